@@ -85,6 +85,8 @@ def startServer(def ontologyArg, def port) {
     context.addServlet(new ServletHolder(new GroovyServlet()), '/health.groovy')
     context.addServlet(new ServletHolder(new GroovyServlet()), '/api/health.groovy')
     context.addServlet(new ServletHolder(new GroovyServlet()), '/api/runQuery.groovy')
+    context.addServlet(new ServletHolder(new GroovyServlet()), '/api/getClasses.groovy')
+    context.addServlet(new ServletHolder(new GroovyServlet()), '/api/resolveShortForm.groovy')
     context.addServlet(new ServletHolder(new GroovyServlet()), '/api/reloadOntology.groovy')
     context.addServlet(new ServletHolder(new GroovyServlet()), '/api/findRoot.groovy')
     context.addServlet(new ServletHolder(new GroovyServlet()), '/api/getObjectProperties.groovy')
@@ -101,6 +103,7 @@ def startServer(def ontologyArg, def port) {
     context.addServlet(new ServletHolder(new GroovyServlet()), '/api/addOntology.groovy')
     context.addServlet(new ServletHolder(new GroovyServlet()), '/api/removeOntology.groovy')
     context.addServlet(new ServletHolder(new GroovyServlet()), '/api/listLoadedOntologies.groovy')
+    context.addServlet(new ServletHolder(new GroovyServlet()), '/api/getCacheStats.groovy')
 
     context.setAttribute('port', port)
     context.setAttribute('version', '0.2')
@@ -121,6 +124,24 @@ def startServer(def ontologyArg, def port) {
     // Create the multi-ontology RequestManager
     def manager = new RequestManager()
 
+    // With TAXONOMY_SNAPSHOT_DIR set, ontologies whose OWL file is unchanged
+    // since their last classification are served from the persisted
+    // taxonomy right away; the manager is published before the (slow) load
+    // and classification below, which then replaces the snapshot.
+    // TAXONOMY_SNAPSHOT_GRACE_S holds that load back for a while, e.g. to
+    // stagger re-classification when many workers restart at once.
+    def restoreSnapshots = { List<List> entries ->
+        if (manager.taxonomySnapshotDir == null) return
+        int restored = entries.count { e -> manager.restoreTaxonomySnapshot(e[0], e[1], e[2]) }
+        println "Restored ${restored}/${entries.size()} ontologies from taxonomy snapshots"
+        context.getServletContext().setAttribute("manager", manager)
+        long grace = (System.getenv("TAXONOMY_SNAPSHOT_GRACE_S") ?: "0") as long
+        if (restored > 0 && grace > 0) {
+            println "Serving from taxonomy snapshots for ${grace} s before loading ontologies"
+            Thread.sleep(grace * 1000L)
+        }
+    }
+
     def ontologyFile = new File(ontologyArg)
 
     if (ontologyFile.isDirectory()) {
@@ -130,6 +151,9 @@ def startServer(def ontologyArg, def port) {
         if (owlFiles == null || owlFiles.length == 0) {
             println "WARNING: No .owl files found in ${ontologyFile.absolutePath}"
         } else {
+            restoreSnapshots(owlFiles.collect { owlFile ->
+                [owlFile.name.replaceAll(/\.owl$/, '').replaceAll(/_active$/, ''), owlFile.absolutePath, "elk"]
+            })
             owlFiles.each { owlFile ->
                 def ontId = owlFile.name.replaceAll(/\.owl$/, '').replaceAll(/_active$/, '')
                 try {
@@ -148,6 +172,7 @@ def startServer(def ontologyArg, def port) {
         // Multi-ontology mode: JSON config file
         println "Multi-ontology mode: reading config from ${ontologyArg}"
         def config = new JsonSlurper().parse(new File(ontologyArg))
+        restoreSnapshots(config.collect { entry -> [entry.id, entry.path, entry.reasoner ?: "elk"] })
         config.each { entry ->
             def ontId = entry.id
             def ontPath = entry.path
@@ -178,6 +203,10 @@ def startServer(def ontologyArg, def port) {
             println "Verified: Ontology file exists at path: ${ontologyArg}"
         }
 
+        if (ontologyFile.exists()) {
+            restoreSnapshots([[ontId, ontologyArg, reasonerType]])
+        }
+
         println "Loading ontology: ${ontId} from ${ontologyArg} with reasoner: ${reasonerType}"
         try {
             manager.loadOntology(ontId, ontologyArg, reasonerType)
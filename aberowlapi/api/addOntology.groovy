@@ -13,7 +13,9 @@
 import groovy.json.*
 import src.util.Util
 import src.RequestManager
+import java.util.concurrent.Callable
 import java.util.concurrent.ConcurrentHashMap
+import java.util.concurrent.RejectedExecutionException
 
 def params = Util.extractParams(request)
 def ontologyId   = params.ontologyId
@@ -68,10 +70,9 @@ synchronized (application) {
 }
 def updateTasks = application.getAttribute("updateTasks")
 def taskId = "add_${UUID.randomUUID()}"
-updateTasks[taskId] = [status: 'pending', started: new Date().toString()]
 
-// Load in background
-Thread.start {
+// Load in background on the classification pool; a saturated pool is a 503.
+def load = {
     def finalStatus = 'failed'
     def message = ''
     try {
@@ -87,6 +88,18 @@ Thread.start {
         try { manager.disposeOntology(ontologyId) } catch (Exception ex) {}
     }
     updateTasks[taskId] = [status: finalStatus, message: message, completed: new Date().toString()]
+    return null
+}
+
+try {
+    updateTasks[taskId] = [status: 'pending', started: new Date().toString()]
+    manager.classificationPool.submit(load as Callable)
+} catch (RejectedExecutionException e) {
+    updateTasks.remove(taskId)
+    response.setStatus(503)
+    response.setHeader('Retry-After', '60')
+    println new JsonBuilder([status: 'error', message: e.getMessage()])
+    return
 }
 
 println new JsonBuilder([status: 'accepted', taskId: taskId, ontologyId: ontologyId])
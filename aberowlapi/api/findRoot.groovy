@@ -1,4 +1,13 @@
-// Find root classes in the hierarchy
+// Find the place of a class in the hierarchy, for the browser.
+//
+// GET ?query=<iri>&ontologyId=go[&depth=n][&axioms=false][&shortform=iri]
+// Answers
+//   {"result": [top-level classes, ancestors carrying "children"],
+//    "paths": [[iri, ...], ...], "truncated": bool}
+// from the worker's hierarchy snapshot in one pass (see
+// RequestManager.findRoot): every ancestor, not just the first parent, and
+// the siblings of ancestors up to `depth` levels above the class (default:
+// all levels). Class info carries axioms unless axioms=false.
 
 import src.util.Util
 import groovy.json.*
@@ -11,10 +20,11 @@ def params = Util.extractParams(request)
 
 def query = params.query
 def ontologyId = params.ontologyId ?: params.ontology
+def depth = params.depth
+def axioms = params.axioms
+def shortform = params.shortform
 def manager = application.getAttribute("manager")
 
-def owlThing = '<http://www.w3.org/2002/07/owl#Thing>'
-
 if (!manager) {
     response.setStatus(503)
     print('{"result": [], "error": "Manager not available"}')
@@ -36,51 +46,29 @@ if (!manager.hasOntology(ontologyId)) {
     return
 }
 
+try {
+    depth = (depth != null && depth.toString().trim()) ? Math.max(0, depth.toString().trim() as int) : Integer.MAX_VALUE
+} catch (NumberFormatException e) {
+    response.setStatus(400)
+    print(new JsonBuilder(["result": [], "error": "depth must be an integer"]).toString())
+    return
+}
+axioms = !(axioms == false || axioms == 'false')
+
 if(query) {
     query = java.net.URLDecoder.decode(query, "UTF-8")
-
-    // find superclasses
-    def supers = [query]
-    def visited = new HashSet()
-    visited.add(query)
-    int it = 0
-    while(it < supers.size()) {
-	    q = supers[it]
-	    parents = manager.runQuery(ontologyId, q, 'superclass', true, false, true).toArray()
-	    if (parents.size() == 0 || parents[0].owlClass.equals(owlThing)) {
-	        break
-	    }
-	    def parent = parents[0].owlClass
-	    if (visited.contains(parent)) {
-	        break // Cycle detected
-	    }
-	    supers.add(parent)
-	    visited.add(parent)
-	    it++
-	    if (it > 100) break // Safety limit
-    }
-
-    supers = supers.reverse()
-
-    // expand children
-    def result = manager.runQuery(ontologyId, owlThing, 'subclass', true, false, true).toArray()
-    def classes = result
-    def classlabels;
-    it = 0
-    for (int i = 0; i < supers.size(); i++) {
-	    for (int j = 0; j < classes.size(); j++) {
-	        if (classes[j].owlClass.equals(supers[i])) {
-		        def children = manager.runQuery(
-		            ontologyId, classes[j].owlClass, 'subclass', true, false, true).toArray()
-		        classes[j]["children"] = children
-		        classes = children
-		        break
-	        }
-	    }
-    }
-
     response.contentType = 'application/json'
-    print(new JsonBuilder(["result": result]).toString())
+    try {
+        print(new JsonBuilder(manager.findRoot(ontologyId, query, depth, axioms, shortform)).toString())
+    } catch(IllegalStateException e) {
+        // Served from its taxonomy snapshot until classification finishes.
+        response.setStatus(503)
+        response.setHeader('Retry-After', '30')
+        print(new JsonBuilder(["result": [], "error": e.getMessage()]).toString())
+    } catch(IllegalArgumentException e) {
+        response.setStatus(404)
+        print(new JsonBuilder(["result": [], "error": e.getMessage()]).toString())
+    }
 } else {
   print('{"result": []}')
 }
@@ -0,0 +1,34 @@
+/**
+ * getCacheStats.groovy
+ *
+ * Return DL query result cache counters for this container: entry count,
+ * estimated bytes, hits, misses, hit rate, evictions and expirations, plus a
+ * per-ontology breakdown and the configured limits. `classInfoCache` reports
+ * the rendered class info store the same way (entries, bytes against its
+ * budget, hits, misses, records rejected for lack of budget). `pools` has
+ * the query and classification executors: threads, active, queued against
+ * the queue limit, completed and rejected tasks. `queryFlights` counts
+ * runQuery calls that started a computation and those that joined an
+ * identical one already in flight.
+ */
+
+import groovy.json.*
+
+if(!application) {
+    application = request.getApplication(true)
+}
+
+def manager = application.getAttribute("manager")
+response.contentType = 'application/json'
+
+if (manager == null) {
+    response.setStatus(503)
+    print new JsonBuilder([status: 'error', message: 'Manager not available']).toString()
+    return
+}
+
+print new JsonBuilder([status: 'ok', queryCache: manager.queryCache.stats(),
+                       classInfoCache: manager.classInfoCache.stats(),
+                       queryFlights: manager.queryFlights.stats(),
+                       pools: [query: manager.queryPool.stats(),
+                               classification: manager.classificationPool.stats()]]).toString()
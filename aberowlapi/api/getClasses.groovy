@@ -0,0 +1,76 @@
+// Look up many classes of one ontology by IRI in a single call.
+//
+// POST {"ontologyId": "go", "iris": ["http://...", ...], "axioms": true}
+// (GET with iris=comma-separated also works). Answers
+//   {"found": {iri: info}, "missing": [iri, ...], "time": ms}
+// Replaces one runQuery.groovy round-trip (or two) per IRI when the central
+// server's /api/getClasses has IRIs that are not in the class index. At most
+// CLASS_BATCH_MAX_IRIS (default 1000) IRIs per call.
+
+import groovy.json.*
+import src.util.Util
+
+if(!application) {
+    application = request.getApplication(true)
+}
+
+def params = Util.extractParams(request)
+
+def ontologyId = params.ontologyId ?: params.ontology
+def iris = params.iris
+def axioms = params.axioms
+def shortform = params.shortform
+def manager = application.getAttribute("manager")
+def maxIris = (System.getenv('CLASS_BATCH_MAX_IRIS') ?: '1000') as int
+
+if (iris instanceof String) {
+    iris = iris.split(',')
+}
+iris = new LinkedHashSet<String>((iris ?: []).collect { it.toString().trim() }.findAll { it })
+axioms = (axioms == true || axioms == 'true')
+
+response.contentType = 'application/json'
+
+if (manager == null) {
+    response.setStatus(503)
+    print new JsonBuilder([ 'error': true, 'message': 'Manager not available.' ]).toString()
+    return
+}
+
+if (!ontologyId && manager.ontologies.size() == 1) {
+    ontologyId = manager.getDefaultOntologyId()
+} else if (!ontologyId) {
+    response.setStatus(400)
+    print new JsonBuilder([ 'error': true, 'message': 'ontologyId parameter required (multiple ontologies loaded).' ]).toString()
+    return
+}
+
+if (!manager.hasOntology(ontologyId)) {
+    response.setStatus(404)
+    print new JsonBuilder([ 'error': true, 'message': "Ontology not found: ${ontologyId}" ]).toString()
+    return
+}
+
+if (iris.size() > maxIris) {
+    response.setStatus(400)
+    print new JsonBuilder([ 'error': true, 'message': "At most ${maxIris} IRIs per call (got ${iris.size()})." ]).toString()
+    return
+}
+
+try {
+    def start = System.currentTimeMillis()
+    def out = manager.getClasses(ontologyId, iris, axioms, shortform)
+    out.put('time', System.currentTimeMillis() - start)
+    print new JsonBuilder(out).toString()
+} catch(IllegalStateException e) {
+    // Served from its taxonomy snapshot until classification finishes.
+    response.setStatus(503)
+    response.setHeader('Retry-After', '30')
+    print new JsonBuilder([ 'error': true, 'message': e.getMessage() ]).toString()
+} catch(IllegalArgumentException e) {
+    response.setStatus(404)
+    print new JsonBuilder([ 'error': true, 'message': e.getMessage() ]).toString()
+} catch(Exception e) {
+    response.setStatus(400)
+    print new JsonBuilder([ 'error': true, 'message': 'Generic query error: ' + e.getMessage() ]).toString()
+}
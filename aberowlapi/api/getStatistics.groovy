@@ -1,26 +1,6 @@
 import groovy.json.JsonOutput
-import groovy.json.JsonSlurper
 import src.RequestManager
-import org.semanticweb.owlapi.model.OWLOntology
-import org.semanticweb.owlapi.model.AxiomType
-import org.semanticweb.owlapi.model.parameters.Imports
-import org.semanticweb.owlapi.util.DLExpressivityChecker
-import org.semanticweb.owlapi.metrics.*
-import java.util.Collections
-import org.semanticweb.owlapi.vocab.DublinCoreVocabulary
-import org.semanticweb.owlapi.vocab.OWLRDFVocabulary
-import org.semanticweb.owlapi.model.OWLAnnotation
-import org.semanticweb.owlapi.model.OWLLiteral
-import org.semanticweb.owlapi.model.IRI
-import org.semanticweb.owlapi.model.OWLClass
-import org.semanticweb.owlapi.model.OWLAnnotationAssertionAxiom
-import org.semanticweb.owlapi.model.OWLObjectIntersectionOf
-import org.semanticweb.owlapi.model.OWLEquivalentClassesAxiom
-import org.semanticweb.owlapi.model.OWLClassExpression
-import uk.ac.manchester.cs.owl.owlapi.mansyntaxrenderer.ManchesterOWLSyntaxObjectRenderer
-import src.NewShortFormProvider
 import src.util.Util
-import java.io.StringWriter
 
 if(!application) {
     application = request.getApplication(true)
@@ -57,189 +37,27 @@ if (!manager.hasOntology(ontologyId)) {
     return
 }
 
-OWLOntology ontology = manager.getOntology(ontologyId)
+def stats = manager.getStatistics(ontologyId)
 
-if (ontology == null) {
+if (stats == null) {
     response.setStatus(503)
     out << JsonOutput.toJson([status: "error", message: "OWLOntology object not available."])
     return
 }
 
-def annotations = ontology.getAnnotations()
-def title = ""
-def description = ""
-def versionInfo = ""
-def versionIRI = ""
-def license = ""
-def defaultNamespace = ""
-def oboFormatVersion = ""
-def homePage = ""
-def documentation = ""
-def publication = ""
-def creators = []
-def licenseIRI = IRI.create("http://purl.org/dc/terms/license")
-def homePageIRI = IRI.create("http://xmlns.com/foaf/0.1/homepage")
-def publicationIRI = IRI.create("http://purl.org/dc/terms/bibliographicCitation")
-def creatorIRI = IRI.create("http://purl.org/dc/terms/creator")
-def defaultNamespaceIRI = IRI.create("http://www.geneontology.org/formats/oboInOwl#default-namespace")
-def oboFormatVersionIRI = IRI.create("http://www.geneontology.org/formats/oboInOwl#hasOBOFormatVersion")
-
-// Additional annotation IRIs to check
-def dctermsTitleIRI = IRI.create("http://purl.org/dc/terms/title")
-def dctermsDescIRI = IRI.create("http://purl.org/dc/terms/description")
-def rdfsLabelIRI = OWLRDFVocabulary.RDFS_LABEL.getIRI()
-def rdfsCommentIRI = OWLRDFVocabulary.RDFS_COMMENT.getIRI()
-
-for (OWLAnnotation annotation : annotations) {
-    def propertyIRI = annotation.getProperty().getIRI()
-    def value = annotation.getValue()
-
-    if (propertyIRI.equals(DublinCoreVocabulary.TITLE.getIRI()) || propertyIRI.equals(dctermsTitleIRI)) {
-        if (value instanceof OWLLiteral) {
-            title = ((OWLLiteral) value).getLiteral()
-        }
-    } else if (propertyIRI.equals(rdfsLabelIRI) && !title) {
-        // Use rdfs:label as fallback for title if dc:title/dcterms:title not found
-        if (value instanceof OWLLiteral) {
-            title = ((OWLLiteral) value).getLiteral()
-        }
-    } else if (propertyIRI.equals(DublinCoreVocabulary.DESCRIPTION.getIRI()) || propertyIRI.equals(dctermsDescIRI)) {
-        if (value instanceof OWLLiteral) {
-            description = ((OWLLiteral) value).getLiteral()
-        }
-    } else if (propertyIRI.equals(rdfsCommentIRI) && !description) {
-        // Use rdfs:comment as fallback description
-        if (value instanceof OWLLiteral) {
-            description = ((OWLLiteral) value).getLiteral()
-        }
-    } else if (propertyIRI.equals(OWLRDFVocabulary.OWL_VERSION_INFO.getIRI())) {
-        if (value instanceof OWLLiteral) {
-            versionInfo = ((OWLLiteral) value).getLiteral()
-        }
-    } else if (propertyIRI.equals(OWLRDFVocabulary.OWL_VERSION_IRI.getIRI())) {
-        if (value instanceof IRI) {
-            versionIRI = value.toString()
-        }
-    } else if (propertyIRI.equals(licenseIRI)) {
-        if (value instanceof IRI) {
-            license = value.toString()
-        } else if (value instanceof OWLLiteral) {
-            license = ((OWLLiteral) value).getLiteral()
-        }
-    } else if (propertyIRI.equals(defaultNamespaceIRI)) {
-        if (value instanceof OWLLiteral) {
-            defaultNamespace = ((OWLLiteral) value).getLiteral()
-        }
-    } else if (propertyIRI.equals(oboFormatVersionIRI)) {
-        if (value instanceof OWLLiteral) {
-            oboFormatVersion = ((OWLLiteral) value).getLiteral()
-        }
-    } else if (propertyIRI.equals(homePageIRI)) {
-        if (value instanceof IRI) {
-            homePage = value.toString()
-        }
-    } else if (propertyIRI.equals(OWLRDFVocabulary.RDFS_SEE_ALSO.getIRI())) {
-        if (value instanceof IRI) {
-            documentation = value.toString()
-        } else if (value instanceof OWLLiteral) {
-            documentation = ((OWLLiteral) value).getLiteral()
-        }
-    } else if (propertyIRI.equals(publicationIRI)) {
-        if (value instanceof OWLLiteral) {
-            publication = ((OWLLiteral) value).getLiteral()
-        }
-    } else if (propertyIRI.equals(creatorIRI)) {
-        if (value instanceof OWLLiteral) {
-            creators.add(((OWLLiteral) value).getLiteral())
-        }
-    }
+// The payload only changes when the ontology is reclassified or its status
+// or metadata.json changes, so pollers revalidate with If-None-Match and
+// get an empty 304 in the common case.
+response.setHeader("ETag", stats.etag)
+def ifNoneMatch = request.getHeader("If-None-Match")
+if (ifNoneMatch && ifNoneMatch.split(",").any { it.trim().replaceFirst(/^W\//, "") == stats.etag || it.trim() == "*" }) {
+    response.setStatus(304)
+    return
 }
 
-// Fallback to companion metadata.json (produced by deploy/fetch_metadata.py)
-// Many BioPortal ontologies — and some OBO ones — have no dc:title /
-// rdfs:label / dcterms:title annotation on the owl:Ontology element, so
-// the loop above leaves title/description/homepage/etc. empty. Sibling
-// metadata.json sourced from the OBO Foundry registry or BioPortal API
-// provides those fields.
-try {
-    def ontPath = manager.ontologyPaths?.get(ontologyId)
-    if (ontPath) {
-        def metaFile = new File(new File(ontPath).getParent(), "metadata.json")
-        if (metaFile.exists()) {
-            def meta = new JsonSlurper().parse(metaFile)
-            if (!title && meta.title) title = meta.title
-            if (!description && meta.description) description = meta.description
-            if (!homePage && meta.home_page) homePage = meta.home_page
-            if (!documentation && meta.documentation) documentation = meta.documentation
-            if (!license && meta.license) license = meta.license
-            if (!publication && meta.publication) publication = meta.publication
-            if (!versionIRI && meta.version_iri) versionIRI = meta.version_iri
-            if (creators.isEmpty() && meta.creators) creators.addAll(meta.creators)
-        }
-    }
-} catch (Exception ignored) {
-    // Non-fatal: fall back to whatever the OWL file gave us.
+if (params.statusOnly?.toString()?.toLowerCase() in ["true", "1", "yes"]) {
+    out << JsonOutput.toJson(stats.summary + [etag: stats.etag])
+    return
 }
 
-def classCount = ontology.getClassesInSignature(true).size()
-def objectPropertyCount = ontology.getObjectPropertiesInSignature(true).size()
-def dataPropertyCount = ontology.getDataPropertiesInSignature(true).size()
-def annotationPropertyCount = ontology.getAnnotationPropertiesInSignature(true).size()
-def individualCount = ontology.getIndividualsInSignature(true).size()
-def propertyCount = objectPropertyCount + dataPropertyCount + annotationPropertyCount
-
-def axiomCount = ontology.getAxiomCount(true)
-def logicalAxiomCount = ontology.getLogicalAxiomCount(true)
-
-def tboxAxiomsCount = ontology.getTBoxAxioms(Imports.INCLUDED).size()
-def aboxAxiomsCount = ontology.getABoxAxioms(Imports.INCLUDED).size()
-def rboxAxiomsCount = ontology.getRBoxAxioms(Imports.INCLUDED).size()
-
-def declarationAxiomsCount = ontology.getAxioms(AxiomType.DECLARATION, true).size()
-
-// Report a canonical DL name (e.g. "ALC", "ALCHIQ") instead of a raw
-// concatenation of construct letters, which produced garbled strings like
-// "CCINTERI". expressibleInLanguages() maps the constructs onto the standard
-// DL family names; fall back to the construct list when no named language fits.
-def checker = new DLExpressivityChecker(Collections.singleton(ontology))
-def expressibleLangs = checker.expressibleInLanguages()
-def dlExpressivity = expressibleLangs ? expressibleLangs.collect { it.toString() }.join(", ") : checker.getDescriptionLogicName()
-
-def exampleSuperclassLabel = manager.exampleSuperclassLabels.get(ontologyId) ?: ""
-def exampleSubclassExpression = manager.exampleSubclassExpressions.get(ontologyId) ?: ""
-def exampleSubclassExpressionText = manager.exampleSubclassExpressionTexts.get(ontologyId) ?: ""
-
-def result = [
-    "ontology_id": ontologyId,
-    "reasoner_type": manager.reasonerTypes.get(ontologyId) ?: "unknown",
-    "status": manager.getStatus(ontologyId) ?: "unknown",
-    "title": title,
-    "description": description,
-    "version_info": versionInfo,
-    "version_iri": versionIRI,
-    "license": license,
-    "default_namespace": defaultNamespace,
-    "obo_format_version": oboFormatVersion,
-    "home_page": homePage,
-    "documentation": documentation,
-    "publication": publication,
-    "creators": creators,
-    "exampleSuperclassLabel": exampleSuperclassLabel,
-    "exampleSubclassExpression": exampleSubclassExpression,
-    "exampleSubclassExpressionText": exampleSubclassExpressionText,
-    "dl_expressivity": dlExpressivity,
-    "class_count": classCount,
-    "property_count": propertyCount,
-    "object_property_count": objectPropertyCount,
-    "data_property_count": dataPropertyCount,
-    "annotation_property_count": annotationPropertyCount,
-    "individual_count": individualCount,
-    "axiom_count": axiomCount,
-    "logical_axiom_count": logicalAxiomCount,
-    "tbox_axiom_count": tboxAxiomsCount,
-    "abox_axiom_count": aboxAxiomsCount,
-    "rbox_axiom_count": rboxAxiomsCount,
-    "declaration_axiom_count": declarationAxiomsCount
-]
-
-out << JsonOutput.toJson(result)
+out << stats.json
@@ -2,7 +2,9 @@
  * listLoadedOntologies.groovy
  *
  * Return a list of all ontologies loaded in this container with their status,
- * reasoner type, and class count.
+ * reasoner type, class count, entity lookup and short form index sizes
+ * (entries and estimated bytes) and load footprint (source ontologies and axioms released
+ * after merging the imports closure).
  */
 
 import groovy.json.*
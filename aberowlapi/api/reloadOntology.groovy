@@ -1,6 +1,9 @@
 import groovy.json.*
 import src.util.Util;
 import src.RequestManager;
+import java.util.concurrent.Callable
+import java.util.concurrent.ExecutionException
+import java.util.concurrent.RejectedExecutionException
 
 def params = Util.extractParams(request)
 
@@ -26,8 +29,16 @@ try {
             application.setAttribute("manager", manager)
         }
 
-        // Reload (hot-swap) the specific ontology within the multi-ontology manager
-        manager.reloadOntology(ontologyId, ontIRI, reasonerType)
+        // Reload (hot-swap) the specific ontology within the multi-ontology
+        // manager, on its classification pool
+        try {
+            manager.classificationPool.submit({ ->
+                manager.reloadOntology(ontologyId, ontIRI, reasonerType)
+                return null
+            } as Callable).get()
+        } catch (ExecutionException e) {
+            throw e.getCause()
+        }
         def classCount = manager.getOntology(ontologyId)?.getClassesInSignature(true)?.size() ?: 0
         println(new JsonBuilder([
             'status': 'ok',
@@ -38,6 +49,10 @@ try {
     } else {
         throw new Exception("Not enough parameters! Required: ontologyId, ontologyIRI");
     }
+} catch(RejectedExecutionException e) {
+  response.setStatus(503);
+  response.setHeader('Retry-After', '60')
+  println(new JsonBuilder([ 'status': 'error', 'message': e.getMessage() ]))
 } catch(Exception e) {
   response.setStatus(400);
   println(new JsonBuilder([ 'status': 'error', 'message': e.getMessage() ]))
@@ -0,0 +1,60 @@
+// Resolve a label short form of one ontology to its entities.
+//
+// GET ?ontologyId=pizza&shortForm='deep dish pizza' (quotes optional). Answers
+//   {"entity": iri or null, "entities": [iri, ...], "time": ms}
+// from the short form index of the served generation: `entities` are all
+// entities with that short form in signature order, `entity` is the one a
+// DL query naming it resolves to.
+
+import groovy.json.*
+import src.util.Util
+
+if(!application) {
+    application = request.getApplication(true)
+}
+
+def params = Util.extractParams(request)
+
+def ontologyId = params.ontologyId ?: params.ontology
+def shortForm = params.shortForm
+def manager = application.getAttribute("manager")
+
+response.contentType = 'application/json'
+
+if (manager == null) {
+    response.setStatus(503)
+    print new JsonBuilder([ 'error': true, 'message': 'Manager not available.' ]).toString()
+    return
+}
+
+if (!shortForm) {
+    response.setStatus(400)
+    print new JsonBuilder([ 'error': true, 'message': 'shortForm parameter required.' ]).toString()
+    return
+}
+
+if (!ontologyId && manager.ontologies.size() == 1) {
+    ontologyId = manager.getDefaultOntologyId()
+} else if (!ontologyId) {
+    response.setStatus(400)
+    print new JsonBuilder([ 'error': true, 'message': 'ontologyId parameter required (multiple ontologies loaded).' ]).toString()
+    return
+}
+
+if (!manager.hasOntology(ontologyId)) {
+    response.setStatus(404)
+    print new JsonBuilder([ 'error': true, 'message': "Ontology not found: ${ontologyId}" ]).toString()
+    return
+}
+
+try {
+    def start = System.currentTimeMillis()
+    def results = manager.resolveShortForm(ontologyId, shortForm.toString())
+    results.put('time', System.currentTimeMillis() - start)
+    print new JsonBuilder(results).toString()
+} catch(IllegalArgumentException e) {
+    // Being classified again and served from its taxonomy snapshot.
+    response.setStatus(503)
+    response.setHeader('Retry-After', '30')
+    print new JsonBuilder([ 'error': true, 'message': e.getMessage() ]).toString()
+}
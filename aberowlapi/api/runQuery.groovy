@@ -17,6 +17,9 @@ def axioms = params.axioms
 def ontologyId = params.ontologyId ?: params.ontology
 def ontologyIds = params.ontologyIds  // comma-separated list, optional
 def shortform = params.shortform
+def format = params.format
+def limit = params.limit
+def countOnly = params.count  // "true": return the number of matching classes only
 def manager = application.getAttribute("manager")
 
 if (type == null) {
@@ -26,6 +29,7 @@ if (type == null) {
 direct = (direct != null && direct.equals("true")) ? true : false;
 labels = (labels != null && labels.equals("true")) ? true : false;
 axioms = (axioms != null && axioms.equals("true")) ? true : false;
+countOnly = (countOnly != null && countOnly.equals("true")) ? true : false;
 
 response.contentType = 'application/json'
 
@@ -35,19 +39,94 @@ if (manager == null) {
     return
 }
 
+// Streaming branch: format=ndjson writes one JSON record per line as each
+// class info is built (no whole-result HashMap/JsonBuilder), flushing in
+// batches. The servlet writer blocks while the client is not reading, which
+// is the backpressure. The last line is a trailer:
+//   {"done": true, "count": N, "truncated": bool, "time": ms, "failed": [...]}
+// or {"error": true, "message": ...} if the query failed mid-stream.
+// Records are capped at min(limit, QUERY_STREAM_MAX_RESULTS).
+if (format == 'ndjson') {
+    def maxResults = (System.getenv('QUERY_STREAM_MAX_RESULTS') ?: '100000') as int
+    def cap = (limit && limit.toString().isInteger()) ? Math.min(limit as int, maxResults) : maxResults
+    def ids = ontologyIds ? ontologyIds.split(',').collect { it.trim() }.findAll { it } : []
+    if (!ids) {
+        if (!ontologyId && manager.ontologies.size() == 1) {
+            ontologyId = manager.getDefaultOntologyId()
+        }
+        if (!ontologyId || !manager.hasOntology(ontologyId)) {
+            response.setStatus(ontologyId ? 404 : 400)
+            print new JsonBuilder([ 'error': true, 'message': ontologyId ? "Ontology not found: ${ontologyId}" : 'ontologyId parameter required (multiple ontologies loaded).' ]).toString()
+            return
+        }
+        ids = [ontologyId]
+    }
+
+    response.contentType = 'application/x-ndjson'
+    def writer = response.getWriter()
+    def start = System.currentTimeMillis()
+    def failed = []
+    int count = 0
+    boolean truncated = false
+    try {
+        for (def id : ids) {
+            if (count >= cap) { truncated = true; break }
+            if (!manager.hasOntology(id)) {
+                failed.add([ 'ontology': id, 'message': "Ontology not found: ${id}".toString() ])
+                continue
+            }
+            try {
+                def stats = manager.streamQuery(id, query, type, direct, labels, axioms, shortform, cap - count) { info ->
+                    def record = ontologyIds ? new HashMap(info) + [ 'ontology': id ] : info
+                    writer.write(JsonOutput.toJson(record))
+                    writer.write('\n')
+                    if (++count % 500 == 0) writer.flush()
+                }
+                truncated = truncated || stats.truncated
+            } catch (org.semanticweb.owlapi.manchestersyntax.parser.ManchesterOWLSyntaxParserException e) {
+                // Nothing was written for this ontology yet (parse errors precede results).
+                if (ids.size() == 1 && !response.isCommitted()) {
+                    response.setStatus(400)
+                    writer.write(new JsonBuilder([ 'error': true, 'message': 'Query parsing error: ' + e.getMessage() ]).toString() + '\n')
+                    return
+                }
+                failed.add([ 'ontology': id, 'message': 'Query parsing error: ' + e.getMessage() ])
+            } catch (Exception e) {
+                if (ids.size() == 1) throw e
+                failed.add([ 'ontology': id, 'message': (e.getMessage() ?: e.getClass().getSimpleName()).toString() ])
+            }
+        }
+        writer.write(new JsonBuilder([ 'done': true, 'count': count, 'truncated': truncated,
+                                       'time': System.currentTimeMillis() - start, 'failed': failed ]).toString() + '\n')
+    } catch(Exception e) {
+        if (!response.isCommitted()) response.setStatus(400)
+        writer.write(new JsonBuilder([ 'error': true, 'message': 'Generic query error: ' + e.getMessage() ]).toString() + '\n')
+    }
+    writer.flush()
+    return
+}
+
 // Multi-ontology branch: ontologyIds=a,b,c — run query against each in
 // parallel inside this worker, aggregate. Lets the central server send
-// one HTTP call per worker URL instead of one per ontology.
+// one HTTP call per worker URL instead of one per ontology. Ontologies
+// that are not loaded or whose query failed are listed under `failed`.
 if (ontologyIds) {
     def ids = ontologyIds.split(',').collect { it.trim() }.findAll { it }
     try {
         def results = new HashMap()
+        def failures = new java.util.concurrent.ConcurrentHashMap<String, String>()
         def start = System.currentTimeMillis()
-        def out = manager.runQueryMulti(ids, query, type, direct, labels, axioms, shortform)
+        def out = manager.runQueryMulti(ids, query, type, direct, labels, axioms, shortform, failures)
         def end = System.currentTimeMillis()
         results.put('time', (end - start))
         results.put('result', out)
+        results.put('failed', failures.collect { id, message -> [ 'ontology': id, 'message': message ] })
         print new JsonBuilder(results).toString()
+    } catch(java.util.concurrent.RejectedExecutionException e) {
+        // Query pool saturated: shed load instead of queueing without bound.
+        response.setStatus(503)
+        response.setHeader('Retry-After', '1')
+        print new JsonBuilder([ 'error': true, 'message': e.getMessage() ]).toString()
     } catch(org.semanticweb.owlapi.manchestersyntax.parser.ManchesterOWLSyntaxParserException e) {
         response.setStatus(400)
         print new JsonBuilder([ 'error': true, 'message': 'Query parsing error: ' + e.getMessage() ]).toString()
@@ -76,6 +155,13 @@ if (!manager.hasOntology(ontologyId)) {
 try {
     def results = new HashMap()
     def start = System.currentTimeMillis()
+    if (countOnly) {
+        def n = manager.countQuery(ontologyId, query, type, direct, labels)
+        results.put('time', (System.currentTimeMillis() - start))
+        results.put('count', n)
+        print new JsonBuilder(results).toString()
+        return
+    }
     def out = manager.runQuery(ontologyId, query, type, direct, labels, axioms, shortform)
     def end = System.currentTimeMillis()
     results.put('time', (end - start))
@@ -84,6 +170,11 @@ try {
 } catch(java.lang.IllegalArgumentException e) {
     response.setStatus(400)
     print new JsonBuilder([ 'error': true, 'message': 'Ontology not found.' ]).toString()
+} catch(IllegalStateException e) {
+    // Served from its taxonomy snapshot until classification finishes.
+    response.setStatus(503)
+    response.setHeader('Retry-After', '30')
+    print new JsonBuilder([ 'error': true, 'message': e.getMessage() ]).toString()
 } catch(org.semanticweb.owlapi.manchestersyntax.parser.ManchesterOWLSyntaxParserException e) {
     response.setStatus(400)
     print new JsonBuilder([ 'error': true, 'message': 'Query parsing error: ' + e.getMessage() ]).toString()
@@ -3,7 +3,8 @@
  *
  * Runs IndexElastic.groovy as a subprocess to index an OWL file into
  * Elasticsearch.  Returns immediately with a task ID; poll via
- * updateStatus.groovy.
+ * updateStatus.groovy.  While the indexer runs, the task entry carries
+ * `indexed`, `failed` and `docsPerSec` parsed from its PROGRESS lines.
  *
  * POST parameters (JSON body or query string):
  *   owlPath          - path to OWL file inside container (must start with /data/)
@@ -13,6 +14,10 @@
  *   name             - display name (optional, defaults to ontologyId)
  *   description      - description (optional)
  *   freshIndex       - "true" to skip deleteOntologyData (writing to a new index)
+ *                      and to bulk-load with refresh and replicas disabled
+ *   bulkActions      - documents per bulk request (optional, default 1000)
+ *   bulkMb           - max bulk request size in MB (optional, default 5)
+ *   bulkConcurrency  - concurrent in-flight bulk requests (optional, default 2)
  *   secretKey        - must match ABEROWL_SECRET_KEY env var
  */
 
@@ -29,6 +34,11 @@ def name              = params.name ?: ontologyId
 def description       = params.description ?: ""
 def freshIndex        = (params.freshIndex == 'true') ? 'True' : 'False'
 def secretKey         = params.secretKey
+def bulkEnv = [
+    INDEX_BULK_ACTIONS:     params.bulkActions,
+    INDEX_BULK_MB:          params.bulkMb,
+    INDEX_BULK_CONCURRENCY: params.bulkConcurrency,
+].findAll { k, v -> v && v.toString().isInteger() }
 
 response.contentType = 'application/json'
 
@@ -65,7 +75,8 @@ synchronized (application) {
 }
 def updateTasks = application.getAttribute("updateTasks")
 def taskId = "idx_${UUID.randomUUID()}"
-updateTasks[taskId] = [status: 'pending', started: new Date().toString()]
+def started = new Date().toString()
+updateTasks[taskId] = [status: 'pending', started: started]
 
 // ---- Resolve ES connection params from environment ----------------------
 def esUrl  = System.getenv("CENTRAL_ES_URL") ?: System.getenv("ELASTICSEARCH_URL") ?: "http://elasticsearch:9200"
@@ -76,6 +87,7 @@ def esPass = System.getenv("ES_PASSWORD") ?: ""
 Thread.start {
     def finalStatus = 'failed'
     def message = ''
+    def progress = [:]
     try {
         def jsonInput = new JsonBuilder([
             acronym:     ontologyId,
@@ -97,27 +109,45 @@ Thread.start {
 
         def pb = new ProcessBuilder(cmd)
         pb.redirectErrorStream(true)   // merge stderr into stdout
+        bulkEnv.each { k, v -> pb.environment().put(k, v.toString()) }
         def proc = pb.start()
 
         // Write JSON metadata to stdin of IndexElastic.groovy
         proc.outputStream.withWriter('UTF-8') { it.write(jsonInput) }
         proc.outputStream.close()
 
-        def output = proc.inputStream.text
+        // Stream the indexer's output: publish PROGRESS lines to the task
+        // registry as they arrive, keep only a short tail for error reports.
+        def tail = new LinkedList<String>()
+        proc.inputStream.eachLine('UTF-8') { line ->
+            def m = (line =~ /^PROGRESS indexed=(\d+) failed=(\d+) docsPerSec=([\d.]+)/)
+            if (m.find()) {
+                progress = [
+                    indexed:    m.group(1) as long,
+                    failed:     m.group(2) as long,
+                    docsPerSec: m.group(3) as double,
+                ]
+                updateTasks[taskId] = [status: 'pending', started: started] + progress
+            }
+            tail.add(line)
+            if (tail.size() > 20) {
+                tail.removeFirst()
+            }
+        }
         proc.waitFor()
 
         if (proc.exitValue() == 0) {
             finalStatus = 'success'
             message = "Indexing completed for ${ontologyId} into ${classIndexName}"
         } else {
-            message = "Indexer exited ${proc.exitValue()}: ${output?.take(500)}"
+            message = "Indexer exited ${proc.exitValue()}: ${tail.join('\n').takeRight(500)}"
         }
     } catch (Exception e) {
         message = e.getMessage() ?: e.getClass().getName()
         e.printStackTrace()
     }
 
-    updateTasks[taskId] = [status: finalStatus, message: message, completed: new Date().toString()]
+    updateTasks[taskId] = [status: finalStatus, message: message, completed: new Date().toString()] + progress
 }
 
 println new JsonBuilder([status: 'accepted', taskId: taskId])
@@ -16,7 +16,9 @@
 import groovy.json.*
 import src.util.Util
 import src.RequestManager
+import java.util.concurrent.Callable
 import java.util.concurrent.ConcurrentHashMap
+import java.util.concurrent.RejectedExecutionException
 
 def params = Util.extractParams(request)
 def owlPath      = params.owlPath
@@ -60,22 +62,25 @@ synchronized (application) {
     }
 }
 def updateTasks = application.getAttribute("updateTasks")
-updateTasks[taskId] = [status: 'pending', started: new Date().toString()]
 
-def manager = application.getAttribute("manager")
-def servletContext = application
+def manager
+synchronized (application) {
+    manager = application.getAttribute("manager")
+    if (manager == null) {
+        manager = new RequestManager()
+        application.setAttribute("manager", manager)
+    }
+}
 
 // ---- Background hot-swap -------------------------------------------------
-Thread.start {
+// Runs on the manager's classification pool, so concurrent updates cannot
+// take threads from interactive queries; a saturated pool is a 503.
+def swap = {
     def finalStatus = 'failed'
     def message = ''
     try {
-        if (manager == null) {
-            manager = new RequestManager()
-            servletContext.setAttribute("manager", manager)
-        }
-
-        // Reload the specific ontology (disposes old, loads new, classifies)
+        // Stage and classify the new version next to the served one, swap it
+        // in, then dispose the old one once its queries have drained
         manager.reloadOntology(ontologyId, owlPath, reasonerType)
 
         def classCount = manager.getOntology(ontologyId)?.getClassesInSignature(true)?.size() ?: 0
@@ -110,6 +115,18 @@ Thread.start {
             println "WARNING: callback to ${callbackUrl} failed: ${e.getMessage()}"
         }
     }
+    return null
+}
+
+try {
+    updateTasks[taskId] = [status: 'pending', started: new Date().toString()]
+    manager.classificationPool.submit(swap as Callable)
+} catch (RejectedExecutionException e) {
+    updateTasks.remove(taskId)
+    response.setStatus(503)
+    response.setHeader('Retry-After', '60')
+    println new JsonBuilder([status: 'error', message: e.getMessage()])
+    return
 }
 
 println new JsonBuilder([status: 'accepted', taskId: taskId, ontologyId: ontologyId])
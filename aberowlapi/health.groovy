@@ -15,9 +15,11 @@ if (manager == null) {
 
 def ontologies = manager.listOntologies()
 def classified = ontologies.findAll { it.status == 'classified' || it.status == 'incoherent' }
+def snapshotServing = ontologies.findAll { it.serving == 'snapshot-serving' }
 
 print new JsonBuilder([
-    status: classified.size() > 0 ? 'ok' : 'loading',
+    status: (classified.size() > 0 || snapshotServing.size() > 0) ? 'ok' : 'loading',
     totalLoaded: ontologies.size(),
-    totalClassified: classified.size()
+    totalClassified: classified.size(),
+    totalSnapshotServing: snapshotServing.size()
 ]).toString()
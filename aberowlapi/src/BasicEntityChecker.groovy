@@ -7,11 +7,18 @@ import org.semanticweb.owlapi.search.EntitySearcher
 public class BasicEntityChecker implements OWLEntityChecker {
    private final OWLDataFactory dFactory;
    private final OWLOntology ontology;
+   // Optional pre-built name index; when null, fall back to scanning the signature.
+   private final EntityLookupIndex lookupIndex;
 
 
     public BasicEntityChecker(OWLDataFactory dFactory, OWLOntology ontology) {
+        this(dFactory, ontology, null);
+    }
+
+    public BasicEntityChecker(OWLDataFactory dFactory, OWLOntology ontology, EntityLookupIndex lookupIndex) {
         this.dFactory = dFactory;
         this.ontology = ontology;
+        this.lookupIndex = lookupIndex;
     }
 
     @Override
@@ -31,6 +38,10 @@ public class BasicEntityChecker implements OWLEntityChecker {
           result = dFactory.getOWLClass(iri)
         }
         
+        if (result == null && lookupIndex != null) {
+            return lookupIndex.getOWLClass(name)
+        }
+
         // If we couldn't find the class by direct IRI lookup, try to find it by label
         if (result == null) {
             // Try to find a class with a label that matches when underscores are replaced with spaces
@@ -135,6 +146,9 @@ public class BasicEntityChecker implements OWLEntityChecker {
         if(ontology.containsDataPropertyInSignature(iri, true) || iri == dFactory.getOWLTopDataProperty().getIRI() || iri == dFactory.getOWLBottomDataProperty().getIRI()) {
           result = dFactory.getOWLDataProperty(iri)
         }
+        if (result == null && lookupIndex != null) {
+            result = lookupIndex.getOWLDataProperty(name)
+        }
         return result
     }
 
@@ -175,6 +189,9 @@ public class BasicEntityChecker implements OWLEntityChecker {
         if(ontology.containsIndividualInSignature(iri, true)) {
           result = dFactory.getOWLNamedIndividual(iri)
         }
+        if (result == null && lookupIndex != null) {
+            result = lookupIndex.getOWLIndividual(name)
+        }
         return result
     }
 
@@ -196,6 +213,10 @@ public class BasicEntityChecker implements OWLEntityChecker {
           result = dFactory.getOWLObjectProperty(iri)
         }
 
+        if (result == null && lookupIndex != null) {
+            return lookupIndex.getOWLObjectProperty(name)
+        }
+
         // Fallback: resolve by fragment / rdfs:label (mirrors getOWLClass).
         if (result == null) {
             for (OWLObjectProperty prop : ontology.getObjectPropertiesInSignature(true)) {
@@ -0,0 +1,250 @@
+package src
+
+import java.util.concurrent.*
+import java.util.concurrent.atomic.*
+import java.util.function.BiFunction
+
+import com.google.common.collect.Interner
+import com.google.common.collect.Interners
+import org.semanticweb.owlapi.model.OWLEntity
+
+/**
+ * Per-ontology store of rendered class info, i.e. the maps built by
+ * RequestManager.toInfo.
+ *
+ * Building one of those maps walks every annotation assertion of the class
+ * and, with axioms=true, renders its Manchester axioms. Hierarchy browsing
+ * asks for the same classes over and over, so each rendered map is kept
+ * here as a compact Record (interned strings in parallel arrays, no Groovy
+ * maps) and queries only assemble a fresh map from it.
+ *
+ * Records are keyed by entity and short form mode ("label" or "iri"). A
+ * record built with axioms also serves axioms=false requests; one built
+ * without is replaced when axioms are asked for. Each ontology's store
+ * belongs to one generation (OntologyGeneration.version): records are only
+ * served to, and only admitted from, renders on that generation, so a
+ * render that was still running on the previous generation during a
+ * hot-swap cannot leave its records behind.
+ *
+ * The store is filled lazily (and eagerly at classification time when
+ * CLASS_INFO_CACHE_PRECOMPUTE=true). Records are admitted until the
+ * estimated size reaches CLASS_INFO_CACHE_MAX_MB (default 256) for the
+ * whole worker; after that, misses are rendered without being cached.
+ * Lookups are lock-free. RequestManager drops an ontology's records when it
+ * is reclassified or disposed (hot-swap), so they never outlive the
+ * short form providers they were rendered with.
+ */
+public class ClassInfoCache {
+    static final List<String> AXIOM_KEYS = ["SubClassOf", "Equivalent", "Disjoint"]
+
+    // Keys every assembled map gets from the entity itself.
+    private static final Set<String> FIXED_KEYS = ["owlClass", "class", "ontology", "deprecated"] as Set
+
+    final long maxBytes
+    final boolean precompute
+
+    private final ConcurrentHashMap<String, Segment> segments = new ConcurrentHashMap<>()
+    private final Interner<String> strings = Interners.newWeakInterner()
+    private final AtomicLong totalBytes = new AtomicLong()
+
+    private final AtomicLong hits = new AtomicLong()
+    private final AtomicLong misses = new AtomicLong()
+    private final AtomicLong rejected = new AtomicLong()
+
+    static final class Record {
+        final boolean deprecated
+        final boolean withAxioms
+        // keys[0 ..< annotationCount] are annotation entries, the rest are
+        // the rendered axiom entries (present only when withAxioms).
+        final String[] keys
+        final Object[] values      // String, Boolean or String[]
+        final int annotationCount
+        final long bytes
+
+        Record(boolean deprecated, boolean withAxioms, String[] keys, Object[] values, int annotationCount, long bytes) {
+            this.deprecated = deprecated
+            this.withAxioms = withAxioms
+            this.keys = keys
+            this.values = values
+            this.annotationCount = annotationCount
+            this.bytes = bytes
+        }
+    }
+
+    private static final class Segment {
+        final long version
+        final ConcurrentHashMap<String, ConcurrentHashMap<OWLEntity, Record>> byMode = new ConcurrentHashMap<>()
+        final AtomicLong bytes = new AtomicLong()
+        volatile boolean dead = false
+
+        Segment(long version) {
+            this.version = version
+        }
+
+        ConcurrentHashMap<OWLEntity, Record> mode(String mode) {
+            return byMode.computeIfAbsent(mode, { k -> new ConcurrentHashMap<OWLEntity, Record>() })
+        }
+    }
+
+    ClassInfoCache(long maxBytes, boolean precompute) {
+        this.maxBytes = maxBytes
+        this.precompute = precompute
+    }
+
+    static ClassInfoCache fromEnvironment() {
+        def mb = System.getenv("CLASS_INFO_CACHE_MAX_MB")
+        def pre = System.getenv("CLASS_INFO_CACHE_PRECOMPUTE")
+        return new ClassInfoCache(
+            ((mb && mb.isLong()) ? mb.toLong() : 256L) * 1024L * 1024L,
+            pre != null && pre.toLowerCase() in ["1", "true", "yes"]
+        )
+    }
+
+    /**
+     * Cached record for the entity as rendered on generation `version`, or
+     * null when absent or when axioms are requested but the record was
+     * built without them.
+     */
+    Record get(String ontId, long version, String mode, OWLEntity entity, boolean axioms) {
+        Segment segment = segments.get(ontId)
+        Record r = (segment != null && segment.version == version) ? segment.byMode.get(mode)?.get(entity) : null
+        if (r == null || (axioms && !r.withAxioms)) {
+            misses.incrementAndGet()
+            return null
+        }
+        hits.incrementAndGet()
+        return r
+    }
+
+    /**
+     * Store the map toInfo just built on generation `version`. Returns
+     * false when the memory budget is exhausted, or a newer generation of
+     * the ontology has been published, and the record was not kept.
+     */
+    boolean put(String ontId, long version, String mode, OWLEntity entity, boolean axioms, Map info) {
+        Record r = encode(info, axioms)
+        if (totalBytes.get() + r.bytes > maxBytes) {
+            rejected.incrementAndGet()
+            return false
+        }
+        Segment segment = segments.compute(ontId, { String k, Segment s ->
+            if (s != null && s.version >= version) return s
+            if (s != null) retire(s)
+            return new Segment(version)
+        } as BiFunction<String, Segment, Segment>)
+        if (segment.version != version) return false
+        Record old = segment.mode(mode).put(entity, r)
+        long delta = r.bytes - (old != null ? old.bytes : 0L)
+        segment.bytes.addAndGet(delta)
+        totalBytes.addAndGet(delta)
+        // Raced with invalidateOntology: the segment is gone, undo our share.
+        if (segment.dead) {
+            totalBytes.addAndGet(-delta)
+        }
+        return true
+    }
+
+    boolean isFull() {
+        return totalBytes.get() >= maxBytes
+    }
+
+    /** Drop the records of `ontId` (disposed). */
+    void invalidateOntology(String ontId) {
+        Segment segment = segments.remove(ontId)
+        if (segment != null) retire(segment)
+    }
+
+    /**
+     * Drop the records of `ontId` and start an empty store for generation
+     * `version`, newly published: renders still finishing on older
+     * generations are no longer admitted.
+     */
+    void invalidateOntology(String ontId, long version) {
+        Segment segment = segments.put(ontId, new Segment(version))
+        if (segment != null) retire(segment)
+    }
+
+    private void retire(Segment segment) {
+        segment.dead = true
+        totalBytes.addAndGet(-segment.bytes.get())
+    }
+
+    /**
+     * A fresh, caller-owned info map for the entity, equivalent to what
+     * toInfo would have built.
+     */
+    static Map assemble(Record r, OWLEntity entity, String ontId, boolean axioms) {
+        def info = new LinkedHashMap<String, Object>(r.keys.length + 6)
+        info.put("owlClass", entity.toString())
+        info.put("class", entity.getIRI().toString())
+        info.put("ontology", ontId)
+        info.put("deprecated", r.deprecated)
+        int n = axioms ? r.keys.length : r.annotationCount
+        for (int i = 0; i < n; i++) {
+            def v = r.values[i]
+            info.put(r.keys[i], v instanceof String[] ? new ArrayList<String>(Arrays.asList((String[]) v)) : v)
+        }
+        return info.withDefault { key -> [] }
+    }
+
+    Map stats() {
+        long h = hits.get()
+        long m = misses.get()
+        return [
+            entries: segments.values().sum { s -> s.byMode.values().sum(0) { it.size() } } ?: 0,
+            estimatedBytes: totalBytes.get(),
+            maxBytes: maxBytes,
+            precompute: precompute,
+            hits: h,
+            misses: m,
+            hitRate: (h + m) > 0 ? (h / (double) (h + m)) : 0.0d,
+            rejected: rejected.get(),
+            ontologies: segments.collectEntries { ontId, s ->
+                [(ontId): [entries: s.byMode.values().sum(0) { it.size() }, estimatedBytes: s.bytes.get()]]
+            }
+        ]
+    }
+
+    private Record encode(Map info, boolean axioms) {
+        List<String> keys = []
+        List<Object> values = []
+        List<String> axiomKeys = []
+        List<Object> axiomValues = []
+        long bytes = 96L
+        info.each { k, v ->
+            String key = k.toString()
+            if (key in FIXED_KEYS) return
+            Object value
+            if (v instanceof Collection) {
+                String[] arr = new String[v.size()]
+                int i = 0
+                for (def item : (Collection) v) {
+                    arr[i++] = strings.intern(item.toString())
+                    bytes += 8L + 40L + 2L * arr[i - 1].length()
+                }
+                bytes += 16L
+                value = arr
+            } else if (v instanceof CharSequence) {
+                value = strings.intern(v.toString())
+                bytes += 40L + 2L * ((String) value).length()
+            } else {
+                value = v
+                bytes += 16L
+            }
+            key = strings.intern(key)
+            bytes += 16L
+            if (axioms && key in AXIOM_KEYS) {
+                axiomKeys << key
+                axiomValues << value
+            } else {
+                keys << key
+                values << value
+            }
+        }
+        int annotationCount = keys.size()
+        keys.addAll(axiomKeys)
+        values.addAll(axiomValues)
+        return new Record(info["deprecated"] as boolean, axioms,
+            keys as String[], values as Object[], annotationCount, bytes)
+    }
+}
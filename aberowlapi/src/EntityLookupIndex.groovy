@@ -0,0 +1,133 @@
+package src
+
+import org.semanticweb.owlapi.model.*
+import org.semanticweb.owlapi.search.EntitySearcher
+
+/**
+ * Normalized name -> entity lookup for one ontology.
+ *
+ * Built once per classification (RequestManager.createReasoner) so that
+ * BasicEntityChecker and QueryParser resolve label-form and fragment-form
+ * names with a hash lookup instead of scanning the whole signature.
+ *
+ * Every IRI fragment and rdfs:label is indexed under two keys:
+ *   - exact:  lowercased, underscores folded to spaces ("Cell_Death" -> "cell death")
+ *   - folded: lowercased, underscores and spaces removed ("Cell_Death" -> "celldeath")
+ * Lookups try the exact key first, then the folded key, which covers the
+ * underscore/space variants the old linear scan compared one by one.
+ *
+ * Immutable after construction; safe to share between request threads.
+ */
+public class EntityLookupIndex {
+    // Rough per-entry cost of a HashMap node plus a String key header,
+    // used only for the memory estimate reported by listLoadedOntologies.
+    private static final int ENTRY_OVERHEAD_BYTES = 32 + 40
+
+    private final Map<String, OWLClass> classes = new HashMap<>()
+    private final Map<String, OWLClass> foldedClasses = new HashMap<>()
+    private final Map<String, OWLObjectProperty> objectProperties = new HashMap<>()
+    private final Map<String, OWLObjectProperty> foldedObjectProperties = new HashMap<>()
+    private final Map<String, OWLDataProperty> dataProperties = new HashMap<>()
+    private final Map<String, OWLDataProperty> foldedDataProperties = new HashMap<>()
+    private final Map<String, OWLNamedIndividual> individuals = new HashMap<>()
+    private final Map<String, OWLNamedIndividual> foldedIndividuals = new HashMap<>()
+
+    private long keyChars = 0
+
+    EntityLookupIndex(OWLOntology ontology) {
+        for (OWLClass c : ontology.getClassesInSignature(true)) {
+            addEntity(ontology, c, classes, foldedClasses)
+        }
+        for (OWLObjectProperty p : ontology.getObjectPropertiesInSignature(true)) {
+            addEntity(ontology, p, objectProperties, foldedObjectProperties)
+        }
+        for (OWLDataProperty p : ontology.getDataPropertiesInSignature(true)) {
+            addEntity(ontology, p, dataProperties, foldedDataProperties)
+        }
+        for (OWLNamedIndividual i : ontology.getIndividualsInSignature(true)) {
+            addEntity(ontology, i, individuals, foldedIndividuals)
+        }
+    }
+
+    /**
+     * Strip the `<...>` and quote wrapping the Manchester parser hands to
+     * OWLEntityChecker, the same way BasicEntityChecker does.
+     */
+    static String unwrap(String name) {
+        name = name.replaceAll("<", "").replaceAll(">", "")
+        if ((name.startsWith("'") && name.endsWith("'")) ||
+            (name.startsWith("\"") && name.endsWith("\""))) {
+            name = name.substring(1, name.length() - 1)
+        }
+        return name
+    }
+
+    static String exactKey(String s) {
+        return s.toLowerCase().replace('_', ' ')
+    }
+
+    static String foldedKey(String s) {
+        return s.toLowerCase().replace("_", "").replace(" ", "")
+    }
+
+    OWLClass getOWLClass(String name) {
+        return lookup(name, classes, foldedClasses)
+    }
+
+    OWLObjectProperty getOWLObjectProperty(String name) {
+        return lookup(name, objectProperties, foldedObjectProperties)
+    }
+
+    OWLDataProperty getOWLDataProperty(String name) {
+        return lookup(name, dataProperties, foldedDataProperties)
+    }
+
+    OWLNamedIndividual getOWLIndividual(String name) {
+        return lookup(name, individuals, foldedIndividuals)
+    }
+
+    /**
+     * Number of distinct keys across all entity types.
+     */
+    int size() {
+        return [classes, foldedClasses, objectProperties, foldedObjectProperties,
+                dataProperties, foldedDataProperties, individuals, foldedIndividuals]
+            .sum { it.size() } as int
+    }
+
+    /**
+     * Approximate heap held by the index: key characters plus map/String
+     * overhead. Entity objects are shared with the ontology and not counted.
+     */
+    long estimatedBytes() {
+        return keyChars * 2L + size() * (long) ENTRY_OVERHEAD_BYTES
+    }
+
+    private <T extends OWLEntity> T lookup(String name, Map<String, T> exact, Map<String, T> folded) {
+        if (name == null) return null
+        name = unwrap(name)
+        if (name.isEmpty()) return null
+        T hit = exact.get(exactKey(name))
+        return hit != null ? hit : folded.get(foldedKey(name))
+    }
+
+    private <T extends OWLEntity> void addEntity(OWLOntology ontology, T entity, Map<String, T> exact, Map<String, T> folded) {
+        String fragment = entity.getIRI().getFragment()
+        if (fragment) {
+            addKey(fragment, entity, exact, folded)
+        }
+        for (OWLAnnotation annotation : EntitySearcher.getAnnotations(entity, ontology)) {
+            if (annotation.getProperty().isLabel() && annotation.getValue() instanceof OWLLiteral) {
+                addKey(((OWLLiteral) annotation.getValue()).getLiteral(), entity, exact, folded)
+            }
+        }
+    }
+
+    // First writer wins, matching the old scan which returned the first hit.
+    private <T extends OWLEntity> void addKey(String name, T entity, Map<String, T> exact, Map<String, T> folded) {
+        String e = exactKey(name)
+        if (exact.putIfAbsent(e, entity) == null) keyChars += e.length()
+        String f = foldedKey(name)
+        if (f && folded.putIfAbsent(f, entity) == null) keyChars += f.length()
+    }
+}
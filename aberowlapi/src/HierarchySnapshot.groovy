@@ -0,0 +1,314 @@
+package src
+
+import org.semanticweb.owlapi.model.*
+import org.semanticweb.owlapi.reasoner.Node
+import org.semanticweb.owlapi.reasoner.OWLReasoner
+
+/**
+ * Inferred class taxonomy of one ontology, materialized once per
+ * classification into integer-indexed CSR arrays.
+ *
+ * Every reasoner Node (a set of equivalent classes) gets an int id. Members
+ * of node i are members[memberOffsets[i] ..< memberOffsets[i+1]]; its direct
+ * parents are parents[parentOffsets[i] ..< parentOffsets[i+1]] and its
+ * direct children likewise in children/childOffsets. The top node (owl:Thing
+ * and its equivalents) and the bottom node (owl:Nothing and unsatisfiable
+ * classes) are included, so flattened answers match what the reasoner's
+ * NodeSets give: direct subclasses of a leaf are the bottom node, transitive
+ * superclasses include the top node.
+ *
+ * RequestManager answers direct/transitive sub-, super- and equivalent-class
+ * queries of named classes, and the ancestor tree of findRoot.groovy, from
+ * here and only goes to the reasoner for complex class expressions.
+ * TaxonomySnapshot persists the arrays so a restarted worker can serve them
+ * before it has classified again.
+ * Immutable after construction.
+ */
+public class HierarchySnapshot {
+    final OWLClass[] members
+    final int[] memberOffsets
+    final int[] parents
+    final int[] parentOffsets
+    final int[] children
+    final int[] childOffsets
+    final int topId
+    final int bottomId
+    private final Map<OWLClass, Integer> nodeOf
+
+    /** Growable int array, to keep the build free of boxed edge lists. */
+    private static final class IntList {
+        int[] data = new int[1024]
+        int size = 0
+
+        void add(int v) {
+            if (size == data.length) data = Arrays.copyOf(data, size * 2)
+            data[size++] = v
+        }
+    }
+
+    HierarchySnapshot(OWLOntology ontology, OWLReasoner reasoner) {
+        nodeOf = new HashMap<>()
+        List<Node<OWLClass>> nodes = new ArrayList<>()
+
+        Closure<Integer> idOf = { Node<OWLClass> node ->
+            Integer id = null
+            for (OWLClass m : node.getEntities()) {
+                id = nodeOf.get(m)
+                if (id != null) break
+            }
+            if (id == null) {
+                id = nodes.size()
+                nodes.add(node)
+                for (OWLClass m : node.getEntities()) nodeOf.put(m, id)
+            }
+            return id
+        }
+
+        topId = idOf(reasoner.getTopClassNode())
+        bottomId = idOf(reasoner.getBottomClassNode())
+        for (OWLClass c : ontology.getClassesInSignature(true)) {
+            if (!nodeOf.containsKey(c)) idOf(reasoner.getEquivalentClasses(c))
+        }
+
+        // (child, parent) edges from the direct superclasses of every node.
+        // Nodes first seen here (classes outside the signature) are appended
+        // to `nodes`, so iterate by index.
+        IntList edgeChild = new IntList()
+        IntList edgeParent = new IntList()
+        for (int i = 0; i < nodes.size(); i++) {
+            if (i == topId || i == bottomId) continue
+            OWLClass rep = nodes.get(i).getRepresentativeElement()
+            boolean any = false
+            for (Node<OWLClass> p : reasoner.getSuperClasses(rep, true).getNodes()) {
+                int pid = idOf(p)
+                if (pid == bottomId || pid == i) continue
+                edgeChild.add(i)
+                edgeParent.add(pid)
+                any = true
+            }
+            if (!any) {
+                edgeChild.add(i)
+                edgeParent.add(topId)
+            }
+        }
+
+        int n = nodes.size()
+        boolean[] hasChild = new boolean[n]
+        for (int e = 0; e < edgeParent.size; e++) hasChild[edgeParent.data[e]] = true
+        for (int i = 0; i < n; i++) {
+            if (i == bottomId || hasChild[i]) continue
+            edgeChild.add(bottomId)
+            edgeParent.add(i)
+        }
+
+        // Member table.
+        memberOffsets = new int[n + 1]
+        for (int i = 0; i < n; i++) memberOffsets[i + 1] = memberOffsets[i] + nodes.get(i).getSize()
+        members = new OWLClass[memberOffsets[n]]
+        for (int i = 0; i < n; i++) {
+            int k = memberOffsets[i]
+            for (OWLClass m : nodes.get(i).getEntities()) members[k++] = m
+        }
+
+        parentOffsets = new int[n + 1]
+        parents = new int[edgeChild.size]
+        csr(edgeChild, edgeParent, parentOffsets, parents)
+        childOffsets = new int[n + 1]
+        children = new int[edgeChild.size]
+        csr(edgeParent, edgeChild, childOffsets, children)
+    }
+
+    /**
+     * Rebuild from arrays taken from an earlier snapshot (see
+     * TaxonomySnapshot); no reasoner involved.
+     */
+    HierarchySnapshot(OWLClass[] members, int[] memberOffsets, int[] parents, int[] parentOffsets,
+                      int[] children, int[] childOffsets, int topId, int bottomId) {
+        this.members = members
+        this.memberOffsets = memberOffsets
+        this.parents = parents
+        this.parentOffsets = parentOffsets
+        this.children = children
+        this.childOffsets = childOffsets
+        this.topId = topId
+        this.bottomId = bottomId
+        nodeOf = new HashMap<>(members.length * 2)
+        for (int i = 0; i + 1 < memberOffsets.length; i++) {
+            for (int k = memberOffsets[i]; k < memberOffsets[i + 1]; k++) nodeOf.put(members[k], i)
+        }
+    }
+
+    // Counting sort of (from, to) edges into offsets/targets indexed by `from`.
+    private static void csr(IntList from, IntList to, int[] offsets, int[] targets) {
+        int n = offsets.length - 1
+        for (int e = 0; e < from.size; e++) offsets[from.data[e] + 1]++
+        for (int i = 0; i < n; i++) offsets[i + 1] += offsets[i]
+        int[] fill = Arrays.copyOf(offsets, n)
+        for (int e = 0; e < from.size; e++) targets[fill[from.data[e]]++] = to.data[e]
+    }
+
+    boolean contains(OWLClass c) {
+        return nodeOf.containsKey(c)
+    }
+
+    int nodeCount() {
+        return memberOffsets.length - 1
+    }
+
+    int edgeCount() {
+        return parents.length
+    }
+
+    Set<OWLClass> equivalentClasses(OWLClass c) {
+        Integer id = nodeOf.get(c)
+        Set<OWLClass> out = new HashSet<>()
+        if (id != null) addMembers(id, out)
+        return out
+    }
+
+    Set<OWLClass> subClasses(OWLClass c, boolean direct) {
+        return related(c, direct, childOffsets, children)
+    }
+
+    Set<OWLClass> superClasses(OWLClass c, boolean direct) {
+        return related(c, direct, parentOffsets, parents)
+    }
+
+    /** Number of named, satisfiable classes strictly below `c` (equivalents excluded). */
+    int descendantCount(OWLClass c) {
+        return countReachable(c, childOffsets, children)
+    }
+
+    /** Number of named classes strictly above `c`, owl:Thing and its equivalents excluded. */
+    int ancestorCount(OWLClass c) {
+        return countReachable(c, parentOffsets, parents)
+    }
+
+    /** Node id of `c`, or -1 when it is not in the taxonomy. */
+    int nodeId(OWLClass c) {
+        Integer id = nodeOf.get(c)
+        return id != null ? id : -1
+    }
+
+    /** Member classes of node `id`. */
+    List<OWLClass> membersOf(int id) {
+        return Arrays.asList(members).subList(memberOffsets[id], memberOffsets[id + 1])
+    }
+
+    /** Direct child node ids of node `id`, the bottom node left out. */
+    int[] childIds(int id) {
+        int[] out = new int[childOffsets[id + 1] - childOffsets[id]]
+        int n = 0
+        for (int k = childOffsets[id]; k < childOffsets[id + 1]; k++) {
+            if (children[k] != bottomId) out[n++] = children[k]
+        }
+        return n == out.length ? out : Arrays.copyOf(out, n)
+    }
+
+    /**
+     * Every ancestor of node `id` mapped to its distance (in edges) down to
+     * `id`, along the shortest route; `id` itself maps to 0 and the top node
+     * is left out. One breadth-first walk up the parent edges.
+     */
+    Map<Integer, Integer> ancestorDepths(int id) {
+        Map<Integer, Integer> depths = new LinkedHashMap<>()
+        depths.put(id, 0)
+        ArrayDeque<Integer> queue = new ArrayDeque<>()
+        queue.add(id)
+        while (!queue.isEmpty()) {
+            int n = queue.poll()
+            int d = depths.get(n)
+            for (int k = parentOffsets[n]; k < parentOffsets[n + 1]; k++) {
+                int p = parents[k]
+                if (p == topId || depths.containsKey(p)) continue
+                depths.put(p, d + 1)
+                queue.add(p)
+            }
+        }
+        return depths
+    }
+
+    /**
+     * Routes from a top-level node (a direct child of the top node) down to
+     * node `id`, each as node ids ending with `id`; at most `max` of them.
+     * The number of routes can grow exponentially with the depth of a DAG,
+     * hence the cap.
+     */
+    List<int[]> pathsTo(int id, int max) {
+        List<int[]> out = new ArrayList<>()
+        if (id != topId && id != bottomId) collectPaths(id, new int[16], 0, out, max)
+        return out
+    }
+
+    // Depth-first up the parent edges; path[0 .. len) holds the nodes from
+    // the start upward.
+    private void collectPaths(int id, int[] path, int len, List<int[]> out, int max) {
+        if (len == path.length) path = Arrays.copyOf(path, len * 2)
+        path[len] = id
+        for (int k = parentOffsets[id]; k < parentOffsets[id + 1] && out.size() < max; k++) {
+            int p = parents[k]
+            if (p == topId) {
+                int[] down = new int[len + 1]
+                for (int i = 0; i <= len; i++) down[i] = path[len - i]
+                out.add(down)
+            } else {
+                collectPaths(p, path, len + 1, out, max)
+            }
+        }
+    }
+
+    /** Rough heap footprint of the arrays (the shared OWLClass objects are not counted). */
+    long estimatedBytes() {
+        return 4L * (memberOffsets.length + parents.length + parentOffsets.length +
+                     children.length + childOffsets.length) +
+               8L * members.length + 48L * nodeOf.size()
+    }
+
+    private Set<OWLClass> related(OWLClass c, boolean direct, int[] offsets, int[] targets) {
+        Integer id = nodeOf.get(c)
+        Set<OWLClass> out = new HashSet<>()
+        if (id == null) return out
+        if (direct) {
+            for (int k = offsets[id]; k < offsets[id + 1]; k++) addMembers(targets[k], out)
+            return out
+        }
+        BitSet seen = walk(id, offsets, targets)
+        for (int i = seen.nextSetBit(0); i >= 0; i = seen.nextSetBit(i + 1)) addMembers(i, out)
+        return out
+    }
+
+    private int countReachable(OWLClass c, int[] offsets, int[] targets) {
+        Integer id = nodeOf.get(c)
+        if (id == null) return 0
+        BitSet seen = walk(id, offsets, targets)
+        int count = 0
+        for (int i = seen.nextSetBit(0); i >= 0; i = seen.nextSetBit(i + 1)) {
+            if (i != topId && i != bottomId) count += memberOffsets[i + 1] - memberOffsets[i]
+        }
+        return count
+    }
+
+    // Nodes reachable from `start` (exclusive) along the given adjacency.
+    private BitSet walk(int start, int[] offsets, int[] targets) {
+        BitSet seen = new BitSet(nodeCount())
+        int[] stack = new int[16]
+        int sp = 0
+        stack[sp++] = start
+        while (sp > 0) {
+            int id = stack[--sp]
+            for (int k = offsets[id]; k < offsets[id + 1]; k++) {
+                int t = targets[k]
+                if (seen.get(t)) continue
+                seen.set(t)
+                if (sp == stack.length) stack = Arrays.copyOf(stack, sp * 2)
+                stack[sp++] = t
+            }
+        }
+        seen.clear(start)
+        return seen
+    }
+
+    private void addMembers(int id, Set<OWLClass> out) {
+        for (int k = memberOffsets[id]; k < memberOffsets[id + 1]; k++) out.add(members[k])
+    }
+}
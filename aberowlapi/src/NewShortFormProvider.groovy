@@ -16,6 +16,7 @@
 
 package src;
 
+import java.util.Arrays;
 import java.util.Collections;
 import java.util.List;
 import java.util.Map;
@@ -39,6 +40,14 @@ import org.semanticweb.owlapi.vocab.OWLRDFVocabulary;
 /**
  * Modified version of the standard short form provider to add quotations around
  *   multi-word label names.
+ *
+ * Short forms are computed once for the whole signature (buildIndex, called
+ * by RequestManager when it classifies the ontology, or on first use) and
+ * kept in both directions: entity -> short form for entities that have an
+ * annotation-derived one, and short form (quotes removed) -> entities. So
+ * getShortForm, getEntity and getEntities are hash lookups instead of a
+ * scan over the signature and its annotation axioms. A new provider is
+ * built for every classification, so a hot-swap gets a fresh index.
  * 
  * @see ShortFormProvider
  * @author OWLAPI, Robert Hoehndorf (leechuck@leechuck.de)
@@ -51,6 +60,19 @@ public class NewShortFormProvider implements BidirectionalShortFormProvider {
     private final Map<OWLAnnotationProperty, List<String>> preferredLanguageMap;
     private final OWLAnnotationValueVisitorEx<String> literalRenderer;
 
+    // Rough per-entry cost of a HashMap node plus a String key header,
+    // used only for the memory estimate reported by listLoadedOntologies.
+    private static final int ENTRY_OVERHEAD_BYTES = 32 + 40;
+
+    // Entity -> short form, only where it comes from an annotation (the
+    // others use the alternate provider, which is cheap).
+    private volatile Map<OWLEntity, String> annotatedShortForms;
+    // Short form without quotes -> OWLEntity, or OWLEntity[] when shared.
+    // Written last by buildIndex, so non-null means the index is complete.
+    private volatile Map<String, Object> entitiesByShortForm;
+    private volatile Set<String> allShortForms;
+    private long keyChars = 0;
+
     /** Constructs an annotation value short form provider. Using
      * {@code SimpleShortFormProvider} as the alternate short form provider
      * 
@@ -197,6 +219,66 @@ public class NewShortFormProvider implements BidirectionalShortFormProvider {
         this.literalRenderer = literalRenderer;
     }
 
+    /**
+     * Compute the short forms of every entity in the signature of the
+     * provider's ontologies. Idempotent; later lookups are served from the
+     * index.
+     */
+    public synchronized void buildIndex() {
+        if (entitiesByShortForm != null) return;
+        Set<OWLEntity> signature = new LinkedHashSet<OWLEntity>();
+        for (OWLOntology o : ontologySetProvider.getOntologies()) {
+            signature.addAll(o.getSignature());
+        }
+        Map<OWLEntity, String> forward = new HashMap<OWLEntity, String>();
+        Map<String, Object> reverse = new HashMap<String, Object>();
+        long chars = 0;
+        for (OWLEntity e : signature) {
+            String shortForm = annotationShortForm(e);
+            if (shortForm != null) {
+                forward.put(e, shortForm);
+            } else {
+                shortForm = alternateShortFormProvider.getShortForm(e);
+            }
+            String key = unquote(shortForm);
+            Object previous = reverse.get(key);
+            if (previous == null) {
+                reverse.put(key, e);
+                chars += key.length();
+            } else if (previous instanceof OWLEntity) {
+                reverse.put(key, [previous, e] as OWLEntity[]);
+            } else {
+                OWLEntity[] shared = Arrays.copyOf((OWLEntity[]) previous, ((OWLEntity[]) previous).length + 1);
+                shared[shared.length - 1] = e;
+                reverse.put(key, shared);
+            }
+        }
+        keyChars = chars;
+        annotatedShortForms = forward;
+        entitiesByShortForm = reverse;
+    }
+
+    private void ensureIndex() {
+        if (entitiesByShortForm == null) {
+            buildIndex();
+        }
+    }
+
+    /** Number of index entries (both directions). */
+    public int size() {
+        ensureIndex();
+        return annotatedShortForms.size() + entitiesByShortForm.size();
+    }
+
+    /**
+     * Approximate heap held by the index: key characters plus map/String
+     * overhead. Entities and annotation short forms shared with the keys
+     * are not counted.
+     */
+    public long estimatedBytes() {
+        return keyChars * 2L + size() * (long) ENTRY_OVERHEAD_BYTES;
+    }
+
     /**
      *
      * @param entity
@@ -204,6 +286,16 @@ public class NewShortFormProvider implements BidirectionalShortFormProvider {
      */
     @Override
     public String getShortForm(OWLEntity entity) {
+        ensureIndex();
+        String shortForm = annotatedShortForms.get(entity);
+        return shortForm != null ? shortForm : alternateShortFormProvider.getShortForm(entity);
+    }
+
+    /**
+     * Short form from the preferred annotation properties, quoted when it
+     * contains a space, or null when the entity has none.
+     */
+    private String annotationShortForm(OWLEntity entity) {
         for (OWLAnnotationProperty prop : annotationProperties) {
             // visit the properties in order of preference
             AnnotationLanguageFilter checker = new AnnotationLanguageFilter(prop,
@@ -215,47 +307,61 @@ public class NewShortFormProvider implements BidirectionalShortFormProvider {
             }
             if(checker.getMatch() != null) {
                 def rendering = getRendering(checker.getMatch())
+                if (rendering == null)
+                    continue
                 if (rendering.contains(" "))
                     return "'" + rendering + "'"
                 else
                     return rendering
             }
         }
-        return alternateShortFormProvider.getShortForm(entity);
+        return null;
+    }
+
+    private static String unquote(String shortForm) {
+        return shortForm.indexOf("'") < 0 ? shortForm : shortForm.replace("'", "");
     }
 
+    /** Entities with the short form, in signature order (getEntity is the first). */
     @Override
     public Set<OWLEntity> getEntities(String shortForm) {
-        Set<OWLEntity> result = new HashSet<OWLEntity>();
-        if(getEntity(shortForm) != null) {
-            result.add(getEntity(shortForm));
+        ensureIndex();
+        Object hit = entitiesByShortForm.get(unquote(shortForm));
+        if (hit == null) {
+            return new LinkedHashSet<OWLEntity>();
         }
-        return result;
+        if (hit instanceof OWLEntity) {
+            Set<OWLEntity> result = new LinkedHashSet<OWLEntity>();
+            result.add((OWLEntity) hit);
+            return result;
+        }
+        return new LinkedHashSet<OWLEntity>(Arrays.asList((OWLEntity[]) hit));
     }
 
     @Override
     public Set<String> getShortForms() {
-        Set<String> shortForms = new HashSet<String>();
-        for (OWLOntology o : ontologySetProvider.getOntologies()) {
-            for (OWLEntity e : o.getSignature()) {
-                shortForms.add(getShortForm(e));
+        ensureIndex();
+        Set<String> shortForms = allShortForms;
+        if (shortForms == null) {
+            shortForms = new HashSet<String>();
+            for (Object hit : entitiesByShortForm.values()) {
+                for (OWLEntity e : (hit instanceof OWLEntity ? [hit] : (OWLEntity[]) hit)) {
+                    shortForms.add(getShortForm(e));
+                }
             }
+            shortForms = Collections.unmodifiableSet(shortForms);
+            allShortForms = shortForms;
         }
         return shortForms;
     }
 
     public OWLEntity getEntity(String shortForm) {
-        if(shortForm.startsWith("'") && shortForm.endsWith("'")) {
-            shortForm = shortForm.substring(1, shortForm.length() - 1);
+        ensureIndex();
+        Object hit = entitiesByShortForm.get(unquote(shortForm));
+        if (hit == null || hit instanceof OWLEntity) {
+            return (OWLEntity) hit;
         }
-        for (OWLOntology o : ontologySetProvider.getOntologies()) {
-            for (OWLEntity e : o.getSignature()) {
-                if (getShortForm(e).replace("'", "") == shortForm.replace("'", "")) {
-                    return e;
-                }
-            }
-        }
-        return null;
+        return ((OWLEntity[]) hit)[0];
     }
 
 
@@ -294,7 +400,12 @@ public class NewShortFormProvider implements BidirectionalShortFormProvider {
      *
      */
     @Override
-    public void dispose() {}
+    public synchronized void dispose() {
+        annotatedShortForms = Collections.emptyMap();
+        entitiesByShortForm = Collections.emptyMap();
+        allShortForms = Collections.emptySet();
+        keyChars = 0;
+    }
 
     private static class AnnotationLanguageFilter extends OWLObjectVisitorAdapter {
         private final OWLAnnotationProperty prop;
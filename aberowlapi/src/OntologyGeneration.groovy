@@ -0,0 +1,101 @@
+package src
+
+import java.util.concurrent.atomic.AtomicInteger
+
+import org.semanticweb.owlapi.model.OWLClass
+import org.semanticweb.owlapi.model.OWLOntology
+import org.semanticweb.owlapi.model.OWLOntologyManager
+import org.semanticweb.owlapi.reasoner.OWLReasoner
+
+/**
+ * Everything one classification of an ontology produced, published by
+ * RequestManager as a single unit.
+ *
+ * Reloads build a new generation off to the side while the current one
+ * keeps serving, then swap the holder in one map write. Queries pin the
+ * generation they started on (acquire/release), so the previous one is
+ * disposed only after its in-flight queries have drained. `version` is
+ * unique per worker and is part of the query cache key, so results
+ * computed on a retired generation are never served from the cache.
+ */
+public class OntologyGeneration {
+    final long version
+    final String ontologyId
+    final String path
+    final String reasonerType
+    final OWLOntologyManager manager
+    final OWLOntology ontology
+    final OWLReasoner reasoner
+    final OWLReasoner structReasoner
+    final QueryEngine queryEngine
+    final NewShortFormProvider shortFormProvider
+    final IRIOnlyShortFormProvider iriShortFormProvider
+    final EntityLookupIndex lookupIndex
+    final HierarchySnapshot hierarchy
+    // "classified", or "incoherent" when the structural reasoner stands in.
+    final String status
+    // Direct subclasses of owl:Thing, found while staging.
+    final Set<OWLClass> rootClasses
+
+    private final AtomicInteger inFlight = new AtomicInteger()
+
+    OntologyGeneration(long version, String ontologyId, String path, String reasonerType,
+                       OWLOntologyManager manager, OWLOntology ontology,
+                       OWLReasoner reasoner, OWLReasoner structReasoner, QueryEngine queryEngine,
+                       NewShortFormProvider shortFormProvider, IRIOnlyShortFormProvider iriShortFormProvider,
+                       EntityLookupIndex lookupIndex, HierarchySnapshot hierarchy, String status,
+                       Set<OWLClass> rootClasses) {
+        this.version = version
+        this.ontologyId = ontologyId
+        this.path = path
+        this.reasonerType = reasonerType
+        this.manager = manager
+        this.ontology = ontology
+        this.reasoner = reasoner
+        this.structReasoner = structReasoner
+        this.queryEngine = queryEngine
+        this.shortFormProvider = shortFormProvider
+        this.iriShortFormProvider = iriShortFormProvider
+        this.lookupIndex = lookupIndex
+        this.hierarchy = hierarchy
+        this.status = status
+        this.rootClasses = rootClasses
+    }
+
+    void acquire() {
+        inFlight.incrementAndGet()
+    }
+
+    void release() {
+        inFlight.decrementAndGet()
+    }
+
+    int inFlight() {
+        return inFlight.get()
+    }
+
+    /**
+     * Wait until no query holds this generation, for at most `timeoutMs`.
+     * Returns false on timeout.
+     */
+    boolean drain(long timeoutMs) {
+        long deadline = System.currentTimeMillis() + timeoutMs
+        while (inFlight.get() > 0) {
+            if (System.currentTimeMillis() >= deadline) return false
+            Thread.sleep(50)
+        }
+        return true
+    }
+
+    void dispose() {
+        try { reasoner?.dispose() } catch (Exception e) {
+            println "Error disposing reasoner for ${ontologyId} (generation ${version}): ${e.getMessage()}"
+        }
+        if (structReasoner != null && structReasoner !== reasoner) {
+            try { structReasoner.dispose() } catch (Exception e) {
+                println "Error disposing struct reasoner for ${ontologyId} (generation ${version}): ${e.getMessage()}"
+            }
+        }
+        shortFormProvider?.dispose()
+    }
+}
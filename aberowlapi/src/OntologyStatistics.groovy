@@ -0,0 +1,186 @@
+package src
+
+import groovy.json.JsonSlurper
+import org.semanticweb.owlapi.model.*
+import org.semanticweb.owlapi.model.parameters.Imports
+import org.semanticweb.owlapi.util.DLExpressivityChecker
+import org.semanticweb.owlapi.vocab.DublinCoreVocabulary
+import org.semanticweb.owlapi.vocab.OWLRDFVocabulary
+
+/**
+ * The expensive parts of the getStatistics.groovy payload: ontology-level
+ * metadata (annotations plus the companion metadata.json) and signature,
+ * axiom and expressivity counts. RequestManager.getStatistics computes them
+ * once per published generation and caches the rendered response.
+ */
+public class OntologyStatistics {
+
+    /**
+     * Title, description, version, licence, home page etc. from the
+     * owl:Ontology annotations, with empty fields filled from `metaFile`
+     * (metadata.json next to the OWL file) when it exists.
+     */
+    static Map metadata(OWLOntology ontology, File metaFile) {
+        def annotations = ontology.getAnnotations()
+        def title = ""
+        def description = ""
+        def versionInfo = ""
+        def versionIRI = ""
+        def license = ""
+        def defaultNamespace = ""
+        def oboFormatVersion = ""
+        def homePage = ""
+        def documentation = ""
+        def publication = ""
+        def creators = []
+        def licenseIRI = IRI.create("http://purl.org/dc/terms/license")
+        def homePageIRI = IRI.create("http://xmlns.com/foaf/0.1/homepage")
+        def publicationIRI = IRI.create("http://purl.org/dc/terms/bibliographicCitation")
+        def creatorIRI = IRI.create("http://purl.org/dc/terms/creator")
+        def defaultNamespaceIRI = IRI.create("http://www.geneontology.org/formats/oboInOwl#default-namespace")
+        def oboFormatVersionIRI = IRI.create("http://www.geneontology.org/formats/oboInOwl#hasOBOFormatVersion")
+
+        // Additional annotation IRIs to check
+        def dctermsTitleIRI = IRI.create("http://purl.org/dc/terms/title")
+        def dctermsDescIRI = IRI.create("http://purl.org/dc/terms/description")
+        def rdfsLabelIRI = OWLRDFVocabulary.RDFS_LABEL.getIRI()
+        def rdfsCommentIRI = OWLRDFVocabulary.RDFS_COMMENT.getIRI()
+
+        for (OWLAnnotation annotation : annotations) {
+            def propertyIRI = annotation.getProperty().getIRI()
+            def value = annotation.getValue()
+
+            if (propertyIRI.equals(DublinCoreVocabulary.TITLE.getIRI()) || propertyIRI.equals(dctermsTitleIRI)) {
+                if (value instanceof OWLLiteral) {
+                    title = ((OWLLiteral) value).getLiteral()
+                }
+            } else if (propertyIRI.equals(rdfsLabelIRI) && !title) {
+                // Use rdfs:label as fallback for title if dc:title/dcterms:title not found
+                if (value instanceof OWLLiteral) {
+                    title = ((OWLLiteral) value).getLiteral()
+                }
+            } else if (propertyIRI.equals(DublinCoreVocabulary.DESCRIPTION.getIRI()) || propertyIRI.equals(dctermsDescIRI)) {
+                if (value instanceof OWLLiteral) {
+                    description = ((OWLLiteral) value).getLiteral()
+                }
+            } else if (propertyIRI.equals(rdfsCommentIRI) && !description) {
+                // Use rdfs:comment as fallback description
+                if (value instanceof OWLLiteral) {
+                    description = ((OWLLiteral) value).getLiteral()
+                }
+            } else if (propertyIRI.equals(OWLRDFVocabulary.OWL_VERSION_INFO.getIRI())) {
+                if (value instanceof OWLLiteral) {
+                    versionInfo = ((OWLLiteral) value).getLiteral()
+                }
+            } else if (propertyIRI.equals(OWLRDFVocabulary.OWL_VERSION_IRI.getIRI())) {
+                if (value instanceof IRI) {
+                    versionIRI = value.toString()
+                }
+            } else if (propertyIRI.equals(licenseIRI)) {
+                if (value instanceof IRI) {
+                    license = value.toString()
+                } else if (value instanceof OWLLiteral) {
+                    license = ((OWLLiteral) value).getLiteral()
+                }
+            } else if (propertyIRI.equals(defaultNamespaceIRI)) {
+                if (value instanceof OWLLiteral) {
+                    defaultNamespace = ((OWLLiteral) value).getLiteral()
+                }
+            } else if (propertyIRI.equals(oboFormatVersionIRI)) {
+                if (value instanceof OWLLiteral) {
+                    oboFormatVersion = ((OWLLiteral) value).getLiteral()
+                }
+            } else if (propertyIRI.equals(homePageIRI)) {
+                if (value instanceof IRI) {
+                    homePage = value.toString()
+                }
+            } else if (propertyIRI.equals(OWLRDFVocabulary.RDFS_SEE_ALSO.getIRI())) {
+                if (value instanceof IRI) {
+                    documentation = value.toString()
+                } else if (value instanceof OWLLiteral) {
+                    documentation = ((OWLLiteral) value).getLiteral()
+                }
+            } else if (propertyIRI.equals(publicationIRI)) {
+                if (value instanceof OWLLiteral) {
+                    publication = ((OWLLiteral) value).getLiteral()
+                }
+            } else if (propertyIRI.equals(creatorIRI)) {
+                if (value instanceof OWLLiteral) {
+                    creators.add(((OWLLiteral) value).getLiteral())
+                }
+            }
+        }
+
+        // Fallback to companion metadata.json (produced by deploy/fetch_metadata.py)
+        // Many BioPortal ontologies — and some OBO ones — have no dc:title /
+        // rdfs:label / dcterms:title annotation on the owl:Ontology element, so
+        // the loop above leaves title/description/homepage/etc. empty. Sibling
+        // metadata.json sourced from the OBO Foundry registry or BioPortal API
+        // provides those fields.
+        try {
+            if (metaFile != null && metaFile.exists()) {
+                def meta = new JsonSlurper().parse(metaFile)
+                if (!title && meta.title) title = meta.title
+                if (!description && meta.description) description = meta.description
+                if (!homePage && meta.home_page) homePage = meta.home_page
+                if (!documentation && meta.documentation) documentation = meta.documentation
+                if (!license && meta.license) license = meta.license
+                if (!publication && meta.publication) publication = meta.publication
+                if (!versionIRI && meta.version_iri) versionIRI = meta.version_iri
+                if (creators.isEmpty() && meta.creators) creators.addAll(meta.creators)
+            }
+        } catch (Exception ignored) {
+            // Non-fatal: fall back to whatever the OWL file gave us.
+        }
+
+        return [
+            "title": title,
+            "description": description,
+            "version_info": versionInfo,
+            "version_iri": versionIRI,
+            "license": license,
+            "default_namespace": defaultNamespace,
+            "obo_format_version": oboFormatVersion,
+            "home_page": homePage,
+            "documentation": documentation,
+            "publication": publication,
+            "creators": creators
+        ]
+    }
+
+    /**
+     * Signature and axiom counts and the DL expressivity of the merged ontology.
+     */
+    static Map counts(OWLOntology ontology) {
+        int objectPropertyCount = ontology.getObjectPropertiesInSignature(Imports.INCLUDED).size()
+        int dataPropertyCount = ontology.getDataPropertiesInSignature(Imports.INCLUDED).size()
+        int annotationPropertyCount = ontology.getAnnotationPropertiesInSignature(Imports.INCLUDED).size()
+
+        // Count axioms per type from the ontology's indexes instead of copying
+        // the TBox/ABox/RBox and declaration axioms into new sets.
+        def count = { Collection<AxiomType> types -> types.sum(0) { ontology.getAxiomCount(it, Imports.INCLUDED) } }
+
+        // Report a canonical DL name (e.g. "ALC", "ALCHIQ") instead of a raw
+        // concatenation of construct letters, which produced garbled strings like
+        // "CCINTERI". expressibleInLanguages() maps the constructs onto the standard
+        // DL family names; fall back to the construct list when no named language fits.
+        def checker = new DLExpressivityChecker(Collections.singleton(ontology))
+        def expressibleLangs = checker.expressibleInLanguages()
+
+        return [
+            "dl_expressivity": expressibleLangs ? expressibleLangs.collect { it.toString() }.join(", ") : checker.getDescriptionLogicName(),
+            "class_count": ontology.getClassesInSignature(Imports.INCLUDED).size(),
+            "property_count": objectPropertyCount + dataPropertyCount + annotationPropertyCount,
+            "object_property_count": objectPropertyCount,
+            "data_property_count": dataPropertyCount,
+            "annotation_property_count": annotationPropertyCount,
+            "individual_count": ontology.getIndividualsInSignature(Imports.INCLUDED).size(),
+            "axiom_count": ontology.getAxiomCount(Imports.INCLUDED),
+            "logical_axiom_count": ontology.getLogicalAxiomCount(Imports.INCLUDED),
+            "tbox_axiom_count": count(AxiomType.TBoxAxiomTypes),
+            "abox_axiom_count": count(AxiomType.ABoxAxiomTypes),
+            "rbox_axiom_count": count(AxiomType.RBoxAxiomTypes),
+            "declaration_axiom_count": ontology.getAxiomCount(AxiomType.DECLARATION, Imports.INCLUDED)
+        ]
+    }
+}
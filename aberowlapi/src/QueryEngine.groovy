@@ -38,9 +38,13 @@ public class QueryEngine {
     private ShortFormProvider sProvider;
     
     QueryEngine(OWLReasoner oReasoner, ShortFormProvider sProvider) {
+        this(oReasoner, sProvider, null);
+    }
+
+    QueryEngine(OWLReasoner oReasoner, ShortFormProvider sProvider, EntityLookupIndex lookupIndex) {
         this.oReasoner = oReasoner;
         this.sProvider = sProvider;
-        this.parser = new QueryParser(oReasoner.getRootOntology(), sProvider);
+        this.parser = new QueryParser(oReasoner.getRootOntology(), sProvider, lookupIndex);
     }
     
     public Set<OWLClass> getClasses(OWLClassExpression cExpression, RequestType requestType, boolean direct, boolean labels) {
@@ -37,14 +37,27 @@ import org.semanticweb.owlapi.util.BidirectionalShortFormProviderAdapter;
 public class QueryParser {
     private final BidirectionalShortFormProvider biSFormProvider;
     private final OWLOntology ontology;
+    private final EntityLookupIndex lookupIndex;
     
     public QueryParser(ontology, sProvider) {
+        this(ontology, sProvider, null);
+    }
+
+    public QueryParser(ontology, sProvider, EntityLookupIndex lookupIndex) {
         this.ontology = ontology;
-        biSFormProvider = new BidirectionalShortFormProviderAdapter(
-            ontology.getOWLOntologyManager(),
-            ontology.getImportsClosure(),
-            sProvider
-        );
+        this.lookupIndex = lookupIndex;
+        // NewShortFormProvider is bidirectional and indexed already; the
+        // adapter would render every entity of the imports closure again and
+        // stay registered as a listener on the ontology manager.
+        if (sProvider instanceof BidirectionalShortFormProvider) {
+            biSFormProvider = sProvider;
+        } else {
+            biSFormProvider = new BidirectionalShortFormProviderAdapter(
+                ontology.getOWLOntologyManager(),
+                ontology.getImportsClosure(),
+                sProvider
+            );
+        }
     }
     
     /**
@@ -70,36 +83,57 @@ public class QueryParser {
                     unquoted = unquoted.substring(1, unquoted.length() - 1)
                 }
 
-                // First try to find the class directly by IRI fragment (case- and
-                // underscore-insensitive).
-                for (OWLClass cls : ontology.getClassesInSignature(true)) {
-                    String shortForm = cls.getIRI().getFragment()
-                    if (shortForm == null) continue
-                    if (shortForm.equalsIgnoreCase(unquoted) ||
-                        shortForm.replace("_", "").equalsIgnoreCase(unquoted.replace("_", ""))) {
-                        return cls
+                // Label and fragment bypasses below go through the pre-built
+                // index when the ontology has one (see EntityLookupIndex).
+                boolean bareName = !unquoted.contains("(") && !unquoted.contains("{")
+                        && !unquoted.toLowerCase().matches('.*\\s+(some|only|and|or|not|min|max|exactly|value|that|inverse)\\s+.*')
+                if (lookupIndex != null) {
+                    if (bareName) {
+                        OWLClass hit = lookupIndex.getOWLClass(unquoted)
+                        if (hit != null) {
+                            return hit
+                        }
                     }
-                }
-
-                // Then try rdfs:label (case-insensitive). This catches the common
-                // case where the user writes 'cell' or 'cell death' and the class
-                // has a matching rdfs:label but an opaque IRI fragment (e.g.
-                // GO_0005623). Only applied when the query is a bare label or a
-                // single quoted label — compound expressions go to the parser.
-                if (!unquoted.contains("(") && !unquoted.contains("{")
-                        && !unquoted.toLowerCase().matches('.*\\s+(some|only|and|or|not|min|max|exactly|value|that|inverse)\\s+.*')) {
+                } else {
+                    // First try to find the class directly by IRI fragment (case- and
+                    // underscore-insensitive).
                     for (OWLClass cls : ontology.getClassesInSignature(true)) {
-                        for (OWLAnnotation a : EntitySearcher.getAnnotations(cls, ontology)) {
-                            if (a.getProperty().isLabel() && a.getValue() instanceof OWLLiteral) {
-                                String label = ((OWLLiteral) a.getValue()).getLiteral()
-                                if (label.equalsIgnoreCase(unquoted)) {
-                                    return cls
+                        String shortForm = cls.getIRI().getFragment()
+                        if (shortForm == null) continue
+                        if (shortForm.equalsIgnoreCase(unquoted) ||
+                            shortForm.replace("_", "").equalsIgnoreCase(unquoted.replace("_", ""))) {
+                            return cls
+                        }
+                    }
+
+                    // Then try rdfs:label (case-insensitive). This catches the common
+                    // case where the user writes 'cell' or 'cell death' and the class
+                    // has a matching rdfs:label but an opaque IRI fragment (e.g.
+                    // GO_0005623). Only applied when the query is a bare label or a
+                    // single quoted label — compound expressions go to the parser.
+                    if (bareName) {
+                        for (OWLClass cls : ontology.getClassesInSignature(true)) {
+                            for (OWLAnnotation a : EntitySearcher.getAnnotations(cls, ontology)) {
+                                if (a.getProperty().isLabel() && a.getValue() instanceof OWLLiteral) {
+                                    String label = ((OWLLiteral) a.getValue()).getLiteral()
+                                    if (label.equalsIgnoreCase(unquoted)) {
+                                        return cls
+                                    }
                                 }
                             }
                         }
                     }
                 }
 
+                // Then the short form index (labels and synonyms, quotes
+                // ignored) of the generation's provider.
+                if (bareName) {
+                    OWLEntity entity = biSFormProvider.getEntity(unquoted)
+                    if (entity instanceof OWLClass) {
+                        return entity
+                    }
+                }
+
                 // Auto-quote bare labels (e.g. `cell death` → `'cell death'`).
                 // Skip if the input already looks like Manchester syntax (IRIs in
                 // `<>`, parens, braces, or pre-quoted).
@@ -109,12 +143,12 @@ public class QueryParser {
                 }
 
                 OWLDataFactory dFactory = this.ontology.getOWLOntologyManager().getOWLDataFactory();
-  def eChecker = new BasicEntityChecker(dFactory, ontology)
+  def eChecker = new BasicEntityChecker(dFactory, ontology, lookupIndex)
   def parser = new ManchesterOWLSyntaxClassExpressionParser(dFactory, eChecker);
 
   if(labels) {
       // Always use BasicEntityChecker to ensure consistent handling of underscores
-      eChecker = new BasicEntityChecker(dFactory, ontology)
+      eChecker = new BasicEntityChecker(dFactory, ontology, lookupIndex)
       parser = new ManchesterOWLSyntaxClassExpressionParser(dFactory, eChecker);
   }
 
@@ -123,7 +157,7 @@ public class QueryParser {
                     result = parser.parse(mOwl);
                 } catch(Exception firstTryException) {
                     // Always try with our enhanced BasicEntityChecker regardless of spaces
-                    def basicChecker = new BasicEntityChecker(dFactory, ontology)
+                    def basicChecker = new BasicEntityChecker(dFactory, ontology, lookupIndex)
                     def basicParser = new ManchesterOWLSyntaxClassExpressionParser(dFactory, basicChecker);
                     
                     try {
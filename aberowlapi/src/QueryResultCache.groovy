@@ -0,0 +1,275 @@
+package src
+
+import java.util.concurrent.*
+import java.util.concurrent.atomic.*
+
+/**
+ * Bounded, size-aware LRU cache for DL query results.
+ *
+ * Entries are keyed by the RequestManager cache key
+ * ("ontologyId|generation|query|type|direct|axioms") and grouped per ontology, so that
+ * invalidating one ontology only touches that ontology's entries. Limits are
+ * enforced both per worker (all ontologies) and per ontology, on entry count
+ * and on an estimate of the retained result size. The least recently used
+ * entry is evicted first; expired entries are removed by a background sweep
+ * as well as on read.
+ *
+ * Limits come from the environment (see fromEnvironment):
+ *   QUERY_CACHE_TTL_SECONDS               entry lifetime (default 300)
+ *   QUERY_CACHE_MAX_ENTRIES               per worker (default 10000)
+ *   QUERY_CACHE_MAX_MB                    per worker (default 512)
+ *   QUERY_CACHE_MAX_ENTRIES_PER_ONTOLOGY  (default 2000)
+ *   QUERY_CACHE_MAX_MB_PER_ONTOLOGY       (default 128)
+ *
+ * All mutating operations take a single lock; they are O(1) apart from
+ * eviction and invalidation, which are O(entries removed).
+ */
+public class QueryResultCache {
+    private static final long SWEEP_INTERVAL_MS = 60 * 1000L
+
+    final long ttlMs
+    final int maxEntries
+    final long maxBytes
+    final int maxEntriesPerOntology
+    final long maxBytesPerOntology
+
+    // Global recency order (access-ordered) and per-ontology recency order.
+    private final LinkedHashMap<String, Entry> entries = new LinkedHashMap<>(1024, 0.75f, true)
+    private final Map<String, LinkedHashMap<String, Entry>> byOntology = new HashMap<>()
+    private final Map<String, long[]> ontologyBytes = new HashMap<>()
+    private long totalBytes = 0
+
+    private final AtomicLong hits = new AtomicLong()
+    private final AtomicLong misses = new AtomicLong()
+    private final AtomicLong evictions = new AtomicLong()
+    private final AtomicLong expirations = new AtomicLong()
+    private final AtomicLong invalidations = new AtomicLong()
+
+    private final ScheduledExecutorService sweeper
+
+    private static class Entry {
+        final String ontId
+        final Object value
+        final long bytes
+        final long createdAt
+
+        Entry(String ontId, Object value, long bytes, long createdAt) {
+            this.ontId = ontId
+            this.value = value
+            this.bytes = bytes
+            this.createdAt = createdAt
+        }
+    }
+
+    QueryResultCache(long ttlMs, int maxEntries, long maxBytes, int maxEntriesPerOntology, long maxBytesPerOntology) {
+        this.ttlMs = ttlMs
+        this.maxEntries = maxEntries
+        this.maxBytes = maxBytes
+        this.maxEntriesPerOntology = maxEntriesPerOntology
+        this.maxBytesPerOntology = maxBytesPerOntology
+
+        sweeper = Executors.newSingleThreadScheduledExecutor({ Runnable r ->
+            Thread t = new Thread(r, "query-cache-sweeper")
+            t.setDaemon(true)
+            return t
+        } as ThreadFactory)
+        sweeper.scheduleWithFixedDelay({ sweepExpired() } as Runnable,
+            SWEEP_INTERVAL_MS, SWEEP_INTERVAL_MS, TimeUnit.MILLISECONDS)
+    }
+
+    static QueryResultCache fromEnvironment() {
+        return new QueryResultCache(
+            envLong("QUERY_CACHE_TTL_SECONDS", 300) * 1000L,
+            envLong("QUERY_CACHE_MAX_ENTRIES", 10000) as int,
+            envLong("QUERY_CACHE_MAX_MB", 512) * 1024L * 1024L,
+            envLong("QUERY_CACHE_MAX_ENTRIES_PER_ONTOLOGY", 2000) as int,
+            envLong("QUERY_CACHE_MAX_MB_PER_ONTOLOGY", 128) * 1024L * 1024L
+        )
+    }
+
+    private static long envLong(String name, long dflt) {
+        def v = System.getenv(name)
+        return (v && v.isLong()) ? v.toLong() : dflt
+    }
+
+    /**
+     * Return the cached value, or null if absent or expired.
+     */
+    Object get(String ontId, String key) {
+        synchronized (this) {
+            Entry e = entries.get(key)
+            if (e == null) {
+                misses.incrementAndGet()
+                return null
+            }
+            if (System.currentTimeMillis() - e.createdAt >= ttlMs) {
+                removeEntry(key, e)
+                expirations.incrementAndGet()
+                misses.incrementAndGet()
+                return null
+            }
+            byOntology.get(ontId)?.get(key)  // touch per-ontology recency
+            hits.incrementAndGet()
+            return e.value
+        }
+    }
+
+    void put(String ontId, String key, Object value) {
+        long bytes = estimateBytes(value)
+        // A single result larger than the per-ontology budget would only
+        // evict everything else and then itself; don't cache it.
+        if (bytes > maxBytesPerOntology || bytes > maxBytes) {
+            return
+        }
+        synchronized (this) {
+            Entry old = entries.get(key)
+            if (old != null) {
+                removeEntry(key, old)
+            }
+            Entry e = new Entry(ontId, value, bytes, System.currentTimeMillis())
+            entries.put(key, e)
+            def segment = byOntology.get(ontId)
+            if (segment == null) {
+                segment = new LinkedHashMap<String, Entry>(64, 0.75f, true)
+                byOntology.put(ontId, segment)
+                ontologyBytes.put(ontId, [0L] as long[])
+            }
+            segment.put(key, e)
+            ontologyBytes.get(ontId)[0] += bytes
+            totalBytes += bytes
+
+            def ontBytes = ontologyBytes.get(ontId)
+            while (segment.size() > maxEntriesPerOntology || ontBytes[0] > maxBytesPerOntology) {
+                def eldest = segment.entrySet().iterator().next()
+                removeEntry(eldest.getKey(), eldest.getValue())
+                evictions.incrementAndGet()
+            }
+            while (entries.size() > maxEntries || totalBytes > maxBytes) {
+                def eldest = entries.entrySet().iterator().next()
+                removeEntry(eldest.getKey(), eldest.getValue())
+                evictions.incrementAndGet()
+            }
+        }
+    }
+
+    /**
+     * Drop every entry belonging to one ontology. O(entries for that ontology).
+     */
+    void invalidateOntology(String ontId) {
+        synchronized (this) {
+            def segment = byOntology.remove(ontId)
+            def ontBytes = ontologyBytes.remove(ontId)
+            if (segment == null) return
+            for (String key : segment.keySet()) {
+                entries.remove(key)
+            }
+            totalBytes -= ontBytes[0]
+            invalidations.addAndGet(segment.size())
+        }
+    }
+
+    void clear() {
+        synchronized (this) {
+            invalidations.addAndGet(entries.size())
+            entries.clear()
+            byOntology.clear()
+            ontologyBytes.clear()
+            totalBytes = 0
+        }
+    }
+
+    /**
+     * Remove all expired entries. Runs on the background sweeper thread.
+     */
+    void sweepExpired() {
+        long now = System.currentTimeMillis()
+        synchronized (this) {
+            def it = entries.entrySet().iterator()
+            while (it.hasNext()) {
+                def me = it.next()
+                Entry e = me.getValue()
+                if (now - e.createdAt >= ttlMs) {
+                    it.remove()
+                    detachFromOntology(me.getKey(), e)
+                    expirations.incrementAndGet()
+                }
+            }
+        }
+    }
+
+    Map stats() {
+        synchronized (this) {
+            long h = hits.get()
+            long m = misses.get()
+            return [
+                entries: entries.size(),
+                estimatedBytes: totalBytes,
+                hits: h,
+                misses: m,
+                hitRate: (h + m) > 0 ? (h / (double) (h + m)) : 0.0d,
+                evictions: evictions.get(),
+                expirations: expirations.get(),
+                invalidations: invalidations.get(),
+                limits: [
+                    ttlSeconds: ttlMs / 1000L,
+                    maxEntries: maxEntries,
+                    maxBytes: maxBytes,
+                    maxEntriesPerOntology: maxEntriesPerOntology,
+                    maxBytesPerOntology: maxBytesPerOntology
+                ],
+                ontologies: byOntology.collectEntries { ontId, segment ->
+                    [(ontId): [entries: segment.size(), estimatedBytes: ontologyBytes.get(ontId)[0]]]
+                }
+            ]
+        }
+    }
+
+    void shutdown() {
+        sweeper.shutdownNow()
+    }
+
+    // Caller holds the lock.
+    private void removeEntry(String key, Entry e) {
+        entries.remove(key)
+        detachFromOntology(key, e)
+    }
+
+    // Caller holds the lock.
+    private void detachFromOntology(String key, Entry e) {
+        totalBytes -= e.bytes
+        def segment = byOntology.get(e.ontId)
+        if (segment != null && segment.remove(key) != null) {
+            ontologyBytes.get(e.ontId)[0] -= e.bytes
+            if (segment.isEmpty()) {
+                byOntology.remove(e.ontId)
+                ontologyBytes.remove(e.ontId)
+            }
+        }
+    }
+
+    /**
+     * Rough retained size of a query result (lists of classes2info maps):
+     * strings count two bytes per char plus a header, containers a fixed
+     * overhead per slot. Good enough to keep the cache within budget.
+     */
+    static long estimateBytes(Object o) {
+        if (o == null) return 0L
+        if (o instanceof CharSequence) return 40L + 2L * ((CharSequence) o).length()
+        if (o instanceof Number || o instanceof Boolean) return 16L
+        if (o instanceof Map) {
+            long total = 48L
+            for (def me : ((Map) o).entrySet()) {
+                total += 32L + estimateBytes(me.getKey()) + estimateBytes(me.getValue())
+            }
+            return total
+        }
+        if (o instanceof Collection) {
+            long total = 40L
+            for (def item : (Collection) o) {
+                total += 8L + estimateBytes(item)
+            }
+            return total
+        }
+        return 64L
+    }
+}
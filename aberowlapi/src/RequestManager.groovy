@@ -28,7 +28,6 @@ import com.google.common.collect.*
 import org.semanticweb.owlapi.model.UnloadableImportException
 import src.IRIOnlyShortFormProvider
 import src.ReasonerFactory
-import groovyx.gpars.GParsPool
 
 
 /**
@@ -42,10 +41,34 @@ import groovyx.gpars.GParsPool
 public class RequestManager {
     private static final int MAX_UNSATISFIABLE_CLASSES = 500
     private static final int MAX_REASONER_RESULTS = 100000
-    private static final int PARALLEL_THREADS = 4
+
+    // Staged reloads: estimated heap cost of a new generation is
+    // RELOAD_HEAP_FACTOR x the OWL file size, and must fit next to the
+    // served one with RELOAD_HEAP_HEADROOM_MB to spare. The old generation
+    // is disposed once its queries drain, or after RELOAD_DRAIN_TIMEOUT_MS.
+    private static final double RELOAD_HEAP_FACTOR = (System.getenv("RELOAD_HEAP_FACTOR") ?: "10") as double
+    private static final long RELOAD_HEAP_HEADROOM_BYTES = ((System.getenv("RELOAD_HEAP_HEADROOM_MB") ?: "512") as long) << 20
+    private static final long RELOAD_DRAIN_TIMEOUT_MS = (System.getenv("RELOAD_DRAIN_TIMEOUT_MS") ?: "60000") as long
+
+    // LOAD_HEAP_PROFILE=true measures (with a full GC either side) how much
+    // heap releasing the imports closure saves per ontology. Off by default:
+    // two collections per load are too slow for a multi-ontology start-up.
+    private static final boolean LOAD_HEAP_PROFILE = (System.getenv("LOAD_HEAP_PROFILE") ?: "").toLowerCase() in ["1", "true", "yes"]
+
+    // findRoot lists at most this many routes from a top-level class down to
+    // the requested one; a class deep in a DAG can have thousands.
+    private static final int FIND_ROOT_MAX_PATHS = (System.getenv("FIND_ROOT_MAX_PATHS") ?: "64") as int
 
     OWLDataFactory df = OWLManager.getOWLDataFactory()
 
+    // Current OntologyGeneration per ontology: the unit a reload swaps.
+    // Query paths read their reasoner, engine and short form providers from
+    // here; the maps below mirror it for everything else.
+    final ConcurrentHashMap<String, OntologyGeneration> generations = new ConcurrentHashMap<>()
+    private final AtomicLong generationCounter = new AtomicLong()
+    // Ontologies with a reload being staged next to the served generation.
+    final Set<String> staging = ConcurrentHashMap.newKeySet()
+
     // Per-ontology state maps (keyed by ontologyId)
     final ConcurrentHashMap<String, OWLOntologyManager> oManagers = new ConcurrentHashMap<>()
     final ConcurrentHashMap<String, OWLOntology> ontologies = new ConcurrentHashMap<>()
@@ -60,15 +83,52 @@ public class RequestManager {
     final ConcurrentHashMap<String, String> exampleSuperclassLabels = new ConcurrentHashMap<>()
     final ConcurrentHashMap<String, String> exampleSubclassExpressions = new ConcurrentHashMap<>()
     final ConcurrentHashMap<String, String> exampleSubclassExpressionTexts = new ConcurrentHashMap<>()
+    // What parseOntology kept and released per ontology; see parseOntology.
+    final ConcurrentHashMap<String, Map> loadFootprints = new ConcurrentHashMap<>()
 
     // Pre-computed root classes (direct subclasses of owl:Thing) per ontology.
     // Populated during createReasoner to avoid the slow ELK traversal at query time.
     final ConcurrentHashMap<String, List> rootClassCache = new ConcurrentHashMap<>()
 
-    // Query result cache: "ontologyId|query|type|direct" -> [timestamp, result]
-    // Entries expire after QUERY_CACHE_TTL_MS milliseconds.
-    private static final long QUERY_CACHE_TTL_MS = 5 * 60 * 1000L
-    final ConcurrentHashMap<String, Object[]> queryCache = new ConcurrentHashMap<>()
+    // Normalized label/fragment -> entity index per ontology, used by the
+    // Manchester parser's entity checker. Rebuilt in createReasoner.
+    final ConcurrentHashMap<String, EntityLookupIndex> entityIndexes = new ConcurrentHashMap<>()
+
+    // Inferred taxonomy per ontology in CSR form, so sub/super/equivalent
+    // queries on named classes skip the reasoner. Rebuilt in createReasoner.
+    final ConcurrentHashMap<String, HierarchySnapshot> hierarchies = new ConcurrentHashMap<>()
+
+    // Ontologies served from a persisted TaxonomySnapshot while they are
+    // loaded and classified again after a restart ("snapshot-serving").
+    // An entry is dropped as soon as the ontology has a query engine.
+    final ConcurrentHashMap<String, TaxonomySnapshot> taxonomySnapshots = new ConcurrentHashMap<>()
+    final ConcurrentHashMap<String, String> ontologyFingerprints = new ConcurrentHashMap<>()
+    final File taxonomySnapshotDir = TaxonomySnapshot.directoryFromEnvironment()
+    private final ExecutorService taxonomyWriter = Executors.newSingleThreadExecutor({ Runnable r ->
+        Thread t = new Thread(r, "taxonomy-snapshot-writer")
+        t.setDaemon(true)
+        return t
+    } as ThreadFactory)
+
+    // Query result cache: "ontologyId|generation|query|type|direct|axioms" -> result.
+    // Bounded per worker and per ontology; see QueryResultCache for limits.
+    final QueryResultCache queryCache = QueryResultCache.fromEnvironment()
+
+    // Identical runQuery calls in flight at the same time share one
+    // computation; keyed like queryCache. See SingleFlight.
+    final SingleFlight queryFlights = new SingleFlight()
+
+    // getStatistics payload per ontology; see getStatistics.
+    final ConcurrentHashMap<String, Map> statisticsCache = new ConcurrentHashMap<>()
+
+    // Long-lived executors: per-ontology slices of runQueryMulti, and
+    // classification (startup, addOntology, reloads). See WorkerPool.
+    final WorkerPool queryPool = WorkerPool.queryPoolFromEnvironment()
+    final WorkerPool classificationPool = WorkerPool.classificationPoolFromEnvironment()
+
+    // Rendered toInfo records per ontology, class and short form mode.
+    // Dropped when an ontology is reclassified or disposed; see ClassInfoCache.
+    final ClassInfoCache classInfoCache = ClassInfoCache.fromEnvironment()
 
     // Shared annotation property lists
     def aProperties = [
@@ -157,7 +217,35 @@ public class RequestManager {
         loadStati.put(ontId, "loading")
         reasonerTypes.put(ontId, reasonerType ?: "elk")
         ontologyPaths.put(ontId, ontIRI)
+        // Hash the file before parsing it, so a snapshot written after
+        // classification is keyed by exactly the bytes that were loaded.
+        if (taxonomySnapshotDir != null && !ontologyFingerprints.containsKey(ontId)) {
+            ontologyFingerprints.put(ontId, TaxonomySnapshot.fingerprint(new File(ontIRI), reasonerType ?: "elk"))
+        }
 
+        def (OWLOntologyManager lManager, OWLOntology mergedOntology, Map footprint) = parseOntology(ontId, ontIRI)
+
+        ontologies.put(ontId, mergedOntology)
+        oManagers.put(ontId, lManager)
+        loadFootprints.put(ontId, footprint)
+        loadStati.put(ontId, "loaded")
+        println "Loaded ontology ${ontId}"
+    }
+
+    /**
+     * Parse an OWL file and merge its imports closure into a single
+     * ontology, without touching any shared state. Returns [manager, merged,
+     * footprint].
+     *
+     * Exactly one copy of the axioms stays resident: an ontology without
+     * imports is served as parsed, and otherwise the closure is merged and
+     * the source ontologies are removed from the manager. The merged
+     * ontology holds the same (shared) axiom objects, so what the sources
+     * kept alive was their own per-ontology indexes. `footprint` records
+     * the source ontology and axiom counts released, and with
+     * LOAD_HEAP_PROFILE the heap that freed.
+     */
+    private List parseOntology(String ontId, String ontIRI) {
         OWLOntologyManager lManager = OWLManager.createOWLOntologyManager()
 
         // Stop remote import fetches. owl:imports of dead URLs hang for minutes
@@ -175,12 +263,21 @@ public class RequestManager {
         IRI originalOntologyIRI = originalOntology.getOntologyID().getOntologyIRI().orNull()
         Set<OWLAnnotation> originalAnnotations = originalOntology.getAnnotations().collect()
 
+        OWLOntologyImportsClosureSetProvider provider = new OWLOntologyImportsClosureSetProvider(lManager, originalOntology)
+        Set<OWLOntology> sources = new HashSet<>(provider.getOntologies())
+        long sourceAxioms = sources.sum(0L) { it.getAxiomCount() } as long
+        if (sources.size() == 1) {
+            println "Loaded ${ontId} without imports (${sourceAxioms} axioms); nothing to merge"
+            return [lManager, originalOntology,
+                    [merged: false, sourceOntologies: 1, sourceAxioms: sourceAxioms, keptAxioms: sourceAxioms,
+                     releasedAxioms: 0L, releasedBytes: LOAD_HEAP_PROFILE ? 0L : null]]
+        }
+
         // Merge imports closure into a single ontology.
         // The merged ontology must use a SYNTHETIC IRI rather than the
         // original's, because originalOntology is already registered in
         // lManager at its own IRI — creating a second ontology at that
         // same IRI in the same manager raises OWLOntologyAlreadyExists.
-        OWLOntologyImportsClosureSetProvider provider = new OWLOntologyImportsClosureSetProvider(lManager, originalOntology)
         OWLOntologyMerger merger = new OWLOntologyMerger(provider, false)
         IRI mergedIRI = IRI.create("http://aberowl.local/merged/${ontId}")
         def mergedOntology = merger.createMergedOntology(lManager, mergedIRI)
@@ -189,10 +286,22 @@ public class RequestManager {
             lManager.applyChange(new AddOntologyAnnotation(mergedOntology, annotation))
         }
 
-        ontologies.put(ontId, mergedOntology)
-        oManagers.put(ontId, lManager)
-        loadStati.put(ontId, "loaded")
-        println "Loaded ontology ${ontId}"
+        // The merged ontology has no imports of its own, so the sources can go.
+        long heldBytes = LOAD_HEAP_PROFILE ? usedHeapAfterGc() : 0L
+        sources.each { lManager.removeOntology(it) }
+        Long releasedBytes = LOAD_HEAP_PROFILE ? Math.max(0L, heldBytes - usedHeapAfterGc()) : null
+        long keptAxioms = mergedOntology.getAxiomCount()
+        println "Merged ${sources.size()} ontologies into ${ontId} (${keptAxioms} axioms) and released the sources" +
+            (releasedBytes != null ? ", freeing ${releasedBytes >> 20} MB" : "")
+        return [lManager, mergedOntology,
+                [merged: true, sourceOntologies: sources.size(), sourceAxioms: sourceAxioms, keptAxioms: keptAxioms,
+                 releasedAxioms: sourceAxioms, releasedBytes: releasedBytes]]
+    }
+
+    private static long usedHeapAfterGc() {
+        System.gc()
+        Runtime rt = Runtime.getRuntime()
+        return rt.totalMemory() - rt.freeMemory()
     }
 
     // -----------------------------------------------------------------------
@@ -210,8 +319,17 @@ public class RequestManager {
             throw new IllegalArgumentException("Ontology not loaded: ${ontId}")
         }
 
-        println "Classifying ${ontId} with reasoner: ${rType}"
         loadStati.put(ontId, "classifying")
+        retire(publish(classify(ontId, ontologyPaths.get(ontId), rType, manager, ontology)))
+    }
+
+    /**
+     * Classify a parsed ontology and build everything queries need (reasoners,
+     * short form providers, lookup index, hierarchy snapshot, root classes)
+     * into a new, unpublished OntologyGeneration. Touches no shared state.
+     */
+    private OntologyGeneration classify(String ontId, String path, String rType, OWLOntologyManager manager, OWLOntology ontology) {
+        println "Classifying ${ontId} with reasoner: ${rType}"
 
         List<String> langs = new ArrayList<>()
         Map<OWLAnnotationProperty, List<String>> preferredLanguageMap = new HashMap<>()
@@ -228,36 +346,170 @@ public class RequestManager {
 
         def sfp = new NewShortFormProvider(this.aProperties, preferredLanguageMap, manager)
         def iriSfp = new IRIOnlyShortFormProvider(manager.getOntologies())
+        long sfpStart = System.currentTimeMillis()
+        sfp.buildIndex()
+        println "Built short form index for ${ontId}: ${sfp.size()} entries, ~${sfp.estimatedBytes() >> 10} KB in ${System.currentTimeMillis() - sfpStart} ms"
 
-        // Dispose old reasoners if present
-        def oldQE = queryEngines.get(ontId)
-        oldQE?.getoReasoner()?.dispose()
+        long indexStart = System.currentTimeMillis()
+        def lookupIndex = new EntityLookupIndex(ontology)
+        println "Built entity lookup index for ${ontId}: ${lookupIndex.size()} keys, ~${lookupIndex.estimatedBytes() >> 10} KB in ${System.currentTimeMillis() - indexStart} ms"
 
         // Check for excessive unsatisfiable classes -> fall back to structural
+        String status
         def unsatCount = oReasoner.getEquivalentClasses(df.getOWLNothing()).getEntitiesMinusBottom().size()
         if (unsatCount >= MAX_UNSATISFIABLE_CLASSES) {
             oReasoner.dispose()
             oReasoner = sReasoner
-            loadStati.put(ontId, "incoherent")
+            status = "incoherent"
             println "Classified ${ontId} but switched to structural reasoner (${unsatCount} unsatisfiable classes)"
         } else {
-            loadStati.put(ontId, "classified")
+            status = "classified"
             println "Successfully classified ${ontId}"
         }
 
-        reasoners.put(ontId, oReasoner)
-        structReasoners.put(ontId, sReasoner)
-        queryEngines.put(ontId, new QueryEngine(oReasoner, sfp))
-        shortFormProviders.put(ontId, sfp)
-        iriShortFormProviders.put(ontId, iriSfp)
+        long hierarchyStart = System.currentTimeMillis()
+        def hierarchy = new HierarchySnapshot(ontology, oReasoner)
+        println "Built hierarchy snapshot for ${ontId}: ${hierarchy.nodeCount()} nodes, ${hierarchy.edgeCount()} edges, ~${hierarchy.estimatedBytes() >> 10} KB in ${System.currentTimeMillis() - hierarchyStart} ms"
+
+        def qEngine = new QueryEngine(oReasoner, sfp, lookupIndex)
+        def roots = findRootClasses(ontId, ontology, qEngine)
+        return new OntologyGeneration(generationCounter.incrementAndGet(), ontId, path, rType,
+            manager, ontology, oReasoner, sReasoner, qEngine, sfp, iriSfp, lookupIndex, hierarchy, status, roots)
+    }
+
+    /**
+     * Make `gen` the served generation of its ontology: one write to
+     * `generations`, then the per-ontology maps, then the cheap derived
+     * state (examples, rendered root classes). Returns the generation it
+     * replaced, which the caller retires.
+     */
+    private OntologyGeneration publish(OntologyGeneration gen) {
+        String ontId = gen.ontologyId
+        def previous = generations.put(ontId, gen)
+
+        ontologies.put(ontId, gen.ontology)
+        oManagers.put(ontId, gen.manager)
+        if (gen.path != null) ontologyPaths.put(ontId, gen.path)
+        reasonerTypes.put(ontId, gen.reasonerType)
+        reasoners.put(ontId, gen.reasoner)
+        structReasoners.put(ontId, gen.structReasoner)
+        entityIndexes.put(ontId, gen.lookupIndex)
+        hierarchies.put(ontId, gen.hierarchy)
+        queryEngines.put(ontId, gen.queryEngine)
+        shortFormProviders.put(ontId, gen.shortFormProvider)
+        iriShortFormProviders.put(ontId, gen.iriShortFormProvider)
+        loadStati.put(ontId, gen.status)
+        taxonomySnapshots.remove(ontId)
+        // Results and records of the previous generation are stale.
+        queryCache.invalidateOntology(ontId)
+        classInfoCache.invalidateOntology(ontId, gen.version)
+        statisticsCache.remove(ontId)
 
         findExampleClassesAndExpressions(ontId)
         precomputeRootClasses(ontId)
-        println "Classification complete for ${ontId}"
+        if (classInfoCache.precompute) {
+            precomputeClassInfo(ontId)
+        }
+        if (taxonomySnapshotDir != null) {
+            saveTaxonomySnapshot(gen)
+        }
+        println "Classification complete for ${ontId} (generation ${gen.version})"
+        return previous
+    }
+
+    /**
+     * The served generation of `ontId`, pinned (the caller releases it), or
+     * null when there is none. Re-checked after pinning: a generation that
+     * was replaced in between may already be draining for disposal, so the
+     * pin is dropped and the new one is taken instead.
+     */
+    private OntologyGeneration acquireGeneration(String ontId) {
+        while (true) {
+            def gen = generations.get(ontId)
+            if (gen == null) return null
+            gen.acquire()
+            if (generations.get(ontId)?.is(gen)) return gen
+            gen.release()
+        }
     }
 
     /**
-     * Classify all loaded ontologies in parallel using GParsPool.
+     * Dispose a generation that is no longer published, once the queries
+     * still running on it have finished (or RELOAD_DRAIN_TIMEOUT_MS passed).
+     */
+    private void retire(OntologyGeneration old) {
+        if (old == null) return
+        if (!old.drain(RELOAD_DRAIN_TIMEOUT_MS)) {
+            println "Disposing generation ${old.version} of ${old.ontologyId} with ${old.inFlight()} queries still running"
+        }
+        old.dispose()
+    }
+
+    // -----------------------------------------------------------------------
+    // Taxonomy snapshots
+    // -----------------------------------------------------------------------
+
+    /**
+     * Start serving `ontId` from its persisted TaxonomySnapshot, if one
+     * matches the current OWL file and reasoner. Called at startup before
+     * the ontology is loaded; returns false (and serves nothing) when
+     * snapshots are disabled, none matches or the file is unreadable.
+     */
+    boolean restoreTaxonomySnapshot(String ontId, String ontIRI, String reasonerType) {
+        if (taxonomySnapshotDir == null) return false
+        try {
+            long start = System.currentTimeMillis()
+            def fingerprint = TaxonomySnapshot.fingerprint(new File(ontIRI), reasonerType ?: "elk")
+            ontologyFingerprints.put(ontId, fingerprint)
+            def file = TaxonomySnapshot.fileFor(taxonomySnapshotDir, ontId, fingerprint)
+            if (!file.exists()) return false
+            def taxonomy = TaxonomySnapshot.open(file)
+            reasonerTypes.put(ontId, reasonerType ?: "elk")
+            ontologyPaths.put(ontId, ontIRI)
+            hierarchies.put(ontId, taxonomy.hierarchy)
+            rootClassCache.put(ontId, taxonomy.rootInfos())
+            taxonomySnapshots.put(ontId, taxonomy)
+            println "Serving ${ontId} from taxonomy snapshot ${file.name}: ${taxonomy.classCount()} classes in ${System.currentTimeMillis() - start} ms"
+            return true
+        } catch (Exception e) {
+            println "Could not restore taxonomy snapshot for ${ontId}: ${e.getMessage()}"
+            return false
+        }
+    }
+
+    /**
+     * Persist the freshly classified hierarchy, root classes and class info
+     * of generation `gen` on the background writer thread, unless a snapshot
+     * for the same file and reasoner already exists. Class info is rendered
+     * without going through classInfoCache, whose budget is for what queries
+     * ask for.
+     */
+    private void saveTaxonomySnapshot(OntologyGeneration gen) {
+        def ontId = gen.ontologyId
+        def hierarchy = gen.hierarchy
+        def fingerprint = ontologyFingerprints.get(ontId)
+        def sfp = gen.shortFormProvider
+        if (fingerprint == null || sfp == null) return
+        def file = TaxonomySnapshot.fileFor(taxonomySnapshotDir, ontId, fingerprint)
+        if (file.exists()) return
+        List<OWLClass> roots = (rootClassCache.get(ontId) ?: []).collect { df.getOWLClass(IRI.create(it["class"])) }
+        taxonomyWriter.submit({
+            // Reclassified or disposed while queued: that run saves its own.
+            if (hierarchies.get(ontId) !== hierarchy) return
+            try {
+                long start = System.currentTimeMillis()
+                long size = TaxonomySnapshot.write(file, ontId, hierarchy, roots) { OWLClass c -> renderInfo(ontId, gen.ontology, c, false, sfp) }
+                println "Wrote taxonomy snapshot for ${ontId}: ${size >> 10} KB in ${System.currentTimeMillis() - start} ms"
+            } catch (Exception e) {
+                println "Failed writing taxonomy snapshot for ${ontId}: ${e.getMessage()}"
+            }
+        } as Runnable)
+    }
+
+    /**
+     * Classify all loaded ontologies in parallel on the classification pool.
+     * When its queue is full the calling thread classifies the next ontology
+     * itself, which also paces the submissions.
      */
     void createAllReasoners() {
         def ontIds = new ArrayList(ontologies.keySet())
@@ -265,18 +517,26 @@ public class RequestManager {
             println "No ontologies to classify"
             return
         }
-        println "Classifying ${ontIds.size()} ontologies in parallel..."
-        GParsPool.withPool(PARALLEL_THREADS) {
-            ontIds.eachParallel { ontId ->
-                try {
-                    createReasoner(ontId)
-                } catch (Exception e) {
-                    loadStati.put(ontId, "error")
-                    println "ERROR classifying ${ontId}: ${e.getMessage()}"
-                    e.printStackTrace()
-                }
+        println "Classifying ${ontIds.size()} ontologies on ${classificationPool.threads} threads..."
+        def classifyOne = { String ontId ->
+            try {
+                createReasoner(ontId)
+            } catch (Exception e) {
+                loadStati.put(ontId, "error")
+                println "ERROR classifying ${ontId}: ${e.getMessage()}"
+                e.printStackTrace()
             }
+            return null
         }
+        List<Future> pending = []
+        ontIds.each { ontId ->
+            try {
+                pending << classificationPool.submit({ classifyOne(ontId) } as Callable)
+            } catch (RejectedExecutionException e) {
+                classifyOne(ontId)
+            }
+        }
+        pending.each { it.get() }
         println "All ontologies classified"
     }
 
@@ -291,18 +551,60 @@ public class RequestManager {
         reloadOntology(ontId, ontIRI, reasonerTypes.get(ontId) ?: "elk")
     }
 
+    /**
+     * Blue/green reload: the new version is parsed and classified next to
+     * the one being served, which keeps answering queries until the new
+     * generation is published. The old generation is disposed after its
+     * in-flight queries drain. Throws IllegalStateException, and leaves the
+     * served version alone, if the staging cost would not fit in the heap;
+     * on a failed load or classification the served version stays as well.
+     */
     void reloadOntology(String ontId, String ontIRI, String reasonerType) {
+        String rType = reasonerType ?: "elk"
         println "Reloading ontology ${ontId} from ${ontIRI}"
-        disposeOntology(ontId)
-        loadOntology(ontId, ontIRI, reasonerType)
-        createReasoner(ontId)
+        checkStagingHeadroom(ontId, ontIRI)
+        if (!staging.add(ontId)) {
+            throw new IllegalStateException("A reload of ${ontId} is already in progress")
+        }
+        try {
+            String fingerprint = taxonomySnapshotDir != null ? TaxonomySnapshot.fingerprint(new File(ontIRI), rType) : null
+            def (OWLOntologyManager lManager, OWLOntology ontology, Map footprint) = parseOntology(ontId, ontIRI)
+            println "Staged ontology ${ontId}; classifying next to the served version"
+            def gen = classify(ontId, ontIRI, rType, lManager, ontology)
+            if (fingerprint != null) ontologyFingerprints.put(ontId, fingerprint)
+            loadFootprints.put(ontId, footprint)
+            def previous = publish(gen)
+            retire(previous)
+        } finally {
+            staging.remove(ontId)
+        }
         println "Reloaded ontology ${ontId}"
     }
 
+    /**
+     * Refuse to stage a reload that would not fit next to the served
+     * generation: RELOAD_HEAP_FACTOR x the file size plus
+     * RELOAD_HEAP_HEADROOM_MB must be available in the heap.
+     */
+    private void checkStagingHeadroom(String ontId, String ontIRI) {
+        long needed = (long) (new File(ontIRI).length() * RELOAD_HEAP_FACTOR) + RELOAD_HEAP_HEADROOM_BYTES
+        Runtime rt = Runtime.getRuntime()
+        long available = rt.maxMemory() - (rt.totalMemory() - rt.freeMemory())
+        if (available < needed) {
+            // Used heap includes garbage; count only what survives a collection.
+            System.gc()
+            available = rt.maxMemory() - (rt.totalMemory() - rt.freeMemory())
+        }
+        if (available < needed) {
+            throw new IllegalStateException("Not enough heap to stage ${ontId}: needs ~${needed >> 20} MB, ${available >> 20} MB available")
+        }
+    }
+
     /**
      * Dispose all resources for a specific ontology.
      */
     void disposeOntology(String ontId) {
+        generations.remove(ontId)
         try {
             def oReasoner = reasoners.remove(ontId)
             def sReasoner = structReasoners.remove(ontId)
@@ -318,6 +620,11 @@ public class RequestManager {
             println "Error during dispose for ${ontId}: ${e.getMessage()}"
         }
         queryEngines.remove(ontId)
+        entityIndexes.remove(ontId)
+        hierarchies.remove(ontId)
+        taxonomySnapshots.remove(ontId)
+        ontologyFingerprints.remove(ontId)
+        loadFootprints.remove(ontId)
         shortFormProviders.remove(ontId)
         iriShortFormProviders.remove(ontId)
         ontologies.remove(ontId)
@@ -329,7 +636,9 @@ public class RequestManager {
         exampleSubclassExpressions.remove(ontId)
         exampleSubclassExpressionTexts.remove(ontId)
         rootClassCache.remove(ontId)
-        queryCache.keySet().removeIf { it.startsWith("${ontId}|") }
+        statisticsCache.remove(ontId)
+        queryCache.invalidateOntology(ontId)
+        classInfoCache.invalidateOntology(ontId)
         println "Disposed all resources for ${ontId}"
     }
 
@@ -350,15 +659,36 @@ public class RequestManager {
 
     /**
      * List all loaded ontology IDs with their status and reasoner type.
+     * `serving` is "snapshot-serving" while an ontology is answered from its
+     * persisted taxonomy snapshot and "fully classified" once it has a
+     * reasoner again. `loadFootprint` is what parseOntology kept and
+     * released.
      */
     List<Map> listOntologies() {
-        return ontologies.keySet().collect { ontId ->
+        def ontIds = new LinkedHashSet<String>(ontologies.keySet())
+        ontIds.addAll(taxonomySnapshots.keySet())
+        return ontIds.collect { ontId ->
+            def lookupIndex = entityIndexes.get(ontId)
+            def sfp = shortFormProviders.get(ontId)
+            def hierarchy = hierarchies.get(ontId)
+            def taxonomy = taxonomySnapshots.get(ontId)
             [
                 ontologyId: ontId,
                 status: loadStati.get(ontId) ?: "unknown",
+                serving: taxonomy != null ? "snapshot-serving" : (queryEngines.containsKey(ontId) ? "fully classified" : "not serving"),
+                generation: generations.get(ontId)?.version ?: 0,
+                reloading: staging.contains(ontId),
                 reasonerType: reasonerTypes.get(ontId) ?: "unknown",
                 path: ontologyPaths.get(ontId) ?: "",
-                classCount: ontologies.get(ontId)?.getClassesInSignature(true)?.size() ?: 0
+                classCount: ontologies.get(ontId)?.getClassesInSignature(true)?.size() ?: (taxonomy?.classCount() ?: 0),
+                lookupIndexKeys: lookupIndex?.size() ?: 0,
+                lookupIndexBytes: lookupIndex?.estimatedBytes() ?: 0,
+                shortFormIndexEntries: sfp?.size() ?: 0,
+                shortFormIndexBytes: sfp?.estimatedBytes() ?: 0,
+                hierarchyNodes: hierarchy?.nodeCount() ?: 0,
+                hierarchyEdges: hierarchy?.edgeCount() ?: 0,
+                hierarchyBytes: hierarchy?.estimatedBytes() ?: 0,
+                loadFootprint: loadFootprints.get(ontId) ?: [:]
             ]
         }
     }
@@ -367,7 +697,7 @@ public class RequestManager {
      * Check if a specific ontology is loaded.
      */
     boolean hasOntology(String ontId) {
-        return ontologies.containsKey(ontId)
+        return ontologies.containsKey(ontId) || taxonomySnapshots.containsKey(ontId)
     }
 
     /**
@@ -377,6 +707,54 @@ public class RequestManager {
         return loadStati.get(ontId)
     }
 
+    /**
+     * getStatistics.groovy payload for an ontology as [json: rendered
+     * response, etag: quoted ETag, summary: id/reasoner/status], or null when the
+     * ontology is not loaded. Metadata and counts are computed once per
+     * published generation (and again if metadata.json changes); status,
+     * reasoner type and example expressions are cheap and checked on every
+     * call, and the JSON and ETag are re-rendered only when they change.
+     */
+    Map getStatistics(String ontId) {
+        def gen = generations.get(ontId)
+        OWLOntology ontology = gen?.ontology ?: ontologies.get(ontId)
+        if (ontology == null) return null
+        long version = gen?.version ?: 0L
+        def path = ontologyPaths.get(ontId)
+        File metaFile = path ? new File(new File(path).getParentFile(), "metadata.json") : null
+        long metaModified = (metaFile != null && metaFile.exists()) ? metaFile.lastModified() : 0L
+
+        def entry = statisticsCache.get(ontId)
+        Map metadata = entry?.metadata
+        Map counts = entry?.counts
+        if (entry == null || entry.version != version || entry.metaModified != metaModified) {
+            long start = System.currentTimeMillis()
+            metadata = OntologyStatistics.metadata(ontology, metaFile)
+            counts = OntologyStatistics.counts(ontology)
+            println "Computed statistics for ${ontId} (generation ${version}) in ${System.currentTimeMillis() - start} ms"
+            entry = null
+        }
+
+        def summary = [
+            "ontology_id": ontId,
+            "reasoner_type": reasonerTypes.get(ontId) ?: "unknown",
+            "status": getStatus(ontId) ?: "unknown"
+        ]
+        def examples = [
+            "exampleSuperclassLabel": exampleSuperclassLabels.get(ontId) ?: "",
+            "exampleSubclassExpression": exampleSubclassExpressions.get(ontId) ?: "",
+            "exampleSubclassExpressionText": exampleSubclassExpressionTexts.get(ontId) ?: ""
+        ]
+        if (entry != null && entry.summary == summary && entry.examples == examples) return entry
+
+        def json = JsonOutput.toJson(summary + metadata + examples + counts)
+        def etag = '"' + json.digest("SHA-1").substring(0, 20) + '"'
+        entry = [version: version, metaModified: metaModified, metadata: metadata, counts: counts,
+                 summary: summary, examples: examples, json: json, etag: etag]
+        statisticsCache.put(ontId, entry)
+        return entry
+    }
+
     /**
      * Run a DL query against a specific ontology (by OWLClassExpression).
      */
@@ -431,37 +809,357 @@ public class RequestManager {
             default: requestType = RequestType.SUBEQ; break
         }
 
-        def qEngine = queryEngines.get(ontId)
-        if (qEngine == null) {
+        def gen = acquireGeneration(ontId)
+        if (gen == null) {
+            def taxonomy = taxonomySnapshots.get(ontId)
+            if (taxonomy != null) {
+                return snapshotQuery(ontId, taxonomy, mOwlQuery, requestType, direct, axioms, shortform)
+            }
             throw new IllegalArgumentException("Ontology not loaded or not classified: ${ontId}")
         }
 
-        def currentSfp = (shortform == 'iri') ? iriShortFormProviders.get(ontId) : shortFormProviders.get(ontId)
+        // Pinned by acquireGeneration, so a concurrent reload does not
+        // dispose its reasoner under us.
+        try {
+            def qEngine = gen.queryEngine
+            def currentSfp = (shortform == 'iri') ? gen.iriShortFormProvider : gen.shortFormProvider
+
+            // Fast path: root class query served from pre-computed cache
+            if (direct && type == "subclass" && !axioms
+                    && (mOwlQuery == '<http://www.w3.org/2002/07/owl#Thing>'
+                        || mOwlQuery == 'http://www.w3.org/2002/07/owl#Thing')) {
+                def cached = rootClassCache.get(ontId)
+                if (cached != null) return cached
+            }
+
+            // General query cache (keyed by ontId + generation + query + type + direct + axioms)
+            def cacheKey = "${ontId}|${gen.version}|${mOwlQuery}|${type}|${direct}|${axioms}".toString()
+            def cached = queryCache.get(ontId, cacheKey)
+            if (cached != null) return cached as Set
+
+            return queryFlights.run(cacheKey) {
+                Set<OWLClass> fromSnapshot = snapshotClasses(gen.hierarchy, { n -> gen.lookupIndex.getOWLClass(n) }, mOwlQuery, requestType, direct)
+                Set resultSet = Sets.newHashSet(Iterables.limit(
+                    fromSnapshot != null ? fromSnapshot : qEngine.getClasses(mOwlQuery, requestType, direct, labels),
+                    MAX_REASONER_RESULTS))
+                resultSet.remove(df.getOWLNothing())
+                resultSet.remove(df.getOWLThing())
+                def classes = classes2info(gen, resultSet, axioms, currentSfp)
+                def result = classes.sort { x, y -> x["label"].compareTo(y["label"]) }
+
+                queryCache.put(ontId, cacheKey, result)
+                return result
+            } as Set
+        } finally {
+            gen.release()
+        }
+    }
+
+    /**
+     * Number of classes runQuery would return, without rendering them.
+     * Transitive subclass/superclass queries of a named class are answered
+     * from the HierarchySnapshot (descendantCount/ancestorCount, satisfiable
+     * classes only), other named-class queries from its adjacency and class
+     * expressions by the reasoner. owl:Thing and owl:Nothing are not
+     * counted; deprecated classes and MAX_REASONER_RESULTS are not applied.
+     */
+    int countQuery(String ontId, String mOwlQuery, String type, boolean direct, boolean labels) {
+        type = type.toLowerCase()
+        def requestType
+        switch (type) {
+            case "superclass": requestType = RequestType.SUPERCLASS; break
+            case "subclass": requestType = RequestType.SUBCLASS; break
+            case "equivalent": requestType = RequestType.EQUIVALENT; break
+            case "supeq": requestType = RequestType.SUPEQ; break
+            case "subeq": requestType = RequestType.SUBEQ; break
+            case "realize": requestType = RequestType.REALIZE; break
+            default: requestType = RequestType.SUBEQ; break
+        }
+
+        def gen = acquireGeneration(ontId)
+        if (gen == null) {
+            def taxonomy = taxonomySnapshots.get(ontId)
+            if (taxonomy != null) {
+                Integer count = hierarchyCount(taxonomy.hierarchy, { n -> taxonomy.classForName(n) }, mOwlQuery, requestType, direct)
+                if (count != null) return count
+                throw new IllegalStateException("${ontId} is being classified; until then only named-class hierarchy queries are available")
+            }
+            throw new IllegalArgumentException("Ontology not loaded or not classified: ${ontId}")
+        }
+
+        try {
+            Integer count = hierarchyCount(gen.hierarchy, { n -> gen.lookupIndex.getOWLClass(n) }, mOwlQuery, requestType, direct)
+            if (count != null) return count
+            Set classes = new HashSet(gen.queryEngine.getClasses(mOwlQuery, requestType, direct, labels))
+            classes.remove(df.getOWLNothing())
+            classes.remove(df.getOWLThing())
+            return classes.size()
+        } finally {
+            gen.release()
+        }
+    }
+
+    // countQuery from the hierarchy, or null when the query is not a named class in it.
+    private Integer hierarchyCount(HierarchySnapshot hierarchy, Closure<OWLClass> byName, String mOwlQuery, RequestType requestType, boolean direct) {
+        if (hierarchy == null) return null
+        if (!direct) {
+            OWLClass c = namedClass(mOwlQuery, byName)
+            if (c == null || !hierarchy.contains(c)) return null
+            if (requestType == RequestType.SUBCLASS) return hierarchy.descendantCount(c)
+            if (requestType == RequestType.SUPERCLASS) return hierarchy.ancestorCount(c)
+        }
+        Set<OWLClass> classes = snapshotClasses(hierarchy, byName, mOwlQuery, requestType, direct)
+        if (classes == null) return null
+        return classes.count { OWLClass c -> !c.isOWLThing() && !c.isOWLNothing() } as int
+    }
+
+    /**
+     * Streaming variant of runQuery for the NDJSON response mode: hands each
+     * class info map to `emit` as soon as it is built instead of collecting,
+     * sorting and caching the whole result. A cached result (query cache or
+     * root-class cache) is replayed. At most `limit` records are emitted;
+     * returns [count: n, truncated: bool]. Parse errors are thrown before
+     * the first record is emitted, so callers can still set an error status.
+     */
+    Map streamQuery(String ontId, String mOwlQuery, String type, boolean direct, boolean labels, boolean axioms, String shortform, int limit, Closure emit) {
+        type = type.toLowerCase()
+        def requestType
+        switch (type) {
+            case "superclass": requestType = RequestType.SUPERCLASS; break
+            case "subclass": requestType = RequestType.SUBCLASS; break
+            case "equivalent": requestType = RequestType.EQUIVALENT; break
+            case "supeq": requestType = RequestType.SUPEQ; break
+            case "subeq": requestType = RequestType.SUBEQ; break
+            case "realize": requestType = RequestType.REALIZE; break
+            default: requestType = RequestType.SUBEQ; break
+        }
+
+        def gen = acquireGeneration(ontId)
+        if (gen == null) {
+            def taxonomy = taxonomySnapshots.get(ontId)
+            if (taxonomy == null) {
+                throw new IllegalArgumentException("Ontology not loaded or not classified: ${ontId}")
+            }
+            int served = 0
+            for (def info : snapshotQuery(ontId, taxonomy, mOwlQuery, requestType, direct, axioms, shortform)) {
+                if (served >= limit) return [count: served, truncated: true]
+                emit(info)
+                served++
+            }
+            return [count: served, truncated: false]
+        }
+
+        try {
+            def qEngine = gen.queryEngine
+            def currentSfp = (shortform == 'iri') ? gen.iriShortFormProvider : gen.shortFormProvider
+
+            def cached = null
+            if (direct && type == "subclass" && !axioms
+                    && (mOwlQuery == '<http://www.w3.org/2002/07/owl#Thing>'
+                        || mOwlQuery == 'http://www.w3.org/2002/07/owl#Thing')) {
+                cached = rootClassCache.get(ontId)
+            }
+            if (cached == null) {
+                cached = queryCache.get(ontId, "${ontId}|${gen.version}|${mOwlQuery}|${type}|${direct}|${axioms}".toString())
+            }
+
+            int count = 0
+            if (cached != null) {
+                for (def info : cached) {
+                    if (count >= limit) return [count: count, truncated: true]
+                    emit(info)
+                    count++
+                }
+                return [count: count, truncated: false]
+            }
+
+            Set<OWLClass> fromSnapshot = snapshotClasses(gen.hierarchy, { n -> gen.lookupIndex.getOWLClass(n) }, mOwlQuery, requestType, direct)
+            def classes = Iterables.limit(
+                fromSnapshot != null ? fromSnapshot : qEngine.getClasses(mOwlQuery, requestType, direct, labels),
+                MAX_REASONER_RESULTS)
+            for (OWLClass c : classes) {
+                if (c.isOWLThing() || c.isOWLNothing()) continue
+                def info = toInfo(gen, c, axioms, currentSfp)
+                if (info["deprecated"]) continue
+                if (count >= limit) return [count: count, truncated: true]
+                emit(info)
+                count++
+            }
+            return [count: count, truncated: false]
+        } finally {
+            gen.release()
+        }
+    }
 
-        // Fast path: root class query served from pre-computed cache
-        if (direct && type == "subclass" && !axioms
+    /**
+     * Answer a sub/super/equivalent query on a single named class from a
+     * HierarchySnapshot. The query must be an IRI (`<http://...>` or bare
+     * `http://...`) or a single quoted/plain name `byName` resolves to a
+     * class. Returns null for anything else (class expressions, REALIZE,
+     * unknown classes, no snapshot) so the caller falls back to the
+     * reasoner. Result sets follow QueryEngine.getClasses.
+     */
+    private Set<OWLClass> snapshotClasses(HierarchySnapshot hierarchy, Closure<OWLClass> byName, String mOwlQuery, RequestType requestType, boolean direct) {
+        if (hierarchy == null) return null
+        OWLClass c = namedClass(mOwlQuery, byName)
+        if (c == null || !hierarchy.contains(c)) return null
+
+        switch (requestType) {
+            case RequestType.SUBCLASS: return hierarchy.subClasses(c, direct)
+            case RequestType.SUPERCLASS: return hierarchy.superClasses(c, direct)
+            case RequestType.EQUIVALENT: return hierarchy.equivalentClasses(c)
+            case RequestType.SUBEQ:
+                def sub = hierarchy.subClasses(c, direct)
+                sub.addAll(hierarchy.equivalentClasses(c))
+                return sub
+            case RequestType.SUPEQ:
+                def sup = hierarchy.superClasses(c, direct)
+                sup.addAll(hierarchy.equivalentClasses(c))
+                return sup
+            default: return null
+        }
+    }
+
+    /**
+     * The named class a query denotes: an IRI (`<http://...>` or bare
+     * `http://...`) or a single quoted/plain name `byName` resolves. Null
+     * for anything else, e.g. a class expression.
+     */
+    private OWLClass namedClass(String mOwlQuery, Closure<OWLClass> byName) {
+        if (mOwlQuery == null) return null
+        String q = mOwlQuery.trim()
+        if (q.startsWith("<") && q.endsWith(">") && !q.contains(" ")) {
+            return df.getOWLClass(IRI.create(q.substring(1, q.length() - 1)))
+        } else if ((q.startsWith("http://") || q.startsWith("https://")) && !q.contains(" ")) {
+            return df.getOWLClass(IRI.create(q))
+        } else if ((q.length() > 2 && q.startsWith("'") && q.endsWith("'") && q.indexOf("'", 1) == q.length() - 1)
+                   || q ==~ /[A-Za-z_][A-Za-z0-9_:\-]*/) {
+            return byName(q)
+        }
+        return null
+    }
+
+    /**
+     * runQuery for an ontology that is being loaded and classified again
+     * and meanwhile served from its TaxonomySnapshot. The snapshot holds
+     * the hierarchy and label-mode class info without axioms, so only
+     * named-class queries in that form are answered; anything else throws
+     * IllegalStateException until classification finishes.
+     */
+    private List snapshotQuery(String ontId, TaxonomySnapshot taxonomy, String mOwlQuery, RequestType requestType, boolean direct, boolean axioms, String shortform) {
+        if (!axioms && direct && requestType == RequestType.SUBCLASS
                 && (mOwlQuery == '<http://www.w3.org/2002/07/owl#Thing>'
                     || mOwlQuery == 'http://www.w3.org/2002/07/owl#Thing')) {
-            def cached = rootClassCache.get(ontId)
-            if (cached != null) return cached
+            def roots = rootClassCache.get(ontId)
+            if (roots != null) return roots
+        }
+        Set<OWLClass> classes = (axioms || shortform == 'iri') ? null
+            : snapshotClasses(taxonomy.hierarchy, { n -> taxonomy.classForName(n) }, mOwlQuery, requestType, direct)
+        if (classes == null) {
+            throw new IllegalStateException("${ontId} is being classified; until then only named-class hierarchy queries without axioms are available")
         }
+        def result = new ArrayList<Map>()
+        for (OWLClass c : Iterables.limit(classes, MAX_REASONER_RESULTS)) {
+            if (c.isOWLThing() || c.isOWLNothing()) continue
+            def info = taxonomy.info(c)
+            if (info != null && !info["deprecated"]) result.add(info)
+        }
+        return result.sort { x, y -> x["label"].compareTo(y["label"]) }
+    }
 
-        // General query cache (keyed by ontId + query + type + direct + axioms)
-        def cacheKey = "${ontId}|${mOwlQuery}|${type}|${direct}|${axioms}"
-        def cached = queryCache.get(cacheKey)
-        if (cached != null) {
-            long age = System.currentTimeMillis() - (cached[0] as long)
-            if (age < QUERY_CACHE_TTL_MS) return cached[1] as Set
+    /**
+     * Where a named class sits in the hierarchy, for the browser, answered
+     * from the HierarchySnapshot in one upward walk instead of a reasoner
+     * query per level. Returns
+     *   [result: [top-level class info, ...], paths: [[iri, ...], ...], truncated: bool]
+     * `result` lists every direct subclass of owl:Thing. Each ancestor of the
+     * class carries `children`: all of them, since ancestors form a DAG
+     * rather than a chain. An ancestor that occurs under several parents is
+     * expanded at its first occurrence only. Ancestors at most
+     * `contextDepth` levels above the class list all their direct
+     * subclasses (the siblings of the ancestor below); farther ones only
+     * the ancestors below them. The class itself lists its direct
+     * subclasses. `paths` are routes from a top-level class down to the
+     * class, at most FIND_ROOT_MAX_PATHS of them (`truncated` says whether
+     * there are more). Class info is rendered once per class after the
+     * structure is known, without touching the reasoner; while the ontology
+     * is served from its TaxonomySnapshot it comes without axioms. An
+     * unknown or unsatisfiable class gets the top level only.
+     */
+    Map findRoot(String ontId, String mOwlQuery, int contextDepth, boolean axioms, String shortform) {
+        def gen = acquireGeneration(ontId)
+        if (gen == null) {
+            def taxonomy = taxonomySnapshots.get(ontId)
+            if (taxonomy == null) {
+                throw new IllegalArgumentException("Ontology not loaded or not classified: ${ontId}")
+            }
+            if (shortform == 'iri') {
+                throw new IllegalStateException("${ontId} is being classified; until then only label short forms are available")
+            }
+            return ancestorTree(taxonomy.hierarchy, namedClass(mOwlQuery, { n -> taxonomy.classForName(n) }),
+                                contextDepth, { OWLClass c -> taxonomy.info(c) })
         }
 
-        Set resultSet = Sets.newHashSet(Iterables.limit(qEngine.getClasses(mOwlQuery, requestType, direct, labels), MAX_REASONER_RESULTS))
-        resultSet.remove(df.getOWLNothing())
-        resultSet.remove(df.getOWLThing())
-        def classes = classes2info(ontId, resultSet, axioms, currentSfp)
-        def result = classes.sort { x, y -> x["label"].compareTo(y["label"]) }
+        try {
+            def currentSfp = (shortform == 'iri') ? gen.iriShortFormProvider : gen.shortFormProvider
+            return ancestorTree(gen.hierarchy, namedClass(mOwlQuery, { n -> gen.lookupIndex.getOWLClass(n) }),
+                                contextDepth, { OWLClass c -> toInfo(gen, c, axioms, currentSfp) })
+        } finally {
+            gen.release()
+        }
+    }
 
-        queryCache.put(cacheKey, [System.currentTimeMillis(), result] as Object[])
-        return result
+    private Map ancestorTree(HierarchySnapshot hierarchy, OWLClass c, int contextDepth, Closure<Map> render) {
+        int target = (c != null) ? hierarchy.nodeId(c) : -1
+        if (target == hierarchy.bottomId) target = -1
+        Map<Integer, Integer> depths = target >= 0 ? hierarchy.ancestorDepths(target) : [:]
+        List<int[]> paths = target >= 0 ? hierarchy.pathsTo(target, FIND_ROOT_MAX_PATHS + 1) : []
+        boolean truncated = paths.size() > FIND_ROOT_MAX_PATHS
+        if (truncated) paths = paths.subList(0, FIND_ROOT_MAX_PATHS)
+
+        // Structure first, as [node id, child structures or null].
+        Set<Integer> expanded = new HashSet<>()
+        Closure<List> level
+        level = { int parent, boolean all ->
+            def out = []
+            for (int child : hierarchy.childIds(parent)) {
+                Integer d = depths.get(child)
+                if (d == null && !all) continue
+                List sub = (d != null && expanded.add(child)) ? level(child, d <= contextDepth) : null
+                out.add([child, sub])
+            }
+            return out
+        }
+        def structure = level(hierarchy.topId, true)
+
+        // Then class info, once per node. Entries are copies: the rendered
+        // maps may be shared with classInfoCache.
+        Map<Integer, List<Map>> infos = new HashMap<>()
+        Closure<List<Map>> infosOf = { int id ->
+            List<Map> rendered = infos.get(id)
+            if (rendered == null) {
+                rendered = hierarchy.membersOf(id).collect { render(it) }.findAll { it != null && !it["deprecated"] }
+                infos.put(id, rendered)
+            }
+            return rendered
+        }
+        Closure<List> toJson
+        toJson = { List nodes ->
+            def out = []
+            for (def node : nodes) {
+                for (Map info : infosOf(node[0])) {
+                    def entry = new LinkedHashMap(info)
+                    if (node[1] != null) entry["children"] = toJson(node[1])
+                    out.add(entry)
+                }
+            }
+            return out.sort { x, y -> x["label"].compareTo(y["label"]) }
+        }
+
+        def iris = paths.collect { int[] path ->
+            path.collect { int id -> id == target ? c.getIRI().toString() : hierarchy.membersOf(id)[0].getIRI().toString() }
+        }
+        return [result: toJson(structure), paths: iris, truncated: truncated]
     }
 
     Set runQuery(String ontId, String mOwlQuery, String type, boolean direct, boolean labels, boolean axioms) {
@@ -472,34 +1170,115 @@ public class RequestManager {
         return runQuery(ontId, mOwlQuery, type, false, false, false, null)
     }
 
+    /**
+     * Look up many classes by IRI in one call. IRIs may be bare or in angle
+     * brackets and are reported back as given. Returns
+     *   [found: [iri: info map], missing: [iri, ...]]
+     * where a class is found when it is in the ontology's signature. Info
+     * maps come from toInfo (so classInfoCache), deprecated classes
+     * included and flagged. While the ontology is being classified again,
+     * lookups without axioms are answered from its TaxonomySnapshot.
+     */
+    Map getClasses(String ontId, Collection<String> iris, boolean axioms, String shortform) {
+        def found = new LinkedHashMap<String, Map>()
+        def missing = new ArrayList<String>()
+        def gen = acquireGeneration(ontId)
+        if (gen == null) {
+            def taxonomy = taxonomySnapshots.get(ontId)
+            if (taxonomy == null) {
+                throw new IllegalArgumentException("Ontology not loaded or not classified: ${ontId}")
+            }
+            if (axioms || shortform == 'iri') {
+                throw new IllegalStateException("${ontId} is being classified; until then only lookups without axioms are available")
+            }
+            for (String iri : iris) {
+                def info = taxonomy.info(classForIri(iri))
+                if (info != null) found.put(iri, info)
+                else missing.add(iri)
+            }
+            return [found: found, missing: missing]
+        }
+
+        try {
+            def currentSfp = (shortform == 'iri') ? gen.iriShortFormProvider : gen.shortFormProvider
+            for (String iri : iris) {
+                OWLClass c = classForIri(iri)
+                if (gen.ontology.containsClassInSignature(c.getIRI(), true)) {
+                    found.put(iri, toInfo(gen, c, axioms, currentSfp))
+                } else {
+                    missing.add(iri)
+                }
+            }
+            return [found: found, missing: missing]
+        } finally {
+            gen.release()
+        }
+    }
+
+    private OWLClass classForIri(String iri) {
+        String s = iri.trim()
+        if (s.startsWith("<") && s.endsWith(">")) s = s.substring(1, s.length() - 1).trim()
+        return df.getOWLClass(IRI.create(s))
+    }
+
     /**
      * Run a DL query against multiple ontologies in parallel, aggregating
      * results. Each result entry is tagged with its source `ontology` id so
      * the central server doesn't need to do it. Unknown ontology ids and
-     * per-ontology errors are silently skipped (fail-soft, matching the old
+     * per-ontology errors are skipped (fail-soft, matching the old
      * aberowl `/api/runQuery.groovy` fan-out semantics).
      */
     List runQueryMulti(List<String> ontIds, String mOwlQuery, String type, boolean direct, boolean labels, boolean axioms, String shortform) {
+        return runQueryMulti(ontIds, mOwlQuery, type, direct, labels, axioms, shortform, null)
+    }
+
+    /**
+     * As above, additionally recording every skipped ontology in `failures`
+     * (ontology id -> message) so callers can report partial failures. The
+     * map is written from the pool threads; pass a ConcurrentHashMap.
+     *
+     * Slices run on the shared query pool. When its queue cannot take the
+     * request, it is refused with RejectedExecutionException before any
+     * work starts (the servlet answers 503).
+     */
+    List runQueryMulti(List<String> ontIds, String mOwlQuery, String type, boolean direct, boolean labels, boolean axioms, String shortform, Map<String, String> failures) {
         if (ontIds == null || ontIds.isEmpty()) {
             return []
         }
         def aggregated = Collections.synchronizedList(new ArrayList())
-        GParsPool.withPool(PARALLEL_THREADS) {
-            ontIds.eachParallel { ontId ->
-                if (!hasOntology(ontId)) return
-                try {
-                    def slice = runQuery(ontId, mOwlQuery, type, direct, labels, axioms, shortform)
-                    slice.each { entry ->
-                        if (entry instanceof Map) {
-                            entry["ontology"] = ontId
-                        }
-                        aggregated.add(entry)
+        def slice = { String ontId ->
+            if (!hasOntology(ontId)) {
+                failures?.put(ontId, "Ontology not found: ${ontId}".toString())
+                return null
+            }
+            try {
+                runQuery(ontId, mOwlQuery, type, direct, labels, axioms, shortform).each { entry ->
+                    if (entry instanceof Map) {
+                        entry["ontology"] = ontId
                     }
-                } catch (Exception e) {
-                    println "ERROR runQueryMulti(${ontId}): ${e.getMessage()}"
+                    aggregated.add(entry)
                 }
+            } catch (Exception e) {
+                println "ERROR runQueryMulti(${ontId}): ${e.getMessage()}"
+                failures?.put(ontId, (e.getMessage() ?: e.getClass().getSimpleName()).toString())
             }
+            return null
         }
+        if (ontIds.size() == 1) {
+            slice(ontIds[0])
+            return new ArrayList(aggregated)
+        }
+        // At most one lane per pool thread, each draining the shared id
+        // queue, so a request over hundreds of ontologies takes a handful
+        // of queue slots rather than hundreds.
+        def remaining = new ConcurrentLinkedQueue<String>(ontIds)
+        def lane = { ->
+            String ontId
+            while ((ontId = remaining.poll()) != null) slice(ontId)
+            return null
+        } as Callable
+        int lanes = Math.min(ontIds.size(), queryPool.threads)
+        queryPool.submitAll((1..lanes).collect { lane }).each { it.get() }
         return new ArrayList(aggregated)
     }
 
@@ -545,16 +1324,95 @@ public class RequestManager {
         return relationQuery(getDefaultOntologyId(), relation, cl)
     }
 
+    /**
+     * Entities of the served generation whose label short form is
+     * `shortForm` (surrounding quotes ignored), from its short form index:
+     *   [entity: iri or null, entities: [iri, ...]]
+     * `entities` is in signature order and `entity` is what the query
+     * parser resolves the name to, the first of them.
+     */
+    Map resolveShortForm(String ontId, String shortForm) {
+        def gen = acquireGeneration(ontId)
+        if (gen == null) {
+            throw new IllegalArgumentException("Ontology not loaded or not classified: ${ontId}")
+        }
+        try {
+            def entity = gen.shortFormProvider.getEntity(shortForm)
+            return [entity: entity?.getIRI()?.toString(),
+                    entities: gen.shortFormProvider.getEntities(shortForm).collect { it.getIRI().toString() }]
+        } finally {
+            gen.release()
+        }
+    }
+
     // -----------------------------------------------------------------------
     // Entity info
     // -----------------------------------------------------------------------
 
+    /**
+     * Info map for an entity: IRI, label, identifiers, definitions, synonyms,
+     * other literal annotations and, with `axioms`, rendered SubClassOf /
+     * Equivalent / Disjoint axioms. Classes rendered with one of the
+     * ontology's own short form providers are served from classInfoCache.
+     * The returned map belongs to the caller.
+     */
     def toInfo(String ontId, OWLEntity c, boolean axioms, shortFormProvider) {
-        def o = ontologies.get(ontId)
+        def gen = generations.get(ontId)
+        if (gen != null) {
+            return toInfo(gen, c, axioms, shortFormProvider)
+        }
+        return renderInfo(ontId, ontologies.get(ontId), c, axioms, shortFormProvider ?: shortFormProviders.get(ontId))
+    }
+
+    /**
+     * toInfo against generation `gen`, which the caller has pinned: entities
+     * are rendered from its ontology and cached records are those of its
+     * version.
+     */
+    def toInfo(OntologyGeneration gen, OWLEntity c, boolean axioms, shortFormProvider) {
+        def ontId = gen.ontologyId
+        def sfp = shortFormProvider ?: gen.shortFormProvider
+        String mode = null
+        if (c instanceof OWLClass) {
+            if (sfp != null && sfp.is(gen.shortFormProvider)) mode = "label"
+            else if (sfp != null && sfp.is(gen.iriShortFormProvider)) mode = "iri"
+        }
+        if (mode == null) {
+            return renderInfo(ontId, gen.ontology, c, axioms, sfp)
+        }
+        def record = classInfoCache.get(ontId, gen.version, mode, c, axioms)
+        if (record != null) {
+            return ClassInfoCache.assemble(record, c, ontId, axioms)
+        }
+        def info = renderInfo(ontId, gen.ontology, c, axioms, sfp)
+        classInfoCache.put(ontId, gen.version, mode, c, axioms, info)
+        return info
+    }
+
+    /**
+     * Render every class of the ontology into classInfoCache (label short
+     * forms, no axioms) until the memory budget is used up.
+     */
+    void precomputeClassInfo(String ontId) {
+        def gen = generations.get(ontId)
+        if (gen == null) return
+        long start = System.currentTimeMillis()
+        int n = 0
+        for (OWLClass c : gen.ontology.getClassesInSignature(true)) {
+            if (classInfoCache.isFull()) {
+                println "Class info cache budget reached while precomputing ${ontId}"
+                break
+            }
+            toInfo(gen, c, false, gen.shortFormProvider)
+            n++
+        }
+        println "Precomputed class info for ${ontId}: ${n} classes in ${System.currentTimeMillis() - start} ms"
+    }
+
+    private Map renderInfo(String ontId, OWLOntology o, OWLEntity c, boolean axioms, sfp) {
         if (o == null) {
             throw new IllegalArgumentException("Ontology not loaded: ${ontId}")
         }
-        def sfp = shortFormProvider ?: shortFormProviders.get(ontId)
 
         def info = [
             "owlClass": c.toString(),
@@ -656,6 +1514,17 @@ public class RequestManager {
         return result
     }
 
+    ArrayList<HashMap> classes2info(OntologyGeneration gen, Set<OWLClass> classes, boolean axioms, shortFormProvider) {
+        ArrayList<HashMap> result = new ArrayList<HashMap>()
+        classes.each { c ->
+            def info = toInfo(gen, c, axioms, shortFormProvider)
+            if (!info["deprecated"]) {
+                result.add(info)
+            }
+        }
+        return result
+    }
+
     // Backward-compatible
     ArrayList<HashMap> classes2info(Set<OWLClass> classes, boolean axioms, shortFormProvider) {
         return classes2info(getDefaultOntologyId(), classes, axioms, shortFormProvider)
@@ -765,10 +1634,27 @@ public class RequestManager {
         return ontologies.keySet().iterator().next()
     }
 
+    /**
+     * Render the root classes of the served generation into rootClassCache.
+     */
     void precomputeRootClasses(String ontId) {
-        def qEngine = queryEngines.get(ontId)
-        def sfp = shortFormProviders.get(ontId)
-        if (qEngine == null || sfp == null) return
+        def gen = generations.get(ontId)
+        if (gen == null) return
+        try {
+            def classes = classes2info(gen, gen.rootClasses, false, gen.shortFormProvider)
+            def sorted = classes.sort { x, y -> x["label"].compareTo(y["label"]) }
+            rootClassCache.put(ontId, sorted)
+            println "Pre-computed ${sorted.size()} root classes for ${ontId}"
+        } catch (Exception e) {
+            println "WARNING: could not pre-compute root classes for ${ontId}: ${e.getMessage()}"
+        }
+    }
+
+    /**
+     * Direct subclasses of owl:Thing according to `qEngine`'s reasoner: the
+     * reasoner-heavy part of the root class cache, done while staging.
+     */
+    private Set<OWLClass> findRootClasses(String ontId, OWLOntology ontology, QueryEngine qEngine) {
         println "Pre-computing root classes for ${ontId}..."
         try {
             Set resultSet = Sets.newHashSet(
@@ -793,7 +1679,7 @@ public class RequestManager {
                 def topNode = reasoner.getTopClassNode()
                 def bottomNode = reasoner.getBottomClassNode()
                 def roots = new HashSet<OWLClass>()
-                for (OWLClass c : ontologies.get(ontId).getClassesInSignature(true)) {
+                for (OWLClass c : ontology.getClassesInSignature(true)) {
                     if (c.isOWLThing() || c.isOWLNothing()) continue
                     if (topNode.contains(c) || bottomNode.contains(c)) continue  // skip Thing-equiv / unsatisfiable
                     def directSupers = reasoner.getSuperClasses(c, true).getFlattened()
@@ -806,12 +1692,10 @@ public class RequestManager {
                 println "Root pre-compute for ${ontId}: getSubClasses(owl:Thing) was empty; reconstructed ${roots.size()} roots from the superclass graph"
             }
 
-            def classes = classes2info(ontId, resultSet, false, sfp)
-            def sorted = classes.sort { x, y -> x["label"].compareTo(y["label"]) }
-            rootClassCache.put(ontId, sorted)
-            println "Pre-computed ${sorted.size()} root classes for ${ontId}"
+            return resultSet
         } catch (Exception e) {
             println "WARNING: could not pre-compute root classes for ${ontId}: ${e.getMessage()}"
+            return Collections.emptySet()
         }
     }
 
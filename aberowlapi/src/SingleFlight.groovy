@@ -0,0 +1,59 @@
+package src
+
+import java.util.concurrent.*
+import java.util.concurrent.atomic.*
+
+/**
+ * In-flight deduplication of identical concurrent computations.
+ *
+ * The first caller for a key runs the closure; callers arriving with the
+ * same key before it finishes block on its future and get the same result
+ * (or the same exception). Nothing is kept afterwards, so this complements
+ * QueryResultCache rather than replacing it: it covers the window between
+ * a cache miss and the result being put.
+ *
+ * RequestManager keys it with the query cache key, so a popular page opened
+ * by many users, or an agent retrying, runs one reasoner query and one
+ * classes2info pass instead of one per request.
+ */
+public class SingleFlight {
+    private final ConcurrentHashMap<String, CompletableFuture<Object>> inFlight = new ConcurrentHashMap<>()
+    private final AtomicLong started = new AtomicLong()
+    private final AtomicLong coalesced = new AtomicLong()
+
+    /** Result of `compute`, shared with every concurrent call for `key`. */
+    Object run(String key, Closure compute) {
+        CompletableFuture<Object> mine = new CompletableFuture<>()
+        CompletableFuture<Object> running = inFlight.putIfAbsent(key, mine)
+        if (running != null) {
+            coalesced.incrementAndGet()
+            try {
+                return running.get()
+            } catch (ExecutionException e) {
+                throw e.getCause()
+            }
+        }
+        started.incrementAndGet()
+        try {
+            Object result = compute()
+            mine.complete(result)
+            return result
+        } catch (Throwable t) {
+            mine.completeExceptionally(t)
+            throw t
+        } finally {
+            inFlight.remove(key, mine)
+        }
+    }
+
+    Map stats() {
+        long s = started.get()
+        long c = coalesced.get()
+        return [
+            inFlight: inFlight.size(),
+            started: s,
+            coalesced: c,
+            coalescedRate: (s + c) > 0 ? (c / (double) (s + c)) : 0.0d
+        ]
+    }
+}
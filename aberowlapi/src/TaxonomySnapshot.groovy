@@ -0,0 +1,264 @@
+package src
+
+import java.nio.ByteBuffer
+import java.nio.MappedByteBuffer
+import java.nio.channels.FileChannel
+import java.nio.charset.StandardCharsets
+import java.nio.file.Files
+import java.nio.file.StandardCopyOption
+import java.nio.file.StandardOpenOption
+import java.security.MessageDigest
+import java.util.regex.Pattern
+
+import groovy.json.JsonOutput
+import groovy.json.JsonSlurper
+import org.semanticweb.owlapi.apibinding.OWLManager
+import org.semanticweb.owlapi.model.*
+
+/**
+ * On-disk copy of what classification produced for one ontology: the
+ * HierarchySnapshot arrays, the root classes and the rendered class info
+ * (label short forms, no axioms) of every class.
+ *
+ * Files live in TAXONOMY_SNAPSHOT_DIR (unset = feature off) and are named
+ * <ontId>-<fingerprint>.tax, where the fingerprint is the SHA-256 of the OWL
+ * file, the reasoner type and FORMAT_VERSION. A changed file, reasoner or
+ * format therefore never matches an old snapshot. A worker restarting on an
+ * unchanged file maps the snapshot and serves named-class hierarchy queries
+ * from it while the ontology is loaded and classified again; RequestManager
+ * drops it once the reasoner is back.
+ *
+ * Layout (big-endian ints):
+ *   magic, version, topId, bottomId, nodeCount, memberCount, edgeCount,
+ *   rootCount, infoBytes,
+ *   memberOffsets[nodeCount + 1], parentOffsets[nodeCount + 1],
+ *   parents[edgeCount], childOffsets[nodeCount + 1], children[edgeCount],
+ *   roots[rootCount]                 member indexes, in display order
+ *   info region (infoBytes)          one UTF-8 JSON object per member
+ *   infoOffsets[memberCount + 1]     into the info region
+ *   memberCount x (IRI, label)       each as int length + UTF-8 bytes
+ *
+ * Only the int arrays and the IRI/label table are decoded on open; class
+ * info stays in the mapped file and is parsed per request.
+ */
+public class TaxonomySnapshot {
+    static final int MAGIC = 0x41425458   // "ABTX"
+    static final int FORMAT_VERSION = 1
+    static final String SUFFIX = ".tax"
+
+    private static final OWLDataFactory df = OWLManager.getOWLDataFactory()
+
+    final File file
+    final HierarchySnapshot hierarchy
+    private final MappedByteBuffer buffer
+    private final int infoStart
+    private final int[] infoOffsets
+    private final int[] roots
+    private final Map<OWLClass, Integer> memberIndex
+    private final Map<String, Integer> names = new HashMap<>()
+    private final Map<String, Integer> foldedNames = new HashMap<>()
+
+    private TaxonomySnapshot(File file, MappedByteBuffer buffer) {
+        this.file = file
+        this.buffer = buffer
+        ByteBuffer b = buffer.duplicate()
+        if (b.getInt() != MAGIC) throw new IOException("Not a taxonomy snapshot: ${file}")
+        int version = b.getInt()
+        if (version != FORMAT_VERSION) throw new IOException("Unsupported taxonomy snapshot version ${version}: ${file}")
+        int topId = b.getInt()
+        int bottomId = b.getInt()
+        int nodeCount = b.getInt()
+        int memberCount = b.getInt()
+        int edgeCount = b.getInt()
+        int rootCount = b.getInt()
+        int infoBytes = b.getInt()
+
+        int[] memberOffsets = readInts(b, nodeCount + 1)
+        int[] parentOffsets = readInts(b, nodeCount + 1)
+        int[] parents = readInts(b, edgeCount)
+        int[] childOffsets = readInts(b, nodeCount + 1)
+        int[] children = readInts(b, edgeCount)
+        roots = readInts(b, rootCount)
+        infoStart = b.position()
+        b.position(infoStart + infoBytes)
+        infoOffsets = readInts(b, memberCount + 1)
+
+        OWLClass[] members = new OWLClass[memberCount]
+        memberIndex = new HashMap<>(memberCount * 2)
+        for (int k = 0; k < memberCount; k++) {
+            members[k] = df.getOWLClass(IRI.create(readString(b)))
+            memberIndex.put(members[k], k)
+            String label = readString(b)
+            String fragment = members[k].getIRI().getFragment()
+            if (fragment) addName(fragment, k)
+            if (label) addName(label, k)
+        }
+        hierarchy = new HierarchySnapshot(members, memberOffsets, parents, parentOffsets,
+                                          children, childOffsets, topId, bottomId)
+    }
+
+    static File directoryFromEnvironment() {
+        def dir = System.getenv("TAXONOMY_SNAPSHOT_DIR")
+        return dir ? new File(dir) : null
+    }
+
+    /** Hex SHA-256 over the OWL file, the reasoner type and the format version. */
+    static String fingerprint(File owlFile, String reasonerType) {
+        MessageDigest md = MessageDigest.getInstance("SHA-256")
+        owlFile.withInputStream { is ->
+            byte[] chunk = new byte[1 << 16]
+            int n
+            while ((n = is.read(chunk)) > 0) md.update(chunk, 0, n)
+        }
+        md.update("|${reasonerType ?: 'elk'}|v${FORMAT_VERSION}".toString().getBytes(StandardCharsets.UTF_8))
+        return md.digest().encodeHex().toString()
+    }
+
+    static File fileFor(File dir, String ontId, String fingerprint) {
+        return new File(dir, "${safeId(ontId)}-${fingerprint}${SUFFIX}")
+    }
+
+    /** Map an existing snapshot file; throws IOException when it is unreadable or of another version. */
+    static TaxonomySnapshot open(File f) {
+        FileChannel channel = FileChannel.open(f.toPath(), StandardOpenOption.READ)
+        try {
+            // The mapping stays valid after the channel is closed.
+            return new TaxonomySnapshot(f, channel.map(FileChannel.MapMode.READ_ONLY, 0, channel.size()))
+        } finally {
+            channel.close()
+        }
+    }
+
+    /**
+     * Write `hierarchy`, `rootClasses` and the info map `infoFor` returns for
+     * every member to `target` (via a temp file and an atomic rename), then
+     * delete older snapshots of the same ontology. Returns the file size.
+     */
+    static long write(File target, String ontId, HierarchySnapshot hierarchy, List<OWLClass> rootClasses, Closure<Map> infoFor) {
+        File dir = target.getParentFile()
+        dir.mkdirs()
+        File tmp = File.createTempFile(".${safeId(ontId)}-", ".tmp", dir)
+        try {
+            OWLClass[] members = hierarchy.members
+            Map<OWLClass, Integer> index = new HashMap<>(members.length * 2)
+            for (int k = 0; k < members.length; k++) index.put(members[k], k)
+            List<Integer> rootIds = rootClasses.collect { index.get(it) }.findAll { it != null }
+
+            int[] infoOffsets = new int[members.length + 1]
+            String[] labels = new String[members.length]
+            long infoBytes = 0
+            new DataOutputStream(new BufferedOutputStream(new FileOutputStream(tmp), 1 << 16)).withStream { out ->
+                [MAGIC, FORMAT_VERSION, hierarchy.topId, hierarchy.bottomId, hierarchy.nodeCount(),
+                 members.length, hierarchy.edgeCount(), rootIds.size(), 0].each { out.writeInt(it) }
+                writeInts(out, hierarchy.memberOffsets)
+                writeInts(out, hierarchy.parentOffsets)
+                writeInts(out, hierarchy.parents)
+                writeInts(out, hierarchy.childOffsets)
+                writeInts(out, hierarchy.children)
+                rootIds.each { out.writeInt(it) }
+
+                for (int k = 0; k < members.length; k++) {
+                    Map info = infoFor(members[k]) ?: [:]
+                    def label = info["label"]
+                    labels[k] = label instanceof CharSequence ? label.toString() : null
+                    byte[] json = JsonOutput.toJson(info).getBytes(StandardCharsets.UTF_8)
+                    out.write(json)
+                    infoBytes += json.length
+                    if (infoBytes > Integer.MAX_VALUE) {
+                        throw new IOException("Taxonomy snapshot for ${ontId} exceeds 2 GB")
+                    }
+                    infoOffsets[k + 1] = (int) infoBytes
+                }
+                writeInts(out, infoOffsets)
+                for (int k = 0; k < members.length; k++) {
+                    writeString(out, members[k].getIRI().toString())
+                    writeString(out, labels[k] ?: "")
+                }
+            }
+            // Patch infoBytes into the header.
+            RandomAccessFile raf = new RandomAccessFile(tmp, "rw")
+            try {
+                raf.seek(8 * 4)
+                raf.writeInt((int) infoBytes)
+            } finally {
+                raf.close()
+            }
+            // FileChannel.map is limited to 2 GB.
+            if (tmp.length() > Integer.MAX_VALUE) {
+                throw new IOException("Taxonomy snapshot for ${ontId} exceeds 2 GB")
+            }
+            Files.move(tmp.toPath(), target.toPath(), StandardCopyOption.REPLACE_EXISTING, StandardCopyOption.ATOMIC_MOVE)
+        } finally {
+            tmp.delete()
+        }
+
+        Pattern own = Pattern.compile(Pattern.quote(safeId(ontId)) + "-[0-9a-f]{64}" + Pattern.quote(SUFFIX))
+        dir.listFiles()?.each { f ->
+            if (f != target && own.matcher(f.name).matches()) f.delete()
+        }
+        return target.length()
+    }
+
+    int classCount() {
+        return memberIndex.size()
+    }
+
+    /** Class with this IRI fragment or label (same normalization as EntityLookupIndex), or null. */
+    OWLClass classForName(String name) {
+        if (name == null) return null
+        name = EntityLookupIndex.unwrap(name)
+        if (name.isEmpty()) return null
+        Integer k = names.get(EntityLookupIndex.exactKey(name))
+        if (k == null) k = foldedNames.get(EntityLookupIndex.foldedKey(name))
+        return k != null ? hierarchy.members[k] : null
+    }
+
+    /** A fresh, caller-owned info map as RequestManager.toInfo rendered it, or null. */
+    Map info(OWLClass c) {
+        Integer k = memberIndex.get(c)
+        if (k == null) return null
+        ByteBuffer b = buffer.duplicate()
+        b.position(infoStart + infoOffsets[k])
+        byte[] json = new byte[infoOffsets[k + 1] - infoOffsets[k]]
+        b.get(json)
+        def info = new LinkedHashMap<String, Object>((Map) new JsonSlurper().parseText(new String(json, StandardCharsets.UTF_8)))
+        return info.withDefault { key -> [] }
+    }
+
+    /** Info maps of the root classes in the order they were saved (sorted by label). */
+    List<Map> rootInfos() {
+        return roots.collect { info(hierarchy.members[it]) }.findAll { it != null }
+    }
+
+    private void addName(String name, int k) {
+        names.putIfAbsent(EntityLookupIndex.exactKey(name), k)
+        foldedNames.putIfAbsent(EntityLookupIndex.foldedKey(name), k)
+    }
+
+    private static String safeId(String ontId) {
+        return ontId.replaceAll(/[^A-Za-z0-9._-]/, '_')
+    }
+
+    private static int[] readInts(ByteBuffer b, int n) {
+        int[] out = new int[n]
+        b.asIntBuffer().get(out)
+        b.position(b.position() + 4 * n)
+        return out
+    }
+
+    private static void writeInts(DataOutputStream out, int[] values) {
+        for (int v : values) out.writeInt(v)
+    }
+
+    private static String readString(ByteBuffer b) {
+        byte[] bytes = new byte[b.getInt()]
+        b.get(bytes)
+        return new String(bytes, StandardCharsets.UTF_8)
+    }
+
+    private static void writeString(DataOutputStream out, String s) {
+        byte[] bytes = s.getBytes(StandardCharsets.UTF_8)
+        out.writeInt(bytes.length)
+        out.write(bytes)
+    }
+}
@@ -0,0 +1,111 @@
+package src
+
+import java.util.concurrent.*
+import java.util.concurrent.atomic.*
+
+/**
+ * Long-lived, fixed-size executor with a bounded queue, shared by every
+ * request that needs it instead of a pool per call.
+ *
+ * RequestManager keeps two: `query` for the per-ontology slices of
+ * runQueryMulti and `classification` for loading, classifying and reloading
+ * ontologies. Keeping them apart means a hot-swap can occupy at most the
+ * classification threads and never the ones interactive queries run on.
+ *
+ * When all threads are busy and the queue is full, submit throws
+ * RejectedExecutionException right away; servlets turn that into a 503 with
+ * Retry-After rather than letting work pile up. Sizes come from the
+ * environment (see the *FromEnvironment factories):
+ *   QUERY_POOL_THREADS     (default: available processors)
+ *   QUERY_POOL_QUEUE       (default 256)
+ *   CLASSIFY_POOL_THREADS  (default: half the processors, 1 to 4)
+ *   CLASSIFY_POOL_QUEUE    (default 64)
+ */
+public class WorkerPool {
+    final String name
+    final int threads
+    final int queueLimit
+
+    private final ThreadPoolExecutor executor
+    private final AtomicLong rejected = new AtomicLong()
+
+    WorkerPool(String name, int threads, int queueLimit) {
+        this.name = name
+        this.threads = Math.max(1, threads)
+        this.queueLimit = Math.max(1, queueLimit)
+        AtomicInteger counter = new AtomicInteger()
+        executor = new ThreadPoolExecutor(this.threads, this.threads, 60L, TimeUnit.SECONDS,
+            new ArrayBlockingQueue<Runnable>(this.queueLimit),
+            { Runnable r ->
+                Thread t = new Thread(r, "${name}-pool-${counter.incrementAndGet()}")
+                t.setDaemon(true)
+                return t
+            } as ThreadFactory,
+            new ThreadPoolExecutor.AbortPolicy())
+    }
+
+    static WorkerPool queryPoolFromEnvironment() {
+        int cores = Runtime.getRuntime().availableProcessors()
+        return new WorkerPool("query",
+            envInt("QUERY_POOL_THREADS", cores),
+            envInt("QUERY_POOL_QUEUE", 256))
+    }
+
+    static WorkerPool classificationPoolFromEnvironment() {
+        int cores = Runtime.getRuntime().availableProcessors()
+        return new WorkerPool("classify",
+            envInt("CLASSIFY_POOL_THREADS", Math.max(1, Math.min(4, cores.intdiv(2) as int))),
+            envInt("CLASSIFY_POOL_QUEUE", 64))
+    }
+
+    private static int envInt(String name, int dflt) {
+        def v = System.getenv(name)
+        return (v && v.isInteger()) ? v.toInteger() : dflt
+    }
+
+    /** Queue `task`; throws RejectedExecutionException when the pool is saturated. */
+    public <T> Future<T> submit(Callable<T> task) {
+        try {
+            return executor.submit(task)
+        } catch (RejectedExecutionException e) {
+            throw reject(e)
+        }
+    }
+
+    /**
+     * Queue all of `tasks` or none: throws RejectedExecutionException up
+     * front when they would not fit, and cancels the ones already queued if
+     * a submission is refused anyway.
+     */
+    public <T> List<Future<T>> submitAll(List<Callable<T>> tasks) {
+        if (executor.getQueue().remainingCapacity() < tasks.size()) {
+            throw reject(null)
+        }
+        List<Future<T>> futures = new ArrayList<>(tasks.size())
+        try {
+            for (Callable<T> task : tasks) futures.add(executor.submit(task))
+        } catch (RejectedExecutionException e) {
+            futures.each { it.cancel(false) }
+            throw reject(e)
+        }
+        return futures
+    }
+
+    private RejectedExecutionException reject(Throwable cause) {
+        rejected.incrementAndGet()
+        def e = new RejectedExecutionException("The ${name} pool is saturated (${threads} threads, ${queueLimit} queued)".toString())
+        if (cause != null) e.initCause(cause)
+        return e
+    }
+
+    Map stats() {
+        return [
+            threads: threads,
+            active: executor.getActiveCount(),
+            queued: executor.getQueue().size(),
+            queueLimit: queueLimit,
+            completed: executor.getCompletedTaskCount(),
+            rejected: rejected.get()
+        ]
+    }
+}
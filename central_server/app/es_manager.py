@@ -9,12 +9,15 @@ Index naming:
 All queries use the alias so callers are insulated from version numbers.
 """
 
+import asyncio
 import json
 import logging
 import os
 from typing import Optional
 import aiohttp
 
+from app.http_pool import es_session
+
 logger = logging.getLogger(__name__)
 
 ONTOLOGIES_INDEX = "aberowl_ontologies"
@@ -91,72 +94,64 @@ class CentralESManager:
 
     async def _get(self, path: str) -> Optional[dict]:
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.es_url}{path}",
-                    timeout=aiohttp.ClientTimeout(total=30),
-                ) as resp:
-                    if resp.status == 200:
-                        return await resp.json(content_type=None)
-                    return None
+            session = es_session()
+            async with session.get(f"{self.es_url}{path}") as resp:
+                if resp.status == 200:
+                    return await resp.json(content_type=None)
+                return None
         except Exception as e:
             logger.error("ES GET %s error: %s", path, e)
             return None
 
     async def _put(self, path: str, body: dict) -> bool:
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.put(
-                    f"{self.es_url}{path}",
-                    json=body,
-                    timeout=aiohttp.ClientTimeout(total=30),
-                ) as resp:
-                    if resp.status in (200, 201):
-                        return True
-                    body_text = await resp.text()
-                    logger.error("ES PUT %s failed (%s): %s", path, resp.status, body_text[:300])
-                    return False
+            session = es_session()
+            async with session.put(
+                f"{self.es_url}{path}",
+                json=body,
+            ) as resp:
+                if resp.status in (200, 201):
+                    return True
+                body_text = await resp.text()
+                logger.error("ES PUT %s failed (%s): %s", path, resp.status, body_text[:300])
+                return False
         except Exception as e:
             logger.error("ES PUT %s error: %s", path, e)
             return False
 
     async def _post(self, path: str, body: dict) -> bool:
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.es_url}{path}",
-                    json=body,
-                    timeout=aiohttp.ClientTimeout(total=30),
-                ) as resp:
-                    if resp.status in (200, 201):
-                        return True
-                    body_text = await resp.text()
-                    logger.error("ES POST %s failed (%s): %s", path, resp.status, body_text[:300])
-                    return False
+            session = es_session()
+            async with session.post(
+                f"{self.es_url}{path}",
+                json=body,
+            ) as resp:
+                if resp.status in (200, 201):
+                    return True
+                body_text = await resp.text()
+                logger.error("ES POST %s failed (%s): %s", path, resp.status, body_text[:300])
+                return False
         except Exception as e:
             logger.error("ES POST %s error: %s", path, e)
             return False
 
     async def _delete(self, path: str) -> bool:
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.delete(
-                    f"{self.es_url}{path}",
-                    timeout=aiohttp.ClientTimeout(total=30),
-                ) as resp:
-                    return resp.status in (200, 404)
+            session = es_session()
+            async with session.delete(f"{self.es_url}{path}") as resp:
+                return resp.status in (200, 404)
         except Exception as e:
             logger.error("ES DELETE %s error: %s", path, e)
             return False
 
     async def index_exists(self, index_name: str) -> bool:
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.head(
-                    f"{self.es_url}/{index_name}",
-                    timeout=aiohttp.ClientTimeout(total=10),
-                ) as resp:
-                    return resp.status == 200
+            session = es_session()
+            async with session.head(
+                f"{self.es_url}/{index_name}",
+                timeout=aiohttp.ClientTimeout(total=10),
+            ) as resp:
+                return resp.status == 200
         except Exception:
             return False
 
@@ -226,13 +221,13 @@ class CentralESManager:
         await self.ensure_ontologies_index()
         doc = {"ontology": ontology_id, "name": name, "description": description or ""}
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.es_url}/{ONTOLOGIES_INDEX}/_update/{ontology_id}",
-                    json={"doc": doc, "doc_as_upsert": True},
-                    timeout=aiohttp.ClientTimeout(total=15),
-                ) as resp:
-                    return resp.status in (200, 201)
+            session = es_session()
+            async with session.post(
+                f"{self.es_url}/{ONTOLOGIES_INDEX}/_update/{ontology_id}",
+                json={"doc": doc, "doc_as_upsert": True},
+                timeout=aiohttp.ClientTimeout(total=15),
+            ) as resp:
+                return resp.status in (200, 201)
         except Exception as e:
             logger.error("ES upsert ontology record error: %s", e)
             return False
@@ -244,6 +239,20 @@ class CentralESManager:
         prefix: bool = False,
         size: int = 100,
     ) -> list:
+        """`search_classes_page` for at most one ontology, without paging."""
+        page = await self.search_classes_page(
+            term, ontologies=[ontology] if ontology else None, prefix=prefix, size=size
+        )
+        return page["result"]
+
+    async def search_classes_page(
+        self,
+        term: str,
+        ontologies: Optional[list] = None,
+        prefix: bool = False,
+        size: int = 100,
+        search_after: Optional[list] = None,
+    ) -> dict:
         """
         Search for ontology classes across all (or specific) ontology indices
         using a boosted dis_max query matching the original AberOWL search logic.
@@ -258,9 +267,19 @@ class CentralESManager:
           Exact matches still outscore fuzzy ones because we keep an
           un-fuzzy variant alongside each fuzzy one in the dis_max set,
           and per-token oboid stays exact.
+
+        Several ontologies are searched in one request over their
+        comma-joined aliases, so hits are ranked together. Results are
+        sorted by score, then class and ontology, which makes the order
+        stable enough for `search_after` paging: pass the returned
+        `search_after` back to get the next page (None after the last).
+        A class is listed once per ontology.
+
+        Returns {"result": [...], "search_after": list or None}.
         """
-        if ontology:
-            index_pattern = self._alias_name(ontology.lower())
+        ont_ids = [o.lower() for o in ontologies or [] if o]
+        if ont_ids:
+            index_pattern = ",".join(self._alias_name(o) for o in dict.fromkeys(ont_ids))
         else:
             index_pattern = "aberowl_*_classes"
 
@@ -313,35 +332,51 @@ class CentralESManager:
             }
 
         # Add ontology filter if specified
-        if ontology and not prefix:
+        if ont_ids and not prefix:
             query_body["query"] = {
                 "bool": {
                     "must": query_body["query"],
-                    "filter": {"term": {"ontology": ontology.lower()}},
+                    "filter": {"terms": {"ontology": ont_ids}},
                 }
             }
 
+        query_body["sort"] = [{"_score": "desc"}, {"class": "asc"}, {"ontology": "asc"}]
+        if search_after:
+            query_body["search_after"] = search_after
+
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.es_url}/{index_pattern}/_search",
-                    json=query_body,
-                    timeout=aiohttp.ClientTimeout(total=30),
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json(content_type=None)
-                        hits = data.get("hits", {}).get("hits", [])
-                        return [hit.get("_source") for hit in hits if hit.get("_source")]
-                    elif resp.status == 404:
-                        # Index doesn't exist yet
-                        return []
-                    else:
-                        body_text = await resp.text()
-                        logger.error("ES search failed (%s): %s", resp.status, body_text[:300])
-                        return []
+            session = es_session()
+            async with session.post(
+                f"{self.es_url}/{index_pattern}/_search",
+                params={"ignore_unavailable": "true"},
+                json=query_body,
+            ) as resp:
+                if resp.status == 200:
+                    data = await resp.json(content_type=None)
+                    hits = data.get("hits", {}).get("hits", [])
+                elif resp.status == 404:
+                    # Index doesn't exist yet
+                    return {"result": [], "search_after": None}
+                else:
+                    body_text = await resp.text()
+                    logger.error("ES search failed (%s): %s", resp.status, body_text[:300])
+                    return {"result": [], "search_after": None}
         except Exception as e:
             logger.error("ES search error: %s", e)
-            return []
+            return {"result": [], "search_after": None}
+
+        results, seen = [], set()
+        for hit in hits:
+            source = hit.get("_source")
+            if not source:
+                continue
+            key = (source.get("class"), source.get("ontology"))
+            if key in seen:
+                continue
+            seen.add(key)
+            results.append(source)
+        next_page = hits[-1].get("sort") if len(hits) >= size and hits else None
+        return {"result": results, "search_after": next_page}
 
     async def resolve(
         self,
@@ -366,14 +401,84 @@ class CentralESManager:
         if not t:
             return []
 
+        index_pattern, query_body = self._resolve_search(t, ontology, size)
+
+        try:
+            session = es_session()
+            async with session.post(
+                f"{self.es_url}/{index_pattern}/_search",
+                json=query_body,
+                timeout=aiohttp.ClientTimeout(total=15),
+            ) as resp:
+                if resp.status == 200:
+                    data = await resp.json(content_type=None)
+                    hits = data.get("hits", {}).get("hits", [])
+                    return [hit.get("_source") for hit in hits if hit.get("_source")]
+                elif resp.status == 404:
+                    return []
+                else:
+                    body_text = await resp.text()
+                    logger.error("ES resolve failed (%s): %s", resp.status, body_text[:300])
+                    return []
+        except Exception as e:
+            logger.error("ES resolve error: %s", e)
+            return []
+
+    async def get_classes(
+        self,
+        ontology_id: str,
+        iris: list,
+        oboids: Optional[list] = None,
+    ) -> list:
+        """Class documents of one ontology whose `class` is one of `iris` or
+        whose `oboid` is one of `oboids`, in a single `terms` query.
+
+        Used by /api/getClasses; a missing index or an ES error yields [] so
+        the caller can fall back to the worker.
+        """
+        should = [{"terms": {"class": list(iris)}}] if iris else []
+        if oboids:
+            should.append({"terms": {"oboid": [o.upper() for o in oboids]}})
+        if not should:
+            return []
+        query_body = {
+            "query": {"bool": {"should": should, "minimum_should_match": 1}},
+            "_source": {"excludes": ["embedding_vector"]},
+            # A class can carry several oboids; leave room for every input.
+            "size": 2 * (len(iris) + len(oboids or [])),
+        }
+        try:
+            session = es_session()
+            async with session.post(
+                f"{self.es_url}/{self._alias_name(ontology_id.lower())}/_search",
+                json=query_body,
+                timeout=aiohttp.ClientTimeout(total=15),
+            ) as resp:
+                if resp.status == 200:
+                    data = await resp.json(content_type=None)
+                    hits = data.get("hits", {}).get("hits", [])
+                    return [hit.get("_source") for hit in hits if hit.get("_source")]
+                elif resp.status == 404:
+                    return []
+                else:
+                    body_text = await resp.text()
+                    logger.error("ES class lookup failed (%s): %s", resp.status, body_text[:300])
+                    return []
+        except Exception as e:
+            logger.error("ES class lookup error: %s", e)
+            return []
+
+    def _resolve_search(self, term: str, ontology: Optional[str], size: int) -> tuple:
+        """(index pattern, query body) of the exact-match search behind
+        `resolve` and `resolve_many`."""
         index_pattern = self._alias_name(ontology.lower()) if ontology else "aberowl_*_classes"
 
         inner = {
             "bool": {
                 "should": [
-                    {"term": {"oboid": t.upper()}},
-                    {"term": {"label": t}},
-                    {"term": {"synonyms.raw": t}},
+                    {"term": {"oboid": term.upper()}},
+                    {"term": {"label": term}},
+                    {"term": {"synonyms.raw": term}},
                 ],
                 "minimum_should_match": 1,
             }
@@ -383,32 +488,76 @@ class CentralESManager:
         else:
             query = inner
 
-        query_body = {
+        return index_pattern, {
             "query": query,
             "_source": {"excludes": ["embedding_vector"]},
             "size": size,
         }
 
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.es_url}/{index_pattern}/_search",
-                    json=query_body,
-                    timeout=aiohttp.ClientTimeout(total=15),
-                ) as resp:
-                    if resp.status == 200:
+    async def resolve_many(
+        self,
+        searches: list,
+        size: int = 25,
+        chunk_size: int = 0,
+        concurrency: int = 1,
+    ) -> list:
+        """`resolve` for many (term, ontology) pairs through `_msearch`.
+
+        Returns one entry per pair, in order: the matching class documents,
+        or None when that search (or its whole `_msearch` request) failed.
+        A missing index matches nothing. All pairs go in one `_msearch`
+        unless `chunk_size` is set; then they are split into requests of at
+        most `chunk_size` searches, at most `concurrency` of them in flight.
+        """
+        results: list = [None] * len(searches)
+        todo = []
+        for i, (term, ontology) in enumerate(searches):
+            t = (term or "").strip()
+            if t:
+                todo.append((i, self._resolve_search(t, ontology, size)))
+            else:
+                results[i] = []
+        if not todo:
+            return results
+
+        step = chunk_size if chunk_size > 0 else len(todo)
+        sem = asyncio.Semaphore(max(1, concurrency))
+
+        async def run_chunk(chunk: list) -> None:
+            lines = []
+            for _, (index_pattern, body) in chunk:
+                lines.append(json.dumps({"index": index_pattern, "ignore_unavailable": True}))
+                lines.append(json.dumps(body))
+            async with sem:
+                try:
+                    session = es_session()
+                    async with session.post(
+                        f"{self.es_url}/_msearch",
+                        data="\n".join(lines) + "\n",
+                        headers={"Content-Type": "application/x-ndjson"},
+                        timeout=aiohttp.ClientTimeout(total=60),
+                    ) as resp:
+                        if resp.status != 200:
+                            body_text = await resp.text()
+                            logger.error("ES msearch failed (%s): %s", resp.status, body_text[:300])
+                            return
                         data = await resp.json(content_type=None)
-                        hits = data.get("hits", {}).get("hits", [])
-                        return [hit.get("_source") for hit in hits if hit.get("_source")]
-                    elif resp.status == 404:
-                        return []
+                except Exception as e:
+                    logger.error("ES msearch error: %s", e)
+                    return
+            for (i, _), item in zip(chunk, data.get("responses", [])):
+                if "error" in item:
+                    reason = item["error"].get("type") if isinstance(item["error"], dict) else item["error"]
+                    if reason == "index_not_found_exception":
+                        results[i] = []
                     else:
-                        body_text = await resp.text()
-                        logger.error("ES resolve failed (%s): %s", resp.status, body_text[:300])
-                        return []
-        except Exception as e:
-            logger.error("ES resolve error: %s", e)
-            return []
+                        logger.error("ES msearch item failed: %s", item["error"])
+                    continue
+                hits = item.get("hits", {}).get("hits", [])
+                results[i] = [hit.get("_source") for hit in hits if hit.get("_source")]
+
+        await asyncio.gather(*(run_chunk(todo[k:k + step]) for k in range(0, len(todo), step)))
+        return results
 
     async def search_ontologies(self, term: str, size: int = 50) -> list:
         """Search the central ontologies index by name or description."""
@@ -426,17 +575,17 @@ class CentralESManager:
             "size": size,
         }
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.es_url}/{ONTOLOGIES_INDEX}/_search",
-                    json=query_body,
-                    timeout=aiohttp.ClientTimeout(total=15),
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json(content_type=None)
-                        hits = data.get("hits", {}).get("hits", [])
-                        return [hit.get("_source") for hit in hits if hit.get("_source")]
-                    return []
+            session = es_session()
+            async with session.post(
+                f"{self.es_url}/{ONTOLOGIES_INDEX}/_search",
+                json=query_body,
+                timeout=aiohttp.ClientTimeout(total=15),
+            ) as resp:
+                if resp.status == 200:
+                    data = await resp.json(content_type=None)
+                    hits = data.get("hits", {}).get("hits", [])
+                    return [hit.get("_source") for hit in hits if hit.get("_source")]
+                return []
         except Exception as e:
             logger.error("ES ontology search error: %s", e)
             return []
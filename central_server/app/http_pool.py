@@ -0,0 +1,200 @@
+"""
+Shared, pooled aiohttp client sessions.
+
+Opening an ``aiohttp.ClientSession`` per call pays TCP (and TLS) setup and a
+DNS lookup every time and never reuses a connection. Instead there is one
+long-lived session per upstream class:
+
+  - ``es``        the central Elasticsearch cluster
+  - ``workers``   the per-ontology OntologyServer (Groovy) workers
+  - ``external``  everything else (OBO Foundry, BioPortal, ontology
+                  downloads, user-chosen SPARQL endpoints)
+
+Each pool has its own connection limits, keep-alive, DNS cache and default
+timeout, configurable through the environment (NAME is ES, WORKERS or
+EXTERNAL):
+
+  HTTP_POOL_<NAME>_LIMIT           total connections   (es 50, workers 200, external 50)
+  HTTP_POOL_<NAME>_LIMIT_PER_HOST  connections per host (es 50, workers 16, external 8)
+  HTTP_POOL_<NAME>_TIMEOUT         default total timeout, seconds (es 30, workers 60, external 60)
+  HTTP_POOL_CONNECT_TIMEOUT        connect timeout for every pool, seconds (default 10)
+  HTTP_POOL_KEEPALIVE              idle keep-alive, seconds (default 30)
+  HTTP_POOL_DNS_TTL                DNS cache lifetime, seconds (default 300)
+
+Callers may still pass a per-request ``timeout=`` where an endpoint needs a
+different budget. Never use the returned session as a context manager (that
+would close the shared pool); the FastAPI lifespan calls ``close_all()``.
+
+Utilization (in-flight requests against the limit) and time spent waiting
+for a free connection are collected with aiohttp tracing and exposed by
+``pool_stats()`` (served on /admin/infrastructure).
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+_CONNECT_TIMEOUT = float(os.getenv("HTTP_POOL_CONNECT_TIMEOUT", "10"))
+_KEEPALIVE = float(os.getenv("HTTP_POOL_KEEPALIVE", "30"))
+_DNS_TTL = int(os.getenv("HTTP_POOL_DNS_TTL", "300"))
+
+
+def _env_number(name: str, default):
+    try:
+        return type(default)(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class HttpPool:
+    """One lazily created, shared ClientSession plus its usage counters."""
+
+    def __init__(self, name: str, limit: int, limit_per_host: int, timeout: float):
+        self.name = name
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    @classmethod
+    def from_environment(cls, name: str, limit: int, limit_per_host: int, timeout: float) -> "HttpPool":
+        prefix = f"HTTP_POOL_{name.upper()}_"
+        return cls(
+            name,
+            limit=_env_number(prefix + "LIMIT", limit),
+            limit_per_host=_env_number(prefix + "LIMIT_PER_HOST", limit_per_host),
+            timeout=_env_number(prefix + "TIMEOUT", float(timeout)),
+        )
+
+    def session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it on first use.
+
+        The session is bound to the running event loop; if the loop changed
+        (tests, a restarted app) a fresh session is created for the new one.
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=_KEEPALIVE,
+                ttl_dns_cache=_DNS_TTL,
+                use_dns_cache=True,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout, connect=_CONNECT_TIMEOUT),
+                trace_configs=[self._trace_config()],
+            )
+            self._loop = loop
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "timeout": self.timeout,
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "utilization": round(self.in_flight / self.limit, 3) if self.limit else 0.0,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "waits": self.waits,
+            "wait_seconds_total": round(self.wait_seconds_total, 4),
+            "wait_seconds_max": round(self.wait_seconds_max, 4),
+        }
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+        async def on_request_end(session, ctx, params):
+            self.in_flight -= 1
+
+        async def on_request_exception(session, ctx, params):
+            self.in_flight -= 1
+            self.errors += 1
+
+        async def on_queued_start(session, ctx, params):
+            ctx.queued_at = time.monotonic()
+
+        async def on_queued_end(session, ctx, params):
+            waited = time.monotonic() - getattr(ctx, "queued_at", time.monotonic())
+            self.waits += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+        async def on_create_end(session, ctx, params):
+            self.connections_created += 1
+
+        async def on_reuse(session, ctx, params):
+            self.connections_reused += 1
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_request_end.append(on_request_end)
+        trace.on_request_exception.append(on_request_exception)
+        trace.on_connection_queued_start.append(on_queued_start)
+        trace.on_connection_queued_end.append(on_queued_end)
+        trace.on_connection_create_end.append(on_create_end)
+        trace.on_connection_reuseconn.append(on_reuse)
+        return trace
+
+
+POOLS: Dict[str, HttpPool] = {
+    "es": HttpPool.from_environment("es", limit=50, limit_per_host=50, timeout=30),
+    "workers": HttpPool.from_environment("workers", limit=200, limit_per_host=16, timeout=60),
+    "external": HttpPool.from_environment("external", limit=50, limit_per_host=8, timeout=60),
+}
+
+
+def es_session() -> aiohttp.ClientSession:
+    return POOLS["es"].session()
+
+
+def worker_session() -> aiohttp.ClientSession:
+    return POOLS["workers"].session()
+
+
+def external_session() -> aiohttp.ClientSession:
+    return POOLS["external"].session()
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: pool.stats() for name, pool in POOLS.items()}
+
+
+async def close_all() -> None:
+    for pool in POOLS.values():
+        try:
+            await pool.close()
+        except Exception as e:
+            logger.warning("Closing HTTP pool %s failed: %s", pool.name, e)
@@ -12,6 +12,8 @@ from typing import Any, Dict, List, Optional, Set
 
 import aiohttp
 
+from app.http_pool import external_session
+
 logger = logging.getLogger(__name__)
 
 BIOPORTAL_API_URL = "https://data.bioontology.org"
@@ -101,8 +103,8 @@ async def fetch_bioportal_metadata() -> List[Dict[str, Any]]:
     ontologies that are not in OBO Foundry. Returns an empty list if BioPortal
     is unreachable or the API key is invalid.
     """
-    async with aiohttp.ClientSession() as session:
-        raw_list = await _fetch_all_ontologies(session)
+    session = external_session()
+    raw_list = await _fetch_all_ontologies(session)
 
     records: List[Dict[str, Any]] = []
     for o in raw_list:
@@ -136,45 +138,45 @@ async def fetch_bioportal_ontologies(exclude_ids: Set[str]) -> List[Dict[str, An
     logger.info("Fetching BioPortal ontology list (excluding %d OBO IDs)", len(exclude_ids))
     semaphore = asyncio.Semaphore(_CONCURRENCY_LIMIT)
 
-    async with aiohttp.ClientSession() as session:
-        raw_list = await _fetch_all_ontologies(session)
-        if not raw_list:
-            logger.warning("BioPortal returned an empty ontology list")
-            return []
-
-        logger.info("BioPortal: %d ontologies total before dedup", len(raw_list))
-
-        # Filter out already-known OBO ontologies
-        candidates = [
-            o for o in raw_list
-            if o.get("acronym", "").lower() not in exclude_ids
-        ]
-        logger.info("BioPortal: %d candidates after OBO dedup", len(candidates))
-
-        # Fetch download URLs concurrently with rate limiting
-        tasks = [
-            _fetch_download_url(session, o["acronym"], semaphore)
-            for o in candidates
-        ]
-        download_urls = await asyncio.gather(*tasks, return_exceptions=True)
-
-        ontologies = []
-        for ont, download_url in zip(candidates, download_urls):
-            if isinstance(download_url, Exception) or not download_url:
-                continue
-            acronym = ont.get("acronym", "")
-            ont_id = acronym.lower()
-            ontologies.append(
-                {
-                    "ontology_id": ont_id,
-                    "name": ont.get("name", acronym),
-                    "description": ont.get("description", ""),
-                    "source": "bioportal",
-                    "source_url": download_url,
-                    "homepage": f"https://bioportal.bioontology.org/ontologies/{acronym}",
-                    "license": "",
-                }
-            )
+    session = external_session()
+    raw_list = await _fetch_all_ontologies(session)
+    if not raw_list:
+        logger.warning("BioPortal returned an empty ontology list")
+        return []
+
+    logger.info("BioPortal: %d ontologies total before dedup", len(raw_list))
+
+    # Filter out already-known OBO ontologies
+    candidates = [
+        o for o in raw_list
+        if o.get("acronym", "").lower() not in exclude_ids
+    ]
+    logger.info("BioPortal: %d candidates after OBO dedup", len(candidates))
+
+    # Fetch download URLs concurrently with rate limiting
+    tasks = [
+        _fetch_download_url(session, o["acronym"], semaphore)
+        for o in candidates
+    ]
+    download_urls = await asyncio.gather(*tasks, return_exceptions=True)
+
+    ontologies = []
+    for ont, download_url in zip(candidates, download_urls):
+        if isinstance(download_url, Exception) or not download_url:
+            continue
+        acronym = ont.get("acronym", "")
+        ont_id = acronym.lower()
+        ontologies.append(
+            {
+                "ontology_id": ont_id,
+                "name": ont.get("name", acronym),
+                "description": ont.get("description", ""),
+                "source": "bioportal",
+                "source_url": download_url,
+                "homepage": f"https://bioportal.bioontology.org/ontologies/{acronym}",
+                "license": "",
+            }
+        )
 
     logger.info("BioPortal: %d ontologies with download URLs", len(ontologies))
     return ontologies
@@ -11,6 +11,8 @@ from typing import Any, Dict, List
 import aiohttp
 import yaml
 
+from app.http_pool import external_session
+
 logger = logging.getLogger(__name__)
 
 OBOFOUNDRY_YAML_URL = "http://purl.obolibrary.org/meta/ontologies.yml"
@@ -25,18 +27,18 @@ async def fetch_obofoundry_ontologies() -> List[Dict[str, Any]]:
     """
     logger.info("Fetching OBOFoundry metadata from %s", OBOFOUNDRY_YAML_URL)
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                OBOFOUNDRY_YAML_URL,
-                timeout=aiohttp.ClientTimeout(total=120),
-                allow_redirects=True,
-            ) as resp:
-                if resp.status != 200:
-                    logger.error(
-                        "Failed to fetch OBOFoundry YAML: HTTP %s", resp.status
-                    )
-                    return []
-                raw_text = await resp.text()
+        session = external_session()
+        async with session.get(
+            OBOFOUNDRY_YAML_URL,
+            timeout=aiohttp.ClientTimeout(total=120),
+            allow_redirects=True,
+        ) as resp:
+            if resp.status != 200:
+                logger.error(
+                    "Failed to fetch OBOFoundry YAML: HTTP %s", resp.status
+                )
+                return []
+            raw_text = await resp.text()
     except Exception as e:
         logger.error("Error fetching OBOFoundry metadata: %s", e)
         return []
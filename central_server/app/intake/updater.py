@@ -2,7 +2,8 @@
 Ontology update pipeline.
 
 Orchestrates the full update process for a single ontology:
-  1. HTTP version check (ETag / Last-Modified / MD5 fallback)
+  1. HTTP version check (conditional HEAD, ETag / Last-Modified, GitHub asset
+     digest or head/tail Range fingerprint, MD5 after download as last resort)
   2. Download to staging file
   3. Validate via OntologyServer validateOntology endpoint
   4. Trigger ES indexing via OntologyServer triggerIndexing endpoint
@@ -17,13 +18,18 @@ import hashlib
 import json
 import logging
 import os
+import re
 import shutil
+import zlib
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
 
 import aiohttp
 
+from app.http_pool import external_session, worker_session
+
 logger = logging.getLogger(__name__)
 
 # How long to wait for OntologyServer hot-swap to complete (seconds)
@@ -35,35 +41,123 @@ POLL_INTERVAL = 10
 # Version checking
 # ---------------------------------------------------------------------------
 
+# Fingerprints for sources without ETag/Last-Modified hash this much of the
+# start and of the end of the file (fetched with Range requests).
+FINGERPRINT_SAMPLE_BYTES = 1024 * 1024
+
+_GITHUB_ASSET_URL = re.compile(
+    r"^https://github\.com/([^/]+)/([^/]+)/releases/(?:download/([^/]+)|latest/download)/([^/?#]+)$"
+)
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+
+
+async def _github_asset_fingerprint(urls: List[str], session: aiohttp.ClientSession) -> Optional[str]:
+    """Digest (or id/update time/size) of a GitHub release asset, from the API.
+
+    `urls` is the redirect chain of the source: GitHub answers release
+    download URLs with a redirect to its asset CDN, so the first URL that
+    names a release asset is used.
+    """
+    m = next((m for m in map(_GITHUB_ASSET_URL.match, urls) if m), None)
+    if not m:
+        return None
+    url = m.group(0)
+    owner, repo, tag, asset = m.groups()
+    api = f"{GITHUB_API_URL}/repos/{owner}/{repo}/releases/" + (f"tags/{tag}" if tag else "latest")
+    headers = {"Accept": "application/vnd.github+json"}
+    if os.getenv("GITHUB_TOKEN"):
+        headers["Authorization"] = f"Bearer {os.getenv('GITHUB_TOKEN')}"
+    try:
+        async with session.get(api, headers=headers, timeout=aiohttp.ClientTimeout(total=30)) as resp:
+            if resp.status != 200:
+                return None
+            release = await resp.json()
+    except Exception as e:
+        logger.debug("GitHub release lookup failed for %s: %s", url, e)
+        return None
+    for a in release.get("assets", []):
+        if a.get("name") == asset:
+            if a.get("digest"):
+                return f"github:{a['digest']}"
+            return f"github:{a.get('id')}:{a.get('updated_at')}:{a.get('size')}"
+    return None
+
+
+async def _range_fingerprint(url: str, content_length: int, session: aiohttp.ClientSession) -> Optional[str]:
+    """SHA-256 over the length and the first and last FINGERPRINT_SAMPLE_BYTES,
+    or None when the server does not honour Range."""
+    n = FINGERPRINT_SAMPLE_BYTES
+    spans = [(0, content_length - 1)] if content_length <= 2 * n else [(0, n - 1), (content_length - n, content_length - 1)]
+    digest = hashlib.sha256(f"{content_length}|".encode())
+    for start, end in spans:
+        async with session.get(
+            url,
+            headers={"Range": f"bytes={start}-{end}", "Accept-Encoding": "identity"},
+            allow_redirects=True,
+            timeout=aiohttp.ClientTimeout(total=60),
+        ) as resp:
+            # A 200 would be the whole file: leave without reading it.
+            if resp.status != 206:
+                return None
+            body = await resp.read()
+            if len(body) != end - start + 1:
+                return None
+            digest.update(body)
+    return f"ranges:{digest.hexdigest()}"
+
+
 async def check_version(
     source_url: str,
     stored_etag: Optional[str],
     stored_last_modified: Optional[str],
     stored_md5: Optional[str],
     session: aiohttp.ClientSession,
+    stored_fingerprint: Optional[str] = None,
+    stored_capabilities: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
     """
-    Perform an HTTP HEAD to check whether the ontology has changed.
+    Check whether the ontology has changed without downloading it.
+
+    A conditional HEAD (If-None-Match / If-Modified-Since) is tried first.
+    Sources without ETag or Last-Modified get a cheap fingerprint instead:
+    the GitHub release asset digest where the URL resolves to one, else the
+    Content-Length plus a hash of the first and last MB via Range requests.
+    Only when none of these is available does the caller fall back to a
+    full download and MD5 comparison. What the source supports is returned
+    as `capabilities`, so the next check skips what it lacks.
 
     Returns dict with keys:
       changed      – bool, True if an update is needed
       etag         – str or None
       last_modified – str or None
+      fingerprint  – str or None
+      content_length – int or None (bytes a download would transfer)
+      capabilities – {etag, last_modified, conditional, ranges, fingerprint}
       need_md5     – bool, True if we had to do a full download for comparison
       permanent_redirect – str or None (new URL if 301/308)
       error        – str or None
     """
+    caps = dict(stored_capabilities or {})
     result = {
         "changed": False,
         "etag": stored_etag,
         "last_modified": stored_last_modified,
+        "fingerprint": stored_fingerprint,
+        "content_length": None,
+        "capabilities": caps,
         "need_md5": False,
         "permanent_redirect": None,
         "error": None,
     }
+    headers = {"Accept-Encoding": "identity"}
+    if stored_etag:
+        headers["If-None-Match"] = stored_etag
+    if stored_last_modified:
+        headers["If-Modified-Since"] = stored_last_modified
     try:
         async with session.head(
             source_url,
+            headers=headers,
             allow_redirects=True,
             timeout=aiohttp.ClientTimeout(total=60),
         ) as resp:
@@ -83,17 +177,44 @@ async def check_version(
                 result["error"] = f"server_error_{resp.status}"
                 return result
 
+            final_url = str(resp.url)
+            chain = [source_url] + [str(r.url) for r in resp.history] + [final_url]
+            length = resp.headers.get("Content-Length")
+            if length and length.isdigit():
+                result["content_length"] = int(length)
+            if resp.headers.get("Accept-Ranges", "").lower() == "none":
+                caps["ranges"] = False
+
+            if resp.status == 304:
+                caps["conditional"] = True
+                result["etag"] = resp.headers.get("ETag") or stored_etag
+                result["last_modified"] = resp.headers.get("Last-Modified") or stored_last_modified
+                return result
+
             new_etag = resp.headers.get("ETag")
             new_lm = resp.headers.get("Last-Modified")
-
-            if new_etag:
-                result["etag"] = new_etag
-                result["changed"] = (new_etag != stored_etag)
-            elif new_lm:
-                result["last_modified"] = new_lm
-                result["changed"] = (new_lm != stored_last_modified)
+            caps["etag"] = bool(new_etag)
+            caps["last_modified"] = bool(new_lm)
+
+        if new_etag:
+            result["etag"] = new_etag
+            result["changed"] = (new_etag != stored_etag)
+        elif new_lm:
+            result["last_modified"] = new_lm
+            result["changed"] = (new_lm != stored_last_modified)
+        else:
+            fingerprint = await _github_asset_fingerprint(chain, session)
+            caps["fingerprint"] = "github" if fingerprint else None
+            if fingerprint is None and result["content_length"] and caps.get("ranges") is not False:
+                fingerprint = await _range_fingerprint(final_url, result["content_length"], session)
+                caps["ranges"] = fingerprint is not None
+                caps["fingerprint"] = "ranges" if fingerprint else None
+            result["fingerprint"] = fingerprint
+            if fingerprint is not None and fingerprint == stored_fingerprint:
+                result["changed"] = False
             else:
-                # No version headers: need full download + MD5 comparison
+                # No usable fingerprint, or it moved: full download + MD5
+                # comparison decides.
                 result["need_md5"] = True
                 result["changed"] = True  # provisionally; caller checks MD5 after download
 
@@ -109,6 +230,118 @@ async def check_version(
 # Download
 # ---------------------------------------------------------------------------
 
+# Per source host: at most DOWNLOAD_HOST_CONCURRENCY downloads at once, all of
+# them together paced to DOWNLOAD_HOST_MAX_MBPS (0 = unpaced). This lets the
+# update sweep fetch several ontologies in parallel without one mirror taking
+# all of the central server's bandwidth.
+DOWNLOAD_HOST_CONCURRENCY = int(os.getenv("DOWNLOAD_HOST_CONCURRENCY", "2"))
+DOWNLOAD_HOST_MAX_MBPS = float(os.getenv("DOWNLOAD_HOST_MAX_MBPS", "0"))
+# How often an interrupted transfer is resumed with a Range request.
+DOWNLOAD_MAX_RESUMES = int(os.getenv("DOWNLOAD_MAX_RESUMES", "5"))
+# First retry delay in seconds, doubled per resume (capped at 30).
+DOWNLOAD_RESUME_BACKOFF = 2.0
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+class _HostBudget:
+    """Concurrency slots and a shared byte pacer for one source host."""
+
+    def __init__(self, concurrency: int, bytes_per_second: float):
+        self.loop = asyncio.get_running_loop()
+        self.slots = asyncio.Semaphore(max(1, concurrency))
+        self.bytes_per_second = bytes_per_second
+        self._next_free = 0.0
+
+    async def pace(self, nbytes: int) -> None:
+        """Sleep until `nbytes` more fit in the host's rate."""
+        if self.bytes_per_second <= 0:
+            return
+        now = self.loop.time()
+        self._next_free = max(now, self._next_free) + nbytes / self.bytes_per_second
+        delay = self._next_free - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_host_budgets: Dict[str, _HostBudget] = {}
+
+
+def _host_budget(url: str) -> _HostBudget:
+    host = (urlparse(url).hostname or "").lower()
+    budget = _host_budgets.get(host)
+    if budget is None or budget.loop is not asyncio.get_running_loop():
+        budget = _HostBudget(DOWNLOAD_HOST_CONCURRENCY, DOWNLOAD_HOST_MAX_MBPS * 1024 * 1024)
+        _host_budgets[host] = budget
+    return budget
+
+
+class _OntologySink:
+    """Writes a download to a file, gunzipping it on the fly if it is gzipped.
+
+    Gzip is recognised by its magic bytes, not by headers. Concatenated gzip
+    members are decompressed in turn. The MD5 and size are of the
+    decompressed bytes, i.e. of the file on disk.
+    """
+
+    def __init__(self, fout):
+        self.fout = fout
+        self.md5 = hashlib.md5()
+        self.size = 0
+        self.gzipped: Optional[bool] = None
+        self._head = b""
+        self._inflater = None
+
+    def write(self, chunk: bytes) -> None:
+        if self.gzipped is None:
+            self._head += chunk
+            if len(self._head) < len(_GZIP_MAGIC):
+                return
+            chunk, self._head = self._head, b""
+            self.gzipped = chunk.startswith(_GZIP_MAGIC)
+            if self.gzipped:
+                self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if not self.gzipped:
+            self._emit(chunk)
+            return
+        while chunk and self._inflater is not None:
+            self._emit(self._inflater.decompress(chunk))
+            if not self._inflater.eof:
+                break
+            chunk = self._inflater.unused_data
+            # Another member follows; anything else (padding) is ignored.
+            self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS) if chunk.startswith(_GZIP_MAGIC) else None
+
+    def close(self) -> None:
+        if self._head:
+            self.gzipped = False
+            self._emit(self._head)
+            self._head = b""
+        if self._inflater is not None:
+            self._emit(self._inflater.flush())
+            if not self._inflater.eof:
+                raise ValueError("truncated gzip stream")
+
+    def _emit(self, data: bytes) -> None:
+        if data:
+            self.fout.write(data)
+            self.md5.update(data)
+            self.size += len(data)
+
+
+class _ResumeServerError(Exception):
+    """5xx answer to a Range request: retried like a dropped connection."""
+
+
+def _strong_validator(resp: aiohttp.ClientResponse) -> Optional[str]:
+    """ETag or Last-Modified usable in If-Range (weak ETags are not)."""
+    etag = resp.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return resp.headers.get("Last-Modified")
+
+
 async def download_ontology(
     source_url: str,
     dest_path: str,
@@ -117,67 +350,102 @@ async def download_ontology(
     """
     Stream-download source_url to dest_path.
 
-    Handles transparent gzip decompression. Returns {"md5": ..., "size": ...}
-    on success, or {"error": ...} on failure.
+    Gzipped bodies are decompressed chunk by chunk into the temp file, so
+    memory use does not grow with the ontology. A transfer that breaks off
+    is resumed with a Range request (If-Range on the ETag/Last-Modified of
+    the first response) up to DOWNLOAD_MAX_RESUMES times; a server that
+    answers 200 instead of 206 restarts it from the top, and a 5xx answer to
+    a resume counts as another interruption. Downloads share the per-host
+    budget above. The temp file is removed whenever the download fails.
+
+    Returns {"md5", "size", "transferred", "resumes"} on success (md5/size
+    of the decompressed file, transferred = bytes received), or
+    {"error": ...} on failure.
     """
-    import gzip as _gzip
-    import io
-
     logger.info("Downloading %s → %s", source_url, dest_path)
     Path(dest_path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest_path + ".tmp"
+    budget = _host_budget(source_url)
 
     try:
-        async with session.get(
-            source_url,
-            allow_redirects=True,
-            timeout=aiohttp.ClientTimeout(total=3600),
-        ) as resp:
-            if resp.status != 200:
-                return {"error": f"HTTP {resp.status}"}
-
-            content_encoding = resp.headers.get("Content-Encoding", "")
-            content_type = resp.headers.get("Content-Type", "")
-            is_gzipped = (
-                content_encoding == "gzip"
-                or source_url.endswith(".gz")
-                or "gzip" in content_type
-            )
-
-            md5 = hashlib.md5()
-            size = 0
-
-            tmp_path = dest_path + ".tmp"
+        async with budget.slots:
             with open(tmp_path, "wb") as fout:
-                if is_gzipped:
-                    buf = io.BytesIO()
-                    async for chunk in resp.content.iter_chunked(65536):
-                        buf.write(chunk)
-                    buf.seek(0)
+                sink = _OntologySink(fout)
+                received = 0
+                transferred = 0
+                resumes = 0
+                validator = None
+                resumable = False
+                while True:
+                    # identity: byte offsets must be those of the entity
+                    # itself for Range to line up.
+                    headers = {"Accept-Encoding": "identity"}
+                    if received:
+                        headers["Range"] = f"bytes={received}-"
+                        headers["If-Range"] = validator
                     try:
-                        with _gzip.GzipFile(fileobj=buf) as gz:
-                            data = gz.read()
-                    except Exception:
-                        buf.seek(0)
-                        data = buf.read()
-                    fout.write(data)
-                    md5.update(data)
-                    size = len(data)
-                else:
-                    async for chunk in resp.content.iter_chunked(65536):
-                        fout.write(chunk)
-                        md5.update(chunk)
-                        size += len(chunk)
-
-            os.replace(tmp_path, dest_path)
-            md5_hex = md5.hexdigest()
-            logger.info("Downloaded %s bytes (md5=%s) to %s", size, md5_hex, dest_path)
-            return {"md5": md5_hex, "size": size}
+                        async with session.get(
+                            source_url,
+                            headers=headers,
+                            allow_redirects=True,
+                            timeout=aiohttp.ClientTimeout(total=3600),
+                        ) as resp:
+                            if received and resp.status == 206:
+                                content_range = resp.headers.get("Content-Range", "")
+                                if not content_range.startswith(f"bytes {received}-"):
+                                    raise ValueError(f"unexpected Content-Range {content_range!r}")
+                            elif resp.status == 200:
+                                if received:
+                                    logger.info("%s changed or ignored Range; restarting download", source_url)
+                                    fout.seek(0)
+                                    fout.truncate()
+                                    sink = _OntologySink(fout)
+                                    received = 0
+                                validator = _strong_validator(resp)
+                            elif received and resp.status >= 500:
+                                raise _ResumeServerError(f"HTTP {resp.status}")
+                            else:
+                                raise ValueError(f"HTTP {resp.status}")
+                            resumable = (
+                                validator is not None
+                                and not resp.headers.get("Content-Encoding")
+                                and resp.headers.get("Accept-Ranges", "").lower() != "none"
+                            )
+                            async for chunk in resp.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                                # Inflating and writing are blocking; keep
+                                # them off the event loop.
+                                await asyncio.to_thread(sink.write, chunk)
+                                received += len(chunk)
+                                transferred += len(chunk)
+                                await budget.pace(len(chunk))
+                        break
+                    except (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError, asyncio.TimeoutError,
+                            _ResumeServerError) as e:
+                        if not resumable or resumes >= DOWNLOAD_MAX_RESUMES:
+                            raise
+                        resumes += 1
+                        logger.warning(
+                            "Download of %s interrupted after %d bytes (%s); resuming (%d/%d)",
+                            source_url, received, str(e) or type(e).__name__, resumes, DOWNLOAD_MAX_RESUMES,
+                        )
+                        await asyncio.sleep(min(DOWNLOAD_RESUME_BACKOFF * 2 ** (resumes - 1), 30))
+                await asyncio.to_thread(sink.close)
+
+        os.replace(tmp_path, dest_path)
+        md5_hex = sink.md5.hexdigest()
+        logger.info(
+            "Downloaded %s bytes (md5=%s, %s transferred, gzip=%s, %d resumes) to %s",
+            sink.size, md5_hex, transferred, bool(sink.gzipped), resumes, dest_path,
+        )
+        return {"md5": md5_hex, "size": sink.size, "transferred": transferred, "resumes": resumes}
 
     except Exception as e:
         logger.error("Download error for %s: %s", source_url, e)
-        if os.path.exists(dest_path + ".tmp"):
-            os.remove(dest_path + ".tmp")
         return {"error": str(e)}
+    finally:
+        # Still there unless os.replace above succeeded.
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
 
 # ---------------------------------------------------------------------------
@@ -188,17 +456,17 @@ async def validate_via_server(server_url: str, owl_path_on_server: str) -> bool:
     """Ask the OntologyServer to validate an OWL file using OWLAPI."""
     url = f"{server_url.rstrip('/')}/api/validateOntology.groovy"
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                url,
-                params={"owlPath": owl_path_on_server},
-                timeout=aiohttp.ClientTimeout(total=300),
-            ) as resp:
-                if resp.status == 200:
-                    data = await resp.json(content_type=None)
-                    return data.get("status") == "ok"
-                logger.warning("Validation failed at %s: HTTP %s", url, resp.status)
-                return False
+        session = worker_session()
+        async with session.get(
+            url,
+            params={"owlPath": owl_path_on_server},
+            timeout=aiohttp.ClientTimeout(total=300),
+        ) as resp:
+            if resp.status == 200:
+                data = await resp.json(content_type=None)
+                return data.get("status") == "ok"
+            logger.warning("Validation failed at %s: HTTP %s", url, resp.status)
+            return False
     except Exception as e:
         logger.error("Validation error for %s: %s", owl_path_on_server, e)
         return False
@@ -224,18 +492,18 @@ async def trigger_hotswap(
     if callback_url:
         payload["callbackUrl"] = callback_url
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                url,
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=30),
-            ) as resp:
-                if resp.status in (200, 202):
-                    data = await resp.json(content_type=None)
-                    return data.get("taskId")
-                body = await resp.text()
-                logger.error("Hot-swap trigger failed (%s): %s", resp.status, body[:200])
-                return None
+        session = worker_session()
+        async with session.post(
+            url,
+            json=payload,
+            timeout=aiohttp.ClientTimeout(total=30),
+        ) as resp:
+            if resp.status in (200, 202):
+                data = await resp.json(content_type=None)
+                return data.get("taskId")
+            body = await resp.text()
+            logger.error("Hot-swap trigger failed (%s): %s", resp.status, body[:200])
+            return None
     except Exception as e:
         logger.error("Hot-swap trigger error: %s", e)
         return None
@@ -247,32 +515,32 @@ async def wait_for_hotswap(
     """Poll the OntologyServer until the hot-swap succeeds, fails, or times out."""
     url = f"{server_url.rstrip('/')}/api/updateStatus.groovy"
     elapsed = 0
-    async with aiohttp.ClientSession() as session:
-        while elapsed < timeout_secs:
-            try:
-                async with session.get(
-                    url,
-                    params={"taskId": task_id},
-                    timeout=aiohttp.ClientTimeout(total=15),
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json(content_type=None)
-                        status = data.get("status")
-                        if status == "success":
-                            logger.info("Hot-swap %s completed successfully", task_id)
-                            return True
-                        if status == "failed":
-                            logger.error(
-                                "Hot-swap %s failed: %s",
-                                task_id, data.get("message"),
-                            )
-                            return False
-                        # "pending" or "running" — keep polling
-            except Exception as e:
-                logger.warning("Poll error for task %s: %s", task_id, e)
-
-            await asyncio.sleep(POLL_INTERVAL)
-            elapsed += POLL_INTERVAL
+    session = worker_session()
+    while elapsed < timeout_secs:
+        try:
+            async with session.get(
+                url,
+                params={"taskId": task_id},
+                timeout=aiohttp.ClientTimeout(total=15),
+            ) as resp:
+                if resp.status == 200:
+                    data = await resp.json(content_type=None)
+                    status = data.get("status")
+                    if status == "success":
+                        logger.info("Hot-swap %s completed successfully", task_id)
+                        return True
+                    if status == "failed":
+                        logger.error(
+                            "Hot-swap %s failed: %s",
+                            task_id, data.get("message"),
+                        )
+                        return False
+                    # "pending" or "running" — keep polling
+        except Exception as e:
+            logger.warning("Poll error for task %s: %s", task_id, e)
+
+        await asyncio.sleep(POLL_INTERVAL)
+        elapsed += POLL_INTERVAL
 
     logger.error("Hot-swap %s timed out after %ss", task_id, timeout_secs)
     return False
@@ -309,18 +577,18 @@ async def trigger_indexing(
     if callback_url:
         payload["callbackUrl"] = callback_url
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                url,
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=30),
-            ) as resp:
-                if resp.status in (200, 202):
-                    data = await resp.json(content_type=None)
-                    return data.get("taskId")
-                body = await resp.text()
-                logger.error("Indexing trigger failed (%s): %s", resp.status, body[:200])
-                return None
+        session = worker_session()
+        async with session.post(
+            url,
+            json=payload,
+            timeout=aiohttp.ClientTimeout(total=30),
+        ) as resp:
+            if resp.status in (200, 202):
+                data = await resp.json(content_type=None)
+                return data.get("taskId")
+            body = await resp.text()
+            logger.error("Indexing trigger failed (%s): %s", resp.status, body[:200])
+            return None
     except Exception as e:
         logger.error("Indexing trigger error: %s", e)
         return None
@@ -344,12 +612,14 @@ async def execute_reindex(
     es_mgr,
     ontologies_base_path: str,
     es_url: str,
+    on_registry_write: Optional[Callable[[], None]] = None,
 ) -> Dict[str, Any]:
     """Re-index an ontology into ES from the OWL the worker ALREADY serves —
     no download, no validate, no hot-swap. Central creates the (correctly
     mapped) index, the worker indexes its existing OWL into it, then the alias
     is swapped. This is the controllable, download-free way to (re)populate an
-    ES class index."""
+    ES class index. `on_registry_write` is called after every registry write
+    (main passes registry_cache.invalidate)."""
     server_url = registry_entry.get("server_url") or registry_entry.get("url")
     # Worker mutating servlets (triggerIndexing / updateOntology) authenticate
     # against the shared ABEROWL_SECRET_KEY env, NOT the per-ontology registry
@@ -358,7 +628,7 @@ async def execute_reindex(
     name = registry_entry.get("name", ontology_id)
     description = registry_entry.get("description", "")
     if not server_url:
-        await _update_registry_status(redis_client, ontology_id, "reindex_failed", "no server url")
+        await _update_registry_status(redis_client, ontology_id, "reindex_failed", "no server url", on_registry_write)
         return {"success": False, "error": "no_server_url"}
 
     # The ontologies dir is mounted at /data in the worker; it serves {id} from
@@ -377,13 +647,13 @@ async def execute_reindex(
     )
     if not task_id:
         await es_mgr.delete_index(new_es_index)
-        await _update_registry_status(redis_client, ontology_id, "reindex_failed", "indexing trigger failed")
+        await _update_registry_status(redis_client, ontology_id, "reindex_failed", "indexing trigger failed", on_registry_write)
         return {"success": False, "error": "reindex_trigger_failed"}
 
     ok = await wait_for_task(server_url, task_id, timeout_secs=1800)
     if not ok:
         await es_mgr.delete_index(new_es_index)
-        await _update_registry_status(redis_client, ontology_id, "reindex_failed", "ES indexing failed")
+        await _update_registry_status(redis_client, ontology_id, "reindex_failed", "ES indexing failed", on_registry_write)
         return {"success": False, "error": "reindex_failed"}
 
     alias_ok = await es_mgr.swap_alias(ontology_id, new_es_index, old_es_index)
@@ -398,7 +668,7 @@ async def execute_reindex(
         "update_error": None,
         "last_indexed": datetime.now(timezone.utc).isoformat(),
     })
-    await redis_client.hset("registered_servers", ontology_id, json.dumps(entry))
+    await _save_registry_entry(redis_client, ontology_id, entry, on_registry_write)
     logger.info("Reindex complete for %s -> %s", ontology_id, new_es_index)
     return {"success": True, "error": None, "es_index": new_es_index}
 
@@ -410,11 +680,21 @@ async def execute_update_pipeline(
     es_mgr,
     ontologies_base_path: str,
     es_url: str,
+    force: bool = False,
+    on_registry_write: Optional[Callable[[], None]] = None,
 ) -> Dict[str, Any]:
     """
     Execute the full update pipeline for one ontology.
 
-    Returns {"success": bool, "error": str|None, "new_md5": str|None}
+    Unless `force` is set (manual and webhook triggers), an ontology whose
+    source is unchanged according to check_version, and which already has
+    an ES index, is not downloaded at all.
+
+    Returns {"success": bool, "error": str|None, "new_md5": str|None,
+    "changed": bool, "bytes_saved": int}; bytes_saved is what the skipped
+    download would have transferred (Content-Length, else the last one).
+    `on_registry_write` is called after every registry write (main passes
+    registry_cache.invalidate).
     """
     source_url = registry_entry.get("source_url")
     # Registry entries store the worker URL under "url"; older code/paths used
@@ -428,6 +708,8 @@ async def execute_update_pipeline(
     stored_etag = registry_entry.get("source_etag")
     stored_lm = registry_entry.get("source_last_modified")
     stored_md5 = registry_entry.get("source_md5")
+    stored_fingerprint = registry_entry.get("source_fingerprint")
+    stored_capabilities = registry_entry.get("source_capabilities")
     name = registry_entry.get("name", ontology_id)
     description = registry_entry.get("description", "")
 
@@ -443,59 +725,79 @@ async def execute_update_pipeline(
 
     timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
 
-    async with aiohttp.ClientSession() as session:
-        # Step 1: Version check
-        version_info = await check_version(
-            source_url, stored_etag, stored_lm, stored_md5, session
-        )
-
-        if version_info.get("error") == "source_gone":
-            await _update_registry_status(
-                redis_client, ontology_id, "source_gone", "Source URL returned 404/410"
-            )
-            return {"success": False, "error": "source_gone"}
+    session = external_session()
+    # Step 1: Version check
+    version_info = await check_version(
+        source_url, stored_etag, stored_lm, stored_md5, session,
+        stored_fingerprint=stored_fingerprint,
+        stored_capabilities=stored_capabilities,
+    )
+    source_fields = {
+        "source_etag": version_info.get("etag"),
+        "source_last_modified": version_info.get("last_modified"),
+        "source_fingerprint": version_info.get("fingerprint"),
+        "source_capabilities": version_info.get("capabilities"),
+    }
 
-        if version_info.get("error"):
-            await _update_registry_status(
-                redis_client, ontology_id, "check_failed", version_info["error"]
-            )
-            return {"success": False, "error": version_info["error"]}
+    if version_info.get("error") == "source_gone":
+        await _update_registry_status(
+            redis_client, ontology_id, "source_gone", "Source URL returned 404/410", on_registry_write
+        )
+        return {"success": False, "error": "source_gone"}
 
-        if version_info.get("permanent_redirect"):
-            logger.info(
-                "Permanent redirect for %s: updating source_resolved_url to %s",
-                ontology_id, version_info["permanent_redirect"],
-            )
-            registry_entry["source_resolved_url"] = version_info["permanent_redirect"]
+    if version_info.get("error"):
+        await _update_registry_status(
+            redis_client, ontology_id, "check_failed", version_info["error"], on_registry_write
+        )
+        return {"success": False, "error": version_info["error"]}
 
-        # Step 2: Download
-        dl_result = await download_ontology(source_url, staging_path_host, session)
-        if "error" in dl_result:
-            await _update_registry_status(
-                redis_client, ontology_id, "download_failed", dl_result["error"]
+    if version_info.get("permanent_redirect"):
+        logger.info(
+            "Permanent redirect for %s: updating source_resolved_url to %s",
+            ontology_id, version_info["permanent_redirect"],
+        )
+        registry_entry["source_resolved_url"] = version_info["permanent_redirect"]
+        source_fields["source_resolved_url"] = version_info["permanent_redirect"]
+
+    if not force and not version_info.get("changed") and await es_mgr.get_current_index(ontology_id):
+        saved = version_info.get("content_length") or registry_entry.get("source_transfer_bytes") or 0
+        logger.info("%s: source unchanged, skipped download (%d bytes)", ontology_id, saved)
+        await _touch_last_checked(redis_client, ontology_id, source_fields, on_registry_write)
+        return {"success": True, "error": None, "new_md5": stored_md5, "changed": False, "bytes_saved": saved}
+
+    # Step 2: Download
+    dl_result = await download_ontology(source_url, staging_path_host, session)
+    if "error" in dl_result:
+        await _update_registry_status(
+            redis_client, ontology_id, "download_failed", dl_result["error"], on_registry_write
+        )
+        return {"success": False, "error": f"download: {dl_result['error']}"}
+
+    new_md5 = dl_result["md5"]
+
+    # MD5 fallback: if no version headers were present, check MD5 now.
+    # Only treat "unchanged" as nothing-to-do when an ES index already
+    # exists — otherwise (e.g. a never-indexed ontology) we must still index
+    # the existing OWL even though the file hasn't changed.
+    if version_info.get("need_md5") and new_md5 == stored_md5:
+        if await es_mgr.get_current_index(ontology_id):
+            logger.info("%s: MD5 unchanged (%s) and ES index present, no update needed", ontology_id, new_md5)
+            # Recording the fingerprint lets the next check skip the download.
+            await _touch_last_checked(
+                redis_client, ontology_id,
+                dict(source_fields, source_transfer_bytes=dl_result.get("transferred")),
+                on_registry_write,
             )
-            return {"success": False, "error": f"download: {dl_result['error']}"}
-
-        new_md5 = dl_result["md5"]
-
-        # MD5 fallback: if no version headers were present, check MD5 now.
-        # Only treat "unchanged" as nothing-to-do when an ES index already
-        # exists — otherwise (e.g. a never-indexed ontology) we must still index
-        # the existing OWL even though the file hasn't changed.
-        if version_info.get("need_md5") and new_md5 == stored_md5:
-            if await es_mgr.get_current_index(ontology_id):
-                logger.info("%s: MD5 unchanged (%s) and ES index present, no update needed", ontology_id, new_md5)
-                await _touch_last_checked(redis_client, ontology_id)
-                _cleanup_staging(staging_path_host)
-                return {"success": True, "error": None, "new_md5": new_md5, "changed": False}
-            logger.info("%s: MD5 unchanged but no ES index — indexing existing OWL", ontology_id)
+            _cleanup_staging(staging_path_host)
+            return {"success": True, "error": None, "new_md5": new_md5, "changed": False, "bytes_saved": 0}
+        logger.info("%s: MD5 unchanged but no ES index — indexing existing OWL", ontology_id)
 
     # Step 3: Validate via OntologyServer (if server is online)
     if server_url:
         valid = await validate_via_server(server_url, staging_path_container)
         if not valid:
             await _update_registry_status(
-                redis_client, ontology_id, "validation_failed", "OWL parse error"
+                redis_client, ontology_id, "validation_failed", "OWL parse error", on_registry_write
             )
             _cleanup_staging(staging_path_host)
             return {"success": False, "error": "owl_validation_failed"}
@@ -533,7 +835,7 @@ async def execute_update_pipeline(
     if not es_ok:
         await es_mgr.delete_index(new_es_index)
         await _update_registry_status(
-            redis_client, ontology_id, "indexing_failed", "ES indexing failed"
+            redis_client, ontology_id, "indexing_failed", "ES indexing failed", on_registry_write
         )
         _cleanup_staging(staging_path_host)
         return {"success": False, "error": "es_indexing_failed"}
@@ -549,7 +851,7 @@ async def execute_update_pipeline(
         if not task_id:
             await es_mgr.delete_index(new_es_index)
             await _update_registry_status(
-                redis_client, ontology_id, "hotswap_failed", "Could not start hot-swap"
+                redis_client, ontology_id, "hotswap_failed", "Could not start hot-swap", on_registry_write
             )
             _cleanup_staging(staging_path_host)
             return {"success": False, "error": "hotswap_trigger_failed"}
@@ -558,7 +860,7 @@ async def execute_update_pipeline(
         if not swap_ok:
             await es_mgr.delete_index(new_es_index)
             await _update_registry_status(
-                redis_client, ontology_id, "hotswap_failed", "Hot-swap did not succeed"
+                redis_client, ontology_id, "hotswap_failed", "Hot-swap did not succeed", on_registry_write
             )
             _cleanup_staging(staging_path_host)
             return {"success": False, "error": "hotswap_failed"}
@@ -583,9 +885,9 @@ async def execute_update_pipeline(
     now_iso = datetime.now(timezone.utc).isoformat()
     registry_entry.update(
         {
-            "source_etag": version_info.get("etag"),
-            "source_last_modified": version_info.get("last_modified"),
+            **source_fields,
             "source_md5": new_md5,
+            "source_transfer_bytes": dl_result.get("transferred"),
             "last_checked": now_iso,
             "last_updated": now_iso,
             "update_status": "ok",
@@ -602,11 +904,9 @@ async def execute_update_pipeline(
     )
     registry_entry["update_history"] = history[-10:]
 
-    await redis_client.hset(
-        "registered_servers", ontology_id, json.dumps(registry_entry)
-    )
+    await _save_registry_entry(redis_client, ontology_id, registry_entry, on_registry_write)
     logger.info("Update pipeline complete for %s", ontology_id)
-    return {"success": True, "error": None, "new_md5": new_md5, "changed": True}
+    return {"success": True, "error": None, "new_md5": new_md5, "changed": True, "bytes_saved": 0}
 
 
 # ---------------------------------------------------------------------------
@@ -621,8 +921,18 @@ def _cleanup_staging(staging_path: str) -> None:
         logger.warning("Could not remove staging file %s: %s", staging_path, e)
 
 
+async def _save_registry_entry(
+    redis_client, ontology_id: str, entry: Dict[str, Any],
+    on_registry_write: Optional[Callable[[], None]] = None,
+) -> None:
+    await redis_client.hset("registered_servers", ontology_id, json.dumps(entry))
+    if on_registry_write is not None:
+        on_registry_write()
+
+
 async def _update_registry_status(
-    redis_client, ontology_id: str, update_status: str, error_msg: str
+    redis_client, ontology_id: str, update_status: str, error_msg: str,
+    on_registry_write: Optional[Callable[[], None]] = None,
 ) -> None:
     raw = await redis_client.hget("registered_servers", ontology_id)
     if raw:
@@ -642,12 +952,16 @@ async def _update_registry_status(
         }
     )
     entry["update_history"] = history[-10:]
-    await redis_client.hset("registered_servers", ontology_id, json.dumps(entry))
+    await _save_registry_entry(redis_client, ontology_id, entry, on_registry_write)
 
 
-async def _touch_last_checked(redis_client, ontology_id: str) -> None:
+async def _touch_last_checked(
+    redis_client, ontology_id: str, fields: Optional[Dict[str, Any]] = None,
+    on_registry_write: Optional[Callable[[], None]] = None,
+) -> None:
     raw = await redis_client.hget("registered_servers", ontology_id)
     if raw:
         entry = json.loads(raw)
+        entry.update(fields or {})
         entry["last_checked"] = datetime.now(timezone.utc).isoformat()
-        await redis_client.hset("registered_servers", ontology_id, json.dumps(entry))
+        await _save_registry_entry(redis_client, ontology_id, entry, on_registry_write)
@@ -3,11 +3,12 @@ import base64
 import json
 import logging
 import os
+import re
 import secrets
 import subprocess
 import sys
 import uuid
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack, asynccontextmanager
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, Any, Optional, List, Set
@@ -16,14 +17,17 @@ from urllib.parse import urlparse
 import aiohttp
 import redis.asyncio as redis
 from fastapi import FastAPI, Request, Query, HTTPException, Depends
-from fastapi.responses import HTMLResponse, JSONResponse, Response
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel, HttpUrl
 
 from app.es_manager import CentralESManager
-from app.sparql_expander import expand_sparql_query
+from app.registry_cache import RegistryCache, RegistrySnapshot
+from app import http_pool, single_flight
+from app.http_pool import es_session, external_session, worker_session
+from app.sparql_expander import expand_sparql_query, frame_cache
 from app.auth import (
     get_rate_limit_key, create_api_key, revoke_api_key, list_api_keys,
     PUBLIC_RATE_LIMIT, API_KEY_RATE_LIMIT,
@@ -46,16 +50,28 @@ MANUAL_ONTOLOGIES_PATH = "config/manual_ontologies.json"
 # worker url/secret_key and could never index. Now unified; _migrate_unify_registries()
 # folds the legacy ontology_registry source fields in once on startup.
 REGISTRY_KEY = "registered_servers"
+# Parsed, indexed in-memory view of REGISTRY_KEY for the read paths. Writers
+# below call registry_cache.invalidate(); other processes are picked up through
+# Redis keyspace notifications (see app/registry_cache.py).
+registry_cache = RegistryCache(REGISTRY_KEY)
 
 # Redis client instance will be managed in the lifespan context
 redis_client: redis.Redis = None
 catalogue_config: Dict[str, Any] = {}
 ELASTICSEARCH_URL = os.getenv("CENTRAL_ES_URL", "http://elasticsearch:9200")
 mcp_process: Optional[asyncio.subprocess.Process] = None
+# Keeps the session manager of an MCP server mounted in this app running
+# (MCP_ONTOLOGY_IN_PROCESS); closed on shutdown.
+mcp_in_process: Optional[AsyncExitStack] = None
+# Answer cache of that MCP server, served on /admin/infrastructure.
+mcp_tool_cache = None
 
 # Central service managers (initialised in lifespan)
 es_mgr: Optional[CentralESManager] = None
 
+# Totals of the most recent update sweep, served on /admin/infrastructure
+last_update_sweep: Optional[Dict[str, Any]] = None
+
 # HTTP Basic Auth for admin endpoints
 _security = HTTPBasic()
 ADMIN_USER = os.getenv("ADMIN_USER", "admin")
@@ -64,8 +80,9 @@ ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "changeme")
 # Scheduling intervals
 SOURCE_SYNC_INTERVAL = int(os.getenv("SOURCE_SYNC_INTERVAL_SECONDS", "86400"))
 UPDATE_CHECK_INTERVAL = int(os.getenv("UPDATE_CHECK_INTERVAL_SECONDS", "86400"))
-# Automatic source-sync + update-check (which DOWNLOAD every ontology to check
-# for upstream changes) are OFF by default so a central restart never triggers a
+UPDATE_CHECK_CONCURRENCY = int(os.getenv("UPDATE_CHECK_CONCURRENCY", "5"))
+# Automatic source-sync + update-check (which DOWNLOAD every ontology whose
+# source has no ETag, Last-Modified or cheap fingerprint) are OFF by default so a central restart never triggers a
 # corpus-wide download. Set ENABLE_AUTO_SYNC=true to run them on the daily
 # schedule; otherwise trigger them on demand via /admin/sync_sources and
 # /admin/check_updates.
@@ -75,6 +92,21 @@ ENABLE_AUTO_SYNC = os.getenv("ENABLE_AUTO_SYNC", "false").lower() in ("1", "true
 # Interval 0 disables the sweep; refresh explicitly via POST /admin/refresh_status.
 STATUS_POLL_INTERVAL = int(os.getenv("STATUS_POLL_INTERVAL", "300"))
 STATUS_POLL_CONCURRENCY = max(1, int(os.getenv("STATUS_POLL_CONCURRENCY", "16")))
+# /api/dlquery_all sends one request per worker covering all of its target
+# ontologies, so the budget is per worker rather than per ontology.
+DLQUERY_WORKER_TIMEOUT = float(os.getenv("DLQUERY_WORKER_TIMEOUT", "60"))
+# Cap on records relayed by /api/dlquery_all?format=ndjson (clients may ask for
+# less with `limit`), and how many records may sit between the worker reads and
+# the client write before the worker reads pause.
+DLQUERY_STREAM_MAX_RESULTS = int(os.getenv("DLQUERY_STREAM_MAX_RESULTS", "100000"))
+DLQUERY_STREAM_BUFFER = int(os.getenv("DLQUERY_STREAM_BUFFER", "1000"))
+# Largest batch POST /api/getClasses accepts (the worker servlet has its own
+# CLASS_BATCH_MAX_IRIS with the same default).
+CLASS_BATCH_MAX_IRIS = int(os.getenv("CLASS_BATCH_MAX_IRIS", "1000"))
+# POST /api/resolve/batch: most terms per call, and searches per _msearch
+# request when the caller asks for bounded concurrency.
+RESOLVE_BATCH_MAX_TERMS = int(os.getenv("RESOLVE_BATCH_MAX_TERMS", "10000"))
+RESOLVE_MSEARCH_CHUNK = int(os.getenv("RESOLVE_MSEARCH_CHUNK", "500"))
 ONTOLOGIES_BASE_PATH = os.getenv("ONTOLOGIES_HOST_PATH", "/data/ontologies")
 ABEROWL_REPO_PATH = os.getenv("ABEROWL_REPO_PATH", "/opt/aberowl")
 
@@ -105,6 +137,13 @@ async def _get_registry_entry(ontology_id: str) -> Optional[Dict[str, Any]]:
 
 async def _save_registry_entry(ontology_id: str, entry: Dict[str, Any]) -> None:
     await redis_client.hset(REGISTRY_KEY, ontology_id, json.dumps(entry))
+    registry_cache.invalidate()
+
+
+async def _registry_snapshot() -> RegistrySnapshot:
+    """Indexed registry view for read-only request paths (no Redis round-trip
+    while the snapshot is fresh). Entries are shared: do not mutate them."""
+    return await registry_cache.snapshot(redis_client)
 
 
 async def _load_manual_ontologies() -> List[Dict[str, Any]]:
@@ -205,8 +244,11 @@ async def _check_and_update_all() -> None:
         logger.info("No ontologies in registry, skipping update check.")
         return
 
-    # Run checks concurrently (but limit parallelism to avoid hammering servers)
-    sem = asyncio.Semaphore(5)
+    # Run checks concurrently. Downloads are further limited per source host
+    # (intake/updater.py: DOWNLOAD_HOST_CONCURRENCY / DOWNLOAD_HOST_MAX_MBPS).
+    sem = asyncio.Semaphore(UPDATE_CHECK_CONCURRENCY)
+    started = datetime.now(timezone.utc)
+    totals = {"checked": 0, "unchanged": 0, "updated": 0, "failed": 0, "bytes_saved": 0}
 
     async def check_one(ontology_id: str) -> None:
         async with sem:
@@ -216,6 +258,7 @@ async def _check_and_update_all() -> None:
             if entry.get("update_status") == "disabled":
                 return
             logger.info("Checking update for %s", ontology_id)
+            totals["checked"] += 1
             try:
                 result = await update_pipeline.execute_update_pipeline(
                     ontology_id=ontology_id,
@@ -224,18 +267,32 @@ async def _check_and_update_all() -> None:
                     es_mgr=es_mgr,
                     ontologies_base_path=ONTOLOGIES_BASE_PATH,
                     es_url=ELASTICSEARCH_URL,
+                    on_registry_write=registry_cache.invalidate,
                 )
+                totals["bytes_saved"] += result.get("bytes_saved") or 0
                 if result.get("changed") is False:
+                    totals["unchanged"] += 1
                     logger.info("%s: no change detected", ontology_id)
                 elif result.get("success"):
+                    totals["updated"] += 1
                     logger.info("%s: updated successfully", ontology_id)
                 else:
+                    totals["failed"] += 1
                     logger.warning("%s: update failed: %s", ontology_id, result.get("error"))
             except Exception as e:
+                totals["failed"] += 1
                 logger.error("Unhandled error updating %s: %s", ontology_id, e)
 
     await asyncio.gather(*[check_one(k) for k in all_keys])
-    logger.info("Daily update check complete.")
+    global last_update_sweep
+    last_update_sweep = dict(totals, started=started.isoformat(),
+                             finished=datetime.now(timezone.utc).isoformat())
+    logger.info(
+        "Daily update check complete: %d checked, %d unchanged, %d updated, %d failed, "
+        "%.1f MB of downloads skipped.",
+        totals["checked"], totals["unchanged"], totals["updated"], totals["failed"],
+        totals["bytes_saved"] / 1e6,
+    )
 
 
 async def daily_update_check_task() -> None:
@@ -308,6 +365,7 @@ async def _load_servers_from_file():
                 # Set status to unknown, as we don't know if it's online until we check
                 server['status'] = 'unknown'
                 await redis_client.hset("registered_servers", ontology_name, json.dumps(server))
+        registry_cache.invalidate()
         logger.info(f"Successfully loaded {len(servers)} servers into Redis.")
     except Exception as e:
         logger.error(f"Failed to load servers from file: {e}")
@@ -333,13 +391,16 @@ async def fetch_and_update_server_metadata(
 ):
     """Fetches metadata for a single server and updates Redis.
 
-    Pass `session` to reuse one connection pool across a sweep; without it a
-    private session is created (fine for the single-server registration path).
+    `session` defaults to the shared worker pool (app/http_pool.py). The
+    worker's ETag is kept in the entry as `stats_etag` and sent back as
+    If-None-Match, so an unchanged ontology costs an empty 304; Redis is
+    only written when the entry actually changed.
     """
     url = server.get("url")
     ontology = server.get("ontology")
     if not url or not ontology:
         return
+    before = json.dumps(server)
 
     # If the URL is localhost/127.0.0.1, we must use host.docker.internal to reach it from inside the container
     base_url = str(url)
@@ -353,15 +414,23 @@ async def fetch_and_update_server_metadata(
     stats_url = f"{poll_base.rstrip('/')}/api/getStatistics.groovy?ontologyId={ontology}"
 
     logger.debug(f"Fetching metadata for {ontology} from {stats_url} (originally {url})")
-    owned_session = session is None
-    if owned_session:
-        session = aiohttp.ClientSession()
+    if session is None:
+        session = worker_session()
+    headers = {"If-None-Match": server["stats_etag"]} if server.get("stats_etag") else None
     try:
-        async with session.get(stats_url, timeout=30) as response:
-            if response.status == 200:
+        async with session.get(stats_url, timeout=30, headers=headers) as response:
+            if response.status == 304:
+                server["status"] = "online"
+                logger.debug(f"Metadata for {ontology} unchanged")
+            elif response.status == 200:
                 stats = await response.json()
                 server.update(stats)
                 server["status"] = "online"
+                etag = response.headers.get("ETag")
+                if etag:
+                    server["stats_etag"] = etag
+                else:
+                    server.pop("stats_etag", None)
                 # Backfill any fields the OWL file didn't carry (title,
                 # description, homepage, license, contact) from OBO Foundry.
                 _apply_registry_fallbacks(server)
@@ -372,16 +441,17 @@ async def fetch_and_update_server_metadata(
     except Exception as e:
         logger.error(f"Error fetching metadata for {ontology}: {e}")
         server["status"] = "offline"
-    finally:
-        if owned_session:
-            await session.close()
 
     # Always apply registry fallbacks for any still-empty fields (e.g. when the
     # worker was unreachable above, title can still come from the cache).
     _apply_registry_fallbacks(server)
 
     # Update the server data in Redis
-    await redis_client.hset("registered_servers", ontology, json.dumps(server))
+    after = json.dumps(server)
+    if after == before:
+        return
+    await redis_client.hset("registered_servers", ontology, after)
+    registry_cache.invalidate()
 
 
 async def start_mcp_servers():
@@ -397,7 +467,9 @@ async def start_mcp_servers():
     enable_ontology = _truthy("ENABLE_MCP_ONTOLOGY", "true")
 
     mcp_scripts = []
-    if enable_ontology:
+    if enable_ontology and _truthy("MCP_ONTOLOGY_IN_PROCESS"):
+        await mount_mcp_ontology()
+    elif enable_ontology:
         mcp_scripts.append(("mcp_ontology_server.py", os.getenv("MCP_ONTOLOGY_PORT", "8766")))
     else:
         logger.info("MCP ontology server disabled (ENABLE_MCP_ONTOLOGY=false)")
@@ -417,6 +489,27 @@ async def start_mcp_servers():
             logger.error(f"Failed to start MCP server {script_name}: {e}")
 
 
+async def mount_mcp_ontology():
+    """Serve the MCP ontology server from this app, at /mcp/ontology/mcp,
+    instead of as a subprocess on its own port. Its tools then call the API
+    routes of this app in-process rather than over HTTP."""
+    global mcp_in_process, mcp_tool_cache
+    from starlette.routing import Mount
+
+    server_dir = os.path.dirname(os.path.dirname(__file__))
+    if server_dir not in sys.path:
+        sys.path.insert(0, server_dir)
+    import mcp_ontology_server
+
+    mcp_ontology_server.mount_in_process(app)
+    mcp_tool_cache = mcp_ontology_server.tool_cache
+    # Ahead of the SPA catch-all route, which would otherwise answer GETs.
+    app.router.routes.insert(0, Mount("/mcp/ontology", app=mcp_ontology_server.mcp.streamable_http_app()))
+    mcp_in_process = AsyncExitStack()
+    await mcp_in_process.enter_async_context(mcp_ontology_server.mcp.session_manager.run())
+    logger.info("MCP ontology server mounted in-process at /mcp/ontology/mcp")
+
+
 # Cache of ontology titles from OBO Foundry + BioPortal known names
 _obo_titles: Dict[str, str] = {}
 # Cache of richer OBO Foundry registry metadata, keyed by lowercase ontology id.
@@ -459,35 +552,35 @@ async def _load_obo_foundry_titles():
     global _obo_titles, _obo_metadata
     _obo_titles.update(_KNOWN_TITLES)
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(OBO_REGISTRY_URL, timeout=aiohttp.ClientTimeout(total=15)) as resp:
-                if resp.status == 200:
-                    data = await resp.json(content_type=None)
-                    for o in data.get("ontologies", []):
-                        oid = o.get("id", "")
-                        if not oid:
-                            continue
-                        key = oid.lower()
-                        title = o.get("title", "")
-                        if title:
-                            _obo_titles[key] = title
-                        license_info = o.get("license", {})
-                        license_url = ""
-                        if isinstance(license_info, dict):
-                            license_url = license_info.get("url", "") or license_info.get("label", "")
-                        elif isinstance(license_info, str):
-                            license_url = license_info
-                        _obo_metadata[key] = {
-                            "title": title,
-                            "description": o.get("description", ""),
-                            "home_page": o.get("homepage", ""),
-                            "license": license_url,
-                            "contact": _normalize_contact(o.get("contact")),
-                        }
-                    logger.info(
-                        f"Loaded {len(_obo_titles)} titles / {len(_obo_metadata)} metadata "
-                        f"records from OBO Foundry registry"
-                    )
+        session = external_session()
+        async with session.get(OBO_REGISTRY_URL, timeout=aiohttp.ClientTimeout(total=15)) as resp:
+            if resp.status == 200:
+                data = await resp.json(content_type=None)
+                for o in data.get("ontologies", []):
+                    oid = o.get("id", "")
+                    if not oid:
+                        continue
+                    key = oid.lower()
+                    title = o.get("title", "")
+                    if title:
+                        _obo_titles[key] = title
+                    license_info = o.get("license", {})
+                    license_url = ""
+                    if isinstance(license_info, dict):
+                        license_url = license_info.get("url", "") or license_info.get("label", "")
+                    elif isinstance(license_info, str):
+                        license_url = license_info
+                    _obo_metadata[key] = {
+                        "title": title,
+                        "description": o.get("description", ""),
+                        "home_page": o.get("homepage", ""),
+                        "license": license_url,
+                        "contact": _normalize_contact(o.get("contact")),
+                    }
+                logger.info(
+                    f"Loaded {len(_obo_titles)} titles / {len(_obo_metadata)} metadata "
+                    f"records from OBO Foundry registry"
+                )
     except Exception as e:
         logger.warning(f"Could not fetch OBO Foundry titles: {e}")
 
@@ -545,6 +638,7 @@ async def _reapply_registry_fallbacks_to_all():
             await redis_client.hset("registered_servers", key, json.dumps(server))
             updated += 1
     if updated:
+        registry_cache.invalidate()
         await _write_servers_to_file()
         logger.info(f"Re-applied registry fallbacks; updated {updated} server entries")
 
@@ -636,12 +730,13 @@ async def _fetch_and_update_all_servers(only: Optional[List[str]] = None):
         async with sem:
             await fetch_and_update_server_metadata(server, session=session)
 
-    connector = aiohttp.TCPConnector(limit=STATUS_POLL_CONCURRENCY)
-    async with aiohttp.ClientSession(connector=connector) as session:
-        # return_exceptions so one bad worker cannot abort the whole sweep.
-        results = await asyncio.gather(
-            *(_one(s, session) for s in servers), return_exceptions=True
-        )
+    # The semaphore bounds the sweep; connections come from the shared worker
+    # pool so the sweep keeps them alive for the next request.
+    session = worker_session()
+    # return_exceptions so one bad worker cannot abort the whole sweep.
+    results = await asyncio.gather(
+        *(_one(s, session) for s in servers), return_exceptions=True
+    )
 
     failed = [r for r in results if isinstance(r, Exception)]
     if failed:
@@ -723,6 +818,8 @@ async def _migrate_unify_registries() -> None:
         if changed:
             await redis_client.hset(REGISTRY_KEY, oid, json.dumps(entry))
             migrated += 1
+    if migrated:
+        registry_cache.invalidate()
     logger.info("Registry unification: folded source fields for %d ontologies into %s", migrated, REGISTRY_KEY)
 
 
@@ -788,6 +885,8 @@ async def lifespan(app: FastAPI):
     asyncio.create_task(_fetch_and_update_all_servers())
     # Start the periodic background task
     asyncio.create_task(periodic_metadata_fetch_task())
+    # Keep the in-memory registry snapshot in sync with every Redis writer.
+    registry_listener = asyncio.create_task(registry_cache.listen(redis_client))
 
     # Start intake scheduler tasks — ONLY when explicitly enabled, so a restart
     # never kicks off a corpus-wide download. Otherwise these run on demand via
@@ -808,6 +907,10 @@ async def lifespan(app: FastAPI):
     yield
 
     # Shutdown
+    registry_listener.cancel()
+    if mcp_in_process is not None:
+        await mcp_in_process.aclose()
+    await http_pool.close_all()
     await redis_client.close()
     logger.info("Redis connection closed.")
 
@@ -914,6 +1017,7 @@ async def register_server(payload: RegistrationRequest):
         logger.info(f"Registered new server for ontology: {ontology_name} at {server_url}")
 
     await redis_client.hset("registered_servers", ontology_name, json.dumps(server_data))
+    registry_cache.invalidate()
     await _write_servers_to_file()
     
     # Trigger an immediate metadata fetch for the newly registered/updated server
@@ -930,11 +1034,18 @@ async def register_server(payload: RegistrationRequest):
 async def search_all_api(request: Request):
     """Search for ontology classes across all ontologies via the central ES.
 
+    Several ontologies are searched with one ES request, so the results are
+    ranked together (and listed once per class and ontology).
+
     Query params:
-        query      - search term (required)
-        ontologies - comma-separated list of ontology IDs to restrict to
-        prefix     - "true" for prefix/autocomplete mode
-        size       - max results (default 100, max 5000)
+        query        - search term (required)
+        ontologies   - comma-separated list of ontology IDs to restrict to
+        prefix       - "true" for prefix/autocomplete mode
+        size         - max results (default 100, max 5000)
+        search_after - cursor from the previous page's `search_after`
+
+    Response:
+        {"result": [...], "search_after": cursor for the next page, or null}
     """
     query = request.query_params.get("query")
     ontologies_to_query_str = request.query_params.get("ontologies")
@@ -947,24 +1058,29 @@ async def search_all_api(request: Request):
     if not query:
         return JSONResponse({"error": "Missing 'query' parameter"}, status_code=400)
 
+    cursor = request.query_params.get("search_after")
+    try:
+        search_after = json.loads(base64.urlsafe_b64decode(cursor.encode())) if cursor else None
+    except (ValueError, TypeError):
+        return JSONResponse({"error": "Invalid 'search_after' cursor"}, status_code=400)
+
     # Query central ES directly (no scatter-gather to ontology servers)
-    ontology_filter = None
-    if ontologies_to_query_str:
-        ontology_filter = ontologies_to_query_str.split(',')[0]  # ES query handles one ontology; loop for multiple
+    ontology_ids = [o.strip() for o in (ontologies_to_query_str or "").split(',') if o.strip()]
 
-    if ontologies_to_query_str and ',' in ontologies_to_query_str:
-        # Multiple ontologies: query each alias and merge
-        ontology_ids = [o.strip() for o in ontologies_to_query_str.split(',')]
-        all_results = []
-        for ont_id in ontology_ids:
-            results = await es_mgr.search_classes(query, ontology=ont_id, prefix=prefix, size=size)
-            all_results.extend(results)
-    else:
-        all_results = await es_mgr.search_classes(
-            query, ontology=ontology_filter, prefix=prefix, size=size
+    async def search():
+        page = await es_mgr.search_classes_page(
+            query, ontologies=ontology_ids, prefix=prefix, size=size, search_after=search_after
         )
+        next_page = page["search_after"]
+        return {
+            "result": page["result"],
+            "search_after": base64.urlsafe_b64encode(json.dumps(next_page).encode()).decode()
+            if next_page else None,
+        }
 
-    return {"result": all_results}
+    # Identical concurrent searches share one ES round trip.
+    key = (query, ontologies_to_query_str or "", prefix, size, cursor or "")
+    return await single_flight.SEARCH.run(key, search)
 
 
 @app.get("/api/resolve")
@@ -990,15 +1106,68 @@ async def resolve_api(request: Request):
     except ValueError:
         size = 25
 
-    if ontologies_str and ',' in ontologies_str:
-        all_results = []
-        for ont_id in (o.strip() for o in ontologies_str.split(',')):
-            all_results.extend(await es_mgr.resolve(query, ontology=ont_id, size=size))
-    else:
+    async def resolve():
+        if ontologies_str and ',' in ontologies_str:
+            # One _msearch for all ontologies instead of a search per ontology.
+            ont_ids = [o.strip() for o in ontologies_str.split(',')]
+            per_ontology = await es_mgr.resolve_many([(query, o) for o in ont_ids], size=size)
+            return [doc for docs in per_ontology for doc in (docs or [])]
         ontology = ontologies_str.split(',')[0] if ontologies_str else None
-        all_results = await es_mgr.resolve(query, ontology=ontology, size=size)
+        return await es_mgr.resolve(query, ontology=ontology, size=size)
+
+    key = (query, ontologies_str or "", size)
+    return {"result": await single_flight.RESOLVE.run(key, resolve)}
+
+
+class ResolveBatchRequest(BaseModel):
+    terms: List[str]
+    ontologies: Optional[List[str]] = None   # default: every ontology
+    size: int = 25                           # max matches per term and ontology
+    concurrency: Optional[int] = None        # split into _msearch requests, at most this many in flight
 
-    return {"result": all_results}
+
+@app.post("/api/resolve/batch")
+async def resolve_batch_api(payload: ResolveBatchRequest):
+    """Exact-match resolution (as /api/resolve) of many terms in one call.
+
+    Every term x ontology pair becomes one search of a single `_msearch`
+    request. With `concurrency`, the searches are split into requests of
+    RESOLVE_MSEARCH_CHUNK and at most that many run at once, which keeps
+    very large batches from monopolising the cluster.
+
+    Response:
+        {
+          "result": {term: [class, ...], ...},   # [] when nothing matches exactly
+          "failed": [term, ...]                  # ES errors; retry these
+        }
+    """
+    terms = list(dict.fromkeys(t for t in payload.terms if t and t.strip()))
+    if len(terms) > RESOLVE_BATCH_MAX_TERMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {RESOLVE_BATCH_MAX_TERMS} terms per call (got {len(terms)})",
+        )
+    size = max(1, min(payload.size, 1000))
+    ontologies = [o.strip() for o in payload.ontologies or [] if o.strip()] or [None]
+
+    searches = [(term, ont) for term in terms for ont in ontologies]
+    concurrency = payload.concurrency or 0
+    hits = await es_mgr.resolve_many(
+        searches,
+        size=size,
+        chunk_size=RESOLVE_MSEARCH_CHUNK if concurrency > 0 else 0,
+        concurrency=max(1, concurrency),
+    )
+
+    result: Dict[str, List[dict]] = {term: [] for term in terms}
+    failed = []
+    for (term, _), docs in zip(searches, hits):
+        if docs is None:
+            if term not in failed:
+                failed.append(term)
+        else:
+            result[term].extend(docs)
+    return {"result": result, "failed": failed}
 
 
 @app.get("/api/queryNames")
@@ -1033,8 +1202,14 @@ async def dl_query_all(request: Request):
     """Runs a DL query across all registered online servers.
 
     In multi-ontology container mode, each server hosts multiple ontologies.
-    The ontologyId parameter is passed so the container knows which ontology
-    to run the query against.
+    Target ontologies are grouped by worker URL and each worker receives a
+    single runQuery call with ontologyIds=a,b,c, which it fans out in-process
+    (RequestManager.runQueryMulti).
+
+    The response carries `failed`: one {ontology, error} entry for every
+    target ontology that produced no answer (not registered, offline, worker
+    timeout or error, or a per-ontology failure reported by the worker);
+    `result` holds the rest.
 
     Query params:
         query      - Manchester OWL Syntax query (required)
@@ -1043,6 +1218,13 @@ async def dl_query_all(request: Request):
         direct     - "true" for direct results only
         labels     - "true" to include labels (default true)
         axioms     - "true" to include axioms
+        format     - "ndjson" to stream one JSON record per line as the workers
+                     produce them, ending with a trailer line
+                     {"done": true, "count", "truncated", "failed", "partial"}
+                     where `partial` lists ontologies whose stream broke
+                     off after some of their records were relayed
+        limit      - ndjson only: maximum number of records
+                     (capped at DLQUERY_STREAM_MAX_RESULTS)
     """
     query = request.query_params.get("query")
     query_type = request.query_params.get("type")
@@ -1054,9 +1236,9 @@ async def dl_query_all(request: Request):
     if not query or not query_type:
         return JSONResponse({"error": "Missing 'query' or 'type' parameter"}, status_code=400)
 
-    server_data_json = await redis_client.hvals("registered_servers")
-    all_servers = [json.loads(s) for s in server_data_json]
-    online_servers = [s for s in all_servers if s.get("status") == "online"]
+    registry = await _registry_snapshot()
+    online_servers = registry.with_status("online")
+    unavailable: List[Dict[str, Any]] = []
 
     if ontologies_to_query_str:
         # Match ontology ids case-insensitively. Registered ids are lowercase,
@@ -1065,45 +1247,220 @@ async def dl_query_all(request: Request):
         # AberOWL 1 link. A case-sensitive match here selected zero workers, so
         # the class hierarchy on those pages came back empty.
         ontologies_to_query = {o.strip().lower() for o in ontologies_to_query_str.split(',')}
-        online_servers = [s for s in online_servers if s.get("ontology", "").lower() in ontologies_to_query]
-
-    async def query_one_server(server, session):
-        ontology_name = server.get("ontology")
-        ontology_title = server.get("title", ontology_name)
-        api_url = f"{str(server.get('url')).rstrip('/')}/api/runQuery.groovy"
-        params = {
-            "query": query,
-            "type": query_type,
-            "labels": labels,
-            "direct": direct,
-            "axioms": axioms,
-            "ontologyId": ontology_name,  # Pass ontologyId for multi-ontology containers
-        }
+        selected = {}
+        for o in sorted(ontologies_to_query):
+            s = registry.get(o)
+            if s is None:
+                unavailable.append({"ontology": o, "error": "ontology is not registered"})
+            elif s.get("status") != "online":
+                unavailable.append({"ontology": s.get("ontology"), "error": "worker is offline"})
+            else:
+                selected[id(s)] = s
+        online_servers = list(selected.values())
+
+    by_worker: Dict[str, List[Dict[str, Any]]] = {}
+    for server in online_servers:
+        by_worker.setdefault(str(server.get("url")).rstrip("/"), []).append(server)
+
+    query_params = {
+        "query": query,
+        "type": query_type,
+        "labels": labels,
+        "direct": direct,
+        "axioms": axioms,
+    }
+
+    if request.query_params.get("format") == "ndjson":
+        limit = request.query_params.get("limit", "")
+        cap = DLQUERY_STREAM_MAX_RESULTS
+        if limit.isdigit():
+            cap = min(cap, int(limit))
+        return StreamingResponse(
+            _stream_dl_query(by_worker, unavailable, query_params, cap),
+            media_type="application/x-ndjson",
+        )
+
+    async def query_one_worker(worker_url, servers, session):
+        """Return (results, failed) for every ontology hosted on one worker."""
+        titles = {s.get("ontology"): s.get("title", s.get("ontology")) for s in servers}
+        ontology_ids = list(titles)
+        params = dict(query_params, ontologyIds=",".join(ontology_ids))
+
+        def fail_all(error):
+            return [], [{"ontology": o, "error": error} for o in ontology_ids]
 
         try:
-            async with session.get(api_url, params=params, timeout=30) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    for item in data.get("result", []):
-                        if isinstance(item, dict):
-                            item["ontology"] = ontology_name
-                            item["ontology_title"] = ontology_title
-                    return data.get("result", [])
-                else:
-                    logger.warning(f"DL query failed for {ontology_name}: Status {response.status}")
-                    return []
+            async with session.get(
+                f"{worker_url}/api/runQuery.groovy",
+                params=params,
+                timeout=aiohttp.ClientTimeout(total=DLQUERY_WORKER_TIMEOUT),
+            ) as response:
+                data = await response.json(content_type=None)
+                if response.status != 200:
+                    message = data.get("message") if isinstance(data, dict) else None
+                    logger.warning(f"DL query failed on {worker_url} for {ontology_ids}: Status {response.status}")
+                    return fail_all(message or f"worker returned HTTP {response.status}")
+        except asyncio.TimeoutError:
+            logger.warning(f"DL query timed out on {worker_url} for {ontology_ids}")
+            return fail_all(f"worker timed out after {DLQUERY_WORKER_TIMEOUT:g}s")
+        except Exception as e:
+            logger.error(f"Error DL querying {worker_url} for {ontology_ids}: {e}")
+            return fail_all(f"worker unreachable: {e}")
+
+        results = []
+        for item in data.get("result", []):
+            if isinstance(item, dict):
+                # runQueryMulti tags each entry with the id it was queried under.
+                ontology_name = item.get("ontology") or ontology_ids[0]
+                item["ontology"] = ontology_name
+                item["ontology_title"] = titles.get(ontology_name, ontology_name)
+            results.append(item)
+        failed = [
+            {"ontology": f.get("ontology"), "error": f.get("message")}
+            for f in data.get("failed", [])
+            if isinstance(f, dict)
+        ]
+        return results, failed
+
+    async def fan_out():
+        all_results = []
+        all_failed = list(unavailable)
+        session = worker_session()
+        tasks = [query_one_worker(url, servers, session) for url, servers in by_worker.items()]
+        for results, failed in await asyncio.gather(*tasks):
+            all_results.extend(results)
+            all_failed.extend(failed)
+        return {"result": all_results, "failed": all_failed}
+
+    # Identical concurrent queries (a popular page opened by many users, an
+    # agent retrying) share one fan-out to the workers.
+    targets = tuple(sorted(ontologies_to_query)) if ontologies_to_query_str else None
+    key = (query, query_type, targets, direct, labels, axioms)
+    return await single_flight.DLQUERY.run(key, fan_out)
+
+
+async def _iter_ndjson(response: aiohttp.ClientResponse):
+    """Yield parsed NDJSON records from a worker response as chunks arrive.
+
+    Splits on newlines itself rather than using StreamReader line iteration,
+    which rejects lines longer than the read buffer (axiom-heavy records)."""
+    pending = b""
+    async for chunk in response.content.iter_chunked(64 * 1024):
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    if pending.strip():
+        yield json.loads(pending)
+
+
+async def _stream_dl_query(
+    by_worker: Dict[str, List[Dict[str, Any]]],
+    unavailable: List[Dict[str, Any]],
+    query_params: Dict[str, str],
+    cap: int,
+):
+    """NDJSON body for /api/dlquery_all?format=ndjson.
+
+    Every worker is asked for its ontologies with format=ndjson and its
+    records are relayed as they arrive, tagged with ontology_title. A bounded
+    queue sits between the worker reads and the client: when the client
+    stops reading, the queue fills and the worker reads pause, so nothing
+    larger than DLQUERY_STREAM_BUFFER records is held here. Each worker read
+    has an idle timeout of DLQUERY_WORKER_TIMEOUT rather than a total one.
+    An ontology that fails after some of its records went out is listed
+    under `partial` in the trailer instead of `failed`.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=DLQUERY_STREAM_BUFFER)
+    failed: List[Dict[str, Any]] = list(unavailable)
+    partial: List[Dict[str, Any]] = []
+    truncated = False
+    session = worker_session()
+    timeout = aiohttp.ClientTimeout(
+        total=None, sock_connect=DLQUERY_WORKER_TIMEOUT, sock_read=DLQUERY_WORKER_TIMEOUT
+    )
+
+    async def relay(worker_url, servers):
+        nonlocal truncated
+        titles = {s.get("ontology"): s.get("title", s.get("ontology")) for s in servers}
+        ontology_ids = list(titles)
+        relayed = set()
+
+        def fail(ontology, error):
+            (partial if ontology in relayed else failed).append({"ontology": ontology, "error": error})
+
+        def fail_all(error):
+            for o in ontology_ids:
+                fail(o, error)
+
+        params = dict(query_params, format="ndjson", ontologyIds=",".join(ontology_ids), limit=str(cap))
+        try:
+            async with session.get(
+                f"{worker_url}/api/runQuery.groovy", params=params, timeout=timeout
+            ) as response:
+                if response.status != 200:
+                    text = await response.text()
+                    try:
+                        message = json.loads(text.splitlines()[0]).get("message")
+                    except (ValueError, IndexError, AttributeError):
+                        message = None
+                    fail_all(message or f"worker returned HTTP {response.status}")
+                    return
+                trailer = None
+                async for record in _iter_ndjson(response):
+                    if not isinstance(record, dict):
+                        continue
+                    if record.get("done") is True:
+                        trailer = record
+                        continue
+                    if record.get("error") is True:
+                        fail_all(record.get("message") or "worker query failed")
+                        return
+                    ontology_name = record.get("ontology") or ontology_ids[0]
+                    record["ontology"] = ontology_name
+                    record["ontology_title"] = titles.get(ontology_name, ontology_name)
+                    await queue.put(record)
+                    relayed.add(ontology_name)
+                if trailer is None:
+                    fail_all("worker stream ended early")
+                    return
+                truncated = truncated or bool(trailer.get("truncated"))
+                for f in trailer.get("failed", []):
+                    if isinstance(f, dict):
+                        fail(f.get("ontology"), f.get("message"))
+        except asyncio.TimeoutError:
+            logger.warning(f"DL query stream timed out on {worker_url} for {ontology_ids}")
+            fail_all(f"worker idle for more than {DLQUERY_WORKER_TIMEOUT:g}s")
         except Exception as e:
-            logger.error(f"Error DL querying {ontology_name}: {e}")
-            return []
+            logger.error(f"Error streaming DL query from {worker_url} for {ontology_ids}: {e}")
+            fail_all(f"worker unreachable: {e}")
+
+    relays = [asyncio.create_task(relay(url, servers)) for url, servers in by_worker.items()]
 
-    all_results = []
-    async with aiohttp.ClientSession() as session:
-        tasks = [query_one_server(server, session) for server in online_servers]
-        results_from_servers = await asyncio.gather(*tasks)
-        for res_list in results_from_servers:
-            all_results.extend(res_list)
+    async def close_queue():
+        await asyncio.gather(*relays, return_exceptions=True)
+        await queue.put(None)
 
-    return {"result": all_results}
+    closer = asyncio.create_task(close_queue())
+    count = 0
+    try:
+        while True:
+            record = await queue.get()
+            if record is None:
+                break
+            if count >= cap:
+                truncated = True
+                break
+            yield json.dumps(record) + "\n"
+            count += 1
+        yield json.dumps({
+            "done": True, "count": count, "truncated": truncated, "failed": failed, "partial": partial,
+        }) + "\n"
+    finally:
+        # Client went away or the cap was hit: stop reading from the workers.
+        for task in relays + [closer]:
+            task.cancel()
 
 
 @app.get("/api/servers")
@@ -1113,16 +1470,14 @@ async def get_servers():
     Filtered through the public allow-list so internal fields (secret_key,
     internal worker url, server_url, ops status) are never exposed.
     """
-    server_data_json = await redis_client.hvals("registered_servers")
-    servers = [_public_ontology_view(json.loads(s)) for s in server_data_json]
-    return servers
+    registry = await _registry_snapshot()
+    return [_public_ontology_view(s) for s in registry.servers]
 
 
 @app.get("/api/listOntologies")
 async def list_ontologies_api():
     """Return a list of all registered ontology IDs."""
-    server_data_json = await redis_client.hvals("registered_servers")
-    servers = [json.loads(s) for s in server_data_json]
+    servers = (await _registry_snapshot()).servers
     ontologies = [
         {
             "id": s.get("ontology"),
@@ -1142,11 +1497,9 @@ async def get_ontology_api(ontology: str = Query(...)):
     worker url, server_url, ops status). We serialize ONLY the public
     allow-list via _public_ontology_view so those are never leaked.
     """
-    server_data_json = await redis_client.hvals("registered_servers")
-    servers = [json.loads(s) for s in server_data_json]
-    for s in servers:
-        if s.get("ontology", "").lower() == ontology.lower():
-            return _public_ontology_view(s)
+    s = (await _registry_snapshot()).by_id.get(ontology.lower())
+    if s is not None:
+        return _public_ontology_view(s)
     raise HTTPException(status_code=404, detail=f"Ontology not found: {ontology}")
 
 
@@ -1175,28 +1528,23 @@ async def get_class_api(
             "query": {"bool": {"must": [{"term": {"class": query}}]}},
             "size": 1,
         }
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{es_mgr.es_url}/{alias}/_search",
-                json=query_body,
-                timeout=aiohttp.ClientTimeout(total=10),
-            ) as resp:
-                if resp.status == 200:
-                    data = await resp.json(content_type=None)
-                    hits = data.get("hits", {}).get("hits", [])
-                    if hits:
-                        return hits[0].get("_source", {})
+        session = es_session()
+        async with session.post(
+            f"{es_mgr.es_url}/{alias}/_search",
+            json=query_body,
+            timeout=aiohttp.ClientTimeout(total=10),
+        ) as resp:
+            if resp.status == 200:
+                data = await resp.json(content_type=None)
+                hits = data.get("hits", {}).get("hits", [])
+                if hits:
+                    return hits[0].get("_source", {})
     except Exception as e:
         logger.debug("getClass ES lookup failed for %s/%s: %s", ontology, query, e)
 
     # --- Fall back to querying the ontology worker directly ---
-    server_data_json = await redis_client.hvals("registered_servers")
-    servers = [json.loads(s) for s in server_data_json]
-    server = next(
-        (s for s in servers if s.get("ontology", "").lower() == ontology.lower() and s.get("status") == "online"),
-        None,
-    )
-    if not server:
+    server = (await _registry_snapshot()).by_id.get(ontology.lower())
+    if not server or server.get("status") != "online":
         raise HTTPException(status_code=404, detail=f"Ontology not found or offline: {ontology}")
 
     worker_url = server.get("url", "").rstrip("/")
@@ -1211,92 +1559,197 @@ async def get_class_api(
         "ontologyId": ontology,
     }
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{worker_url}/api/runQuery.groovy",
-                params=params,
-                timeout=aiohttp.ClientTimeout(total=30),
-            ) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    results = data.get("result", [])
-                    # The query returns equivalent classes; find the one matching our IRI
-                    for r in results:
-                        if r.get("class") == query:
-                            return r
-                    # If exact match not found, return first result or query info
-                    if results:
-                        return results[0]
-
-                    # No equivalent found — try superclass query to get class info
-                    params["type"] = "superclass"
-                    async with session.get(
-                        f"{worker_url}/api/runQuery.groovy",
-                        params=params,
-                        timeout=aiohttp.ClientTimeout(total=30),
-                    ) as resp2:
-                        if resp2.status == 200:
-                            data2 = await resp2.json()
-                            supers = data2.get("result", [])
-                            if supers:
-                                # Class exists (has superclasses) — build info
-                                return {
-                                    "class": query,
-                                    "ontology": ontology,
-                                    "label": query.rsplit("#", 1)[-1].rsplit("/", 1)[-1],
-                                    "SubClassOf": [r.get("label", r.get("class")) for r in supers],
-                                }
-                        # No superclasses = class not in ontology
-                        elif resp2.status == 400:
-                            pass  # Query error = class not found
+        session = worker_session()
+        async with session.get(
+            f"{worker_url}/api/runQuery.groovy",
+            params=params,
+            timeout=aiohttp.ClientTimeout(total=30),
+        ) as resp:
+            if resp.status == 200:
+                data = await resp.json()
+                results = data.get("result", [])
+                # The query returns equivalent classes; find the one matching our IRI
+                for r in results:
+                    if r.get("class") == query:
+                        return r
+                # If exact match not found, return first result or query info
+                if results:
+                    return results[0]
+
+                # No equivalent found — try superclass query to get class info
+                params["type"] = "superclass"
+                async with session.get(
+                    f"{worker_url}/api/runQuery.groovy",
+                    params=params,
+                    timeout=aiohttp.ClientTimeout(total=30),
+                ) as resp2:
+                    if resp2.status == 200:
+                        data2 = await resp2.json()
+                        supers = data2.get("result", [])
+                        if supers:
+                            # Class exists (has superclasses) — build info
+                            return {
+                                "class": query,
+                                "ontology": ontology,
+                                "label": query.rsplit("#", 1)[-1].rsplit("/", 1)[-1],
+                                "SubClassOf": [r.get("label", r.get("class")) for r in supers],
+                            }
+                    # No superclasses = class not in ontology
+                    elif resp2.status == 400:
+                        pass  # Query error = class not found
     except Exception as e:
         logger.error("getClass worker fallback error: %s", e)
 
     raise HTTPException(status_code=404, detail="Class not found")
 
 
+class ClassBatchRequest(BaseModel):
+    iris: List[str]
+    ontology: Optional[str] = None   # default for IRIs/CURIEs that do not imply one
+    axioms: bool = True              # worker fallback: render SubClassOf/Equivalent/Disjoint
+
+
+_CURIE_RE = re.compile(r"^([A-Za-z][A-Za-z0-9]*)[:_]([A-Za-z0-9][A-Za-z0-9_]*)$")
+_OBO_IRI_RE = re.compile(r"^https?://purl\.obolibrary\.org/obo/([A-Za-z][A-Za-z0-9]*)_[A-Za-z0-9]+$")
+
+
+def _batch_target(term: str, ontology: Optional[str]):
+    """(ontology id, IRI, OBO id or None) for one /api/getClasses input, or
+    None when it is neither an IRI nor a CURIE.
+
+    CURIEs (GO:0006915, GO_0006915) become OBO PURLs; without an explicit
+    ontology the prefix (or the one of an OBO PURL) names it."""
+    t = term.strip()
+    if t.startswith("<") and t.endswith(">"):
+        t = t[1:-1].strip()
+    if re.match(r"^https?://", t, re.I):
+        m = _OBO_IRI_RE.match(t)
+        ont = ontology or (m.group(1) if m else None)
+        return (ont.lower(), t, None) if ont else ("", t, None)
+    m = _CURIE_RE.match(t)
+    if m:
+        prefix, local = m.groups()
+        return ((ontology or prefix).lower(),
+                f"http://purl.obolibrary.org/obo/{prefix}_{local}",
+                f"{prefix}:{local}".upper())
+    return None
+
+
+@app.post("/api/getClasses")
+async def get_classes_api(payload: ClassBatchRequest):
+    """Look up many classes (IRIs or CURIEs) in one call.
+
+    Per ontology, one ES `terms` query on class IRI / OBO id finds what is
+    indexed; whatever is left goes to that ontology's worker in a single
+    getClasses.groovy call, instead of /api/getClass's search plus one or two
+    reasoner round-trips per IRI. Ontologies are handled concurrently.
+
+    Response:
+        {
+          "found":   {input: class record, ...},
+          "missing": {input: reason, ...}
+        }
+    """
+    terms = list(dict.fromkeys(t for t in payload.iris if t and t.strip()))
+    if len(terms) > CLASS_BATCH_MAX_IRIS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {CLASS_BATCH_MAX_IRIS} IRIs per call (got {len(terms)})",
+        )
+
+    found: Dict[str, Any] = {}
+    missing: Dict[str, str] = {}
+    # ontology -> IRI -> inputs naming it
+    by_ontology: Dict[str, Dict[str, List[str]]] = {}
+    oboids: Dict[str, Dict[str, str]] = {}
+    for term in terms:
+        target = _batch_target(term, payload.ontology)
+        if target is None:
+            missing[term] = "not an IRI or CURIE"
+            continue
+        ont, iri, oboid = target
+        if not ont:
+            missing[term] = "ontology required for this IRI"
+            continue
+        by_ontology.setdefault(ont, {}).setdefault(iri, []).append(term)
+        if oboid:
+            oboids.setdefault(ont, {})[oboid] = iri
+
+    registry = await _registry_snapshot()
+
+    async def lookup(ont: str, wanted: Dict[str, List[str]]) -> None:
+        by_oboid = oboids.get(ont, {})
+        for doc in await es_mgr.get_classes(ont, list(wanted), list(by_oboid)):
+            iri = doc.get("class")
+            if iri not in wanted:
+                ids = doc.get("oboid") or []
+                for oboid in ids if isinstance(ids, list) else [ids]:
+                    if str(oboid).upper() in by_oboid:
+                        iri = by_oboid[str(oboid).upper()]
+                        break
+            for term in wanted.pop(iri, []):
+                found[term] = doc
+        if not wanted:
+            return
+
+        server = registry.by_id.get(ont)
+        if not server or server.get("status") != "online":
+            for terms_ in wanted.values():
+                for term in terms_:
+                    missing[term] = f"ontology not found or offline: {ont}"
+            return
+        worker_url = server.get("url", "").rstrip("/")
+        reason = "class not found"
+        try:
+            async with worker_session().post(
+                f"{worker_url}/api/getClasses.groovy",
+                json={"ontologyId": ont, "iris": list(wanted), "axioms": payload.axioms},
+                timeout=aiohttp.ClientTimeout(total=DLQUERY_WORKER_TIMEOUT),
+            ) as resp:
+                data = await resp.json(content_type=None)
+                if resp.status == 200:
+                    for iri, info in (data.get("found") or {}).items():
+                        for term in wanted.pop(iri, []):
+                            found[term] = info
+                else:
+                    reason = f"worker error: {data.get('message') or resp.status}"
+        except Exception as e:
+            logger.error("getClasses worker fallback error for %s: %s", ont, e)
+            reason = f"worker unreachable: {e}"
+        for terms_ in wanted.values():
+            for term in terms_:
+                missing[term] = reason
+
+    await asyncio.gather(*(lookup(ont, wanted) for ont, wanted in by_ontology.items()))
+    return {"found": found, "missing": missing}
+
+
 @app.get("/api/getStats")
 async def get_stats_api(ontology: Optional[str] = Query(None)):
     """Get ontology statistics. If ontology is specified, returns stats for that ontology only."""
-    server_data_json = await redis_client.hvals("registered_servers")
-    servers = [json.loads(s) for s in server_data_json]
+    registry = await _registry_snapshot()
 
     if ontology:
-        for s in servers:
-            if s.get("ontology", "").lower() == ontology.lower():
-                return {
-                    "ontology": s.get("ontology"),
-                    "class_count": s.get("class_count", 0),
-                    "property_count": s.get("property_count", 0),
-                    "object_property_count": s.get("object_property_count", 0),
-                    "individual_count": s.get("individual_count", 0),
-                    "status": s.get("status"),
-                }
+        s = registry.by_id.get(ontology.lower())
+        if s is not None:
+            return {
+                "ontology": s.get("ontology"),
+                "class_count": s.get("class_count", 0),
+                "property_count": s.get("property_count", 0),
+                "object_property_count": s.get("object_property_count", 0),
+                "individual_count": s.get("individual_count", 0),
+                "status": s.get("status"),
+            }
         raise HTTPException(status_code=404, detail=f"Ontology not found: {ontology}")
 
-    # Aggregate stats across all ontologies
-    total_classes = sum(s.get("class_count", 0) for s in servers)
-    total_properties = sum(s.get("property_count", 0) for s in servers)
-    total_ontologies = len(servers)
-    online = sum(1 for s in servers if s.get("status") == "online")
-    return {
-        "total_ontologies": total_ontologies,
-        "online_ontologies": online,
-        "total_classes": total_classes,
-        "total_properties": total_properties,
-    }
+    # Aggregate stats across all ontologies (precomputed per snapshot)
+    return dict(registry.totals)
 
 
 @app.get("/api/getStatuses")
 async def get_statuses_api():
     """Return loading/classification status for all ontologies."""
-    server_data_json = await redis_client.hvals("registered_servers")
-    servers = [json.loads(s) for s in server_data_json]
-    statuses = {
-        s.get("ontology"): s.get("status", "unknown")
-        for s in servers
-    }
-    return statuses
+    return dict((await _registry_snapshot()).statuses)
 
 
 @app.post("/api/sparql")
@@ -1319,45 +1772,74 @@ async def sparql_rewrite_api(request: Request):
        Example: FILTER OWL(?class, subeq, GO, "'part of' some 'cell'")
 
     Query params (GET) or JSON/form body (POST):
-        query - SPARQL query string with OWL frames (required)
+        query            - SPARQL query string with OWL frames (required)
+        compact          - write IRIs as prefixed names under PREFIX
+                           declarations added to the query (default false)
+        values_chunk     - split VALUES blocks of more IRIs than this into
+                           a UNION of smaller ones (default 0: never)
+        filter_as_values - rewrite FILTER frames as inline VALUES blocks
+                           (default false)
 
     Response:
         {
           "rewritten_query": "...",       # SPARQL with IRIs spliced in
           "expansions":      [...],        # per-frame info: pattern, variable,
-                                           # ontology, type, dl_query, result_count
-          "errors":          [...]         # per-frame failures (unknown ontology,
+                                           # ontology, type, dl_query, result_count,
+                                           # cached, chars, plain_chars
+          "errors":          [...],        # per-frame failures (unknown ontology,
                                            # DL parse error, …); empty list on success
+          "size":            {...}         # characters: query (as sent), expanded
+                                           # (full IRIs, no chunking), rewritten
+                                           # (as returned)
         }
     """
     if request.method == "POST":
         try:
-            body = await request.json()
-            query = body.get("query", "")
+            params = await request.json()
         except Exception:
-            form = await request.form()
-            query = form.get("query", "")
+            params = await request.form()
+        else:
+            if not isinstance(params, dict):
+                return JSONResponse({"error": "JSON body must be an object"}, status_code=400)
     else:
-        query = request.query_params.get("query", "")
+        params = request.query_params
+    query = params.get("query", "")
 
     if not query:
         return JSONResponse({"error": "Missing 'query' parameter"}, status_code=400)
 
-    # Build the ontology → worker URL lookup from registered servers.
-    server_data_json = await redis_client.hvals("registered_servers")
-    servers = [json.loads(s) for s in server_data_json]
-    server_lookup = {
-        s.get("ontology", "").lower(): s.get("url", "")
-        for s in servers
-        if s.get("status") == "online" and s.get("url")
-    }
+    def _flag(name: str) -> bool:
+        value = params.get(name)
+        return value is True or str(value).lower() in ("1", "true", "yes")
 
-    rewritten_query, expansions, errors = await expand_sparql_query(query, server_lookup)
+    try:
+        values_chunk = max(0, int(params.get("values_chunk") or 0))
+    except (TypeError, ValueError):
+        return JSONResponse({"error": "'values_chunk' must be an integer"}, status_code=400)
+
+    # Build the ontology → worker URL lookup from registered servers. An
+    # update moves last_updated, which retires cached frame results.
+    snapshot = await _registry_snapshot()
+    server_lookup = snapshot.online_urls
+    versions = {}
+    for oid in server_lookup:
+        entry = snapshot.get(oid) or {}
+        versions[oid] = f"{entry.get('last_updated') or ''}|{entry.get('version_info') or ''}"
+
+    size: Dict[str, int] = {}
+    rewritten_query, expansions, errors = await expand_sparql_query(
+        query, server_lookup, versions,
+        compact=_flag("compact"),
+        values_chunk=values_chunk,
+        filter_as_values=_flag("filter_as_values"),
+        sizes=size,
+    )
 
     return {
         "rewritten_query": rewritten_query,
         "expansions": expansions,
         "errors": errors,
+        "size": size,
     }
 
 
@@ -1385,79 +1867,62 @@ async def elastic_proxy(request: Request, path: str):
     if ".." in path:
         raise HTTPException(status_code=400, detail="Invalid path.")
 
-    async with aiohttp.ClientSession() as session:
-        target_url = f"{ELASTICSEARCH_URL}/{path}"
+    session = es_session()
+    target_url = f"{ELASTICSEARCH_URL}/{path}"
         
-        data = await request.body()
-        params = request.query_params
-        method = request.method
+    data = await request.body()
+    params = request.query_params
+    method = request.method
         
-        # Forward headers, excluding some that are specific to the incoming request
-        headers = {
-            key: value for key, value in request.headers.items() 
-            if key.lower() not in ['host', 'connection', 'accept-encoding', 'content-length', 'user-agent']
-        }
+    # Forward headers, excluding some that are specific to the incoming request
+    headers = {
+        key: value for key, value in request.headers.items() 
+        if key.lower() not in ['host', 'connection', 'accept-encoding', 'content-length', 'user-agent']
+    }
 
-        if method == "POST":
-            # Elasticsearch supports GET with body via the 'source' parameter
-            # We keep the method as GET for the actual request to ES if we use 'source'
-            method = "GET"
-            if data:
-                # ES can take query in `source` parameter for GET requests
-                new_params = list(params.items())
-                try:
-                    new_params.append(('source', data.decode('utf-8')))
-                    new_params.append(('source_content_type', 'application/json'))
-                    params = new_params
-                    data = None
-                except UnicodeDecodeError:
-                    # If data is not decodable, don't try to use 'source'
-                    method = "POST"
+    if method == "POST":
+        # Elasticsearch supports GET with body via the 'source' parameter
+        # We keep the method as GET for the actual request to ES if we use 'source'
+        method = "GET"
+        if data:
+            # ES can take query in `source` parameter for GET requests
+            new_params = list(params.items())
+            try:
+                new_params.append(('source', data.decode('utf-8')))
+                new_params.append(('source_content_type', 'application/json'))
+                params = new_params
+                data = None
+            except UnicodeDecodeError:
+                # If data is not decodable, don't try to use 'source'
+                method = "POST"
         
-        try:
-            async with session.request(
-                method=method,
-                url=target_url,
-                params=params,
-                data=data,
-                headers=headers
-            ) as proxy_response:
-                response_content = await proxy_response.read()
-                return Response(
-                    content=response_content,
-                    status_code=proxy_response.status,
-                    media_type=proxy_response.content_type
-                )
-        except aiohttp.ClientConnectorError as e:
-            logger.error(f"Elasticsearch proxy error: {e}")
-            raise HTTPException(status_code=502, detail=f"Could not connect to Elasticsearch service: {e}")
+    try:
+        async with session.request(
+            method=method,
+            url=target_url,
+            params=params,
+            data=data,
+            headers=headers
+        ) as proxy_response:
+            response_content = await proxy_response.read()
+            return Response(
+                content=response_content,
+                status_code=proxy_response.status,
+                media_type=proxy_response.content_type
+            )
+    except aiohttp.ClientConnectorError as e:
+        logger.error(f"Elasticsearch proxy error: {e}")
+        raise HTTPException(status_code=502, detail=f"Could not connect to Elasticsearch service: {e}")
 
 
 async def get_all_servers():
-    """Helper function to get all servers from Redis."""
-    server_data_json = await redis_client.hvals("registered_servers")
-    return [json.loads(s) for s in server_data_json]
+    """Helper function to get all servers from the registry snapshot."""
+    return (await _registry_snapshot()).servers
 
 
 async def _find_server_by_id(artefact_id: str) -> Optional[Dict[str, Any]]:
     """Finds a server by artefact_id, matching against ontology name (case-insensitive, with/without .owl extension)."""
-    servers = await get_all_servers()
-    artefact_id_lower = artefact_id.lower()
-    for server in servers:
-        ontology_key = server.get("ontology", "")
-        if not ontology_key:
-            continue
-        
-        ontology_key_lower = ontology_key.lower()
-        # Direct match (case-insensitive)
-        if ontology_key_lower == artefact_id_lower:
-            return server
-        
-        # Match without extension (case-insensitive)
-        if os.path.splitext(ontology_key_lower)[0] == artefact_id_lower:
-            return server
-
-    return None
+    return (await _registry_snapshot()).get(artefact_id)
 
 
 def _norm_date(value) -> Optional[str]:
@@ -2648,6 +3113,8 @@ async def admin_trigger_update(
                 es_mgr=es_mgr,
                 ontologies_base_path=ONTOLOGIES_BASE_PATH,
                 es_url=ELASTICSEARCH_URL,
+                force=True,
+                on_registry_write=registry_cache.invalidate,
             )
         except Exception as e:
             logger.error("Manual update failed for %s: %s", ontology_id, e)
@@ -2677,6 +3144,7 @@ async def admin_reindex(
                 es_mgr=es_mgr,
                 ontologies_base_path=ONTOLOGIES_BASE_PATH,
                 es_url=ELASTICSEARCH_URL,
+                on_registry_write=registry_cache.invalidate,
             )
         except Exception as e:
             logger.error("Manual reindex failed for %s: %s", ontology_id, e)
@@ -2768,6 +3236,8 @@ async def webhook_trigger_update(ontology_id: str, request: Request):
                 es_mgr=es_mgr,
                 ontologies_base_path=ONTOLOGIES_BASE_PATH,
                 es_url=ELASTICSEARCH_URL,
+                force=True,
+                on_registry_write=registry_cache.invalidate,
             )
         except Exception as e:
             logger.error("Webhook update failed for %s: %s", ontology_id, e)
@@ -2809,9 +3279,16 @@ async def admin_enable_ontology(
 async def admin_infrastructure(
     credentials: HTTPBasicCredentials = Depends(_require_admin),
 ):
-    """Health status of Elasticsearch."""
+    """Health status of Elasticsearch, usage of the shared HTTP pools,
+    request coalescing counters, the SPARQL frame cache and the totals of
+    the last update sweep."""
     return {
         "elasticsearch": "ok" if await es_mgr.health_check() else "error",
+        "http_pools": http_pool.pool_stats(),
+        "single_flight": single_flight.flight_stats(),
+        "sparql_frame_cache": frame_cache.stats(),
+        "mcp_tool_cache": mcp_tool_cache.stats() if mcp_tool_cache else None,
+        "last_update_sweep": last_update_sweep,
     }
 
 
@@ -2854,8 +3331,8 @@ async def admin_provision_ontology(
     owl_dest = str(ont_dir / f"{ontology_id}_active.owl")
 
     logger.info("Provisioning %s: downloading from %s", ontology_id, payload.source_url)
-    async with aiohttp.ClientSession() as session:
-        dl = await update_pipeline.download_ontology(payload.source_url, owl_dest, session)
+    session = external_session()
+    dl = await update_pipeline.download_ontology(payload.source_url, owl_dest, session)
     if "error" in dl:
         raise HTTPException(status_code=502, detail=f"Download failed: {dl['error']}")
 
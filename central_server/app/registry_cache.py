@@ -0,0 +1,184 @@
+"""
+Process-local, indexed view of the ontology registry.
+
+The registry lives in one Redis hash (``registered_servers``). Read paths used
+to HVALS the whole hash and ``json.loads`` every entry on every request; with
+~460 ontologies that dominated the latency of hierarchy clicks. This module
+keeps a parsed snapshot in memory, indexed by lowercase ontology id, worker
+URL and status, so lookups are plain dict reads.
+
+Freshness:
+  - ``listen()`` subscribes to Redis keyspace notifications for the registry
+    hash, so ANY writer (this process, the update pipeline, the ops scripts
+    under scripts/) invalidates the snapshot.
+  - Writers in this process also call ``invalidate()`` directly, so a request
+    always sees its own writes without waiting for the notification.
+  - While no listener is active (Redis refuses CONFIG SET, the subscription
+    dropped, unit tests) a snapshot is trusted for at most
+    REGISTRY_SNAPSHOT_TTL seconds.
+
+Snapshot entries are shared between requests: treat them as read-only and
+copy before mutating.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_SNAPSHOT_TTL = float(os.getenv("REGISTRY_SNAPSHOT_TTL", "5"))
+
+
+def _norm_url(url: Any) -> str:
+    return str(url or "").rstrip("/")
+
+
+class RegistrySnapshot:
+    """Immutable, indexed copy of every registry entry."""
+
+    def __init__(self, servers: List[Dict[str, Any]]):
+        self.servers = servers
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_url: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_status: Dict[str, List[Dict[str, Any]]] = {}
+        for s in servers:
+            oid = (s.get("ontology") or "").lower()
+            if oid:
+                self.by_id[oid] = s
+            url = _norm_url(s.get("url"))
+            if url:
+                self.by_url.setdefault(url, []).append(s)
+            self.by_status.setdefault(s.get("status", "unknown"), []).append(s)
+        # Extension-less aliases ("go.owl" -> "go") for FAIR artefact lookups;
+        # a real id always wins over an alias.
+        for oid, s in list(self.by_id.items()):
+            base = os.path.splitext(oid)[0]
+            if base != oid:
+                self.by_id.setdefault(base, s)
+
+        self.statuses = {s.get("ontology"): s.get("status", "unknown") for s in servers}
+        self.online_urls = {
+            (s.get("ontology") or "").lower(): s.get("url", "")
+            for s in self.by_status.get("online", [])
+            if s.get("url")
+        }
+        self.totals = {
+            "total_ontologies": len(servers),
+            "online_ontologies": len(self.by_status.get("online", [])),
+            "total_classes": sum(s.get("class_count", 0) or 0 for s in servers),
+            "total_properties": sum(s.get("property_count", 0) or 0 for s in servers),
+        }
+
+    def get(self, ontology_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Entry for ``ontology_id`` (case-insensitive), or None."""
+        if not ontology_id:
+            return None
+        return self.by_id.get(ontology_id.lower())
+
+    def with_status(self, status: str) -> List[Dict[str, Any]]:
+        return self.by_status.get(status, [])
+
+    def on_worker(self, url: str) -> List[Dict[str, Any]]:
+        return self.by_url.get(_norm_url(url), [])
+
+
+class RegistryCache:
+    """Holds the current RegistrySnapshot and decides when to rebuild it."""
+
+    def __init__(self, key: str, ttl: float = REGISTRY_SNAPSHOT_TTL):
+        self.key = key
+        self.ttl = ttl
+        self._snapshot: Optional[RegistrySnapshot] = None
+        self._source = None
+        self._generation = 0
+        self._built_generation = -1
+        self._built_at = 0.0
+        self._listening = False
+        self.rebuilds = 0
+
+    def invalidate(self) -> None:
+        """Mark the snapshot stale; the next read rebuilds it."""
+        self._generation += 1
+
+    def _is_fresh(self, redis_client) -> bool:
+        if self._snapshot is None or self._source is not redis_client:
+            return False
+        if self._built_generation != self._generation:
+            return False
+        return self._listening or (time.monotonic() - self._built_at) < self.ttl
+
+    async def snapshot(self, redis_client) -> RegistrySnapshot:
+        """Return the current snapshot, rebuilding it from Redis if stale."""
+        if self._is_fresh(redis_client):
+            return self._snapshot
+        generation = self._generation
+        raw_values = await redis_client.hvals(self.key)
+        servers = []
+        for raw in raw_values or []:
+            try:
+                servers.append(json.loads(raw))
+            except (TypeError, ValueError):
+                logger.warning("Skipping unparseable registry entry in snapshot")
+        snap = RegistrySnapshot(servers)
+        # An invalidate() that raced with the HVALS leaves the generation
+        # ahead of what we built, so the next read rebuilds again.
+        self._snapshot = snap
+        self._source = redis_client
+        self._built_generation = generation
+        self._built_at = time.monotonic()
+        self.rebuilds += 1
+        return snap
+
+    async def listen(self, redis_client) -> None:
+        """Invalidate on every change to the registry hash, via keyspace
+        notifications. Runs until cancelled; reconnects on failure and falls
+        back to TTL freshness while disconnected."""
+        db = redis_client.connection_pool.connection_kwargs.get("db", 0)
+        channel = f"__keyspace@{db}__:{self.key}"
+        while True:
+            pubsub = None
+            try:
+                await self._enable_notifications(redis_client)
+                pubsub = redis_client.pubsub()
+                await pubsub.subscribe(channel)
+                self._listening = True
+                # Anything written before the subscription took effect.
+                self.invalidate()
+                logger.info("Registry snapshot: listening on %s", channel)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self.invalidate()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(
+                    "Registry snapshot: keyspace listener unavailable (%s); "
+                    "using %.0fs TTL until it reconnects", e, self.ttl,
+                )
+            finally:
+                self._listening = False
+                if pubsub is not None:
+                    try:
+                        await pubsub.close()
+                    except Exception:
+                        pass
+            await asyncio.sleep(30)
+
+    @staticmethod
+    async def _enable_notifications(redis_client) -> None:
+        """Add hash keyspace events to notify-keyspace-events without
+        dropping flags another client may already rely on."""
+        current = (await redis_client.config_get("notify-keyspace-events")).get(
+            "notify-keyspace-events", ""
+        )
+        # "A" is the alias for every event class, including hash events.
+        wanted = set(current)
+        wanted.add("K")
+        if "A" not in wanted:
+            wanted.add("h")
+        if wanted != set(current):
+            await redis_client.config_set("notify-keyspace-events", "".join(sorted(wanted)))
@@ -0,0 +1,77 @@
+"""
+In-flight request coalescing ("single-flight") for read-only endpoints.
+
+When an ontology page is opened by many users at once, or an agent retries,
+identical /api/dlquery_all, /api/search_all and /api/resolve requests arrive
+while the first one is still waiting on the workers or Elasticsearch. Each
+used to do its own fan-out. ``SingleFlight.run`` keys the work: the first
+caller starts it as a task, later callers with the same key await that
+task and get the same result object. Nothing is kept once it finishes; this
+is deduplication, not a cache.
+
+The work runs in its own task and callers await it through
+``asyncio.shield``, so a client disconnecting does not cancel the result for
+the others. Results are shared between requests: treat them as read-only.
+
+Counters (``stats()``, served on /admin/infrastructure) report, per endpoint,
+how many requests started the work and how many joined one in flight.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, work: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of ``work()``, shared with every concurrent call for ``key``.
+
+        Exceptions are shared the same way.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.started += 1
+            task = asyncio.ensure_future(work())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so a failure nobody awaited is not logged
+        # as "never retrieved".
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.started + self.coalesced
+        return {
+            "in_flight": len(self._inflight),
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": (self.coalesced / total) if total else 0.0,
+        }
+
+
+DLQUERY = SingleFlight("dlquery_all")
+SEARCH = SingleFlight("search_all")
+RESOLVE = SingleFlight("resolve")
+
+FLIGHTS = {f.name: f for f in (DLQUERY, SEARCH, RESOLVE)}
+
+
+def flight_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: flight.stats() for name, flight in FLIGHTS.items()}
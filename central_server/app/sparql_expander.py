@@ -27,17 +27,51 @@ Per-frame errors (unknown ontology, offline worker, DL parse error,
 HTTP failure) do not abort the whole rewrite. The frame is replaced
 with an empty IRI list (so the SPARQL stays syntactically valid) and a
 structured error is returned alongside the rewritten query.
+
+All frames of a query are resolved concurrently, identical frames once.
+Successful resolutions are kept in ``frame_cache`` for
+SPARQL_FRAME_CACHE_TTL seconds, keyed by (ontology, type, dl_query,
+ontology version), so an updated ontology is asked again. The
+rewritten query is assembled in one pass from the match spans. A frame
+matching more than SPARQL_FRAME_MAX_IRIS classes, or one that would
+grow the query past SPARQL_EXPANSION_MAX_CHARS, is treated as a failed
+frame rather than spliced in.
+
+Large expansions can be written more compactly (all opt-in):
+
+- ``compact``: namespaces shared by enough IRIs get a PREFIX line at the
+  top of the query (a prefix the query already declares for it is
+  reused) and the IRIs are written as prefixed names, e.g. ``obo:GO_0005623``.
+- ``values_chunk``: a VALUES block of more IRIs than this is split into
+  ``{ VALUES ?v { ... } } UNION { VALUES ?v { ... } }``. Only done inside
+  a group pattern; a trailing query-level VALUES clause stays whole.
+- ``filter_as_values``: a FILTER frame becomes an inline VALUES block,
+  which endpoints join rather than test row by row. Same answers as long
+  as ?var is bound by a required pattern of the group; not for variables
+  that only OPTIONAL binds.
 """
 
+import asyncio
 import json
 import logging
+import os
 import re
-from typing import Any, Dict, List, Tuple
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 import aiohttp
 
+from app.http_pool import worker_session
+
 logger = logging.getLogger(__name__)
 
+SPARQL_FRAME_CACHE_TTL = float(os.getenv("SPARQL_FRAME_CACHE_TTL", "300"))
+# Total IRIs held by the frame cache across all entries.
+SPARQL_FRAME_CACHE_IRIS = int(os.getenv("SPARQL_FRAME_CACHE_IRIS", "200000"))
+SPARQL_FRAME_MAX_IRIS = int(os.getenv("SPARQL_FRAME_MAX_IRIS", "10000"))
+SPARQL_EXPANSION_MAX_CHARS = int(os.getenv("SPARQL_EXPANSION_MAX_CHARS", str(2 * 1024 * 1024)))
+
 # Ontology id may contain letters, digits, underscore, hyphen, or dot.
 _ONT_ID = r"[\w.\-]+"
 _QUERY_TYPE = r"(?:subclass|superclass|equivalent|subeq|supeq)"
@@ -51,6 +85,15 @@ FILTER_OWL_PATTERN = re.compile(
     re.IGNORECASE,
 )
 
+_PREFIX_DECL = re.compile(r"PREFIX\s+([A-Za-z][\w.\-]*)?:\s*<([^>]*)>", re.IGNORECASE)
+# Local names that can follow a prefix without escaping (a subset of PN_LOCAL).
+_LOCAL_NAME = re.compile(r"[A-Za-z0-9_](?:[A-Za-z0-9_.\-]*[A-Za-z0-9_\-])?\Z")
+# What matters for brace depth: braces, and the IRIs, strings and comments
+# that may contain them.
+_GROUP_TOKEN = re.compile(
+    r"""<[^<>"{}|^`\\\s]*>|"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*'|#[^\n]*|[{}]"""
+)
+
 
 async def _run_dl_query(
     server_url: str,
@@ -72,28 +115,215 @@ async def _run_dl_query(
         "ontologyId": ontology_id.lower(),
     }
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                api_url, params=params, timeout=aiohttp.ClientTimeout(total=timeout)
-            ) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    if isinstance(data, dict) and data.get("error"):
-                        return [], str(data.get("message") or data.get("error"))
-                    results = data.get("result", []) if isinstance(data, dict) else []
-                    iris = [item["class"] for item in results if isinstance(item, dict) and "class" in item]
-                    return iris, None
-                text = await resp.text()
-                logger.warning("DL query to %s failed (%s): %s", api_url, resp.status, text[:200])
-                return [], f"worker returned HTTP {resp.status}"
+        session = worker_session()
+        async with session.get(
+            api_url, params=params, timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as resp:
+            if resp.status == 200:
+                data = await resp.json()
+                if isinstance(data, dict) and data.get("error"):
+                    return [], str(data.get("message") or data.get("error"))
+                results = data.get("result", []) if isinstance(data, dict) else []
+                iris = [item["class"] for item in results if isinstance(item, dict) and "class" in item]
+                return iris, None
+            text = await resp.text()
+            logger.warning("DL query to %s failed (%s): %s", api_url, resp.status, text[:200])
+            return [], f"worker returned HTTP {resp.status}"
     except Exception as e:
         logger.warning("DL query error for %s: %s", ontology_id, e)
         return [], f"worker unreachable: {e}"
 
 
+class FrameCache:
+    """IRI lists of resolved frames, kept for ``ttl`` seconds.
+
+    Bounded by the total number of IRIs held; the least recently used
+    entries go first. Only used from the event loop, so no locking.
+    """
+
+    def __init__(self, ttl: float = SPARQL_FRAME_CACHE_TTL, max_iris: int = SPARQL_FRAME_CACHE_IRIS):
+        self.ttl = ttl
+        self.max_iris = max_iris
+        self._entries: "OrderedDict[Tuple, Tuple[float, Tuple[str, ...]]]" = OrderedDict()
+        self._iris = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Optional[Tuple[str, ...]]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] < time.monotonic():
+            self._drop(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Tuple, iris: List[str]) -> None:
+        if self.ttl <= 0 or len(iris) > self.max_iris:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, tuple(iris))
+        self._iris += len(iris)
+        while self._iris > self.max_iris:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: Tuple) -> None:
+        self._iris -= len(self._entries.pop(key)[1])
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._iris = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "iris": self._iris,
+            "hits": self.hits,
+            "misses": self.misses,
+            "ttl_seconds": self.ttl,
+        }
+
+
+frame_cache = FrameCache()
+
+
+def _full_iri(iri: str) -> str:
+    return f"<{iri}>"
+
+
+def _split_iri(iri: str) -> Tuple[str, str]:
+    """(namespace, local name), cut after the last '#' or '/'. The namespace
+    is empty when the local name could not be written as a prefixed name."""
+    cut = max(iri.rfind("#"), iri.rfind("/")) + 1
+    local = iri[cut:]
+    if cut == 0 or not _LOCAL_NAME.match(local):
+        return "", iri
+    return iri[:cut], local
+
+
+def _prefix_name(namespace: str, taken: set) -> str:
+    segment = re.sub(r"[^A-Za-z0-9]", "", namespace.rstrip("/#").rsplit("/", 1)[-1]).lower()
+    base = segment if segment[:1].isalpha() and len(segment) <= 12 else "ns"
+    name, n = base, 1
+    while name in taken:
+        n += 1
+        name = f"{base}{n}"
+    return name
+
+
+class _PrefixedNames:
+    """Writes IRIs as prefixed names, for namespaces that save more
+    characters than their PREFIX line costs. ``header`` holds the PREFIX
+    lines to put in front of the query."""
+
+    def __init__(self, sparql: str, iri_lists: Iterable[Iterable[str]]):
+        names: Dict[str, str] = {}
+        for m in _PREFIX_DECL.finditer(sparql):
+            names[m.group(1) or ""] = m.group(2)
+        declared = {ns: name for name, ns in names.items()}
+        taken = set(names)
+
+        counts = Counter(_split_iri(iri)[0] for iris in iri_lists for iri in iris)
+        counts.pop("", None)
+        self.prefixes: Dict[str, str] = {}
+        lines: List[str] = []
+        for ns, count in counts.most_common():
+            if ns in declared:
+                self.prefixes[ns] = declared[ns]
+                continue
+            name = _prefix_name(ns, taken)
+            line = f"PREFIX {name}: <{ns}>\n"
+            if count * (len(ns) + 1 - len(name)) > len(line):
+                taken.add(name)
+                self.prefixes[ns] = name
+                lines.append(line)
+        self.header = "".join(lines)
+
+    def __call__(self, iri: str) -> str:
+        ns, local = _split_iri(iri)
+        name = self.prefixes.get(ns)
+        return f"<{iri}>" if name is None else f"{name}:{local}"
+
+
+def _group_depths(sparql: str, offsets: Iterable[int]) -> Dict[int, int]:
+    """Brace depth at each of ``offsets``: 0 at the top level of the query,
+    more inside a group pattern."""
+    pending = sorted(offsets)
+    depths: Dict[int, int] = {}
+    depth = 0
+    i = 0
+    for tok in _GROUP_TOKEN.finditer(sparql):
+        while i < len(pending) and pending[i] <= tok.start():
+            depths[pending[i]] = depth
+            i += 1
+        if i == len(pending):
+            break
+        if tok.group() == "{":
+            depth += 1
+        elif tok.group() == "}":
+            depth -= 1
+    for offset in pending[i:]:
+        depths[offset] = depth
+    return depths
+
+
+def _render(
+    pattern: str,
+    variable: str,
+    iris: List[str],
+    term: Callable[[str], str] = _full_iri,
+    chunk: int = 0,
+    as_values: bool = False,
+) -> str:
+    if pattern == "VALUES" or (as_values and iris):
+        tokens = [term(iri) for iri in iris]
+        if chunk and len(tokens) > chunk:
+            return " UNION ".join(
+                f"{{ VALUES {variable} {{ {' '.join(tokens[i:i + chunk])} }} }}"
+                for i in range(0, len(tokens), chunk)
+            )
+        return f"VALUES {variable} {{ {' '.join(tokens)} }}"
+    if iris:
+        iri_list = ", ".join(term(iri) for iri in iris)
+        return f"FILTER ({variable} IN ({iri_list}))"
+    return "FILTER (false)"
+
+
+def _plain_length(pattern: str, variable: str, iris: List[str]) -> int:
+    """len(_render(pattern, variable, iris)) without building the string."""
+    n = len(iris)
+    tokens = sum(len(iri) for iri in iris) + 2 * n
+    if pattern == "VALUES":
+        return len(f"VALUES {variable} {{ ") + tokens + max(n - 1, 0) + 2
+    if iris:
+        return len(f"FILTER ({variable} IN (") + tokens + 2 * (n - 1) + 2
+    return len("FILTER (false)")
+
+
+def _render_failed(pattern: str, variable: str) -> str:
+    if pattern == "VALUES":
+        return f"VALUES {variable} {{ }}"
+    # Empty IN list is illegal in standard SPARQL; use a never-matching guard.
+    return "FILTER (false)"
+
+
+def _frame_key(match: "re.Match") -> Tuple[str, str, str]:
+    return match.group(3).lower(), match.group(2).lower(), match.group(4).strip()
+
+
 async def expand_sparql_query(
     sparql: str,
     server_lookup: Dict[str, str],
+    versions: Optional[Dict[str, str]] = None,
+    *,
+    compact: bool = False,
+    values_chunk: int = 0,
+    filter_as_values: bool = False,
+    sizes: Optional[Dict[str, int]] = None,
 ) -> Tuple[str, List[Dict[str, Any]], List[Dict[str, Any]]]:
     """Rewrite OWL DL frames in a SPARQL query.
 
@@ -101,6 +331,15 @@ async def expand_sparql_query(
         sparql: SPARQL query with embedded OWL frames.
         server_lookup: dict mapping lowercased ontology_id -> worker base URL
             (only ontologies whose worker is online).
+        versions: optional dict mapping lowercased ontology_id -> a token
+            that changes whenever the ontology is updated; part of the
+            frame cache key.
+        compact, values_chunk, filter_as_values: encoding options, see
+            the module docstring.
+        sizes: if given, filled with the length in characters of the
+            query as sent (``query``), of the rewrite with full IRIs and no
+            chunking (``expanded``) and of the returned rewrite
+            (``rewritten``).
 
     Returns:
         (rewritten_query, expansions, errors)
@@ -109,79 +348,104 @@ async def expand_sparql_query(
           Frames whose DL resolution fails are still replaced (with an
           empty IRI list) so the result remains syntactically valid.
         - expansions: per-frame info for successful resolutions
-          (pattern, variable, ontology, type, dl_query, result_count).
+          (pattern, variable, ontology, type, dl_query, result_count,
+          cached, chars, plain_chars). ``chars`` is the length of the
+          text that replaced the frame, ``plain_chars`` what it would
+          have been with full IRIs and no chunking.
         - errors: per-frame error objects
           (pattern, variable, ontology, type, dl_query, error).
     """
-    expanded = sparql
-    expansions: List[Dict[str, Any]] = []
-    errors: List[Dict[str, Any]] = []
+    versions = versions or {}
+    values = list(VALUES_OWL_PATTERN.finditer(sparql))
+    # A FILTER frame inside a VALUES frame's DL query is part of that frame.
+    filters = [
+        m for m in FILTER_OWL_PATTERN.finditer(sparql)
+        if not any(v.start() < m.end() and m.start() < v.end() for v in values)
+    ]
+    frames = [("VALUES", m) for m in values] + [("FILTER", m) for m in filters]
+    if not frames:
+        if sizes is not None:
+            sizes.update(query=len(sparql), expanded=len(sparql), rewritten=len(sparql))
+        return sparql, [], []
 
-    async def resolve(variable: str, query_type: str, ontology_id: str, dl_query: str):
-        server_url = server_lookup.get(ontology_id.lower())
+    async def resolve(key: Tuple[str, str, str]):
+        ontology_id, query_type, dl_query = key
+        server_url = server_lookup.get(ontology_id)
         if not server_url:
-            return None, f"ontology '{ontology_id}' is not registered or its worker is offline"
+            return None, f"ontology '{ontology_id}' is not registered or its worker is offline", False
+        cache_key = key + (versions.get(ontology_id),)
+        iris = frame_cache.get(cache_key)
+        if iris is not None:
+            return iris, None, True
         iris, err = await _run_dl_query(server_url, ontology_id, dl_query, query_type)
         if err is not None:
-            return None, err
-        return iris, None
+            return None, err, False
+        if len(iris) <= SPARQL_FRAME_MAX_IRIS:
+            frame_cache.put(cache_key, iris)
+        return iris, None, False
 
-    # Process VALUES patterns
-    for match in list(VALUES_OWL_PATTERN.finditer(sparql)):
-        variable, query_type, ontology_id, dl_query = match.group(1), match.group(2), match.group(3), match.group(4).strip()
-        iris, err = await resolve(variable, query_type, ontology_id, dl_query)
-        if err is not None:
-            replacement = f"VALUES {variable} {{ }}"
-            errors.append({
-                "pattern": "VALUES",
-                "variable": variable,
-                "ontology": ontology_id,
-                "type": query_type,
-                "dl_query": dl_query,
-                "error": err,
-            })
-        else:
-            iri_list = " ".join(f"<{iri}>" for iri in iris)
-            replacement = f"VALUES {variable} {{ {iri_list} }}"
-            expansions.append({
-                "pattern": "VALUES",
-                "variable": variable,
-                "ontology": ontology_id,
-                "type": query_type,
-                "dl_query": dl_query,
-                "result_count": len(iris),
-            })
-        expanded = expanded.replace(match.group(0), replacement, 1)
+    keys = list(dict.fromkeys(_frame_key(m) for _, m in frames))
+    outcomes = dict(zip(keys, await asyncio.gather(*(resolve(k) for k in keys))))
+
+    term: Callable[[str], str] = _full_iri
+    header = ""
+    if compact:
+        term = _PrefixedNames(sparql, (
+            iris for iris, err, _ in outcomes.values()
+            if err is None and len(iris) <= SPARQL_FRAME_MAX_IRIS
+        ))
+        header = term.header
+    depths = _group_depths(sparql, (m.start() for _, m in frames)) if values_chunk > 0 else {}
 
-    # Process FILTER patterns
-    for match in list(FILTER_OWL_PATTERN.finditer(expanded)):
+    expansions: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+    edits: List[Tuple[int, int, str]] = []
+    size = len(header) + len(sparql)
+    plain_size = len(sparql)
+    for pattern, match in frames:
         variable, query_type, ontology_id, dl_query = match.group(1), match.group(2), match.group(3), match.group(4).strip()
-        iris, err = await resolve(variable, query_type, ontology_id, dl_query)
+        iris, err, cached = outcomes[_frame_key(match)]
+        frame = {
+            "pattern": pattern,
+            "variable": variable,
+            "ontology": ontology_id,
+            "type": query_type,
+            "dl_query": dl_query,
+        }
+        replacement = None
+        if err is None and len(iris) > SPARQL_FRAME_MAX_IRIS:
+            err = (f"frame matches {len(iris)} classes, more than the limit of "
+                   f"{SPARQL_FRAME_MAX_IRIS}; narrow the DL query")
+        if err is None:
+            chunk = values_chunk if depths.get(match.start(), 0) > 0 else 0
+            replacement = _render(pattern, variable, iris, term, chunk, filter_as_values)
+            if size + len(replacement) - len(match.group(0)) > SPARQL_EXPANSION_MAX_CHARS:
+                err = (f"expanding this frame ({len(iris)} classes) would make the query longer "
+                       f"than {SPARQL_EXPANSION_MAX_CHARS} characters")
         if err is not None:
-            # Empty IN list is illegal in standard SPARQL; use a never-matching guard.
-            replacement = f"FILTER (false)"
-            errors.append({
-                "pattern": "FILTER",
-                "variable": variable,
-                "ontology": ontology_id,
-                "type": query_type,
-                "dl_query": dl_query,
-                "error": err,
-            })
+            replacement = _render_failed(pattern, variable)
+            errors.append({**frame, "error": err})
         else:
-            if iris:
-                iri_list = ", ".join(f"<{iri}>" for iri in iris)
-                replacement = f"FILTER ({variable} IN ({iri_list}))"
-            else:
-                replacement = f"FILTER (false)"
             expansions.append({
-                "pattern": "FILTER",
-                "variable": variable,
-                "ontology": ontology_id,
-                "type": query_type,
-                "dl_query": dl_query,
+                **frame,
                 "result_count": len(iris),
+                "cached": cached,
+                "chars": len(replacement),
+                "plain_chars": _plain_length(pattern, variable, iris),
             })
-        expanded = expanded.replace(match.group(0), replacement, 1)
+        size += len(replacement) - len(match.group(0))
+        plain_size += (expansions[-1]["plain_chars"] if err is None else len(replacement)) - len(match.group(0))
+        edits.append((match.start(), match.end(), replacement))
 
-    return expanded, expansions, errors
+    edits.sort()
+    pieces: List[str] = [header]
+    pos = 0
+    for start, end, replacement in edits:
+        pieces.append(sparql[pos:start])
+        pieces.append(replacement)
+        pos = end
+    pieces.append(sparql[pos:])
+    rewritten = "".join(pieces)
+    if sizes is not None:
+        sizes.update(query=len(sparql), expanded=plain_size, rewritten=len(rewritten))
+    return rewritten, expansions, errors
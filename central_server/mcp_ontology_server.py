@@ -18,22 +18,54 @@ Tools:
   - list_sparql_examples: Curated SPARQL+OWL example queries to use as templates
   - query_sparql: Rewrite + execute against an external endpoint (Ontobee by default)
 
+Answers of the lookup tools (find_iri, search_classes, run_dl_query,
+get_class_info, browse_hierarchy) are cached for MCP_CACHE_TTL seconds.
+Mounted inside the central FastAPI app (MCP_ONTOLOGY_IN_PROCESS, see
+app.main) the tools call the API in-process instead of over HTTP.
+
 Usage:
   python mcp_ontology_server.py          # streamable HTTP on port 8766
   python mcp_ontology_server.py --stdio  # stdio transport (Claude Desktop)
 """
 
+import asyncio
+import functools
+import inspect
 import json
 import os
 import re
 import sys
-from typing import Any
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable
 
 import aiohttp
 from mcp.server.fastmcp import FastMCP
 
+from app.http_pool import HttpPool, external_session
+from app.single_flight import SingleFlight
+
 CENTRAL_SERVER_URL = os.getenv("CENTRAL_SERVER_URL", "http://localhost:80")
 PORT = int(os.getenv("MCP_ONTOLOGY_PORT", "8766"))
+# Tool answer cache (see _cached); a TTL of 0 turns it off.
+MCP_CACHE_TTL = float(os.getenv("MCP_CACHE_TTL", "300"))
+MCP_CACHE_SIZE = int(os.getenv("MCP_CACHE_SIZE", "2048"))
+# How long a find_iri lookup stage may run before the next fallback stage is
+# started alongside it (see _first_acceptable); 0 starts them all at once.
+MCP_RESOLVE_HEDGE = float(os.getenv("MCP_RESOLVE_HEDGE_MS", "150")) / 1000
+
+# Keep-alive pool to the central API (HTTP_POOL_CENTRAL_* to tune); SPARQL
+# endpoints go through the shared `external` pool.
+_central_pool = HttpPool.from_environment("central", limit=64, limit_per_host=64, timeout=60)
+
+# Set by mount_in_process(): a client whose transport calls the central
+# FastAPI app directly, without a socket.
+_in_process_client = None
+
+
+def _central_session() -> aiohttp.ClientSession:
+    return _central_pool.session()
 
 mcp = FastMCP(
     "aberowl-ontology",
@@ -42,26 +74,164 @@ mcp = FastMCP(
 )
 
 
+def mount_in_process(app) -> None:
+    """Send central API calls straight to `app`, the central FastAPI app, for
+    when this server runs in the same process (MCP_ONTOLOGY_IN_PROCESS, see
+    app.main). Requests still go through the app's routing, validation and
+    middleware; only the network round trip is skipped."""
+    import httpx  # installed with mcp
+
+    global _in_process_client
+    _in_process_client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://central")
+
+
+# Failures seen by the tool call in progress (see _cached); a failed central
+# call makes the answer degraded, so it is not cached. Failures are transport
+# errors, timeouts, 5xx and 429; other 4xx answers and "not found" payloads
+# are definitive (a repeated unknown IRI gets the same answer).
+_call_failures: ContextVar[list | None] = ContextVar("mcp_call_failures", default=None)
+
+
+def _note_failure(path: str) -> None:
+    failures = _call_failures.get()
+    if failures is not None:
+        failures.append(path)
+
+
+async def _api_request(method: str, path: str, params: dict | None = None,
+                       body: dict | None = None, timeout: float = 30) -> dict:
+    try:
+        if _in_process_client is not None:
+            resp = await _in_process_client.request(method, path, params=params, json=body,
+                                                    timeout=timeout)
+            status, text = resp.status_code, resp.text
+            data = resp.json() if status == 200 else None
+        else:
+            url = f"{CENTRAL_SERVER_URL.rstrip('/')}{path}"
+            async with _central_session().request(
+                    method, url, params=params, json=body,
+                    timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+                status = resp.status
+                if status == 200:
+                    data, text = await resp.json(), ""
+                else:
+                    data, text = None, await resp.text()
+    except Exception:
+        _note_failure(path)
+        raise
+    if status == 200:
+        if isinstance(data, dict) and data.get("error") and "not found" not in str(data["error"]).lower():
+            _note_failure(path)
+        return data
+    if status >= 500 or status == 429:
+        _note_failure(path)
+    return {"error": f"HTTP {status}: {text[:500]}"}
+
+
 async def _api_get(path: str, params: dict | None = None) -> dict:
     """Make a GET request to the central AberOWL API."""
-    url = f"{CENTRAL_SERVER_URL.rstrip('/')}{path}"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=30)) as resp:
-            if resp.status == 200:
-                return await resp.json()
-            text = await resp.text()
-            return {"error": f"HTTP {resp.status}: {text[:500]}"}
+    return await _api_request("GET", path, params=params, timeout=30)
 
 
 async def _api_post(path: str, body: dict) -> dict:
     """Make a POST request to the central AberOWL API."""
-    url = f"{CENTRAL_SERVER_URL.rstrip('/')}{path}"
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, json=body, timeout=aiohttp.ClientTimeout(total=60)) as resp:
-            if resp.status == 200:
-                return await resp.json()
-            text = await resp.text()
-            return {"error": f"HTTP {resp.status}: {text[:500]}"}
+    return await _api_request("POST", path, body=body, timeout=60)
+
+
+# --- Tool answer cache -------------------------------------------------------
+#
+# Agents repeat the same lookups (the IRI of a term, the class info of that
+# IRI) many times within and across sessions, and one find_iri can take up to
+# four central API calls. Read-only tools are wrapped with @_cached: answers are
+# kept for MCP_CACHE_TTL seconds, keyed by tool name and normalized arguments,
+# and identical calls in flight share one execution.
+
+
+class ToolCache:
+    """Tool answers, kept for ``ttl`` seconds; the least recently used of
+    more than ``max_entries`` go first. Only used from the event loop, so no
+    locking."""
+
+    def __init__(self, ttl: float = MCP_CACHE_TTL, max_entries: int = MCP_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> str | None:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] < time.monotonic():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: tuple, answer: str) -> None:
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, answer)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "ttl_seconds": self.ttl,
+            "in_flight": _tool_flight.stats(),
+        }
+
+
+tool_cache = ToolCache()
+_tool_flight = SingleFlight("mcp_tools")
+
+
+def _cache_arg(name: str, value: Any) -> Any:
+    """Argument as it goes into a cache key: surrounding whitespace does not
+    matter, nor does the case of an ontology id; an empty ontology is none."""
+    if isinstance(value, str):
+        value = value.strip()
+        if name == "ontology":
+            value = value.lower() or None
+    return value
+
+
+def _cached(fn: Callable[..., Awaitable[str]]) -> Callable[..., Awaitable[str]]:
+    """Cache the answers of a read-only tool in tool_cache. Goes under
+    @mcp.tool; the signature FastMCP builds the tool schema from is kept."""
+    sig = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs) -> str:
+        bound = sig.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = (fn.__name__,) + tuple(_cache_arg(k, v) for k, v in bound.arguments.items())
+        answer = tool_cache.get(key)
+        if answer is not None:
+            return answer
+
+        async def work() -> str:
+            failures: list = []
+            _call_failures.set(failures)
+            answer = await fn(*bound.args, **bound.kwargs)
+            if not failures:
+                tool_cache.put(key, answer)
+            return answer
+
+        return await _tool_flight.run(key, work)
+
+    return wrapper
 
 
 @mcp.tool(
@@ -92,6 +262,7 @@ async def list_ontologies() -> str:
         "  - Search for 'cell death' in the GO ontology specifically"
     ),
 )
+@_cached
 async def search_classes(query: str, ontology: str | None = None, size: int = 50) -> str:
     """
     Args:
@@ -302,6 +473,46 @@ def _dedup(records: list[dict], limit: int) -> list[dict]:
     return out
 
 
+async def _first_acceptable(stages: list[Callable[[], Awaitable[list[dict]]]],
+                            hedge: float | None = None) -> list[dict]:
+    """Result of the first stage, in order of preference, that finds anything.
+
+    The lookup stages of _resolve are independent fallbacks: the preferred
+    one usually answers fast, and when it does not, running the next one
+    only after it has finished adds up their latencies. Each stage is
+    started once every stage before it has either come back empty or been
+    running for `hedge` seconds (0: all at once). A stage's result is used
+    once all preferred stages have come back empty; stages still running
+    then are cancelled.
+    """
+    hedge = MCP_RESOLVE_HEDGE if hedge is None else hedge
+    tasks: list[asyncio.Task] = []
+    best = 0  # the most preferred stage not known to be empty
+    try:
+        while True:
+            while best < len(tasks) and tasks[best].done():
+                result = tasks[best].result()
+                if result:
+                    return result
+                best += 1
+            if best == len(stages):
+                return []
+            if best == len(tasks):
+                tasks.append(asyncio.ensure_future(stages[best]()))
+                continue
+            pending = [t for t in tasks[best:] if not t.done()]
+            more = len(tasks) < len(stages) and not any(
+                t.done() and not t.exception() and t.result() for t in tasks[best:])
+            done, _ = await asyncio.wait(pending, timeout=hedge if more else None,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if not done and more:
+                tasks.append(asyncio.ensure_future(stages[len(tasks)]()))
+    finally:
+        for t in tasks:
+            if not t.done():
+                t.cancel()
+
+
 async def _resolve(term: str, ontology: str | None, limit: int) -> tuple[str, list[dict]]:
     kind = _classify(term)
     t = _strip_iri(term)
@@ -309,57 +520,67 @@ async def _resolve(term: str, ontology: str | None, limit: int) -> tuple[str, li
     if kind == "iri":
         # Validate against the most likely ontology: the caller's hint, then the
         # one implied by an OBO-style IRI (purl.obolibrary.org/obo/GO_… -> go).
-        guesses, seen_g = [], set()
+        guesses = []
         if ontology:
             guesses.append(ontology)
         curie = _iri_to_curie(t)
         if curie:
             guesses.append(curie.split(":")[0].lower())
-        for g in guesses:
-            if not g or g in seen_g:
-                continue
-            seen_g.add(g)
-            rec = await _validate_iri(t, g)
-            if rec:
-                return kind, [rec]
+        stages = []
+        for g in dict.fromkeys(g for g in guesses if g):
+            async def validate(g=g):
+                rec = await _validate_iri(t, g)
+                return [rec] if rec else []
+            stages.append(validate)
         # Scoped reasoner backstop only when an ontology was given explicitly.
         if ontology:
-            hits = [r for r in await _dl_equivalent(f"<{t}>", ontology) if r["iri"] == t]
-            return kind, _dedup(hits, limit)
-        return kind, []
+            async def reasoner():
+                hits = [r for r in await _dl_equivalent(f"<{t}>", ontology) if r["iri"] == t]
+                return _dedup(hits, limit)
+            stages.append(reasoner)
+        return kind, await _first_acceptable(stages)
 
     if kind == "curie":
         prefix, local = _curie_parts(t)
         colon = f"{prefix}:{local}"
+
         # 1) ES exact oboid match.
-        es = [r for r in await _es_records(colon, ontology, limit)
-              if _norm(r["curie"]) == _norm(colon)]
-        if es:
-            for r in es:
+        async def es():
+            hits = [r for r in await _es_records(colon, ontology, limit)
+                    if _norm(r["curie"]) == _norm(colon)]
+            for r in hits:
                 r["match"] = "curie"
-            return kind, _dedup(es, limit)
+            return _dedup(hits, limit)
+
         # 2) Construct the OBO PURL IRI and validate it against the ontology the
         #    prefix implies (GO:… -> go) unless the caller scoped one explicitly.
-        cand = f"http://purl.obolibrary.org/obo/{prefix}_{local}"
-        rec = await _validate_iri(cand, ontology or prefix.lower())
-        if rec:
+        async def purl():
+            rec = await _validate_iri(f"http://purl.obolibrary.org/obo/{prefix}_{local}",
+                                      ontology or prefix.lower())
+            if not rec:
+                return []
             rec["match"] = "curie"
-            return kind, [rec]
-        return kind, []
+            return [rec]
+
+        return kind, await _first_acceptable([es, purl])
 
     # text / label: EXACT match first (oboid/label/synonym equality) so the term
     # itself resolves instead of a fuzzy sibling; only if nothing matches exactly
     # do we fall back to the fuzzy index, then the reasoner. Fuzzy hits are tagged
     # so the tool presents them as candidates, not a confident resolution.
-    records = await _exact_records(t, ontology, limit)
-    if records:
-        return kind, records
-    records = await _es_records(t, ontology, limit)
-    for r in records:
-        r["match"] = "fuzzy"
-    if not records and ontology:
-        records = await _dl_equivalent(_quote_label(t), ontology)
-    return kind, _dedup(records, limit)
+    async def exact():
+        return await _exact_records(t, ontology, limit)
+
+    async def fuzzy():
+        records = await _es_records(t, ontology, limit)
+        for r in records:
+            r["match"] = "fuzzy"
+        return _dedup(records, limit)
+
+    async def reasoner():
+        return _dedup(await _dl_equivalent(_quote_label(t), ontology), limit)
+
+    return kind, await _first_acceptable([exact, fuzzy, reasoner] if ontology else [exact, fuzzy])
 
 
 async def _suggest(term: str, ontology: str | None, limit: int = 5) -> list[dict]:
@@ -412,6 +633,7 @@ def _fmt_record(rec: dict, idx: int | None = None) -> str:
         "non-existent class."
     ),
 )
+@_cached
 async def find_iri(term: str, ontology: str | None = None, limit: int = 10) -> str:
     """
     Args:
@@ -494,6 +716,7 @@ async def find_iri(term: str, ontology: str | None = None, limit: int = 10) -> s
         "  - query=\"'has part' some 'nucleus'\", type='subeq' -> things that have a nucleus"
     ),
 )
+@_cached
 async def run_dl_query(query: str, type: str = "subeq", ontology: str | None = None) -> str:
     """
     Args:
@@ -525,6 +748,7 @@ async def run_dl_query(query: str, type: str = "subeq", ontology: str | None = N
         "the ontology ID."
     ),
 )
+@_cached
 async def get_class_info(class_iri: str, ontology: str) -> str:
     """
     Args:
@@ -564,6 +788,7 @@ async def get_ontology_info(ontology: str) -> str:
         "(subclass or superclass) to explore the hierarchy."
     ),
 )
+@_cached
 async def browse_hierarchy(class_iri: str, ontology: str, direction: str = "subclass") -> str:
     """
     Args:
@@ -625,15 +850,19 @@ async def browse_hierarchy(class_iri: str, ontology: str, direction: str = "subc
         "      }\n\n"
         "Frames whose ontology is unknown or whose worker is offline are "
         "reported as errors and replaced with an empty match in the rewritten "
-        "query, so the rest of the query is still usable."
+        "query, so the rest of the query is still usable.\n\n"
+        "Set compact=true to write the class IRIs as prefixed names (e.g. "
+        "obo:GO_0005623) under PREFIX declarations; useful when a frame "
+        "expands to thousands of classes."
     ),
 )
-async def rewrite_sparql(query: str) -> str:
+async def rewrite_sparql(query: str, compact: bool = False) -> str:
     """
     Args:
         query: SPARQL query string containing one or more OWL DL frames.
+        compact: Write IRIs as prefixed names to shorten the rewritten query.
     """
-    data = await _api_post("/api/sparql", {"query": query})
+    data = await _api_post("/api/sparql", {"query": query, "compact": compact})
     if data.get("error") and "rewritten_query" not in data:
         return f"Error: {data['error']}"
 
@@ -662,6 +891,9 @@ async def rewrite_sparql(query: str) -> str:
         lines.append("")
     if not expansions and not errors:
         lines.append("No OWL DL frames found in the query — returned unchanged.\n")
+    size = data.get("size") or {}
+    if compact and size.get("expanded") and size.get("expanded") != size.get("rewritten"):
+        lines.append(f"Size: {size['rewritten']} characters (with full IRIs: {size['expanded']}).\n")
 
     lines.append("Rewritten query:")
     lines.append(rewritten or "(empty)")
@@ -791,20 +1023,20 @@ async def _execute_sparql(endpoint: str, query: str, timeout: int = 60) -> dict[
         "Content-Type": "application/x-www-form-urlencoded",
     }
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                endpoint,
-                data={"query": query},
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=timeout),
-            ) as resp:
-                text = await resp.text()
-                if resp.status != 200:
-                    return {"error": f"endpoint returned HTTP {resp.status}: {text[:500]}"}
-                try:
-                    return json.loads(text)
-                except json.JSONDecodeError:
-                    return {"error": f"endpoint returned non-JSON: {text[:500]}"}
+        session = external_session()
+        async with session.post(
+            endpoint,
+            data={"query": query},
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as resp:
+            text = await resp.text()
+            if resp.status != 200:
+                return {"error": f"endpoint returned HTTP {resp.status}: {text[:500]}"}
+            try:
+                return json.loads(text)
+            except json.JSONDecodeError:
+                return {"error": f"endpoint returned non-JSON: {text[:500]}"}
     except Exception as e:
         return {"error": f"endpoint unreachable: {e}"}
 
@@ -848,7 +1080,9 @@ def _format_sparql_results(results: dict[str, Any], limit: int = 50) -> list[str
         "  - https://bio2rdf.org/sparql              (Bio2RDF)\n\n"
         "Frame syntax is identical to `rewrite_sparql`. Per-frame "
         "resolution failures (unknown ontology, offline worker, DL parse "
-        "error) are reported but the rest of the query is still executed.\n\n"
+        "error) are reported but the rest of the query is still executed. "
+        "The query is sent with its class IRIs written as prefixed names "
+        "to keep large expansions small.\n\n"
         "Example: SELECT ?c ?label WHERE { VALUES ?c { OWL subeq go-plus { 'cell death' } } "
         "?c <http://www.w3.org/2000/01/rdf-schema#label> ?label . } LIMIT 50"
     ),
@@ -863,7 +1097,7 @@ async def query_sparql(query: str, endpoint: str | None = None) -> str:
     """
     target = (endpoint or DEFAULT_SPARQL_ENDPOINT).strip()
 
-    rewrite = await _api_post("/api/sparql", {"query": query})
+    rewrite = await _api_post("/api/sparql", {"query": query, "compact": True})
     if rewrite.get("error") and "rewritten_query" not in rewrite:
         return f"Rewrite error: {rewrite['error']}"
 
@@ -42,6 +42,12 @@ import org.semanticweb.owlapi.reasoner.structural.*
 
 import org.elasticsearch.client.indices.*
 import org.elasticsearch.action.index.IndexRequest
+import org.elasticsearch.action.bulk.BulkRequest
+import org.elasticsearch.action.bulk.BulkResponse
+import org.elasticsearch.action.admin.indices.settings.get.GetSettingsRequest
+import org.elasticsearch.action.admin.indices.settings.put.UpdateSettingsRequest
+import org.elasticsearch.action.admin.indices.refresh.RefreshRequest
+import org.elasticsearch.rest.RestStatus
 import org.elasticsearch.common.xcontent.XContentType;
 import org.elasticsearch.client.RestClientBuilder
 import org.elasticsearch.client.RestClient
@@ -54,6 +60,8 @@ import org.elasticsearch.common.unit.TimeValue;
 import java.nio.*
 import java.nio.file.*
 import java.util.*
+import java.util.concurrent.*
+import java.util.concurrent.atomic.*
 import org.apache.logging.log4j.*
 import java.net.URL
 import org.apache.commons.lang3.StringEscapeUtils // Added import
@@ -69,6 +77,24 @@ skip_embbedding = args[6]
 // args[7] (optional): "True" means skip deleteOntologyData (writing to a pre-created fresh index)
 freshIndex = (args.length > 7 && args[7] == "True")
 
+// Bulk ingestion tuning. triggerIndexing.groovy passes per-request overrides
+// through the environment of this subprocess.
+bulkActions     = (System.getenv("INDEX_BULK_ACTIONS") ?: "1000") as int
+bulkBytes       = ((System.getenv("INDEX_BULK_MB") ?: "5") as long) * 1024L * 1024L
+bulkConcurrency = Math.max(1, (System.getenv("INDEX_BULK_CONCURRENCY") ?: "2") as int)
+bulkMaxRetries  = (System.getenv("INDEX_BULK_MAX_RETRIES") ?: "3") as int
+bulkProgressMs  = 5000L
+
+// Shared bulk state. All of it is created here, before any worker thread
+// starts, so the background threads only ever read these bindings.
+pendingBulk    = new BulkRequest()
+bulkExecutor   = Executors.newFixedThreadPool(bulkConcurrency)
+bulkPermits    = new Semaphore(bulkConcurrency)
+indexedDocs    = new AtomicLong(0)
+failedDocs     = new AtomicLong(0)
+bulkStartMs    = System.currentTimeMillis()
+lastProgressMs = new AtomicLong(0)
+
 esUrls = new ArrayList<URL>();
 hosts = new HttpHost[urls.length];
 idx=0
@@ -227,6 +253,160 @@ def index(def indexName, def obj) {
     }
 }
 
+/**
+ * Queue a document for bulk indexing. The pending batch is handed to the
+ * bulk executor once it reaches bulkActions documents or bulkBytes bytes.
+ */
+def bulkIndex(def indexName, def obj) {
+	def request = new IndexRequest(indexName)
+	request.source(new JsonBuilder(obj).toString(), XContentType.JSON)
+	pendingBulk.add(request)
+	if (pendingBulk.numberOfActions() >= bulkActions || pendingBulk.estimatedSizeInBytes() >= bulkBytes) {
+		flushBulk()
+	}
+}
+
+/**
+ * Send the pending batch asynchronously. Blocks while bulkConcurrency
+ * batches are already in flight, which bounds both heap and ES load.
+ */
+def flushBulk() {
+	if (pendingBulk.numberOfActions() == 0) {
+		return
+	}
+	def batch = pendingBulk
+	pendingBulk = new BulkRequest()
+	bulkPermits.acquire()
+	bulkExecutor.execute {
+		try {
+			sendBulk(batch)
+		} finally {
+			bulkPermits.release()
+			reportProgress(false)
+		}
+	}
+}
+
+/**
+ * Execute one bulk request. Items that failed with a retryable status
+ * (429 / 5xx) are collected into a new, smaller batch and retried with
+ * exponential backoff; items that succeeded are never re-sent. Items that
+ * failed for any other reason (e.g. a mapping error) are counted as failed.
+ */
+def sendBulk(BulkRequest batch) {
+	int attempt = 0
+	while (batch.numberOfActions() > 0) {
+		def retry = new BulkRequest()
+		try {
+			BulkResponse response = esClient.bulk(batch, RequestOptions.DEFAULT)
+			if (!response.hasFailures()) {
+				indexedDocs.addAndGet(batch.numberOfActions())
+				return
+			}
+			def requests = batch.requests()
+			int ok = 0
+			response.getItems().each { item ->
+				if (!item.isFailed()) {
+					ok++
+				} else {
+					def status = item.getFailure().getStatus()
+					if (status == RestStatus.TOO_MANY_REQUESTS || status.getStatus() >= 500) {
+						retry.add(requests.get(item.getItemId()))
+					} else {
+						failedDocs.incrementAndGet()
+						println "WARN: Document rejected by Elasticsearch: ${item.getFailureMessage()}"
+					}
+				}
+			}
+			indexedDocs.addAndGet(ok)
+		} catch (Exception e) {
+			// The whole request failed (connection reset, timeout, 429 on the
+			// request itself); retry the batch as a unit.
+			println "WARN: Bulk request of ${batch.numberOfActions()} docs failed: ${e.message}"
+			retry = batch
+		}
+		batch = retry
+		if (batch.numberOfActions() == 0) {
+			return
+		}
+		attempt++
+		if (attempt > bulkMaxRetries) {
+			failedDocs.addAndGet(batch.numberOfActions())
+			println "ERROR: Giving up on ${batch.numberOfActions()} docs after ${bulkMaxRetries} retries"
+			return
+		}
+		Thread.sleep(500L * (1L << Math.min(attempt, 6)))
+	}
+}
+
+/**
+ * Flush the last partial batch, wait for every in-flight request and stop
+ * the bulk executor.
+ */
+def finishBulk() {
+	flushBulk()
+	bulkPermits.acquire(bulkConcurrency)
+	bulkPermits.release(bulkConcurrency)
+	bulkExecutor.shutdown()
+	bulkExecutor.awaitTermination(1, TimeUnit.MINUTES)
+	reportProgress(true)
+}
+
+/**
+ * Print a machine-readable progress line. triggerIndexing.groovy parses
+ * these from stdout and publishes them in its task registry.
+ */
+def reportProgress(boolean force) {
+	long now = System.currentTimeMillis()
+	long last = lastProgressMs.get()
+	if (!force && (now - last < bulkProgressMs || !lastProgressMs.compareAndSet(last, now))) {
+		return
+	}
+	double elapsed = Math.max(1L, now - bulkStartMs) / 1000.0d
+	long indexed = indexedDocs.get()
+	println String.format(Locale.ROOT, "PROGRESS indexed=%d failed=%d docsPerSec=%.1f",
+		indexed, failedDocs.get(), indexed / elapsed)
+}
+
+/**
+ * Disable refresh and replicas on a freshly created index while it is bulk
+ * loaded. Returns the previous values so restoreIndexSettings can put them back.
+ */
+def disableRefreshAndReplicas(indexName) {
+	def saved = ["index.refresh_interval": "1s", "index.number_of_replicas": "1"]
+	try {
+		def getRequest = new GetSettingsRequest()
+			.indices(indexName)
+			.names("index.refresh_interval", "index.number_of_replicas")
+			.includeDefaults(true)
+		def current = esClient.indices().getSettings(getRequest, RequestOptions.DEFAULT)
+		saved.keySet().each { key ->
+			def value = current.getSetting(indexName, key)
+			if (value != null) {
+				saved[key] = value
+			}
+		}
+		def update = new UpdateSettingsRequest(indexName)
+			.settings(["index.refresh_interval": "-1", "index.number_of_replicas": 0])
+		esClient.indices().putSettings(update, RequestOptions.DEFAULT)
+		println "Disabled refresh and replicas on ${indexName} (was ${saved})"
+	} catch (Exception e) {
+		println "WARN: Could not relax settings on ${indexName}: ${e.message}"
+	}
+	return saved
+}
+
+def restoreIndexSettings(indexName, saved) {
+	try {
+		esClient.indices().putSettings(new UpdateSettingsRequest(indexName).settings(saved), RequestOptions.DEFAULT)
+		esClient.indices().refresh(new RefreshRequest(indexName), RequestOptions.DEFAULT)
+		println "Restored settings on ${indexName}: ${saved}"
+	} catch (Exception e) {
+		println "ERROR: Failed to restore settings on ${indexName}: ${e.message}"
+		e.printStackTrace()
+	}
+}
+
 
 void indexOntology(String fileName, def data) {
     println "Starting to index ontology from file: ${fileName}"
@@ -311,6 +491,10 @@ void indexOntology(String fileName, def data) {
     OWLOntologyMerger merger = new OWLOntologyMerger(mp, false)
     def iOnt = merger.createMergedOntology(manager, IRI.create("http://test.owl"))
 
+    def savedSettings = freshIndex ? disableRefreshAndReplicas(owlClassIndexName) : null
+    bulkStartMs = System.currentTimeMillis()
+
+    try {
     iOnt.getClassesInSignature(true).each {
 	c -> // OWLClass
 	def cIRI = c.getIRI().toString()
@@ -381,10 +565,20 @@ void indexOntology(String fileName, def data) {
 
 	// Index the class info (Consider uncommenting the check if needed)
 	// if (!deprecated) {
-	    index(owlClassIndexName, info)
+	    bulkIndex(owlClassIndexName, info)
 	// } // Original commented out block end
 
     } // End of classes loop
+    } finally {
+        finishBulk()
+        if (savedSettings != null) {
+            restoreIndexSettings(owlClassIndexName, savedSettings)
+        }
+    }
+
+    if (failedDocs.get() > 0) {
+        println "WARN: ${failedDocs.get()} class documents could not be indexed for ${acronym}"
+    }
 
 	println('Finished indexing :' + acronym)
     } catch (Exception e) {
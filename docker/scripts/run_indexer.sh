@@ -9,6 +9,10 @@ set -e
 # SKIP_EMBEDDING=${SKIP_EMBEDDING:-True}
 # ES_USERNAME=${ES_USERNAME:-}
 # ES_PASSWORD=${ES_PASSWORD:-}
+# INDEX_BULK_ACTIONS=${INDEX_BULK_ACTIONS:-1000}        # docs per bulk request
+# INDEX_BULK_MB=${INDEX_BULK_MB:-5}                     # max bulk request size (MB)
+# INDEX_BULK_CONCURRENCY=${INDEX_BULK_CONCURRENCY:-2}   # in-flight bulk requests
+# INDEX_BULK_MAX_RETRIES=${INDEX_BULK_MAX_RETRIES:-3}   # retries for rejected items
 
 echo "--- Indexer Service Started ---"
 echo "Ontology file path: $ONTOLOGY_FILE_PATH"
@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 """Compare central-server dispatch shapes against a multi-ontology worker.
 
-Mode A — "old" (current prod): N parallel HTTP calls, one per ontology,
-dispatched via asyncio.gather (mirroring central_server/app/main.py:700).
+Mode A — "old": N parallel HTTP calls, one per ontology, dispatched via
+asyncio.gather (the previous /api/dlquery_all dispatch).
 
-Mode B — "new" (option B): 1 HTTP call with ontologyIds=a,b,c,...
+Mode B — "new": 1 HTTP call with ontologyIds=a,b,c,... (what
+/api/dlquery_all in central_server/app/main.py now sends to each worker).
 """
 import argparse, asyncio, json, statistics, sys, time
 import aiohttp
@@ -252,12 +252,280 @@ class TestSearchAll:
     @pytest.mark.asyncio
     async def test_search_all_with_results(self, client, test_app):
         import app.main as main_module
-        main_module.es_mgr.search_classes = AsyncMock(return_value=[
+        main_module.es_mgr.search_classes_page = AsyncMock(return_value={"result": [
             {"class": "http://example.org/C1", "label": "test", "ontology": "go"},
-        ])
+        ], "search_after": None})
         r = await client.get("/api/search_all", params={"query": "test"})
         assert r.status_code == 200
         assert len(r.json()["result"]) == 1
+        assert r.json()["search_after"] is None
+
+    @pytest.mark.asyncio
+    async def test_several_ontologies_are_one_search_with_paging(self, client, test_app):
+        import app.main as main_module
+        main_module.es_mgr.search_classes_page = AsyncMock(return_value={"result": [
+            {"class": "http://example.org/C1", "label": "test", "ontology": "go"},
+        ], "search_after": [1.5, "http://example.org/C1", "go"]})
+        r = await client.get("/api/search_all", params={"query": "test", "ontologies": "go,hp", "size": "1"})
+        cursor = r.json()["search_after"]
+        call = main_module.es_mgr.search_classes_page.await_args
+        assert call.kwargs["ontologies"] == ["go", "hp"]
+        assert call.kwargs["search_after"] is None
+
+        r = await client.get("/api/search_all", params={
+            "query": "test", "ontologies": "go,hp", "size": "1", "search_after": cursor})
+        assert r.status_code == 200
+        assert main_module.es_mgr.search_classes_page.await_count == 2
+        assert main_module.es_mgr.search_classes_page.await_args.kwargs["search_after"] == [
+            1.5, "http://example.org/C1", "go"]
+
+    @pytest.mark.asyncio
+    async def test_search_all_rejects_a_bad_cursor(self, client):
+        r = await client.get("/api/search_all", params={"query": "test", "search_after": "%%%"})
+        assert r.status_code == 400
+
+
+# ---------------------------------------------------------------------------
+# dlquery_all (one runQuery call per worker)
+# ---------------------------------------------------------------------------
+
+class FakeWorkerResponse:
+
+    def __init__(self, status, payload):
+        self.status = status
+        self._payload = payload
+
+    async def json(self, content_type=None):
+        return self._payload
+
+    async def text(self):
+        return self._payload if isinstance(self._payload, str) else json.dumps(self._payload)
+
+    @property
+    def content(self):
+        body = self._payload.encode()
+
+        class _Content:
+            async def iter_chunked(self, n):
+                # Deliberately tiny chunks so records straddle chunk borders.
+                for i in range(0, len(body), 7):
+                    yield body[i:i + 7]
+
+        return _Content()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeWorkerSession:
+    """Records runQuery calls; `replies` maps worker URL -> (status, payload)
+    or an exception to raise."""
+
+    def __init__(self, replies):
+        self.replies = replies
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None):
+        worker = url.rsplit("/api/", 1)[0]
+        self.calls.append((worker, dict(params or {})))
+        reply = self.replies[worker]
+        if isinstance(reply, Exception):
+            raise reply
+        return FakeWorkerResponse(*reply)
+
+    def post(self, url, json=None, timeout=None):
+        worker = url.rsplit("/api/", 1)[0]
+        self.calls.append((worker, dict(json or {})))
+        reply = self.replies[worker]
+        if isinstance(reply, Exception):
+            raise reply
+        return FakeWorkerResponse(*reply)
+
+
+@pytest.mark.unit
+class TestDLQueryAll:
+
+    @pytest.fixture
+    def shared_worker(self, populated_redis):
+        populated_redis._data["registered_servers"]["cl"] = json.dumps({
+            "ontology": "cl",
+            "title": "Cell Ontology",
+            "url": "http://go-server:80/",
+            "status": "online",
+        })
+        return populated_redis
+
+    @pytest.mark.asyncio
+    async def test_groups_ontologies_per_worker(self, client, shared_worker):
+        import app.main as main_module
+        fake = FakeWorkerSession({
+            "http://go-server:80": (200, {"result": [
+                {"class": "http://example.org/GO_1", "ontology": "go"},
+                {"class": "http://example.org/CL_1", "ontology": "cl"},
+            ], "failed": []}),
+            "http://hp-server:80": (200, {"result": [
+                {"class": "http://example.org/HP_1", "ontology": "hp"},
+            ], "failed": []}),
+        })
+        with patch.object(main_module, "worker_session", lambda: fake):
+            r = await client.get("/api/dlquery_all", params={"query": "X", "type": "subclass"})
+        assert r.status_code == 200
+        body = r.json()
+        assert len(fake.calls) == 2
+        go_call = next(p for w, p in fake.calls if w == "http://go-server:80")
+        assert sorted(go_call["ontologyIds"].split(",")) == ["cl", "go"]
+        assert "ontologyId" not in go_call
+        titles = {item["ontology"]: item["ontology_title"] for item in body["result"]}
+        assert titles == {"go": "Gene Ontology", "cl": "Cell Ontology", "hp": "Human Phenotype Ontology"}
+        assert body["failed"] == []
+
+    @pytest.mark.asyncio
+    async def test_reports_partial_failures(self, client, shared_worker):
+        import app.main as main_module
+        fake = FakeWorkerSession({
+            "http://go-server:80": (200, {
+                "result": [{"class": "http://example.org/GO_1", "ontology": "go"}],
+                "failed": [{"ontology": "cl", "message": "Query parsing error"}],
+            }),
+            "http://hp-server:80": asyncio.TimeoutError(),
+        })
+        with patch.object(main_module, "worker_session", lambda: fake):
+            r = await client.get("/api/dlquery_all", params={
+                "query": "X", "type": "subclass",
+                "ontologies": "GO,cl,hp,test_offline,nope",
+            })
+        assert r.status_code == 200
+        body = r.json()
+        assert [item["ontology"] for item in body["result"]] == ["go"]
+        failed = {f["ontology"]: f["error"] for f in body["failed"]}
+        assert failed["cl"] == "Query parsing error"
+        assert "timed out" in failed["hp"]
+        assert failed["test_offline"] == "worker is offline"
+        assert failed["nope"] == "ontology is not registered"
+        assert "go" not in failed
+
+    @staticmethod
+    def _ndjson(*records):
+        return "".join(json.dumps(r) + "\n" for r in records)
+
+    @pytest.mark.asyncio
+    async def test_ndjson_relays_worker_streams(self, client, shared_worker):
+        import app.main as main_module
+        fake = FakeWorkerSession({
+            "http://go-server:80": (200, self._ndjson(
+                {"class": "http://example.org/GO_1", "ontology": "go"},
+                {"class": "http://example.org/CL_1", "ontology": "cl"},
+                {"done": True, "count": 2, "truncated": False,
+                 "failed": [{"ontology": "cl", "message": "partial"}]},
+            )),
+            "http://hp-server:80": (200, self._ndjson(
+                {"class": "http://example.org/HP_1", "ontology": "hp"},
+                {"error": True, "message": "Generic query error: boom"},
+            )),
+        })
+        with patch.object(main_module, "worker_session", lambda: fake):
+            r = await client.get("/api/dlquery_all", params={
+                "query": "X", "type": "subclass", "format": "ndjson",
+            })
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in r.text.splitlines()]
+        trailer = lines[-1]
+        records = lines[:-1]
+        assert {rec["class"] for rec in records} == {
+            "http://example.org/GO_1", "http://example.org/CL_1", "http://example.org/HP_1",
+        }
+        assert all("ontology_title" in rec for rec in records)
+        assert trailer["done"] is True and trailer["count"] == 3
+        # Both failed after relaying records, so they are partial, not failed.
+        assert trailer["failed"] == []
+        partial = {f["ontology"]: f["error"] for f in trailer["partial"]}
+        assert partial == {"cl": "partial", "hp": "Generic query error: boom"}
+        assert all(p["format"] == "ndjson" for _, p in fake.calls)
+
+    @pytest.mark.asyncio
+    async def test_ndjson_fails_only_ontologies_without_records(self, client, shared_worker):
+        import app.main as main_module
+        fake = FakeWorkerSession({
+            "http://go-server:80": (200, self._ndjson(
+                {"class": "http://example.org/GO_1", "ontology": "go"},
+            )),
+        })
+        with patch.object(main_module, "worker_session", lambda: fake):
+            r = await client.get("/api/dlquery_all", params={
+                "query": "X", "type": "subclass", "format": "ndjson", "ontologies": "go,cl",
+            })
+        lines = [json.loads(line) for line in r.text.splitlines()]
+        trailer = lines[-1]
+        assert [rec["ontology"] for rec in lines[:-1]] == ["go"]
+        assert trailer["partial"] == [{"ontology": "go", "error": "worker stream ended early"}]
+        assert trailer["failed"] == [{"ontology": "cl", "error": "worker stream ended early"}]
+
+    @pytest.mark.asyncio
+    async def test_ndjson_applies_limit(self, client, populated_redis):
+        import app.main as main_module
+        fake = FakeWorkerSession({
+            "http://go-server:80": (200, self._ndjson(
+                *({"class": f"http://example.org/GO_{i}", "ontology": "go"} for i in range(5)),
+                {"done": True, "count": 5, "truncated": False, "failed": []},
+            )),
+        })
+        with patch.object(main_module, "worker_session", lambda: fake):
+            r = await client.get("/api/dlquery_all", params={
+                "query": "X", "type": "subclass", "format": "ndjson",
+                "ontologies": "go", "limit": "3",
+            })
+        lines = [json.loads(line) for line in r.text.splitlines()]
+        assert len(lines) == 4
+        assert lines[-1]["count"] == 3
+        assert lines[-1]["truncated"] is True
+        assert fake.calls[0][1]["limit"] == "3"
+
+
+# ---------------------------------------------------------------------------
+# resolve/batch
+# ---------------------------------------------------------------------------
+
+@pytest.mark.unit
+class TestResolveBatch:
+
+    @pytest.mark.asyncio
+    async def test_terms_times_ontologies_in_one_call(self, client):
+        import app.main as main_module
+
+        async def resolve_many(searches, size, chunk_size, concurrency):
+            return [[{"class": f"http://x/{ont}/{term}", "ontology": ont}] if term != "nothing" else []
+                    for term, ont in searches]
+
+        main_module.es_mgr.resolve_many = AsyncMock(side_effect=resolve_many)
+        r = await client.post("/api/resolve/batch", json={
+            "terms": ["apoptosis", "nothing", "apoptosis"], "ontologies": ["go", "hp"],
+        })
+        assert r.status_code == 200
+        body = r.json()
+        assert [d["ontology"] for d in body["result"]["apoptosis"]] == ["go", "hp"]
+        assert body["result"]["nothing"] == []
+        assert body["failed"] == []
+        main_module.es_mgr.resolve_many.assert_awaited_once()
+        call = main_module.es_mgr.resolve_many.await_args
+        assert call.args[0] == [("apoptosis", "go"), ("apoptosis", "hp"), ("nothing", "go"), ("nothing", "hp")]
+        assert call.kwargs["chunk_size"] == 0
+
+    @pytest.mark.asyncio
+    async def test_concurrency_chunks_and_failures_are_reported(self, client):
+        import app.main as main_module
+        main_module.es_mgr.resolve_many = AsyncMock(return_value=[None, [{"class": "http://x/1"}]])
+        r = await client.post("/api/resolve/batch", json={"terms": ["a", "b"], "concurrency": 3})
+        body = r.json()
+        assert body["failed"] == ["a"]
+        assert body["result"]["b"] == [{"class": "http://x/1"}]
+        call = main_module.es_mgr.resolve_many.await_args
+        assert call.args[0] == [("a", None), ("b", None)]
+        assert call.kwargs["chunk_size"] == main_module.RESOLVE_MSEARCH_CHUNK
+        assert call.kwargs["concurrency"] == 3
 
 
 # ---------------------------------------------------------------------------
@@ -273,6 +541,68 @@ class TestGetClass:
         assert r.status_code == 422  # FastAPI validation error
 
 
+@pytest.mark.unit
+class TestGetClasses:
+
+    GO_1 = "http://purl.obolibrary.org/obo/GO_0000001"
+    GO_2 = "http://purl.obolibrary.org/obo/GO_0000002"
+    HP_1 = "http://purl.obolibrary.org/obo/HP_0000001"
+
+    @pytest.mark.asyncio
+    async def test_one_es_query_per_ontology_and_one_worker_call_for_misses(self, client):
+        import app.main as main_module
+
+        async def es_lookup(ont, iris, oboids):
+            if ont == "go":
+                return [{"class": self.GO_1, "oboid": "GO:0000001", "ontology": "go"}]
+            return []
+
+        main_module.es_mgr.get_classes = AsyncMock(side_effect=es_lookup)
+        fake = FakeWorkerSession({
+            "http://go-server:80": (200, {"found": {self.GO_2: {"class": self.GO_2, "label": "two"}},
+                                          "missing": []}),
+            "http://hp-server:80": (200, {"found": {}, "missing": [self.HP_1]}),
+        })
+        with patch.object(main_module, "worker_session", lambda: fake):
+            r = await client.post("/api/getClasses", json={
+                "iris": ["GO:0000001", f"<{self.GO_2}>", self.HP_1, "not a class"],
+            })
+        assert r.status_code == 200
+        body = r.json()
+        assert body["found"]["GO:0000001"]["class"] == self.GO_1
+        assert body["found"][f"<{self.GO_2}>"]["label"] == "two"
+        assert body["missing"] == {self.HP_1: "class not found", "not a class": "not an IRI or CURIE"}
+
+        assert main_module.es_mgr.get_classes.await_count == 2
+        go_es = next(c.args for c in main_module.es_mgr.get_classes.await_args_list if c.args[0] == "go")
+        assert sorted(go_es[1]) == [self.GO_1, self.GO_2]
+        assert go_es[2] == ["GO:0000001"]
+        go_call = next(p for w, p in fake.calls if w == "http://go-server:80")
+        assert go_call["iris"] == [self.GO_2]
+
+    @pytest.mark.asyncio
+    async def test_offline_ontology_and_unscoped_iri_are_missing(self, client):
+        import app.main as main_module
+        main_module.es_mgr.get_classes = AsyncMock(return_value=[])
+        fake = FakeWorkerSession({})
+        with patch.object(main_module, "worker_session", lambda: fake):
+            r = await client.post("/api/getClasses", json={
+                "iris": ["http://example.org/C1", "http://example.org/C2"],
+                "ontology": "test_offline",
+            })
+            r2 = await client.post("/api/getClasses", json={"iris": ["http://example.org/C1"]})
+        assert set(r.json()["missing"]) == {"http://example.org/C1", "http://example.org/C2"}
+        assert r2.json()["missing"] == {"http://example.org/C1": "ontology required for this IRI"}
+        assert fake.calls == []
+
+    @pytest.mark.asyncio
+    async def test_batch_size_is_capped(self, client):
+        import app.main as main_module
+        with patch.object(main_module, "CLASS_BATCH_MAX_IRIS", 2):
+            r = await client.post("/api/getClasses", json={"iris": ["GO:1", "GO:2", "GO:3"]})
+        assert r.status_code == 400
+
+
 # ---------------------------------------------------------------------------
 # SPARQL expansion endpoint
 # ---------------------------------------------------------------------------
@@ -285,6 +615,17 @@ class TestSparqlEndpoint:
         r = await client.get("/api/sparql")
         assert r.status_code == 400
 
+    @pytest.mark.asyncio
+    async def test_sparql_bad_values_chunk(self, client):
+        r = await client.post("/api/sparql", json={"query": "SELECT * WHERE { ?s ?p ?o }",
+                                                   "values_chunk": "many"})
+        assert r.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_sparql_non_object_json_body(self, client):
+        r = await client.post("/api/sparql", json=["SELECT * WHERE { ?s ?p ?o }"])
+        assert r.status_code == 400
+
     # NOTE: there is deliberately no test here for executing a plain SPARQL
     # query. AberOWL rewrites SPARQL, it never executes it — /api/sparql returns
     # {rewritten_query, expansions, errors} and the caller runs the result
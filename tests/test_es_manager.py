@@ -0,0 +1,168 @@
+"""
+Unit tests for CentralESManager requests that cover several searches or
+ontologies at once (central_server/app/es_manager.py), against a stub
+Elasticsearch.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+REPO = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO / "central_server"))
+
+from app.es_manager import CentralESManager  # noqa: E402
+
+CLASSES = {
+    "go": [{"class": "http://purl.obolibrary.org/obo/GO_0006915", "label": "apoptotic process",
+            "oboid": "GO:0006915", "synonyms": ["apoptosis"], "ontology": "go"}],
+    "hp": [{"class": "http://purl.obolibrary.org/obo/HP_0000118", "label": "phenotypic abnormality",
+            "oboid": "HP:0000118", "synonyms": [], "ontology": "hp"}],
+}
+
+
+def _matches(doc, term):
+    t = term.lower()
+    return doc["oboid"].lower() == t or doc["label"] == t or t in doc["synonyms"]
+
+
+def _stub_es():
+    """_msearch over CLASSES: answers each search like ES would, with an
+    index_not_found error for unknown aliases."""
+    requests = []
+
+    async def msearch(request):
+        lines = (await request.text()).strip().split("\n")
+        requests.append(lines)
+        responses = []
+        for header, body in zip(lines[::2], lines[1::2]):
+            index = json.loads(header)["index"]
+            should = json.loads(body)["query"]
+            should = should.get("bool", {}).get("must", should)["bool"]["should"]
+            term = should[1]["term"]["label"]
+            if index == "aberowl_*_classes":
+                docs = [d for ds in CLASSES.values() for d in ds]
+            else:
+                ont = index[len("aberowl_"):-len("_classes")]
+                if ont not in CLASSES:
+                    responses.append({"error": {"type": "index_not_found_exception"}, "status": 404})
+                    continue
+                docs = CLASSES[ont]
+            hits = [{"_source": d} for d in docs if _matches(d, term)]
+            responses.append({"hits": {"hits": hits}, "status": 200})
+        return web.json_response({"responses": responses})
+
+    app = web.Application()
+    app.router.add_post("/_msearch", msearch)
+    return app, requests
+
+
+async def _manager(app):
+    srv = TestServer(app)
+    await srv.start_server()
+    mgr = CentralESManager()
+    mgr.es_url = str(srv.make_url("")).rstrip("/")
+    return srv, mgr
+
+
+@pytest.mark.unit
+class TestResolveMany:
+
+    @pytest.mark.asyncio
+    async def test_all_pairs_in_one_msearch(self):
+        app, requests = _stub_es()
+        srv, mgr = await _manager(app)
+        try:
+            results = await mgr.resolve_many([
+                ("apoptosis", "go"), ("apoptosis", "hp"), ("HP:0000118", None), ("", "go"),
+                ("apoptosis", "nosuch"),
+            ])
+        finally:
+            await srv.close()
+        assert len(requests) == 1
+        assert len(requests[0]) == 8  # header + body for every non-empty term
+        assert [len(r) for r in results] == [1, 0, 1, 0, 0]
+        assert results[0][0]["oboid"] == "GO:0006915"
+
+    @pytest.mark.asyncio
+    async def test_chunks_are_separate_requests(self):
+        app, requests = _stub_es()
+        srv, mgr = await _manager(app)
+        try:
+            searches = [("apoptosis", "go")] * 5
+            results = await mgr.resolve_many(searches, chunk_size=2, concurrency=2)
+        finally:
+            await srv.close()
+        assert sorted(len(r) // 2 for r in requests) == [1, 2, 2]
+        assert all(len(r) == 1 for r in results)
+
+    @pytest.mark.asyncio
+    async def test_failed_request_yields_none(self):
+        async def broken(request):
+            return web.Response(status=500, text="boom")
+
+        app = web.Application()
+        app.router.add_post("/_msearch", broken)
+        srv, mgr = await _manager(app)
+        try:
+            results = await mgr.resolve_many([("apoptosis", "go"), ("", "go")])
+        finally:
+            await srv.close()
+        assert results == [None, []]
+
+
+@pytest.mark.unit
+class TestSearchClassesPage:
+
+    @staticmethod
+    def _stub(hits):
+        requests = []
+
+        async def search(request):
+            requests.append((request.match_info["index"], dict(request.query), await request.json()))
+            return web.json_response({"hits": {"hits": hits}})
+
+        app = web.Application()
+        app.router.add_post("/{index}/_search", search)
+        return app, requests
+
+    @pytest.mark.asyncio
+    async def test_several_ontologies_in_one_ranked_request(self):
+        go = {"class": "http://x/A", "ontology": "go"}
+        hp = {"class": "http://x/A", "ontology": "hp"}
+        app, requests = self._stub([
+            {"_source": go, "sort": [9.0, "http://x/A", "go"]},
+            {"_source": go, "sort": [9.0, "http://x/A", "go"]},
+            {"_source": hp, "sort": [4.0, "http://x/A", "hp"]},
+        ])
+        srv, mgr = await _manager(app)
+        try:
+            page = await mgr.search_classes_page("a", ontologies=["GO", "hp"], size=3,
+                                                 search_after=[10.0, "http://x/0", "go"])
+        finally:
+            await srv.close()
+        assert len(requests) == 1
+        index, params, body = requests[0]
+        assert index == "aberowl_go_classes,aberowl_hp_classes"
+        assert params["ignore_unavailable"] == "true"
+        assert body["query"]["bool"]["filter"] == {"terms": {"ontology": ["go", "hp"]}}
+        assert body["sort"][0] == {"_score": "desc"}
+        assert body["search_after"] == [10.0, "http://x/0", "go"]
+        assert page["result"] == [go, hp]
+        assert page["search_after"] == [4.0, "http://x/A", "hp"]
+
+    @pytest.mark.asyncio
+    async def test_short_page_is_the_last(self):
+        app, _ = self._stub([{"_source": {"class": "http://x/A", "ontology": "go"}, "sort": [1.0, "a", "go"]}])
+        srv, mgr = await _manager(app)
+        try:
+            page = await mgr.search_classes_page("a", size=10)
+            plain = await mgr.search_classes("a", ontology="go")
+        finally:
+            await srv.close()
+        assert page["search_after"] is None
+        assert plain == page["result"]
@@ -0,0 +1,89 @@
+"""
+Unit tests for the shared aiohttp connection pools
+(central_server/app/http_pool.py).
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+REPO = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO / "central_server"))
+
+from app.http_pool import HttpPool  # noqa: E402
+
+
+async def _ok(request):
+    return web.json_response({"ok": True})
+
+
+@pytest.fixture
+async def server():
+    app = web.Application()
+    app.router.add_get("/ok", _ok)
+    srv = TestServer(app)
+    await srv.start_server()
+    yield srv
+    await srv.close()
+
+
+@pytest.mark.unit
+class TestHttpPool:
+
+    @pytest.mark.asyncio
+    async def test_session_is_shared(self):
+        pool = HttpPool("t", limit=4, limit_per_host=2, timeout=5)
+        try:
+            assert pool.session() is pool.session()
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_close_recreates(self):
+        pool = HttpPool("t", limit=4, limit_per_host=2, timeout=5)
+        first = pool.session()
+        await pool.close()
+        assert first.closed
+        second = pool.session()
+        assert second is not first and not second.closed
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_connections_are_reused_and_counted(self, server):
+        pool = HttpPool("t", limit=4, limit_per_host=2, timeout=5)
+        try:
+            for _ in range(3):
+                async with pool.session().get(server.make_url("/ok")) as resp:
+                    assert resp.status == 200
+                    await resp.json()
+            stats = pool.stats()
+            assert stats["requests"] == 3
+            assert stats["in_flight"] == 0
+            assert stats["connections_created"] == 1
+            assert stats["connections_reused"] == 2
+            assert stats["errors"] == 0
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_errors_are_counted(self):
+        pool = HttpPool("t", limit=4, limit_per_host=2, timeout=2)
+        try:
+            with pytest.raises(Exception):
+                async with pool.session().get("http://127.0.0.1:1/"):
+                    pass
+            stats = pool.stats()
+            assert stats["errors"] == 1
+            assert stats["in_flight"] == 0
+        finally:
+            await pool.close()
+
+    def test_environment_overrides(self, monkeypatch):
+        monkeypatch.setenv("HTTP_POOL_DEMO_LIMIT", "7")
+        monkeypatch.setenv("HTTP_POOL_DEMO_TIMEOUT", "bogus")
+        pool = HttpPool.from_environment("demo", limit=1, limit_per_host=1, timeout=9)
+        assert pool.limit == 7
+        assert pool.timeout == 9.0
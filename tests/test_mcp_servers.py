@@ -5,6 +5,7 @@ These tests verify tool schemas and call each tool with mocked HTTP
 responses. No central server / Docker is required.
 """
 
+import asyncio
 import sys
 from pathlib import Path
 from unittest.mock import AsyncMock, patch
@@ -31,6 +32,16 @@ def _text(result):
     return first.text if hasattr(first, "text") else first["text"]
 
 
+@pytest.fixture(autouse=True)
+def _fresh_tool_cache():
+    """Tests mock the central API with different answers for the same
+    arguments; start each from an empty tool answer cache."""
+    import mcp_ontology_server as srv
+    srv.tool_cache.clear()
+    yield
+    srv.tool_cache.clear()
+
+
 # ---------------------------------------------------------------------------
 # MCP Ontology Server — schemas
 # ---------------------------------------------------------------------------
@@ -365,6 +376,149 @@ class TestLookupIRICalls:
         assert params["type"] == "subclass"
 
 
+# ---------------------------------------------------------------------------
+# Tool answer cache, concurrent find_iri stages, in-process central API
+# ---------------------------------------------------------------------------
+
+@pytest.mark.unit
+class TestToolCache:
+
+    async def test_repeated_lookup_is_answered_from_cache(self):
+        import mcp_ontology_server as srv
+        payload = {"class": "http://purl.obolibrary.org/obo/GO_0005623", "label": "cell"}
+        mock = AsyncMock(return_value=payload)
+        with patch.object(srv, "_api_get", new=mock):
+            first = await srv.mcp.call_tool(
+                "get_class_info",
+                {"class_iri": "http://purl.obolibrary.org/obo/GO_0005623", "ontology": "go"},
+            )
+            again = await srv.mcp.call_tool(
+                "get_class_info",
+                {"class_iri": " http://purl.obolibrary.org/obo/GO_0005623", "ontology": "GO"},
+            )
+        assert mock.await_count == 1
+        assert _text(first) == _text(again)
+        assert srv.tool_cache.stats()["hits"] >= 1
+
+    async def test_identical_calls_in_flight_share_one_execution(self):
+        import mcp_ontology_server as srv
+        calls = []
+
+        async def fake_get(path, params=None):
+            calls.append(path)
+            await asyncio.sleep(0.01)
+            return {"result": [{"class": "http://purl.obolibrary.org/obo/GO_0006915",
+                                "label": "apoptotic process", "ontology": "go",
+                                "oboid": "GO:0006915", "synonyms": ["apoptosis"]}]}
+
+        with patch.object(srv, "_api_get", new=AsyncMock(side_effect=fake_get)):
+            a, b = await asyncio.gather(
+                srv.mcp.call_tool("find_iri", {"term": "apoptosis", "ontology": "go"}),
+                srv.mcp.call_tool("find_iri", {"term": "apoptosis", "ontology": "go"}),
+            )
+        assert calls == ["/api/resolve"]
+        assert _text(a) == _text(b)
+
+    async def test_in_process_calls_and_failures_are_not_cached(self, monkeypatch):
+        """mount_in_process routes central API calls into the app itself; an
+        answer built from a failed call is not cached."""
+        from fastapi import FastAPI
+        from fastapi.responses import JSONResponse
+        import mcp_ontology_server as srv
+
+        app = FastAPI()
+        statuses = [503, 200]
+
+        @app.get("/api/getClass")
+        async def get_class(query: str, ontology: str):
+            status = statuses.pop(0)
+            if status != 200:
+                return JSONResponse({"detail": "worker offline"}, status_code=status)
+            return {"class": query, "label": "cell", "ontology": ontology}
+
+        monkeypatch.setattr(srv, "_in_process_client", None)
+        srv.mount_in_process(app)
+        args = {"class_iri": "http://purl.obolibrary.org/obo/GO_0005623", "ontology": "go"}
+        assert "Error: HTTP 503" in _text(await srv.mcp.call_tool("get_class_info", args))
+        assert '"label": "cell"' in _text(await srv.mcp.call_tool("get_class_info", args))
+        assert '"label": "cell"' in _text(await srv.mcp.call_tool("get_class_info", args))
+        assert statuses == []
+        assert srv.tool_cache.stats()["entries"] == 1
+
+    async def test_class_not_found_is_answered_from_cache(self, monkeypatch):
+        """A 404 from getClass is a definitive answer, unlike a 5xx."""
+        from fastapi import FastAPI, HTTPException
+        import mcp_ontology_server as srv
+
+        app = FastAPI()
+        calls = []
+
+        @app.get("/api/getClass")
+        async def get_class(query: str, ontology: str):
+            calls.append(query)
+            raise HTTPException(status_code=404, detail="Class not found")
+
+        monkeypatch.setattr(srv, "_in_process_client", None)
+        srv.mount_in_process(app)
+        args = {"class_iri": "http://purl.obolibrary.org/obo/GO_9999999", "ontology": "go"}
+        first = _text(await srv.mcp.call_tool("get_class_info", args))
+        again = _text(await srv.mcp.call_tool("get_class_info", args))
+        assert "Error: HTTP 404" in first and "Class not found" in first
+        assert again == first
+        assert calls == ["http://purl.obolibrary.org/obo/GO_9999999"]
+
+
+@pytest.mark.unit
+class TestFirstAcceptable:
+
+    @staticmethod
+    def _stage(log, name, result, delay=0.0):
+        async def stage():
+            log.append(name)
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                log.append(f"{name} cancelled")
+                raise
+            return result
+        return stage
+
+    async def test_fast_answer_does_not_start_fallbacks(self):
+        import mcp_ontology_server as srv
+        log = []
+        result = await srv._first_acceptable(
+            [self._stage(log, "exact", ["a"]), self._stage(log, "fuzzy", ["b"])], hedge=0.5)
+        assert result == ["a"]
+        assert log == ["exact"]
+
+    async def test_slow_stage_is_hedged_and_still_preferred(self):
+        import mcp_ontology_server as srv
+        log = []
+        result = await srv._first_acceptable(
+            [self._stage(log, "exact", ["a"], delay=0.05), self._stage(log, "fuzzy", ["b"])],
+            hedge=0.01)
+        assert result == ["a"]
+        assert log == ["exact", "fuzzy"]
+
+    async def test_fallback_wins_when_preferred_stages_are_empty(self):
+        import mcp_ontology_server as srv
+        log = []
+        result = await srv._first_acceptable(
+            [self._stage(log, "exact", [], delay=0.02), self._stage(log, "fuzzy", ["b"], delay=0.01),
+             self._stage(log, "reasoner", ["c"], delay=1)],
+            hedge=0)
+        assert result == ["b"]
+        await asyncio.sleep(0)  # let the cancellation land
+        assert log == ["exact", "fuzzy", "reasoner", "reasoner cancelled"]
+
+    async def test_nothing_found(self):
+        import mcp_ontology_server as srv
+        log = []
+        assert await srv._first_acceptable(
+            [self._stage(log, "exact", []), self._stage(log, "fuzzy", [])]) == []
+        assert await srv._first_acceptable([]) == []
+
+
 # ---------------------------------------------------------------------------
 # MCP Ontology Server — rewrite_sparql tool
 # ---------------------------------------------------------------------------
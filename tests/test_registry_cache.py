@@ -0,0 +1,138 @@
+"""
+Unit tests for the central server's in-memory registry snapshot
+(central_server/app/registry_cache.py).
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO / "central_server"))
+
+from app.registry_cache import RegistryCache, RegistrySnapshot  # noqa: E402
+
+
+class CountingRedis:
+    """Async Redis mock holding one hash and counting HVALS calls."""
+
+    def __init__(self, entries):
+        self.entries = {e["ontology"]: json.dumps(e) for e in entries}
+        self.hvals_calls = 0
+
+    async def hvals(self, hash_name):
+        self.hvals_calls += 1
+        return list(self.entries.values())
+
+    async def hget(self, hash_name, key):
+        return self.entries.get(key)
+
+    async def hset(self, hash_name, key, value):
+        self.entries[key] = value
+
+
+SERVERS = [
+    {"ontology": "go", "url": "http://go-server:80/", "status": "online",
+     "class_count": 47000, "property_count": 100},
+    {"ontology": "hp.owl", "url": "http://hp-server:80", "status": "online",
+     "class_count": 16000, "property_count": 30},
+    {"ontology": "test_offline", "url": "http://offline:80", "status": "offline",
+     "class_count": 100, "property_count": 5},
+]
+
+
+@pytest.mark.unit
+class TestRegistrySnapshot:
+
+    def test_lookup_is_case_insensitive(self):
+        snap = RegistrySnapshot(SERVERS)
+        assert snap.get("GO")["ontology"] == "go"
+        assert snap.get("missing") is None
+        assert snap.get(None) is None
+
+    def test_extension_alias(self):
+        snap = RegistrySnapshot(SERVERS)
+        assert snap.get("HP")["ontology"] == "hp.owl"
+        assert snap.get("hp.owl")["ontology"] == "hp.owl"
+
+    def test_status_and_url_indexes(self):
+        snap = RegistrySnapshot(SERVERS)
+        assert {s["ontology"] for s in snap.with_status("online")} == {"go", "hp.owl"}
+        assert snap.with_status("unknown") == []
+        assert snap.on_worker("http://go-server:80")[0]["ontology"] == "go"
+        assert snap.online_urls == {"go": "http://go-server:80/", "hp.owl": "http://hp-server:80"}
+        assert snap.statuses["test_offline"] == "offline"
+
+    def test_totals(self):
+        snap = RegistrySnapshot(SERVERS)
+        assert snap.totals == {
+            "total_ontologies": 3,
+            "online_ontologies": 2,
+            "total_classes": 63100,
+            "total_properties": 135,
+        }
+
+
+@pytest.mark.unit
+class TestRegistryCache:
+
+    @pytest.mark.asyncio
+    async def test_snapshot_is_reused(self):
+        redis = CountingRedis(SERVERS)
+        cache = RegistryCache("registered_servers", ttl=60)
+        first = await cache.snapshot(redis)
+        second = await cache.snapshot(redis)
+        assert first is second
+        assert redis.hvals_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidate_rebuilds(self):
+        redis = CountingRedis(SERVERS)
+        cache = RegistryCache("registered_servers", ttl=60)
+        await cache.snapshot(redis)
+        redis.entries["chebi"] = json.dumps({"ontology": "chebi", "status": "online"})
+        cache.invalidate()
+        snap = await cache.snapshot(redis)
+        assert snap.get("chebi") is not None
+        assert redis.hvals_calls == 2
+
+    @pytest.mark.asyncio
+    async def test_new_client_rebuilds(self):
+        cache = RegistryCache("registered_servers", ttl=60)
+        await cache.snapshot(CountingRedis(SERVERS))
+        snap = await cache.snapshot(CountingRedis(SERVERS[:1]))
+        assert snap.totals["total_ontologies"] == 1
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry_without_listener(self):
+        redis = CountingRedis(SERVERS)
+        cache = RegistryCache("registered_servers", ttl=0)
+        await cache.snapshot(redis)
+        await cache.snapshot(redis)
+        assert redis.hvals_calls == 2
+
+    @pytest.mark.asyncio
+    async def test_unparseable_entry_skipped(self):
+        redis = CountingRedis(SERVERS)
+        redis.entries["broken"] = "{not json"
+        snap = await RegistryCache("registered_servers").snapshot(redis)
+        assert snap.totals["total_ontologies"] == 3
+
+    @pytest.mark.asyncio
+    async def test_update_pipeline_writes_invalidate(self):
+        from app.intake import updater
+
+        redis = CountingRedis(SERVERS)
+        cache = RegistryCache("registered_servers", ttl=60)
+        await cache.snapshot(redis)
+        # No worker URL: the reindex records its failure and returns.
+        result = await updater.execute_reindex(
+            "test_offline", {}, redis, es_mgr=None, ontologies_base_path="", es_url="",
+            on_registry_write=cache.invalidate,
+        )
+        assert result["error"] == "no_server_url"
+        snap = await cache.snapshot(redis)
+        assert snap.get("test_offline")["update_status"] == "reindex_failed"
+        assert redis.hvals_calls == 2
@@ -18,7 +18,10 @@ import requests
 from tests.conftest import (
     ONT_HOST_PATH,
     PORT_ES,
+    PORT_PIZZA,
+    REPO,
     TEST_SECRET_KEY,
+    _compose_up,
 )
 
 
@@ -44,6 +47,22 @@ def _poll_task(api_url, task_id, timeout=300, interval=5.0):
     raise TimeoutError(f"Task {task_id} did not finish within {timeout} s")
 
 
+def _wait_serving(api_url, serving, timeout=300, interval=1.0):
+    """Poll listLoadedOntologies until the first ontology reports `serving`."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            r = requests.get(f"{api_url}/listLoadedOntologies.groovy", timeout=5)
+            if r.status_code == 200:
+                onts = r.json().get("ontologies") or []
+                if onts and onts[0].get("serving") == serving:
+                    return onts[0]
+        except requests.RequestException:
+            pass
+        time.sleep(interval)
+    raise TimeoutError(f"Ontology not {serving!r} within {timeout} s")
+
+
 # ---------------------------------------------------------------------------
 # Health
 # ---------------------------------------------------------------------------
@@ -152,6 +171,60 @@ def test_find_root(pizza_stack):
     assert "result" in body
 
 
+@pytest.mark.slow
+@pytest.mark.timeout(120)
+def test_find_root_returns_every_ancestor_path(pizza_stack):
+    """findRoot follows all parents of a class and lists the routes down to it."""
+    margherita = "http://www.co-ode.org/ontologies/pizza/pizza.owl#Margherita"
+    pizza = "http://www.co-ode.org/ontologies/pizza/pizza.owl#Pizza"
+    r = _get(f"{pizza_stack}/findRoot.groovy", params={
+        "query": f"<{margherita}>",
+        "ontologyId": "pizza",
+        "axioms": "false",
+    })
+    assert r.status_code == 200
+    body = r.json()
+    assert body["paths"]
+    assert all(path[-1] == margherita for path in body["paths"])
+    assert any(pizza in path for path in body["paths"])
+    assert body["truncated"] is False
+
+    def find(nodes, iri):
+        for node in nodes:
+            if node["class"] == iri:
+                return node
+            hit = find(node.get("children", []), iri)
+            if hit:
+                return hit
+        return None
+
+    assert find(body["result"], margherita) is not None
+
+
+# ---------------------------------------------------------------------------
+# getClasses
+# ---------------------------------------------------------------------------
+
+@pytest.mark.slow
+@pytest.mark.timeout(120)
+def test_get_classes_batch(pizza_stack):
+    """getClasses looks up several IRIs in one call."""
+    pizza = "http://www.co-ode.org/ontologies/pizza/pizza.owl#Pizza"
+    topping = "<http://www.co-ode.org/ontologies/pizza/pizza.owl#PizzaTopping>"
+    unknown = "http://www.co-ode.org/ontologies/pizza/pizza.owl#NoSuchClass"
+    r = _post(f"{pizza_stack}/getClasses.groovy", json_body={
+        "ontologyId": "pizza",
+        "iris": [pizza, topping, unknown],
+        "axioms": True,
+    })
+    assert r.status_code == 200
+    body = r.json()
+    assert set(body["found"]) == {pizza, topping}
+    assert body["found"][pizza]["class"] == pizza
+    assert "SubClassOf" in body["found"][pizza]
+    assert body["missing"] == [unknown]
+
+
 # ---------------------------------------------------------------------------
 # getObjectProperties
 # ---------------------------------------------------------------------------
@@ -189,6 +262,27 @@ def test_get_statistics(pizza_stack):
     assert body["status"] in ("classified", "incoherent")
 
 
+@pytest.mark.slow
+@pytest.mark.timeout(120)
+def test_get_statistics_revalidates_with_etag(pizza_stack):
+    """An unchanged ontology answers If-None-Match with an empty 304."""
+    url = f"{pizza_stack}/getStatistics.groovy"
+    r = _get(url, params={"ontologyId": "pizza"})
+    assert r.status_code == 200
+    etag = r.headers.get("ETag")
+    assert etag
+
+    r = requests.get(url, params={"ontologyId": "pizza"},
+                     headers={"If-None-Match": etag}, timeout=30)
+    assert r.status_code == 304
+    assert r.content == b""
+
+    r = _get(url, params={"ontologyId": "pizza", "statusOnly": "true"})
+    assert r.status_code == 200
+    assert r.json() == {"ontology_id": "pizza", "reasoner_type": "elk",
+                        "status": r.json()["status"], "etag": etag}
+
+
 @pytest.mark.slow
 @pytest.mark.timeout(120)
 def test_get_statistics_all(pizza_stack):
@@ -237,6 +331,130 @@ def test_list_loaded_ontologies(pizza_stack):
     assert "classCount" in ont
 
 
+@pytest.mark.slow
+@pytest.mark.timeout(120)
+def test_list_loaded_ontologies_reports_lookup_index(pizza_stack):
+    """Each classified ontology reports its entity lookup index footprint."""
+    r = _get(f"{pizza_stack}/listLoadedOntologies.groovy")
+    assert r.status_code == 200
+    ont = r.json()["ontologies"][0]
+    assert ont["lookupIndexKeys"] > 0
+    assert ont["lookupIndexBytes"] > 0
+    assert ont["shortFormIndexEntries"] > 0
+    assert ont["shortFormIndexBytes"] > 0
+    assert ont["serving"] == "fully classified"
+
+
+@pytest.mark.slow
+@pytest.mark.timeout(120)
+def test_list_loaded_ontologies_reports_load_footprint(pizza_stack):
+    """Only one copy of the axioms is kept after merging the imports closure."""
+    ont = _get(f"{pizza_stack}/listLoadedOntologies.groovy").json()["ontologies"][0]
+    footprint = ont["loadFootprint"]
+    assert footprint["sourceOntologies"] >= 1
+    assert footprint["keptAxioms"] > 0
+    if footprint["merged"]:
+        assert footprint["releasedAxioms"] == footprint["sourceAxioms"]
+    else:
+        assert footprint["sourceOntologies"] == 1
+        assert footprint["releasedAxioms"] == 0
+
+
+@pytest.mark.slow
+@pytest.mark.timeout(120)
+def test_hierarchy_snapshot_matches_reasoner(pizza_stack):
+    """Named-class queries come from the hierarchy snapshot and agree with
+    the reasoner's answer for an equivalent class expression."""
+    ont = _get(f"{pizza_stack}/listLoadedOntologies.groovy").json()["ontologies"][0]
+    assert ont["hierarchyNodes"] > 0
+    assert ont["hierarchyEdges"] > 0
+    for type_, direct in [("subclass", "true"), ("subclass", "false"), ("superclass", "false")]:
+        base = {"type": type_, "direct": direct, "ontologyId": "pizza"}
+        named = _get(f"{pizza_stack}/runQuery.groovy", params=dict(base, query="Pizza"))
+        expr = _get(f"{pizza_stack}/runQuery.groovy", params=dict(base, query="Pizza and Pizza"))
+        assert named.status_code == 200 and expr.status_code == 200
+        named_iris = {c["class"] for c in named.json()["result"]}
+        expr_iris = {c["class"] for c in expr.json()["result"]}
+        assert named_iris == expr_iris
+
+
+@pytest.mark.slow
+@pytest.mark.timeout(120)
+def test_run_query_count(pizza_stack):
+    """count=true returns the size of the result without the result; named
+    classes are counted from the hierarchy snapshot, expressions by the
+    reasoner."""
+    def query(**params):
+        r = _get(f"{pizza_stack}/runQuery.groovy", params=dict(params, ontologyId="pizza"))
+        assert r.status_code == 200
+        return r.json()
+
+    for q in ["Margherita", "Margherita and Margherita"]:
+        counted = query(query=q, type="superclass", direct="false", count="true")
+        assert "result" not in counted
+        listed = query(query=q, type="superclass", direct="false")
+        assert counted["count"] == len(listed["result"]) > 0
+
+    counted = query(query="Pizza", type="subclass", direct="true", count="true")
+    assert counted["count"] == len(query(query="Pizza", type="subclass", direct="true")["result"])
+
+    # Descendants exclude unsatisfiable classes, which the reasoner lists.
+    counted = query(query="Pizza", type="subclass", direct="false", count="true")
+    assert 0 < counted["count"] <= len(query(query="Pizza", type="subclass", direct="false")["result"])
+
+
+# ---------------------------------------------------------------------------
+# getCacheStats
+# ---------------------------------------------------------------------------
+
+@pytest.mark.slow
+@pytest.mark.timeout(120)
+def test_get_cache_stats_counts_hits(pizza_stack):
+    """A repeated DL query is served from the query cache and counted as a hit."""
+    params = {"query": "Pizza", "type": "subclass", "direct": "true", "ontologyId": "pizza"}
+    _get(f"{pizza_stack}/runQuery.groovy", params=params)
+    before = _get(f"{pizza_stack}/getCacheStats.groovy").json()["queryCache"]
+    _get(f"{pizza_stack}/runQuery.groovy", params=params)
+    after = _get(f"{pizza_stack}/getCacheStats.groovy").json()["queryCache"]
+    assert after["hits"] == before["hits"] + 1
+    assert after["entries"] >= 1
+    assert after["estimatedBytes"] > 0
+    assert "pizza" in after["ontologies"]
+
+
+@pytest.mark.slow
+@pytest.mark.timeout(120)
+def test_class_info_cache_serves_repeated_classes(pizza_stack):
+    """Different queries returning the same classes reuse rendered class info."""
+    base = {"query": "Pizza", "direct": "false", "ontologyId": "pizza"}
+    _get(f"{pizza_stack}/runQuery.groovy", params=dict(base, type="subclass"))
+    before = _get(f"{pizza_stack}/getCacheStats.groovy").json()["classInfoCache"]
+    r = _get(f"{pizza_stack}/runQuery.groovy", params=dict(base, type="subeq"))
+    assert r.status_code == 200
+    after = _get(f"{pizza_stack}/getCacheStats.groovy").json()["classInfoCache"]
+    assert after["hits"] > before["hits"]
+    assert after["estimatedBytes"] <= after["maxBytes"]
+    assert "pizza" in after["ontologies"]
+
+
+@pytest.mark.slow
+@pytest.mark.timeout(120)
+def test_multi_ontology_query_runs_on_the_query_pool(pizza_stack):
+    """runQueryMulti slices go through the shared, bounded query pool."""
+    before = _get(f"{pizza_stack}/getCacheStats.groovy").json()["pools"]
+    r = _get(f"{pizza_stack}/runQuery.groovy", params={
+        "query": "Pizza", "type": "subclass", "ontologyIds": "pizza,missing",
+    })
+    assert r.status_code == 200
+    assert [f["ontology"] for f in r.json()["failed"]] == ["missing"]
+    after = _get(f"{pizza_stack}/getCacheStats.groovy").json()["pools"]
+    assert after["query"]["completed"] > before["query"]["completed"]
+    for pool in after.values():
+        assert pool["threads"] >= 1
+        assert 0 <= pool["queued"] <= pool["queueLimit"]
+        assert pool["rejected"] >= 0
+
+
 # ---------------------------------------------------------------------------
 # validateOntology
 # ---------------------------------------------------------------------------
@@ -291,6 +509,43 @@ def test_update_ontology_with_ontology_id(pizza_stack):
     assert result["status"] == "success"
 
 
+@pytest.mark.slow
+@pytest.mark.timeout(300)
+def test_update_ontology_keeps_serving_during_swap(pizza_stack):
+    """Queries keep answering from the old generation while a reload is
+    staged, and the ontology moves to a new generation afterwards."""
+    ont_dir = ONT_HOST_PATH / "pizza"
+    staging = ont_dir / "pizza_staging3.owl"
+    shutil.copy2(ont_dir / "pizza_active.owl", staging)
+    before = _get(f"{pizza_stack}/listLoadedOntologies.groovy").json()["ontologies"][0]
+
+    r = _post(f"{pizza_stack}/updateOntology.groovy", json_body={
+        "owlPath": "/data/pizza_staging3.owl",
+        "ontologyId": "pizza",
+        "reasonerType": "elk",
+        "secretKey": TEST_SECRET_KEY,
+    })
+    assert r.status_code == 200
+    task_id = r.json()["taskId"]
+
+    params = {"query": "Pizza", "type": "subclass", "direct": "true", "ontologyId": "pizza"}
+    deadline = time.time() + 240
+    while time.time() < deadline:
+        q = _get(f"{pizza_stack}/runQuery.groovy", params=params)
+        assert q.status_code == 200, q.text
+        assert len(q.json()["result"]) > 0
+        status = requests.get(f"{pizza_stack}/updateStatus.groovy", params={"taskId": task_id}, timeout=10)
+        if status.status_code == 200 and status.json().get("status") != "pending":
+            break
+        time.sleep(0.5)
+
+    result = _poll_task(pizza_stack, task_id, timeout=60)
+    assert result["status"] == "success"
+    after = _get(f"{pizza_stack}/listLoadedOntologies.groovy").json()["ontologies"][0]
+    assert after["generation"] > before["generation"]
+    assert after["reloading"] is False
+
+
 @pytest.mark.slow
 @pytest.mark.timeout(120)
 def test_update_ontology_unauthorized(pizza_stack):
@@ -356,3 +611,113 @@ def test_reload_ontology(pizza_stack):
     })
     assert r.status_code == 200
     assert len(r.json()["result"]) > 0
+
+
+SF = "http://example.org/shortforms#"
+PIZZA = "http://www.co-ode.org/ontologies/pizza/pizza.owl#"
+
+
+def _reload(api_url, owl_path):
+    r = _get(f"{api_url}/reloadOntology.groovy", params={
+        "ontologyId": "pizza", "ontologyIRI": owl_path, "reasonerType": "elk",
+    }, timeout=240)
+    assert r.status_code == 200 and r.json()["status"] == "ok", r.text
+
+
+@pytest.mark.slow
+@pytest.mark.timeout(600)
+def test_short_form_index_follows_reload(pizza_stack):
+    """Labels resolve through the short form index of the served generation:
+    a multi-word label quoted or not, a label shared by several classes
+    (first in signature order wins, as the old signature scan did), and
+    classes that only exist after a reloadOntology hot-swap."""
+    ont_dir = ONT_HOST_PATH / "pizza"
+    classes = "".join(
+        f'<owl:Class rdf:about="{SF}{name}"><rdfs:subClassOf rdf:resource="{PIZZA}Pizza"/>'
+        f"<rdfs:label>{label}</rdfs:label></owl:Class>\n"
+        for name, label in [("DeepDish", "deep dish pizza"),
+                            ("FoldedA", "folded pizza"), ("FoldedB", "folded pizza")]
+    )
+    owl = (ont_dir / "pizza_active.owl").read_text()
+    (ont_dir / "pizza_shortforms.owl").write_text(owl.replace("</rdf:RDF>", classes + "</rdf:RDF>"))
+
+    def resolve(short_form):
+        r = _get(f"{pizza_stack}/resolveShortForm.groovy",
+                 params={"ontologyId": "pizza", "shortForm": short_form})
+        assert r.status_code == 200, r.text
+        return r.json()
+
+    def equivalent(query):
+        r = _get(f"{pizza_stack}/runQuery.groovy", params={
+            "query": query, "type": "equivalent", "labels": "true", "ontologyId": "pizza",
+        })
+        assert r.status_code == 200, r.text
+        return {c["class"] for c in r.json()["result"]}
+
+    assert resolve("folded pizza")["entities"] == []
+    before = _get(f"{pizza_stack}/listLoadedOntologies.groovy").json()["ontologies"][0]
+    try:
+        _reload(pizza_stack, "/data/pizza_shortforms.owl")
+        after = _get(f"{pizza_stack}/listLoadedOntologies.groovy").json()["ontologies"][0]
+        assert after["generation"] > before["generation"]
+
+        assert equivalent("'deep dish pizza'") == equivalent("deep dish pizza") == {SF + "DeepDish"}
+        assert resolve("'deep dish pizza'")["entity"] == resolve("deep dish pizza")["entity"] == SF + "DeepDish"
+
+        shared = resolve("folded pizza")
+        assert set(shared["entities"]) == {SF + "FoldedA", SF + "FoldedB"}
+        assert shared["entity"] == shared["entities"][0]
+    finally:
+        _reload(pizza_stack, "/data/pizza_active.owl")
+        (ont_dir / "pizza_shortforms.owl").unlink(missing_ok=True)
+    assert resolve("folded pizza")["entities"] == []
+    assert resolve("Margherita")["entity"] == PIZZA + "Margherita"
+
+
+# ---------------------------------------------------------------------------
+# Taxonomy snapshots (restart)
+# ---------------------------------------------------------------------------
+
+@pytest.mark.slow
+@pytest.mark.timeout(900)
+def test_restart_serves_from_taxonomy_snapshot(pizza_stack):
+    """A restarted worker answers named-class hierarchy queries from the
+    snapshot written after its last classification, refuses class
+    expressions with 503 + Retry-After until it has classified again, and
+    then serves fully classified."""
+    deadline = time.time() + 60
+    while not list(ONT_HOST_PATH.glob("**/.taxonomy/pizza-*")):
+        assert time.time() < deadline, "no taxonomy snapshot was written"
+        time.sleep(1)
+    named = {
+        "query": "<http://www.co-ode.org/ontologies/pizza/pizza.owl#Pizza>",
+        "type": "subclass", "direct": "true", "ontologyId": "pizza",
+    }
+    expected = {c["class"] for c in _get(f"{pizza_stack}/runQuery.groovy", params=named).json()["result"]}
+    assert expected
+
+    env_file = REPO / "env_files" / f"aberowl_{PORT_PIZZA}_test.env"
+    compose_file = REPO / "docker-compose.yml"
+    project = f"aberowl_{PORT_PIZZA}"
+    original = env_file.read_text()
+    # Hold re-classification back long enough to query the snapshot.
+    env_file.write_text(original + "TAXONOMY_SNAPSHOT_GRACE_S=300\n")
+    try:
+        _compose_up(env_file, compose_file, project)
+        _wait_serving(pizza_stack, "snapshot-serving", timeout=180)
+
+        r = _get(f"{pizza_stack}/runQuery.groovy", params=named)
+        assert r.status_code == 200, r.text
+        assert {c["class"] for c in r.json()["result"]} == expected
+
+        r = _get(f"{pizza_stack}/runQuery.groovy", params={
+            "query": "Pizza and hasTopping some CheeseTopping",
+            "type": "subclass", "ontologyId": "pizza",
+        })
+        assert r.status_code == 503
+        assert r.headers.get("Retry-After")
+    finally:
+        env_file.write_text(original)
+        _compose_up(env_file, compose_file, project)
+    ont = _wait_serving(pizza_stack, "fully classified", timeout=300)
+    assert ont["status"] == "classified"
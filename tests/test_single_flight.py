@@ -0,0 +1,88 @@
+"""
+Unit tests for request coalescing on the central server
+(central_server/app/single_flight.py).
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO / "central_server"))
+
+from app.single_flight import SingleFlight  # noqa: E402
+
+
+@pytest.mark.unit
+class TestSingleFlight:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_run(self):
+        flight = SingleFlight("t")
+        calls = 0
+        release = asyncio.Event()
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return {"result": [1, 2]}
+
+        waiters = [asyncio.ensure_future(flight.run("k", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+
+        assert calls == 1
+        assert all(r is results[0] for r in results)
+        assert flight.stats()["started"] == 1
+        assert flight.stats()["coalesced"] == 4
+        assert flight.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_and_later_calls_run_again(self):
+        flight = SingleFlight("t")
+        calls = []
+
+        async def work(tag):
+            calls.append(tag)
+            return tag
+
+        assert await asyncio.gather(flight.run("a", lambda: work("a")),
+                                    flight.run("b", lambda: work("b"))) == ["a", "b"]
+        assert await flight.run("a", lambda: work("a2")) == "a2"
+        assert calls == ["a", "b", "a2"]
+        assert flight.stats()["coalesced"] == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_are_shared(self):
+        flight = SingleFlight("t")
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            raise RuntimeError("es down")
+
+        waiters = [asyncio.ensure_future(flight.run("k", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_the_others(self):
+        flight = SingleFlight("t")
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "done"
+
+        first = asyncio.ensure_future(flight.run("k", work))
+        second = asyncio.ensure_future(flight.run("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        assert await second == "done"
@@ -5,6 +5,7 @@ These tests verify pattern matching and rewriting logic without
 requiring a running ontology worker.
 """
 
+import asyncio
 import sys
 from pathlib import Path
 from unittest.mock import AsyncMock, patch
@@ -15,13 +16,23 @@ import pytest
 REPO = Path(__file__).parent.parent
 sys.path.insert(0, str(REPO / "central_server"))
 
+from app import sparql_expander  # noqa: E402
 from app.sparql_expander import (  # noqa: E402
     VALUES_OWL_PATTERN,
     FILTER_OWL_PATTERN,
+    FrameCache,
     expand_sparql_query,
+    frame_cache,
 )
 
 
+@pytest.fixture(autouse=True)
+def _empty_frame_cache():
+    frame_cache.clear()
+    yield
+    frame_cache.clear()
+
+
 # ---------------------------------------------------------------------------
 # Pattern matching
 # ---------------------------------------------------------------------------
@@ -232,3 +243,201 @@ class TestRewriting:
         assert errors[0]["ontology"] == "nonexistent"
         assert "<http://example.org/A1>" in rewritten
         assert "OWL" not in rewritten
+
+
+# ---------------------------------------------------------------------------
+# Concurrency, caching and size guard
+# ---------------------------------------------------------------------------
+
+@pytest.mark.unit
+class TestFrameResolution:
+
+    @pytest.mark.asyncio
+    async def test_frames_resolved_concurrently_and_deduplicated(self):
+        query = """SELECT ?a ?b ?c WHERE {
+            VALUES ?a { OWL subeq GO { 'cell' } }
+            VALUES ?b { OWL subeq hp { 'abnormality' } }
+            FILTER OWL(?c, subeq, go, "'cell'")
+        }"""
+        running = 0
+        peak = 0
+        calls = []
+
+        async def run(server_url, ontology_id, dl_query, query_type):
+            nonlocal running, peak
+            calls.append((ontology_id, dl_query))
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return [f"http://example.org/{ontology_id}"], None
+
+        lookup = {"go": "http://w1", "hp": "http://w2"}
+        with patch("app.sparql_expander._run_dl_query", run):
+            rewritten, expansions, errors = await expand_sparql_query(query, lookup)
+
+        assert errors == []
+        assert sorted(calls) == [("go", "'cell'"), ("hp", "'abnormality'")]
+        assert peak == 2
+        assert [e["pattern"] for e in expansions] == ["VALUES", "VALUES", "FILTER"]
+        assert "VALUES ?a { <http://example.org/go> }" in rewritten
+        assert "VALUES ?b { <http://example.org/hp> }" in rewritten
+        assert "FILTER (?c IN (<http://example.org/go>))" in rewritten
+
+    @pytest.mark.asyncio
+    async def test_repeated_rewrite_served_from_cache_until_version_changes(self):
+        query = "VALUES ?c { OWL subeq GO { 'cell' } }"
+        lookup = {"go": "http://w1"}
+        run = _ok(["http://example.org/C"])
+        with patch("app.sparql_expander._run_dl_query", run):
+            first, exp1, _ = await expand_sparql_query(query, lookup, {"go": "v1"})
+            second, exp2, _ = await expand_sparql_query(query, lookup, {"go": "v1"})
+            await expand_sparql_query(query, lookup, {"go": "v2"})
+
+        assert first == second
+        assert [exp1[0]["cached"], exp2[0]["cached"]] == [False, True]
+        assert run.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failures_are_not_cached(self):
+        query = "VALUES ?c { OWL subeq GO { 'cell' } }"
+        lookup = {"go": "http://w1"}
+        with patch("app.sparql_expander._run_dl_query", _err("worker returned HTTP 500")):
+            await expand_sparql_query(query, lookup)
+        with patch("app.sparql_expander._run_dl_query", _ok(["http://example.org/C"])):
+            _, expansions, errors = await expand_sparql_query(query, lookup)
+        assert errors == []
+        assert expansions[0]["cached"] is False
+
+    @pytest.mark.asyncio
+    async def test_oversized_frame_is_an_error(self):
+        query = "SELECT * WHERE { VALUES ?c { OWL subeq GO { 'cell' } } }"
+        iris = [f"http://example.org/C{i}" for i in range(5)]
+        with patch.object(sparql_expander, "SPARQL_FRAME_MAX_IRIS", 4), \
+                patch("app.sparql_expander._run_dl_query", _ok(iris)):
+            rewritten, expansions, errors = await expand_sparql_query(query, {"go": "http://w1"})
+        assert expansions == []
+        assert "more than the limit of 4" in errors[0]["error"]
+        assert rewritten == "SELECT * WHERE { VALUES ?c { } }"
+
+    @pytest.mark.asyncio
+    async def test_expansion_past_the_length_limit_is_an_error(self):
+        query = """SELECT * WHERE {
+            VALUES ?a { OWL subeq GO { 'cell' } }
+            VALUES ?b { OWL subeq HP { 'abnormality' } }
+        }"""
+        async def run(server_url, ontology_id, dl_query, query_type):
+            return [f"http://example.org/{ontology_id}/{i}" for i in range(3)], None
+
+        limit = len(query) + 60
+        with patch.object(sparql_expander, "SPARQL_EXPANSION_MAX_CHARS", limit), \
+                patch("app.sparql_expander._run_dl_query", run):
+            rewritten, expansions, errors = await expand_sparql_query(
+                query, {"go": "http://w1", "hp": "http://w2"})
+        assert [e["ontology"] for e in expansions] == ["GO"]
+        assert [e["ontology"] for e in errors] == ["HP"]
+        assert "VALUES ?b { }" in rewritten
+        assert len(rewritten) <= limit
+
+
+@pytest.mark.unit
+class TestFrameCache:
+
+    def test_evicts_least_recently_used_beyond_iri_budget(self):
+        cache = FrameCache(ttl=60, max_iris=3)
+        cache.put(("a",), ["1", "2"])
+        cache.put(("b",), ["3"])
+        assert cache.get(("a",)) == ("1", "2")
+        cache.put(("c",), ["4"])
+        assert cache.get(("b",)) is None
+        assert cache.get(("a",)) is not None
+        assert cache.stats()["iris"] == 3
+
+    def test_entries_expire(self):
+        cache = FrameCache(ttl=60, max_iris=10)
+        cache.put(("a",), ["1"])
+        with patch("app.sparql_expander.time.monotonic", return_value=1e12):
+            assert cache.get(("a",)) is None
+        assert cache.stats()["entries"] == 0
+
+
+# ---------------------------------------------------------------------------
+# Compact encodings
+# ---------------------------------------------------------------------------
+
+OBO = "http://purl.obolibrary.org/obo/"
+
+
+@pytest.mark.unit
+class TestCompactEncoding:
+
+    @pytest.mark.asyncio
+    async def test_compact_uses_prefixed_names_and_reports_sizes(self):
+        query = "SELECT ?c WHERE { VALUES ?c { OWL subeq GO { 'cell' } } }"
+        iris = [f"{OBO}GO_{i:07d}" for i in range(20)] + ["http://example.org/odd(name)"]
+        sizes = {}
+        with patch("app.sparql_expander._run_dl_query", _ok(iris)):
+            rewritten, expansions, errors = await expand_sparql_query(
+                query, {"go": "http://w1"}, compact=True, sizes=sizes)
+
+        assert errors == []
+        assert rewritten.startswith(f"PREFIX obo: <{OBO}>\n")
+        assert "obo:GO_0000007" in rewritten
+        assert f"<{OBO}GO_0000007>" not in rewritten
+        assert "<http://example.org/odd(name)>" in rewritten
+        assert sizes["query"] == len(query)
+        assert sizes["rewritten"] == len(rewritten)
+        assert sizes["expanded"] > sizes["rewritten"]
+        assert expansions[0]["plain_chars"] > expansions[0]["chars"]
+
+        with patch("app.sparql_expander._run_dl_query", _ok(iris)):
+            plain, _, _ = await expand_sparql_query(query, {"go": "http://w1"})
+        assert len(plain) == sizes["expanded"]
+
+    @pytest.mark.asyncio
+    async def test_compact_reuses_declared_prefix_and_avoids_taken_names(self):
+        query = f"""PREFIX GO: <{OBO}>
+PREFIX obo: <http://example.org/other/>
+SELECT ?c WHERE {{ VALUES ?c {{ OWL subeq GO {{ 'cell' }} }} }}"""
+        iris = [f"{OBO}GO_{i:07d}" for i in range(3)]
+        with patch("app.sparql_expander._run_dl_query", _ok(iris)):
+            rewritten, _, _ = await expand_sparql_query(query, {"go": "http://w1"}, compact=True)
+        assert rewritten.startswith("PREFIX GO:")
+        assert "GO:GO_0000001" in rewritten
+
+        query = "PREFIX obo: <http://example.org/other/>\n" + query.split("\n", 2)[2]
+        with patch("app.sparql_expander._run_dl_query", _ok(iris * 5)):
+            rewritten, _, _ = await expand_sparql_query(query, {"go": "http://w1"}, compact=True)
+        assert rewritten.startswith(f"PREFIX obo2: <{OBO}>\n")
+        assert "obo2:GO_0000001" in rewritten
+
+    @pytest.mark.asyncio
+    async def test_values_chunked_inside_group_only(self):
+        query = """SELECT ?a ?b WHERE {
+            VALUES ?a { OWL subeq GO { 'cell' } }
+        } VALUES ?b { OWL subeq GO { 'cell' } }"""
+        iris = [f"http://example.org/C{i}" for i in range(5)]
+        with patch("app.sparql_expander._run_dl_query", _ok(iris)):
+            rewritten, _, errors = await expand_sparql_query(query, {"go": "http://w1"}, values_chunk=2)
+
+        assert errors == []
+        assert ("{ VALUES ?a { <http://example.org/C0> <http://example.org/C1> } } UNION "
+                "{ VALUES ?a { <http://example.org/C2> <http://example.org/C3> } } UNION "
+                "{ VALUES ?a { <http://example.org/C4> } }") in rewritten
+        assert "} VALUES ?b { <http://example.org/C0> <http://example.org/C1> <http://example.org/C2>" in rewritten
+
+    @pytest.mark.asyncio
+    async def test_filter_as_values(self):
+        query = """SELECT ?c WHERE {
+            ?c a <http://www.w3.org/2002/07/owl#Class> .
+            FILTER OWL(?c, subeq, GO, "'cell'")
+        }"""
+        with patch("app.sparql_expander._run_dl_query", _ok(["http://example.org/A"])):
+            rewritten, _, _ = await expand_sparql_query(query, {"go": "http://w1"}, filter_as_values=True)
+        assert "VALUES ?c { <http://example.org/A> }" in rewritten
+        assert "FILTER" not in rewritten
+
+        with patch("app.sparql_expander._run_dl_query", _ok([])):
+            rewritten, _, _ = await expand_sparql_query(query.replace("'cell'", "'none'"),
+                                                        {"go": "http://w1"}, filter_as_values=True)
+        assert "FILTER (false)" in rewritten
@@ -155,3 +155,58 @@ def test_polling_can_be_disabled(main_module):
 
     asyncio.run(drive())
     assert called == []
+
+
+class _FakeResponse:
+    def __init__(self, status, body=None, etag=None):
+        self.status = status
+        self._body = body
+        self.headers = {"ETag": etag} if etag else {}
+
+    async def json(self):
+        return self._body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _FakeSession:
+    """Worker stand-in honouring If-None-Match against a fixed ETag."""
+
+    def __init__(self, body, etag):
+        self.body = body
+        self.etag = etag
+        self.sent = []
+
+    def get(self, url, timeout=None, headers=None):
+        self.sent.append(dict(headers or {}))
+        if (headers or {}).get("If-None-Match") == self.etag:
+            return _FakeResponse(304)
+        return _FakeResponse(200, dict(self.body), self.etag)
+
+
+def test_unchanged_statistics_are_revalidated_not_rewritten(main_module):
+    """The second poll sends the stored ETag, gets a 304 and skips Redis."""
+    fake = FakeRedis()
+    session = _FakeSession({"ontology_id": "ont0", "status": "classified",
+                            "class_count": 42}, '"abc"')
+    hset = AsyncMock(side_effect=fake.hset)
+    fake.hset = hset
+
+    async def poll():
+        raw = await fake.hget("registered_servers", "ont0")
+        server = json.loads(raw) if raw else {"ontology": "ont0", "url": "http://w:8080/"}
+        await main_module.fetch_and_update_server_metadata(server, session=session)
+
+    with patch.object(main_module, "redis_client", fake):
+        asyncio.run(poll())
+        asyncio.run(poll())
+
+    assert session.sent == [{}, {"If-None-Match": '"abc"'}]
+    assert hset.await_count == 1
+    stored = json.loads(fake._data["registered_servers"]["ont0"])
+    assert stored["class_count"] == 42 and stored["status"] == "online"
+    assert stored["stats_etag"] == '"abc"'
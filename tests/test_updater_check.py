@@ -0,0 +1,164 @@
+"""
+Unit tests for the version check of the update pipeline
+(central_server/app/intake/updater.py: check_version).
+"""
+
+import re
+import sys
+from pathlib import Path
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+REPO = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO / "central_server"))
+
+from app.intake import updater  # noqa: E402
+
+BODY = bytes(range(256)) * 20000
+
+
+def _app(body, etag=None, ranges=True):
+    """Serve `body` at /ont.owl, honouring If-None-Match and (optionally) Range."""
+    calls = []
+
+    async def handler(request):
+        calls.append((request.method, dict(request.headers)))
+        headers = {"Accept-Ranges": "bytes" if ranges else "none"}
+        if etag:
+            headers["ETag"] = etag
+            if request.headers.get("If-None-Match") == etag:
+                return web.Response(status=304, headers=headers)
+        rng = request.headers.get("Range")
+        if ranges and rng and request.method == "GET":
+            start, end = (int(x) for x in rng[len("bytes="):].split("-"))
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+            return web.Response(status=206, body=body[start:end + 1], headers=headers)
+        return web.Response(body=body, headers=headers)
+
+    app = web.Application()
+    app.router.add_route("*", "/ont.owl", handler)
+    return app, calls
+
+
+async def _check(app, **stored):
+    srv = TestServer(app)
+    await srv.start_server()
+    try:
+        async with aiohttp.ClientSession() as session:
+            return await updater.check_version(
+                str(srv.make_url("/ont.owl")),
+                stored.get("etag"), stored.get("last_modified"), stored.get("md5"), session,
+                stored_fingerprint=stored.get("fingerprint"),
+                stored_capabilities=stored.get("capabilities"),
+            )
+    finally:
+        await srv.close()
+
+
+@pytest.mark.unit
+class TestCheckVersion:
+
+    @pytest.mark.asyncio
+    async def test_conditional_head_not_modified(self):
+        app, calls = _app(BODY, etag='"v1"')
+        result = await _check(app, etag='"v1"')
+        assert calls[0][1]["If-None-Match"] == '"v1"'
+        assert result["changed"] is False
+        assert result["need_md5"] is False
+        assert result["capabilities"]["conditional"] is True
+
+    @pytest.mark.asyncio
+    async def test_new_etag_is_a_change(self):
+        app, _ = _app(BODY, etag='"v2"')
+        result = await _check(app, etag='"v1"')
+        assert result["changed"] is True
+        assert result["etag"] == '"v2"'
+        assert result["need_md5"] is False
+
+    @pytest.mark.asyncio
+    async def test_range_fingerprint_unchanged(self, monkeypatch):
+        monkeypatch.setattr(updater, "FINGERPRINT_SAMPLE_BYTES", 4096)
+        app, calls = _app(BODY)
+        first = await _check(app)
+        assert first["fingerprint"].startswith("ranges:")
+        assert first["need_md5"] is True
+        assert first["capabilities"]["ranges"] is True
+
+        app, calls = _app(BODY)
+        second = await _check(app, fingerprint=first["fingerprint"], capabilities=first["capabilities"])
+        assert second["changed"] is False
+        assert second["need_md5"] is False
+        assert second["content_length"] == len(BODY)
+        # Only the sampled spans were fetched.
+        assert [h.get("Range") for m, h in calls if m == "GET"] == [
+            "bytes=0-4095", f"bytes={len(BODY) - 4096}-{len(BODY) - 1}"]
+
+    @pytest.mark.asyncio
+    async def test_changed_tail_changes_the_fingerprint(self, monkeypatch):
+        monkeypatch.setattr(updater, "FINGERPRINT_SAMPLE_BYTES", 4096)
+        app, _ = _app(BODY)
+        first = await _check(app)
+        app, _ = _app(BODY[:-1] + b"x")
+        second = await _check(app, fingerprint=first["fingerprint"])
+        assert second["fingerprint"] != first["fingerprint"]
+        assert second["changed"] is True
+        assert second["need_md5"] is True
+
+    @pytest.mark.asyncio
+    async def test_source_without_ranges_falls_back_to_md5(self):
+        app, calls = _app(BODY, ranges=False)
+        result = await _check(app)
+        assert result["fingerprint"] is None
+        assert result["need_md5"] is True
+        assert result["capabilities"]["ranges"] is False
+        assert all(m == "HEAD" for m, _ in calls)
+
+    @pytest.mark.asyncio
+    async def test_redirected_github_release_uses_the_asset_digest(self, monkeypatch):
+        """GitHub redirects release downloads to its asset CDN; the digest is
+        looked up from the release URL, not the CDN one."""
+        calls = []
+
+        async def release_download(request):
+            calls.append((request.method, request.path))
+            raise web.HTTPFound("/cdn/ont.owl")
+
+        async def cdn(request):
+            calls.append((request.method, request.path))
+            return web.Response(body=BODY, headers={"Accept-Ranges": "bytes"})
+
+        async def release(request):
+            calls.append((request.method, request.path))
+            return web.json_response({"assets": [
+                {"name": "other.owl", "digest": "sha256:00"},
+                {"name": "ont.owl", "digest": "sha256:abc", "id": 7},
+            ]})
+
+        app = web.Application()
+        app.router.add_route("*", "/o/r/releases/download/v1/ont.owl", release_download)
+        app.router.add_route("*", "/cdn/ont.owl", cdn)
+        app.router.add_get("/repos/o/r/releases/tags/v1", release)
+        srv = TestServer(app)
+        await srv.start_server()
+        base = str(srv.make_url("")).rstrip("/")
+        monkeypatch.setattr(updater, "_GITHUB_ASSET_URL", re.compile(
+            re.escape(base) + r"/([^/]+)/([^/]+)/releases/(?:download/([^/]+)|latest/download)/([^/?#]+)$"))
+        monkeypatch.setattr(updater, "GITHUB_API_URL", base)
+        try:
+            async with aiohttp.ClientSession() as session:
+                url = f"{base}/o/r/releases/download/v1/ont.owl"
+                first = await updater.check_version(url, None, None, None, session)
+                second = await updater.check_version(
+                    url, None, None, None, session,
+                    stored_fingerprint=first["fingerprint"], stored_capabilities=first["capabilities"])
+        finally:
+            await srv.close()
+        assert first["fingerprint"] == "github:sha256:abc"
+        assert first["capabilities"]["fingerprint"] == "github"
+        assert second["changed"] is False
+        assert second["need_md5"] is False
+        # No Range requests against the CDN: the digest was enough.
+        assert ("GET", "/cdn/ont.owl") not in calls
@@ -0,0 +1,191 @@
+"""
+Unit tests for the ontology download step of the update pipeline
+(central_server/app/intake/updater.py: download_ontology).
+"""
+
+import gzip
+import hashlib
+import sys
+from pathlib import Path
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+REPO = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO / "central_server"))
+
+from app.intake import updater  # noqa: E402
+
+OWL = b"<?xml version='1.0'?>\n<rdf:RDF>" + b"<owl:Class/>" * 50000 + b"</rdf:RDF>\n"
+
+
+def _range_start(request):
+    rng = request.headers.get("Range")
+    return int(rng[len("bytes="):-1]) if rng else 0
+
+
+def _app(body, drop_first_at=None, etag='"v1"', resume_statuses=()):
+    """Serve `body` with Range support; the first full response breaks off
+    after `drop_first_at` bytes, and Range requests are answered with
+    `resume_statuses` in turn before being served."""
+    calls = []
+    statuses = list(resume_statuses)
+
+    async def handler(request):
+        start = _range_start(request)
+        calls.append(dict(request.headers))
+        if start and statuses:
+            return web.Response(status=statuses.pop(0))
+        headers = {"Accept-Ranges": "bytes", "ETag": etag,
+                   "Content-Length": str(len(body) - start)}
+        if start:
+            headers["Content-Range"] = f"bytes {start}-{len(body) - 1}/{len(body)}"
+        resp = web.StreamResponse(status=206 if start else 200, headers=headers)
+        await resp.prepare(request)
+        if drop_first_at is not None and len(calls) == 1:
+            await resp.write(body[:drop_first_at])
+            request.transport.close()
+            return resp
+        await resp.write(body[start:])
+        return resp
+
+    app = web.Application()
+    app.router.add_get("/ont.owl.gz", handler)
+    app.router.add_get("/ont.owl", handler)
+    return app, calls
+
+
+async def _serve(app):
+    srv = TestServer(app)
+    await srv.start_server()
+    return srv
+
+
+@pytest.mark.unit
+class TestDownloadOntology:
+
+    @pytest.mark.asyncio
+    async def test_gzip_is_streamed_to_disk(self, tmp_path):
+        app, _ = _app(gzip.compress(OWL))
+        srv = await _serve(app)
+        try:
+            async with aiohttp.ClientSession() as session:
+                dest = tmp_path / "ont.owl"
+                result = await updater.download_ontology(str(srv.make_url("/ont.owl.gz")), str(dest), session)
+        finally:
+            await srv.close()
+        assert dest.read_bytes() == OWL
+        assert result["md5"] == hashlib.md5(OWL).hexdigest()
+        assert result["size"] == len(OWL)
+        assert result["transferred"] < len(OWL)
+
+    @pytest.mark.asyncio
+    async def test_plain_body_is_written_as_is(self, tmp_path):
+        app, _ = _app(OWL)
+        srv = await _serve(app)
+        try:
+            async with aiohttp.ClientSession() as session:
+                dest = tmp_path / "ont.owl"
+                result = await updater.download_ontology(str(srv.make_url("/ont.owl")), str(dest), session)
+        finally:
+            await srv.close()
+        assert dest.read_bytes() == OWL
+        assert result["resumes"] == 0
+
+    @pytest.mark.asyncio
+    async def test_interrupted_transfer_resumes_with_range(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(updater, "DOWNLOAD_RESUME_BACKOFF", 0)
+        body = gzip.compress(OWL)
+        app, calls = _app(body, drop_first_at=len(body) // 2)
+        srv = await _serve(app)
+        try:
+            async with aiohttp.ClientSession() as session:
+                dest = tmp_path / "ont.owl"
+                result = await updater.download_ontology(str(srv.make_url("/ont.owl.gz")), str(dest), session)
+        finally:
+            await srv.close()
+        assert dest.read_bytes() == OWL
+        assert result["resumes"] == 1
+        assert calls[1]["Range"] == f"bytes={len(body) // 2}-"
+        assert calls[1]["If-Range"] == '"v1"'
+        assert result["transferred"] == len(body)
+
+    @pytest.mark.asyncio
+    async def test_truncated_gzip_is_an_error(self, tmp_path):
+        app, _ = _app(gzip.compress(OWL)[:-100])
+        srv = await _serve(app)
+        try:
+            async with aiohttp.ClientSession() as session:
+                dest = tmp_path / "ont.owl"
+                result = await updater.download_ontology(str(srv.make_url("/ont.owl.gz")), str(dest), session)
+        finally:
+            await srv.close()
+        assert "error" in result
+        assert not dest.exists()
+        assert not Path(str(dest) + ".tmp").exists()
+
+    @pytest.mark.asyncio
+    async def test_http_error_leaves_no_temp_file(self, tmp_path):
+        async def not_found(request):
+            return web.Response(status=404)
+
+        app = web.Application()
+        app.router.add_get("/ont.owl", not_found)
+        srv = await _serve(app)
+        try:
+            async with aiohttp.ClientSession() as session:
+                dest = tmp_path / "ont.owl"
+                result = await updater.download_ontology(str(srv.make_url("/ont.owl")), str(dest), session)
+        finally:
+            await srv.close()
+        assert result == {"error": "HTTP 404"}
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_failed_resume_leaves_no_temp_file(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(updater, "DOWNLOAD_RESUME_BACKOFF", 0)
+        app, calls = _app(OWL, drop_first_at=len(OWL) // 2, resume_statuses=[416])
+        srv = await _serve(app)
+        try:
+            async with aiohttp.ClientSession() as session:
+                dest = tmp_path / "ont.owl"
+                result = await updater.download_ontology(str(srv.make_url("/ont.owl")), str(dest), session)
+        finally:
+            await srv.close()
+        assert result == {"error": "HTTP 416"}
+        assert len(calls) == 2
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_server_error_on_resume_is_retried(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(updater, "DOWNLOAD_RESUME_BACKOFF", 0)
+        app, calls = _app(OWL, drop_first_at=len(OWL) // 2, resume_statuses=[503])
+        srv = await _serve(app)
+        try:
+            async with aiohttp.ClientSession() as session:
+                dest = tmp_path / "ont.owl"
+                result = await updater.download_ontology(str(srv.make_url("/ont.owl")), str(dest), session)
+        finally:
+            await srv.close()
+        assert dest.read_bytes() == OWL
+        assert result["resumes"] == 2
+        assert len(calls) == 3
+        assert list(tmp_path.iterdir()) == [dest]
+
+    @pytest.mark.asyncio
+    async def test_resume_server_errors_count_against_the_limit(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(updater, "DOWNLOAD_RESUME_BACKOFF", 0)
+        monkeypatch.setattr(updater, "DOWNLOAD_MAX_RESUMES", 2)
+        app, calls = _app(OWL, drop_first_at=len(OWL) // 2, resume_statuses=[503, 503, 503])
+        srv = await _serve(app)
+        try:
+            async with aiohttp.ClientSession() as session:
+                dest = tmp_path / "ont.owl"
+                result = await updater.download_ontology(str(srv.make_url("/ont.owl")), str(dest), session)
+        finally:
+            await srv.close()
+        assert result == {"error": "HTTP 503"}
+        assert len(calls) == 3
+        assert list(tmp_path.iterdir()) == []